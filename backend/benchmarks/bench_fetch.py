@@ -0,0 +1,198 @@
+"""Benchmark the report fetch against a local stub that injects latency.
+
+Every source endpoint the report calls is served from canned JSON after a
+fixed delay, so the timings show how many round trips are waited for in turn:
+one after another (the old pipeline) versus concurrently, and what a source
+that misses its deadline costs.
+
+Usage (from backend/):
+    python -m benchmarks.bench_fetch [--latency 0.2] [--repeat 3]
+"""
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from training_status.config import Settings
+from training_status.database import Database
+from training_status.services.fetch import fetch_sources
+from training_status.services.http import close_clients, http_stats
+from training_status.services.intervals import IntervalsClient
+from training_status.services.smashrun import SmashrunClient
+from training_status.services.strava import StravaClient
+
+
+def _responses() -> dict[str, Any]:
+    today = date.today().isoformat()
+    run = {"type": "Run", "distance": 10000.0, "moving_time": 3000}
+    return {
+        "/intervals/wellness": [
+            {"id": today, "ctl": 45.0, "atl": 50.0, "rampRate": 1.2, "restingHR": 48}
+        ],
+        "/intervals/activities": [
+            {**run, "id": "i1", "start_date_local": f"{today}T07:00:00", "icu_training_load": 60}
+        ],
+        "/smashrun/my/stats": {"totalDistance": 5000.0, "runCount": 600, "averagePace": "5:00"},
+        "/smashrun/my/activities": [
+            {
+                "activityId": 1,
+                "activityType": "running",
+                "startDateTimeLocal": f"{today}T07:00:00",
+                "distance": 10,
+            }
+        ],
+        "/strava/oauth/token": {"access_token": "token", "expires_at": time.time() + 3600},
+        "/strava/api/athlete": {"id": 1},
+        "/strava/api/athletes/1/stats": {"all_run_totals": {"distance": 5e6, "count": 600}},
+        "/strava/api/athlete/activities": [
+            {
+                **run,
+                "id": 1,
+                "start_date": f"{today}T06:00:00Z",
+                "start_date_local": f"{today}T07:00:00Z",
+            }
+        ],
+    }
+
+
+class LatencyStub(ThreadingHTTPServer):
+    """Serves the source endpoints after ``latency`` seconds (per path prefix if set)."""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.slow: dict[str, float] = {}  # path prefix -> latency override
+        self.responses = _responses()
+        self.thread = threading.Thread(target=self.serve_forever, args=(0.01,), daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL the stub listens on."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def delay(self, path: str) -> float:
+        """Get the latency for ``path``: the first matching ``slow`` prefix, else the default."""
+        return next((v for p, v in self.slow.items() if path.startswith(p)), self.latency)
+
+    def __enter__(self) -> "LatencyStub":
+        """Start serving in a background thread."""
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: LatencyStub
+
+    def _respond(self) -> None:
+        path = self.path.split("?")[0]
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.server.delay(path))
+        if path in self.server.responses:
+            status, body = 200, json.dumps(self.server.responses[path]).encode()
+        else:
+            status, body = 404, b"{}"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _respond  # noqa: N815
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def stub_fetchers(stub: LatencyStub, db: Database) -> dict[str, Callable[[], dict[str, Any]]]:
+    """Build the report's fetchers with every client pointed at the stub."""
+    settings = Settings(
+        intervals_id="bench",
+        intervals_api_key="key",
+        smashrun_token="token",
+        strava_client_id="1",
+        strava_client_secret="secret",
+        strava_refresh_token="refresh",
+        http_cache_max_mb=0,  # time the round trips, not the cache
+    )
+    intervals, smashrun = IntervalsClient(settings), SmashrunClient(settings)
+    intervals.base_url = f"{stub.url}/intervals"
+    smashrun.base_url = f"{stub.url}/smashrun"
+
+    def strava() -> dict[str, Any]:
+        client = StravaClient(settings, db)
+        client.token_url = f"{stub.url}/strava/oauth/token"
+        client.base_url = f"{stub.url}/strava/api"
+        return client.get_stats()
+
+    return {
+        "intervals": lambda: intervals.get_wellness(db),
+        "smashrun": lambda: smashrun.get_stats(db),
+        "strava": strava,
+    }
+
+
+def _sequential(fetchers: dict[str, Callable[[], dict[str, Any]]]) -> None:
+    for fetch in fetchers.values():
+        fetch()
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    close_clients()  # count this run's requests only
+    with tempfile.TemporaryDirectory() as tmp, LatencyStub(args.latency) as stub:
+        db = Database(Path(tmp) / "bench.db")
+        db.init_schema()
+        fetchers = stub_fetchers(stub, db)
+        _sequential(fetchers)
+        requests = sum(s["requests"] for s in http_stats().values())
+        no_deadline = dict.fromkeys(fetchers, 60.0)
+
+        cases: list[tuple[str, Callable[[], Any]]] = [
+            ("sources in sequence", lambda: _sequential(fetchers)),
+            ("concurrent", lambda: fetch_sources(fetchers, no_deadline)),
+        ]
+        print(f"{requests} requests at {args.latency * 1000:.0f} ms each, best of {args.repeat}")
+        print(f"  {'case':<36} {'ms':>10}")
+        print(f"  {'every request in turn':<36} {requests * args.latency * 1000:>10.1f}")
+        for name, fn in cases:
+            print(f"  {name:<36} {_time(fn, args.repeat):>10.1f}")
+
+        deadline = 4 * args.latency
+        stub.slow["/smashrun"] = 10 * args.latency
+        results: dict[str, Any] = {}
+        ms = _time(
+            lambda: results.update(fetch_sources(fetchers, dict.fromkeys(fetchers, deadline))), 1
+        )
+        missing = [s for s, r in results.items() if not r.ok]
+        print(f"  {'concurrent, smashrun past deadline':<36} {ms:>10.1f}  (missing: {missing})")
+        close_clients()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Benchmark importing a tree of FIT/GPX/TCX files across process pools of different sizes.
+
+Writes ``--files`` synthetic runs (FIT, GPX and TCX in turn, every fourth one
+gzipped, ``--samples`` one-second samples each) into nested directories, then
+imports the tree into a fresh database with 1, 2 and all CPUs' worker
+processes, and finally once more into the last database (every file skipped
+by content hash). Reports files/s and MB of file content per second.
+
+Usage (from backend/):
+    python -m benchmarks.bench_import [--files 2000] [--samples 1800]
+"""
+
+import argparse
+import gzip
+import math
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from training_status.database import Database
+from training_status.services.activity_files import FIT_EPOCH
+from training_status.services.importer import import_directory
+
+
+@dataclass(frozen=True)
+class Sample:
+    """One second of a synthetic run."""
+
+    secs: int  # from the start
+    lat: float
+    lng: float
+    altitude: float
+    heartrate: int
+    cadence: int
+    distance: float  # m
+    speed: float  # m/s
+
+
+def synthetic_samples(n: int, seed: int = 0) -> list[Sample]:
+    """Build ``n`` one-second samples of a steady run heading north-east at ~3 m/s."""
+    samples, distance = [], 0.0
+    for i in range(n):
+        speed = 3.0 + 0.3 * math.sin((i + seed) / 60)
+        distance += speed if i else 0.0
+        step = distance / math.sqrt(2) / 111_320  # degrees
+        samples.append(
+            Sample(
+                i,
+                59.33 + step,
+                18.06 + step / math.cos(math.radians(59.33)),
+                20 + 5 * math.sin(i / 300),
+                140 + (i + seed) % 20,
+                85 + i % 5,
+                distance,
+                speed,
+            )
+        )
+    return samples
+
+
+def fit_bytes(start: datetime, samples: list[Sample], sport: int = 1) -> bytes:
+    """Encode the samples as a FIT activity: records, one session and the activity."""
+    stamp = int(start.timestamp()) - FIT_EPOCH
+    body = bytearray()
+
+    def define(local: int, global_num: int, fields: list[tuple[int, int, int]]) -> None:
+        body.extend(struct.pack("<BBBHB", 0x40 | local, 0, 0, global_num, len(fields)))
+        for field in fields:
+            body.extend(struct.pack("<BBB", *field))
+
+    define(
+        0,
+        20,
+        [
+            (253, 4, 0x86),
+            (0, 4, 0x85),
+            (1, 4, 0x85),
+            (2, 2, 0x84),
+            (3, 1, 0x02),
+            (4, 1, 0x02),
+            (5, 4, 0x86),
+            (6, 2, 0x84),
+        ],
+    )
+    semicircles = 2**31 / 180
+    for s in samples:
+        body.extend(
+            struct.pack(
+                "<BIiiHBBIH",
+                0,
+                stamp + s.secs,
+                round(s.lat * semicircles),
+                round(s.lng * semicircles),
+                round((s.altitude + 500) * 5),
+                s.heartrate,
+                s.cadence,
+                round(s.distance * 100),
+                round(s.speed * 1000),
+            )
+        )
+    elapsed = samples[-1].secs if samples else 0
+    define(
+        1,
+        18,
+        [
+            (253, 4, 0x86),
+            (2, 4, 0x86),
+            (5, 1, 0x00),
+            (7, 4, 0x86),
+            (8, 4, 0x86),
+            (9, 4, 0x86),
+            (16, 1, 0x02),
+        ],
+    )
+    avg_hr = round(sum(s.heartrate for s in samples) / len(samples)) if samples else 0xFF
+    body.extend(
+        struct.pack(
+            "<BIIBIIIB",
+            1,
+            stamp + elapsed,
+            stamp,
+            sport,
+            elapsed * 1000,
+            elapsed * 1000,
+            round(samples[-1].distance * 100) if samples else 0,
+            avg_hr,
+        )
+    )
+    define(2, 34, [(253, 4, 0x86), (5, 4, 0x86)])
+    body.extend(struct.pack("<BII", 2, stamp + elapsed, stamp + elapsed + 7200))  # UTC+2
+    header = struct.pack("<BBHI4sH", 14, 0x20, 2132, len(body), b".FIT", 0)
+    return header + bytes(body) + b"\0\0"  # CRC (not checked)
+
+
+def _iso(start: datetime, secs: int) -> str:
+    return (start + timedelta(seconds=secs)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def gpx_bytes(start: datetime, samples: list[Sample], sport: str = "running") -> bytes:
+    """Encode the samples as a GPX track with Garmin HR/cadence extensions."""
+    points = "".join(
+        f'<trkpt lat="{s.lat:.7f}" lon="{s.lng:.7f}"><ele>{s.altitude:.1f}</ele>'
+        f"<time>{_iso(start, s.secs)}</time><extensions><gpxtpx:TrackPointExtension>"
+        f"<gpxtpx:hr>{s.heartrate}</gpxtpx:hr><gpxtpx:cad>{s.cadence}</gpxtpx:cad>"
+        f"</gpxtpx:TrackPointExtension></extensions></trkpt>"
+        for s in samples
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<gpx version="1.1" creator="bench" xmlns="http://www.topografix.com/GPX/1/1" '
+        'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">'
+        f"<trk><name>Run</name><type>{sport}</type><trkseg>{points}</trkseg></trk></gpx>"
+    ).encode()
+
+
+def tcx_bytes(start: datetime, samples: list[Sample], sport: str = "Running") -> bytes:
+    """Encode the samples as a TCX activity with one lap."""
+    points = "".join(
+        f"<Trackpoint><Time>{_iso(start, s.secs)}</Time><Position>"
+        f"<LatitudeDegrees>{s.lat:.7f}</LatitudeDegrees>"
+        f"<LongitudeDegrees>{s.lng:.7f}</LongitudeDegrees></Position>"
+        f"<AltitudeMeters>{s.altitude:.1f}</AltitudeMeters>"
+        f"<DistanceMeters>{s.distance:.1f}</DistanceMeters>"
+        f"<HeartRateBpm><Value>{s.heartrate}</Value></HeartRateBpm>"
+        f"<Extensions><ns3:TPX><ns3:Speed>{s.speed:.3f}</ns3:Speed>"
+        f"<ns3:RunCadence>{s.cadence}</ns3:RunCadence></ns3:TPX></Extensions></Trackpoint>"
+        for s in samples
+    )
+    elapsed = samples[-1].secs if samples else 0
+    avg_hr = round(sum(s.heartrate for s in samples) / len(samples)) if samples else 0
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        "<TrainingCenterDatabase "
+        'xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2" '
+        'xmlns:ns3="http://www.garmin.com/xmlschemas/ActivityExtension/v2">'
+        f'<Activities><Activity Sport="{sport}"><Id>{_iso(start, 0)}</Id>'
+        f'<Lap StartTime="{_iso(start, 0)}"><TotalTimeSeconds>{elapsed}</TotalTimeSeconds>'
+        f"<DistanceMeters>{samples[-1].distance if samples else 0:.1f}</DistanceMeters>"
+        f"<AverageHeartRateBpm><Value>{avg_hr}</Value></AverageHeartRateBpm>"
+        f"<Track>{points}</Track></Lap></Activity></Activities></TrainingCenterDatabase>"
+    ).encode()
+
+
+def write_tree(root: Path, files: int, samples: int) -> int:
+    """Write ``files`` synthetic runs under ``root``; returns their total size in bytes."""
+    encoders = (("fit", fit_bytes), ("gpx", gpx_bytes), ("tcx", tcx_bytes))
+    first = datetime(2020, 1, 1, 6, tzinfo=timezone.utc)
+    total = 0
+    for n in range(files):
+        fmt, encode = encoders[n % 3]
+        content = encode(first + timedelta(days=n, minutes=n % 60), synthetic_samples(samples, n))
+        name = f"run-{n:06d}.{fmt}"
+        if n % 4 == 3:
+            content, name = gzip.compress(content, compresslevel=1), f"{name}.gz"
+        path = root / f"{2020 + n // 365}" / f"{n // 30 % 12 + 1:02d}" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        total += len(content)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=1800, help="one-second samples per file")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "exports"
+        size = write_tree(root, args.files, args.samples)
+        print(f"Importing {args.files} files ({size / 2**20:.0f} MB), {cpus} CPUs")
+        print(f"  {'case':<22} {'s':>8} {'files/s':>9} {'MB/s':>8} {'imported':>9}")
+        db = None
+        for case, workers in [(f"{w} worker(s)", w) for w in sorted({1, min(2, cpus), cpus})]:
+            db = Database(Path(tmp) / f"import-{workers}.db")
+            db.init_schema()
+            stats = import_directory(db, root, workers)
+            print(
+                f"  {case:<22} {stats.secs:>8.2f} {stats.files_per_sec:>9.0f} "
+                f"{size / 2**20 / stats.secs:>8.1f} {stats.imported:>9}"
+            )
+        assert db is not None
+        stats = import_directory(db, root, cpus)
+        print(
+            f"  {'again (all skipped)':<22} {stats.secs:>8.2f} {stats.files_per_sec:>9.0f} "
+            f"{size / 2**20 / stats.secs:>8.1f} {stats.imported:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Benchmark peak memory of a first Smashrun sync over a long activity history.
+
+A local server pages out ``--activities`` synthetic activity summaries (newest
+first, ``PAGE_SIZE`` per page). Each case runs in a fresh process and reports
+its peak RSS growth over the process after imports and schema setup:
+
+* buffered: every page decoded with ``response.json()``, the new activities
+  kept as dicts until the end, re-serialized into the cache and into the
+  snapshot's raw payload (the sync before incremental parsing);
+* streamed: ``SmashrunClient.sync_activities`` (pages parsed element by
+  element, stored per page as received, compact records kept).
+
+Usage (from backend/):
+    python -m benchmarks.bench_memory [--activities 20000] [--page-size 100]
+"""
+
+import argparse
+import json
+import multiprocessing
+import resource
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+from training_status.config import Settings
+from training_status.database import Database
+from training_status.services import smashrun
+from training_status.services.http import close_clients
+from training_status.services.smashrun import SmashrunClient
+
+
+def _activity(n: int) -> dict[str, Any]:
+    """Build a Smashrun activity summary shaped like the API's (about 1 KB of JSON)."""
+    day = time.strftime("%Y-%m-%d", time.gmtime(1.7e9 - n * 86400))
+    return {
+        "activityId": 10**6 - n,
+        "activityType": "running",
+        "startDateTimeLocal": f"{day}T07:00:00",
+        "distance": 8 + n % 7,
+        "duration": 2900,
+        "cadenceAverage": 172,
+        "cadenceMin": 150,
+        "cadenceMax": 186,
+        "heartRateAverage": 148,
+        "heartRateMin": 96,
+        "heartRateMax": 176,
+        "bodyWeight": 72.5,
+        "howFelt": "good",
+        "terrain": "road",
+        "temperature": 11.0,
+        "temperatureApparent": 9.0,
+        "humidity": 70,
+        "windSpeed": 3.1,
+        "weatherType": "Cloudy",
+        "isRace": False,
+        "isTreadmill": False,
+        "notes": "Easy run along the river " * 4,
+        "lapType": "general",
+        "laps": [{"lapType": "general", "endDistance": k + 1.0} for k in range(8)],
+        "recordingKeys": ["clock", "distance", "heartRate", "cadence", "latitude", "longitude"],
+    }
+
+
+class _HistoryServer(ThreadingHTTPServer):
+    def __init__(self, activities: int) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.activities = activities
+        self.thread = threading.Thread(target=self.serve_forever, args=(0.01,), daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _HistoryServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        query = dict(parse_qsl(urlsplit(self.path).query))
+        count, page = int(query.get("count", 100)), int(query.get("page", 0))
+        first = page * count
+        last = min(first + count, self.server.activities)
+        body = json.dumps([_activity(n) for n in range(first, last)]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def _buffered(client: SmashrunClient, db: Database) -> int:
+    new: list[dict[str, Any]] = []
+    for page in range(10**9):
+        batch = client._get("my/activities", {"count": smashrun.PAGE_SIZE, "page": page})
+        new.extend(batch)  # type: ignore[arg-type]
+        if len(batch) < smashrun.PAGE_SIZE:
+            break
+    db.upsert_smashrun_activities(
+        [
+            (
+                a["activityId"],
+                a["startDateTimeLocal"],
+                a.get("activityType"),
+                a.get("distance"),
+                json.dumps(a),
+            )
+            for a in new
+        ]
+    )
+    json.dumps({"activities": new})  # the snapshot's smashrun_json
+    return len(new)
+
+
+def _streamed(client: SmashrunClient, db: Database) -> int:
+    new = client.sync_activities(db)
+    json.dumps({"activities": [a.id for a in new]})
+    return len(new)
+
+
+def _run(case: str, url: str, page_size: int, out: Any) -> None:
+    smashrun.PAGE_SIZE = page_size
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Settings(
+            intervals_id="bench",
+            intervals_api_key="key",
+            smashrun_token="token",
+            api_stand_in_url=url,
+            http_cache_max_mb=0,
+            db_path=Path(tmp) / "bench.db",
+        )
+        db = Database(settings.db_path)
+        db.init_schema()
+        client = SmashrunClient(settings)
+        base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        n = (_buffered if case == "buffered" else _streamed)(client, db)
+        secs = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        close_clients()
+    out.send((n, secs, (peak - base) / 1024))  # ru_maxrss is in KiB on Linux
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--activities", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=smashrun.PAGE_SIZE)
+    args = parser.parse_args()
+
+    server = _HistoryServer(args.activities)
+    context = multiprocessing.get_context("spawn")
+    print(f"First Smashrun sync of {args.activities} activities, {args.page_size} per page")
+    print(f"  {'case':<10} {'activities':>10} {'s':>8} {'peak RSS +MB':>13}")
+    for case in ("buffered", "streamed"):
+        receive, send = context.Pipe(duplex=False)
+        process = context.Process(target=_run, args=(case, server.url, args.page_size, send))
+        process.start()
+        n, secs, mb = receive.recv()
+        process.join()
+        print(f"  {case:<10} {n:>10} {secs:>8.2f} {mb:>13.1f}")
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark ``generate_report`` end to end against the replay stand-in server.
+
+Every case runs the full report (concurrent fetch, incremental syncs, HTTP
+cache, post-insert stages) on a fresh database against the recorded
+responses in ``benchmarks/recordings``: a first run and a repeat on the same
+database (incremental syncs, cached responses), then with per-request latency,
+injected 503s and activity lists scaled up.
+
+Usage (from backend/):
+    python -m benchmarks.bench_report [--latency 0.05] [--error-rate 0.25] [--scale 20]
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.replay import RECORDINGS_DIR, ReplayServer, report_environment
+from training_status import cli
+from training_status.config import Settings
+from training_status.database import Database
+from training_status.services.http import http_stats
+
+
+def replay_settings(server: ReplayServer, data_dir: Path) -> Settings:
+    """Build settings that keep every file in ``data_dir`` and every request on the stand-in."""
+    return Settings(
+        intervals_id="i0",
+        intervals_api_key="key",
+        smashrun_token="token",
+        strava_client_id="1",
+        strava_client_secret="secret",
+        strava_refresh_token="refresh",
+        api_stand_in_url=server.url,
+        db_path=data_dir / "bench.db",
+        reports_dir=data_dir / "reports",
+        http_cache_path=data_dir / "http_cache.db",
+        http_cache_max_mb=64,
+    )
+
+
+def run_report(settings: Settings, db: Database) -> tuple[float, str, dict[str, dict]]:
+    """Run the report once; returns (ms, printed report, this run's ``http_stats``)."""
+    out = io.StringIO()
+    with report_environment(settings, db), contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        cli.generate_report()
+        ms = (time.perf_counter() - start) * 1000
+        stats = http_stats()
+    return ms, out.getvalue(), stats
+
+
+def _case(name: str, server: ReplayServer, runs: int = 1) -> None:
+    with tempfile.TemporaryDirectory() as tmp, server:
+        settings = replay_settings(server, Path(tmp))
+        db = Database(settings.db_path)
+        db.init_schema()
+        for n in range(runs):
+            before, errors = server.requests, server.errors
+            ms, _, stats = run_report(settings, db)
+            retries = sum(s["retries"] for s in stats.values())
+            cached = sum(s["cache_hits"] + s["cache_revalidated"] for s in stats.values())
+            label = name if runs == 1 else f"{name}, run {n + 1}"
+            print(
+                f"  {label:<28} {ms:>10.1f} {server.requests - before:>9} "
+                f"{server.errors - errors:>5} {retries:>8} {cached:>7}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recordings", type=Path, default=RECORDINGS_DIR)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.25, help="share answered with 503")
+    parser.add_argument("--scale", type=int, default=20, help="copies of every activity list")
+    args = parser.parse_args()
+
+    print(f"generate_report against {args.recordings}")
+    print(f"  {'case':<28} {'ms':>10} {'requests':>9} {'503s':>5} {'retries':>8} {'cached':>7}")
+    _case("no latency", ReplayServer(args.recordings), runs=2)
+    _case(f"{args.latency * 1000:.0f} ms latency", ReplayServer(args.recordings, args.latency))
+    _case(
+        f"{args.error_rate:.0%} errors",
+        ReplayServer(args.recordings, args.latency, error_rate=args.error_rate),
+    )
+    _case(
+        f"activities x{args.scale}", ReplayServer(args.recordings, args.latency, scale=args.scale)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,611 @@
+"""Benchmark every Database query, analytics function and API route at scale.
+
+Each scale builds a fresh synthetic history (see ``benchmarks.synthetic``) with that
+many snapshot rows and times every case, best of ``--repeat`` runs after one
+warm-up call. Read-only cases run first; cases that write run last so they cannot
+change what the reads measure.
+
+Results are compared against ``baselines.json`` next to this file. A case
+regresses when it is both ``--threshold`` (default 50%) slower than its baseline
+and more than ``--min-delta`` milliseconds slower, which keeps sub-millisecond
+noise out. Baselines are per machine: re-record them with ``--save`` after an
+intended change or on new hardware.
+
+Usage (from backend/):
+    python -m benchmarks.bench_suite [--scales 1000 10000 100000] [--repeat 5]
+        [--filter api.] [--save] [--threshold 0.5]
+
+Exits with status 1 if any case regressed.
+"""
+
+import argparse
+import copy
+import inspect
+import json
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import SNAPSHOT_COLUMNS, Database
+from training_status.services import analytics
+from training_status.services.critical_speed import update_critical_speed_history
+from training_status.services.decoupling import analyze_run, hr_drift_trend
+from training_status.services.injury_risk import calculate_injury_risk_series
+from training_status.services.materialized import refresh_analytics
+from training_status.services.metric_stats import rebuild_metric_stats, sync_metric_stats
+from training_status.services.pace_curve import best_efforts, mean_max_curve
+from training_status.services.pipeline import run_post_insert_stages
+from training_status.services.streams import load_streams, stream_cache
+from training_status.services.timeseries import load_daily
+
+from .synthetic import generate
+
+BASELINES = Path(__file__).with_name("baselines.json")
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+
+# Not benchmarked, with the reason. Everything else must have a case.
+SKIPPED = {
+    "db.connection": "context manager used by every other query",
+    "db.init_schema": "runs once at startup",
+    "db.detached": "constructs a handle, no query",
+    "db.expire": "sets a flag, no query",
+    "db.add_snapshot_columns": "schema check once per fetch, independent of database size",
+    "db.get_imported_file_hashes": "once per file import, see benchmarks/bench_import.py",
+    "db.save_imported_activities": "file import batches, see benchmarks/bench_import.py",
+    "api.POST /api/fetch": "calls the external APIs",
+    "api.GET /api/reports": "lists PDF files on disk, independent of database size",
+    "api.GET /api/reports/latest": "serves a PDF from disk",
+    "api.GET /api/reports/{filename}": "serves a PDF from disk",
+    "api.POST /api/reports/generate": "PDF rendering, not a database path",
+}
+
+
+@dataclass(frozen=True)
+class Case:
+    """One timed operation; ``writes`` cases run after all reads."""
+
+    name: str
+    fn: Callable[[], Any]
+    writes: bool = False
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    """Best wall time in milliseconds over ``repeat`` calls, after a warm-up call."""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _ids(db: Database, table: str) -> list[int]:
+    with db.connection() as conn:
+        return [r[0] for r in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+
+
+def _popper(ids: list[int]) -> Callable[[], int]:
+    """Hand out existing row IDs to delete, newest first (0, a no-op, once exhausted)."""
+    return lambda: ids.pop() if ids else 0
+
+
+def _db_cases(db: Database) -> list[Case]:
+    latest_id = db.get_latest_snapshot_id() or 0
+    latest_day = db.get_latest_fitness_day()["day"]
+    month_ago = (date.fromisoformat(latest_day) - timedelta(days=30)).isoformat()
+    cols = ["recorded_at", "ctl", "atl", "hrv", "week_0_km"]
+    row = db.get_snapshots_for_analytics(list(SNAPSHOT_COLUMNS), limit=1)[0]
+    template = dict(zip(SNAPSHOT_COLUMNS, row, strict=True))
+    template.update(intervals_json="{}", smashrun_json="{}")
+    stats_rows = [tuple(r)[:-1] for r in db.get_metric_stats()]  # without updated_at
+    notes = _popper(_ids(db, "training_notes"))
+    events = _popper(_ids(db, "health_events"))
+    annotations = _popper(_ids(db, "annotations"))
+    db.create_shared_link("bench-token")
+    tick = iter(range(1, 1_000_000))
+    streamed = max(db.get_streamed_activity_ids(), default="")
+    stream_rows = [tuple(r)[1:] for r in db.get_activity_streams(streamed)]
+    run_ids = [r["id"] for r in db.get_activities(sport="run")]
+    effort_rows = [tuple(r) for r in db.get_activity_best_efforts(streamed)]
+    cs_rows = [tuple(r)[:-1] for r in db.get_critical_speed_history(42)]  # without updated_at
+
+    def insert_snapshot() -> int:
+        data = copy.copy(template)
+        data["recorded_at"] = f"{latest_day}T23:{next(tick) % 60:02d}:00"
+        return db.insert_snapshot(data)
+
+    return [
+        Case("db.get_latest_snapshot", db.get_latest_snapshot),
+        Case("db.get_snapshots", lambda: db.get_snapshots(limit=90, offset=0)),
+        Case(
+            "db.get_snapshots_for_analytics",
+            lambda: db.get_snapshots_for_analytics(cols, limit=None),
+        ),
+        Case("db.get_history", lambda: db.get_history(days=30)),
+        Case("db.get_active_goals", db.get_active_goals),
+        Case("db.get_goal_periods", lambda: db.get_goal_periods("week", 40.0)),
+        Case("db.get_personal_records", db.get_personal_records),
+        Case("db.get_notes", lambda: db.get_notes(limit=200)),
+        Case("db.get_gear", lambda: db.get_gear(active_only=False)),
+        Case("db.get_health_events", lambda: db.get_health_events(limit=200)),
+        Case("db.get_annotations", lambda: db.get_annotations(limit=200)),
+        Case("db.get_shared_link", lambda: db.get_shared_link("bench-token")),
+        Case("db.get_all_shared_links", db.get_all_shared_links),
+        Case("db.get_analytics_result", lambda: db.get_analytics_result("readiness")),
+        Case("db.get_latest_snapshot_id", db.get_latest_snapshot_id),
+        Case("db.get_snapshot_columns", lambda: db.get_snapshot_columns(latest_id, cols)),
+        Case("db.get_snapshots_after", lambda: db.get_snapshots_after(latest_id - 100, cols)),
+        Case(
+            "db.get_snapshots_between",
+            lambda: db.get_snapshots_between(cols, month_ago, latest_day),
+        ),
+        Case("db.get_fitness_days", lambda: db.get_fitness_days()),
+        Case("db.get_latest_fitness_day", db.get_latest_fitness_day),
+        Case("db.get_fitness_day_before", lambda: db.get_fitness_day_before(latest_day)),
+        Case("db.get_metric_stats", lambda: db.get_metric_stats(["hrv", "ctl"], 28)),
+        Case("db.get_metric_stats_snapshot_id", db.get_metric_stats_snapshot_id),
+        Case("db.get_alerts", lambda: db.get_alerts(limit=50, before_id=latest_id)),
+        Case("db.get_anomaly_states", db.get_anomaly_states),
+        Case("db.get_activities", lambda: db.get_activities(month_ago, latest_day)),
+        Case("db.get_activity_streams", lambda: db.get_activity_streams(streamed)),
+        Case("db.get_streamed_activity_ids", db.get_streamed_activity_ids),
+        Case("db.get_activity_decoupling", lambda: db.get_activity_decoupling(run_ids)),
+        Case("db.get_best_effort_versions", db.get_best_effort_versions),
+        Case("db.get_activity_best_efforts", lambda: db.get_activity_best_efforts(streamed)),
+        Case("db.get_mean_max_curve", lambda: db.get_mean_max_curve("distance")),
+        Case("db.get_best_efforts", lambda: db.get_best_efforts("distance", [1000.0, 5000.0])),
+        Case("db.get_critical_speed_history", lambda: db.get_critical_speed_history(42)),
+        Case("db.get_latest_critical_speed", lambda: db.get_latest_critical_speed(42)),
+        Case("db.get_sync_cursor", lambda: db.get_sync_cursor("intervals", "wellness")),
+        Case("db.get_latest_wellness_day", db.get_latest_wellness_day),
+        Case("db.get_latest_vo2max", db.get_latest_vo2max),
+        Case(
+            "db.get_latest_smashrun_activity",
+            lambda: db.get_latest_smashrun_activity("running"),
+        ),
+        Case("db.get_smashrun_km", lambda: db.get_smashrun_km(month_ago, latest_day)),
+        Case("db.get_oauth_token", lambda: db.get_oauth_token("strava")),
+        Case("db.get_strava_km", lambda: db.get_strava_km(month_ago, latest_day)),
+        # --- writes ---
+        Case("db.insert_snapshot", insert_snapshot, writes=True),
+        Case("db.create_goal", lambda: db.create_goal("yearly_km", 2000.0), writes=True),
+        Case("db.deactivate_goal", lambda: db.deactivate_goal(1), writes=True),
+        Case(
+            "db.upsert_record_if_pr",
+            lambda: db.upsert_record_if_pr("5k", 5000, 1500.0, "5:00", latest_day),
+            writes=True,
+        ),
+        Case("db.create_note", lambda: db.create_note(latest_day, "bench"), writes=True),
+        Case("db.delete_note", lambda: db.delete_note(notes()), writes=True),
+        Case(
+            "db.create_gear",
+            lambda: db.create_gear("Bench", "shoe", None, latest_day, 800.0),
+            writes=True,
+        ),
+        Case("db.update_gear", lambda: db.update_gear(1, accumulated_km=10.0), writes=True),
+        Case("db.delete_gear", lambda: db.delete_gear(1), writes=True),
+        Case(
+            "db.create_health_event",
+            lambda: db.create_health_event(latest_day, None, "rest_period", "bench", None),
+            writes=True,
+        ),
+        Case(
+            "db.update_health_event",
+            lambda: db.update_health_event(1, description="bench"),
+            writes=True,
+        ),
+        Case("db.delete_health_event", lambda: db.delete_health_event(events()), writes=True),
+        Case(
+            "db.create_annotation",
+            lambda: db.create_annotation(latest_day, "hrv", "bench"),
+            writes=True,
+        ),
+        Case("db.delete_annotation", lambda: db.delete_annotation(annotations()), writes=True),
+        Case(
+            "db.create_shared_link",
+            lambda: db.create_shared_link(f"bench-{next(tick)}"),
+            writes=True,
+        ),
+        Case(
+            "db.deactivate_shared_link",
+            lambda: db.deactivate_shared_link("bench-token"),
+            writes=True,
+        ),
+        Case(
+            "db.save_analytics_result",
+            lambda: db.save_analytics_result("bench", 1, latest_id, "{}"),
+            writes=True,
+        ),
+        Case(
+            "db.upsert_fitness_day",
+            lambda: db.upsert_fitness_day(latest_day, 60.0, 45.0, 50.0),
+            writes=True,
+        ),
+        Case("db.replace_metric_stats", lambda: db.replace_metric_stats(stats_rows), writes=True),
+        Case(
+            "db.create_alert",
+            lambda: db.create_alert(latest_day, "hrv", "ewma", "warning", 40, 55, 4, 1.4, "x"),
+            writes=True,
+        ),
+        Case("db.delete_alerts", lambda: db.delete_alerts("hrv", latest_day), writes=True),
+        Case(
+            "db.upsert_activity",
+            lambda: db.upsert_activity("bench", f"{latest_day}T07:00:00", "run", 8000.0, 2400.0),
+            writes=True,
+        ),
+        Case(
+            "db.save_activity_decoupling",
+            lambda: db.save_activity_decoupling("bench", 1, 3600.0, 145, 3.0, 1.3, 1.25, 3.8, True),
+            writes=True,
+        ),
+        Case(
+            "db.save_best_efforts",
+            lambda: db.save_best_efforts("bench", 1, effort_rows),
+            writes=True,
+        ),
+        Case(
+            "db.replace_critical_speed_history",
+            lambda: db.replace_critical_speed_history(cs_rows),
+            writes=True,
+        ),
+        Case(
+            "db.set_sync_cursor",
+            lambda: db.set_sync_cursor("intervals", "wellness", latest_day),
+            writes=True,
+        ),
+        Case(
+            "db.upsert_wellness_days",
+            lambda: db.upsert_wellness_days([(latest_day, 50.0, '{"ctl": 45.0}')]),
+            writes=True,
+        ),
+        Case(
+            "db.upsert_smashrun_activities",
+            lambda: db.upsert_smashrun_activities(
+                [(10**9, f"{latest_day}T07:00:00", "running", 8.0, "{}")]
+            ),
+            writes=True,
+        ),
+        Case(
+            "db.save_oauth_token",
+            lambda: db.save_oauth_token("strava", "access", "refresh", 2e9),
+            writes=True,
+        ),
+        Case(
+            "db.upsert_strava_activities",
+            lambda: db.upsert_strava_activities(
+                [(10**9, f"{latest_day}T06:00:00Z", f"{latest_day}T07:00:00Z", "Run", 8e3, 2400)]
+            ),
+            writes=True,
+        ),
+        Case(
+            "db.save_activity_streams",
+            lambda: db.save_activity_streams("bench", stream_rows),
+            writes=True,
+        ),
+        Case(
+            "db.save_anomaly_state",
+            lambda: db.save_anomaly_state(
+                "hrv", latest_day, 0.1, 0.2, False, False, 0.0, 0.0, False, False
+            ),
+            writes=True,
+        ),
+    ]
+
+
+def _analytics_cases(db: Database) -> list[Case]:
+    """Every ``calculate_*`` function, fed the full history where it takes rows."""
+
+    def rows(*cols: str) -> list[tuple]:
+        return db.get_snapshots_for_analytics(list(cols), limit=None)
+
+    latest = dict(zip(SNAPSHOT_COLUMNS, db.get_latest_snapshot(), strict=True))
+    ctl, atl = latest["ctl"], latest["atl"]
+    weekly = [r[0] for r in rows("week_0_km") if r[0] is not None]
+    rests = [r[0] for r in rows("rest_days") if r[0] is not None]
+    monotony = [r[0] for r in rows("monotony") if r[0] is not None]
+    summary_rows = rows("ctl", "atl", "tsb", "hrv", "week_0_km", "rest_days")
+    adherence_rows = [tuple(r) for r in db.get_goal_periods("week", 40.0)]
+    injury_rows = rows(
+        "ctl", "atl", "ramp_rate", "ac_ratio", "rest_days", "hrv", "sleep_score", "fatigue"
+    )
+    overload_rows = rows("week_0_km", "week_1_km", "week_2_km", "week_3_km", "week_4_km")
+    drift_points = [
+        {"date": r["start_date_local"][:10], "decoupling_pct": 2.0 + i % 7 * 0.5}
+        for i, r in enumerate(reversed(db.get_activities(sport="run")))
+    ]
+    sleep_rows = rows("sleep_secs", "sleep_score", "hrv")
+    race_day = (date.today() + timedelta(weeks=12)).isoformat()
+    streamed = max(db.get_streamed_activity_ids(), default="")
+
+    return [
+        Case(
+            "calc.calculate_consistency_score",
+            lambda: analytics.calculate_consistency_score(weekly, rests, monotony),
+        ),
+        Case(
+            "calc.calculate_projections",
+            lambda: analytics.calculate_projections(ctl, atl, latest["ramp_rate"]),
+        ),
+        Case("calc.calculate_detraining", lambda: analytics.calculate_detraining(ctl, atl)),
+        Case(
+            "calc.calculate_weekly_summary",
+            lambda: analytics.calculate_weekly_summary(summary_rows),
+        ),
+        Case(
+            "calc.calculate_goal_adherence",
+            lambda: analytics.calculate_goal_adherence(40.0, adherence_rows, "week"),
+        ),
+        Case("calc.calculate_injury_risk", lambda: analytics.calculate_injury_risk(injury_rows)),
+        Case(
+            "calc.calculate_race_predictions",
+            lambda: analytics.calculate_race_predictions(
+                latest["critical_speed"], latest["d_prime"], ctl, latest["avg_pace"]
+            ),
+        ),
+        Case(
+            "calc.calculate_readiness_score",
+            lambda: analytics.calculate_readiness_score(
+                latest["tsb"], -5.0, latest["sleep_score"], latest["rest_days"], latest["soreness"]
+            ),
+        ),
+        Case("calc.calculate_overload", lambda: analytics.calculate_overload(overload_rows)),
+        Case(
+            "calc.calculate_training_zones",
+            lambda: analytics.calculate_training_zones(
+                latest["resting_hr"], latest["max_hr"], latest["critical_speed"]
+            ),
+        ),
+        Case("calc.calculate_hr_drift", lambda: analytics.calculate_hr_drift(drift_points)),
+        Case(
+            "calc.calculate_sleep_insights",
+            lambda: analytics.calculate_sleep_insights(sleep_rows),
+        ),
+        Case(
+            "calc.calculate_taper",
+            lambda: analytics.calculate_taper(race_day, ctl, "exponential", atl),
+        ),
+        Case("calc.calculate_injury_risk_series", lambda: calculate_injury_risk_series(db)),
+        # Services the ingest pipeline and analytics builders lean on
+        Case("svc.load_daily", lambda: load_daily(db, ["ctl", "atl", "hrv", "sleep_score"])),
+        Case("svc.load_streams", lambda: (stream_cache.clear(), load_streams(db, streamed))),
+        Case("svc.analyze_run", lambda: analyze_run(load_streams(db, streamed))),
+        Case("svc.hr_drift_trend", lambda: hr_drift_trend(db)),
+        Case("svc.best_efforts", lambda: best_efforts(load_streams(db, streamed))),
+        Case("svc.mean_max_curve", lambda: mean_max_curve(db, "all")),
+        Case(
+            "svc.update_critical_speed_history",
+            lambda: update_critical_speed_history(db),
+            writes=True,
+        ),
+        Case("svc.rebuild_metric_stats", lambda: rebuild_metric_stats(db)),
+        Case("svc.sync_metric_stats", lambda: sync_metric_stats(db)),
+        Case("svc.refresh_analytics", lambda: refresh_analytics(db)),
+        Case(
+            "svc.run_post_insert_stages",
+            lambda: run_post_insert_stages(db, db.get_latest_snapshot_id() or 0),
+            writes=True,
+        ),
+    ]
+
+
+def _api_cases(db: Database, client: TestClient) -> list[Case]:
+    latest_day = db.get_latest_fitness_day()["day"]
+    race_day = (date.today() + timedelta(weeks=12)).isoformat()
+    db.create_shared_link("bench-api-token")
+    notes = _popper(_ids(db, "training_notes"))
+    events = _popper(_ids(db, "health_events"))
+    annotations = _popper(_ids(db, "annotations"))
+
+    def get(url: str, **params: Any) -> Callable[[], Any]:
+        def call() -> Any:
+            response = client.get(url, params=params)
+            response.raise_for_status()
+            return response
+
+        return call
+
+    def send(method: str, url: str | Callable[[], str], body: Any = None) -> Callable[[], Any]:
+        def call() -> Any:
+            response = client.request(method, url() if callable(url) else url, json=body)
+            response.raise_for_status()
+            return response
+
+        return call
+
+    reads = {
+        "GET /api/snapshots/latest": get("/api/snapshots/latest"),
+        "GET /api/snapshots": get("/api/snapshots", limit=90),
+        "GET /api/goals": get("/api/goals"),
+        "GET /api/analytics/consistency": get("/api/analytics/consistency"),
+        "GET /api/analytics/recommendation": get("/api/analytics/recommendation"),
+        "GET /api/analytics/projections": get("/api/analytics/projections"),
+        "GET /api/analytics/injury-risk": get("/api/analytics/injury-risk"),
+        "GET /api/analytics/injury-risk/series": get("/api/analytics/injury-risk/series", days=365),
+        "GET /api/analytics/correlations": get("/api/analytics/correlations"),
+        "GET /api/analytics/race-predictor": get("/api/analytics/race-predictor"),
+        "GET /api/analytics/detraining": get("/api/analytics/detraining"),
+        "GET /api/analytics/summary": get("/api/analytics/summary"),
+        "GET /api/analytics/adherence": get("/api/analytics/adherence"),
+        "GET /api/personal-records": get("/api/personal-records"),
+        "GET /api/alerts": get("/api/alerts", limit=50),
+        "GET /api/notes": get("/api/notes", limit=200),
+        "GET /api/strava/status": get("/api/strava/status"),
+        "GET /api/export/json": get("/api/export/json"),
+        "GET /api/export/csv": get("/api/export/csv"),
+        "GET /api/analytics/readiness": get("/api/analytics/readiness"),
+        "GET /api/analytics/workout-suggestion": get("/api/analytics/workout-suggestion"),
+        "GET /api/analytics/overload": get("/api/analytics/overload"),
+        "GET /api/analytics/zones": get("/api/analytics/zones"),
+        "GET /api/analytics/hr-drift": get("/api/analytics/hr-drift"),
+        "GET /api/analytics/pace-curve": get("/api/analytics/pace-curve", period="all"),
+        "GET /api/analytics/critical-speed": get("/api/analytics/critical-speed", days=3650),
+        "GET /api/analytics/sleep-insights": get("/api/analytics/sleep-insights"),
+        "GET /api/analytics/taper": get("/api/analytics/taper", race_date=race_day),
+        "POST /api/analytics/scenarios": send(
+            "POST", "/api/analytics/scenarios", {"race_date": race_day, "top": 5}
+        ),
+        "GET /api/gear": get("/api/gear"),
+        "GET /api/health-events": get("/api/health-events"),
+        "GET /api/annotations": get("/api/annotations"),
+        "GET /api/shared/{token}": get("/api/shared/bench-api-token"),
+    }
+    writes = {
+        "POST /api/goals": send(
+            "POST", "/api/goals", {"goal_type": "weekly_km", "target_value": 45.0}
+        ),
+        "DELETE /api/goals/{goal_id}": send("DELETE", "/api/goals/1"),
+        "POST /api/notes": send(
+            "POST", "/api/notes", {"note_date": latest_day, "content": "bench"}
+        ),
+        "DELETE /api/notes/{note_id}": send("DELETE", lambda: f"/api/notes/{notes()}"),
+        "POST /api/gear": send("POST", "/api/gear", {"name": "Bench shoe"}),
+        "PUT /api/gear/{gear_id}": send("PUT", "/api/gear/1", {"accumulated_km": 20.0}),
+        "DELETE /api/gear/{gear_id}": send("DELETE", "/api/gear/1"),
+        "POST /api/health-events": send(
+            "POST",
+            "/api/health-events",
+            {"event_date": latest_day, "event_type": "rest_period", "description": "bench"},
+        ),
+        "PUT /api/health-events/{event_id}": send(
+            "PUT", "/api/health-events/1", {"description": "bench"}
+        ),
+        "DELETE /api/health-events/{event_id}": send(
+            "DELETE", lambda: f"/api/health-events/{events()}"
+        ),
+        "POST /api/annotations": send(
+            "POST",
+            "/api/annotations",
+            {"annotation_date": latest_day, "metric": "hrv", "content": "bench"},
+        ),
+        "DELETE /api/annotations/{ann_id}": send(
+            "DELETE", lambda: f"/api/annotations/{annotations()}"
+        ),
+        "POST /api/share": send("POST", "/api/share", {"expires_days": 7}),
+    }
+    return [Case(f"api.{k}", fn) for k, fn in reads.items()] + [
+        Case(f"api.{k}", fn, writes=True) for k, fn in writes.items()
+    ]
+
+
+def all_case_names() -> set[str]:
+    """Everything that should be benchmarked or listed in ``SKIPPED``."""
+    names = {
+        f"db.{n}"
+        for n, _ in inspect.getmembers(Database, inspect.isfunction)
+        if not n.startswith("_")
+    }
+    names |= {f"calc.{n}" for n in dir(analytics) if n.startswith("calculate_")}
+    names.add("calc.calculate_injury_risk_series")
+    for route in app.routes:
+        path = getattr(route, "path", "")
+        if path.startswith("/api"):
+            names |= {f"api.{m} {path}" for m in route.methods - {"HEAD"}}  # type: ignore[attr-defined]
+    return names
+
+
+@contextmanager
+def scale(rows: int, seed: int = 0) -> Iterator[tuple[Database, TestClient]]:
+    """Yield a fresh synthetic database of ``rows`` snapshots, with the API pointed at it."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = Database(Path(tmpdir) / "bench.db")
+        db.init_schema()
+        generate(db, rows, seed=seed)
+        with patch("training_status.api.get_db", return_value=db):
+            yield db, TestClient(app)
+
+
+def run_scale(rows: int, repeat: int, name_filter: str = "", seed: int = 0) -> dict[str, float]:
+    """Time every case at one scale. Returns ``{case name: best ms}``."""
+    results: dict[str, float] = {}
+    with scale(rows, seed) as (db, client):
+        cases = _db_cases(db) + _analytics_cases(db) + _api_cases(db, client)
+        for case in sorted(cases, key=lambda c: c.writes):
+            if name_filter in case.name:
+                results[case.name] = _time(case.fn, repeat)
+    return results
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float, min_delta: float
+) -> list[str]:
+    """Names of cases that regressed against ``baseline``."""
+    return [
+        name
+        for name, ms in results.items()
+        if name in baseline
+        and ms > baseline[name] * (1 + threshold)
+        and ms - baseline[name] > min_delta
+    ]
+
+
+def load_baselines(path: Path = BASELINES) -> dict[str, dict[str, float]]:
+    """Read the stored baselines as ``{rows: {case: ms}}``."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())["scales"]  # type: ignore[no-any-return]
+
+
+def save_baselines(new: dict[str, dict[str, float]], path: Path = BASELINES) -> None:
+    """Merge ``new`` scales into the stored baselines."""
+    scales = load_baselines(path)
+    for rows, results in new.items():
+        scales.setdefault(rows, {}).update({k: round(v, 3) for k, v in results.items()})
+    path.write_text(json.dumps({"unit": "ms", "scales": scales}, indent=2, sort_keys=True) + "\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="Only cases whose name contains this")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--min-delta", type=float, default=1.0, help="Milliseconds")
+    parser.add_argument("--save", action="store_true", help="Store results as baselines")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    missing = all_case_names() - SKIPPED.keys()
+    baselines = load_baselines()
+    measured: dict[str, dict[str, float]] = {}
+    regressions: list[str] = []
+    for rows in args.scales:
+        results = run_scale(rows, args.repeat, args.filter, args.seed)
+        measured[str(rows)] = results
+        missing -= results.keys()
+        baseline = baselines.get(str(rows), {})
+        slow = compare(results, baseline, args.threshold, args.min_delta)
+        regressions += [f"{name} @ {rows}" for name in slow]
+
+        print(f"\n{rows} rows, best of {args.repeat} (ms)")
+        print(f"  {'case':<52} {'ms':>10} {'baseline':>10}")
+        for name, ms in results.items():
+            base = baseline.get(name)
+            flag = "  REGRESSED" if name in slow else ""
+            base_str = f"{base:>10.3f}" if base is not None else f"{'-':>10}"
+            print(f"  {name:<52} {ms:>10.3f} {base_str}{flag}")
+
+    if missing and not args.filter:
+        print(f"\nNo benchmark for: {', '.join(sorted(missing))}")
+    if args.save:
+        save_baselines(measured)
+        print(f"\nSaved baselines to {BASELINES}")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
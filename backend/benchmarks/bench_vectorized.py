@@ -0,0 +1,107 @@
+"""Benchmark the vectorized analytics core over 10 years of daily data.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vectorized [--years 10] [--repeat 5]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from training_status.services.analytics import (
+    calculate_consistency_score,
+    calculate_injury_risk,
+    calculate_sleep_insights,
+    calculate_weekly_summary,
+)
+from training_status.services.timeseries import ewma, rolling_mean, rolling_std, rolling_zscore
+
+
+def _daily_rows(days: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """Random but plausible daily metrics with ~10% missing values."""
+    rng = np.random.default_rng(seed)
+    cols = {
+        "ctl": 40 + np.cumsum(rng.normal(0, 0.5, days)),
+        "atl": 40 + rng.normal(0, 8, days),
+        "ramp_rate": rng.normal(1, 2, days),
+        "ac_ratio": rng.normal(1.0, 0.2, days),
+        "rest_days": rng.integers(0, 4, days).astype(float),
+        "hrv": rng.normal(55, 8, days),
+        "sleep_score": rng.normal(75, 12, days),
+        "sleep_secs": rng.normal(7.5 * 3600, 3600, days),
+        "fatigue": rng.integers(1, 6, days).astype(float),
+        "week_0_km": rng.uniform(0, 60, days),
+        "monotony": rng.normal(1.3, 0.3, days),
+    }
+    for arr in cols.values():
+        arr[rng.random(days) < 0.1] = np.nan
+    return cols
+
+
+def _rows(cols: dict[str, np.ndarray], names: list[str]) -> list[tuple]:
+    """Newest-first DB-style rows with None for missing values."""
+    stacked = np.column_stack([cols[n] for n in names])[::-1]
+    return [tuple(None if np.isnan(v) else float(v) for v in row) for row in stacked]
+
+
+def _naive_rolling_mean(x: list[float | None], window: int) -> list[float | None]:
+    out: list[float | None] = []
+    for i in range(len(x)):
+        vals = [v for v in x[max(0, i - window + 1) : i + 1] if v is not None]
+        out.append(sum(vals) / len(vals) if vals else None)
+    return out
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    days = args.years * 365
+    cols = _daily_rows(days)
+    hrv = cols["hrv"]
+    hrv_list = [None if np.isnan(v) else float(v) for v in hrv]
+
+    injury_rows = _rows(
+        cols,
+        ["ctl", "atl", "ramp_rate", "ac_ratio", "rest_days", "hrv", "sleep_score", "fatigue"],
+    )
+    summary_rows = _rows(cols, ["ctl", "atl", "ctl", "hrv", "week_0_km", "rest_days"])
+    sleep_rows = _rows(cols, ["sleep_secs", "sleep_score", "hrv"])
+    volumes = [v for v in cols["week_0_km"].tolist() if v == v]
+    rests = [v for v in cols["rest_days"].tolist() if v == v]
+    monotony = [v for v in cols["monotony"].tolist() if v == v]
+
+    cases: list[tuple[str, Callable[[], Any]]] = [
+        ("rolling_mean(28)", lambda: rolling_mean(hrv, 28)),
+        ("naive rolling_mean(28)", lambda: _naive_rolling_mean(hrv_list, 28)),
+        ("rolling_std(28)", lambda: rolling_std(hrv, 28)),
+        ("rolling_zscore(60)", lambda: rolling_zscore(hrv, 60)),
+        ("ewma(span=7)", lambda: ewma(hrv, span=7)),
+        ("consistency_score", lambda: calculate_consistency_score(volumes, rests, monotony)),
+        ("injury_risk", lambda: calculate_injury_risk(injury_rows)),
+        ("weekly_summary", lambda: calculate_weekly_summary(summary_rows)),
+        ("sleep_insights", lambda: calculate_sleep_insights(sleep_rows)),
+    ]
+
+    print(f"{days} daily rows ({args.years} years), best of {args.repeat}")
+    print(f"  {'case':<26} {'ms':>10}")
+    for name, fn in cases:
+        print(f"  {name:<26} {_time(fn, args.repeat):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Record real source responses and replay them from a local stand-in server.
+
+``record`` runs the report fetch against the live APIs (credentials from .env,
+a throwaway database so every sync starts from scratch) and writes each
+response, sanitized, to ``recordings/<source>.json``: tokens, names and
+locations are redacted and the Intervals.icu athlete id becomes ``i0``.
+
+``ReplayServer`` serves those recordings to clients configured with
+``API_STAND_IN_URL``. A request is answered with the recorded exchange of the
+same method and path whose query matches best (a paged request only matches
+its own page; unrecorded pages are empty), after ``latency`` seconds. On top of
+that it can fail a share of requests with 503 (``error_rate``), repeat every
+recorded activity list ``scale`` times under fresh ids, and it shifts every
+recorded date by the days since the recording, so "this week" stays populated.
+
+Usage (from backend/):
+    python -m benchmarks.replay record [--out benchmarks/recordings]
+    python -m benchmarks.replay serve [--port 8765] [--latency 0.1] [--error-rate 0.05]
+        [--scale 10]
+    API_STAND_IN_URL=http://127.0.0.1:8765 DB_PATH=/tmp/replay.db
+        HTTP_CACHE_PATH=/tmp/http_cache.db python -m training_status fetch
+
+The app refuses stand-in mode with a ``DB_PATH`` or ``HTTP_CACHE_PATH`` inside
+``data/``: the replayed data would otherwise mix into the real database.
+"""
+
+import argparse
+import contextlib
+import json
+import random
+import re
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from unittest import mock
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+from training_status import cli
+from training_status.config import Settings, get_settings
+from training_status.database import Database
+from training_status.services.http import RETRY_STATUSES, close_clients, http_client
+from training_status.services.sources import SOURCES
+
+RECORDINGS_DIR = Path(__file__).parent / "recordings"
+# Sources that depend on no other talk to an upstream API (with a client of their name)
+UPSTREAM_SOURCES = [name for name, adapter in SOURCES.items() if not adapter.depends_on]
+
+# Response fields replaced on record: credentials, identity and location
+REDACTED_KEYS = frozenset(
+    {
+        "access_token",
+        "refresh_token",
+        "firstname",
+        "lastname",
+        "username",
+        "email",
+        "city",
+        "state",
+        "country",
+        "profile",
+        "profile_medium",
+        "bio",
+        "start_latlng",
+        "end_latlng",
+        "map",
+        "location",
+        "icu_athlete_id",
+        "athlete_id",
+        "name",
+        "description",
+    }
+)
+KEPT_HEADERS = frozenset({"content-type", "etag", "last-modified"})
+_DATE = re.compile(rb'"(\d{4}-\d{2}-\d{2})')
+
+
+def sanitize(value: Any) -> Any:
+    """Copy of a JSON value with every ``REDACTED_KEYS`` field blanked."""
+    if isinstance(value, dict):
+        return {
+            k: ("redacted" if isinstance(v, str) else None) if k in REDACTED_KEYS else sanitize(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [sanitize(v) for v in value]
+    return value
+
+
+class Recorder:
+    """Collects every response of the shared source clients as replayable exchanges."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.exchanges: dict[str, list[dict[str, Any]]] = {
+            source: [] for source in UPSTREAM_SOURCES
+        }
+        self.lock = threading.Lock()
+
+    def attach(self) -> None:
+        """Install fresh shared clients and hook into each source's session."""
+        close_clients()
+        for source in UPSTREAM_SOURCES:
+            session = http_client(source, self.settings).session
+            session.hooks["response"].append(
+                lambda response, *_, source=source, **__: self.capture(source, response)
+            )
+
+    def capture(self, source: str, response: requests.Response) -> None:
+        """Record one final response of ``source`` with its body sanitized."""
+        if response.status_code in RETRY_STATUSES:
+            return  # retried: the final response is captured instead
+        url = urlsplit(response.url)
+        path = url.path if url.path.startswith(f"/{source}/") else f"/{source}{url.path}"
+        path = path.replace(f"/{self.settings.intervals_id}/", "/i0/")
+        try:
+            body = sanitize(response.json())
+        except ValueError:
+            body = None
+        exchange = {
+            "method": response.request.method,
+            "path": path,
+            "query": dict(parse_qsl(url.query)),
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS},
+            "body": body,
+        }
+        with self.lock:
+            self.exchanges[source].append(exchange)
+
+    def save(self, out_dir: Path) -> None:
+        """Write one ``<source>.json`` recording per source that saw traffic."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for source, exchanges in self.exchanges.items():
+            if exchanges:
+                recording = {"recorded_on": date.today().isoformat(), "exchanges": exchanges}
+                (out_dir / f"{source}.json").write_text(json.dumps(recording, indent=1) + "\n")
+
+
+@contextlib.contextmanager
+def report_environment(settings: Settings, db: Database) -> Iterator[None]:
+    """Make ``cli.generate_report`` use these settings and database, with fresh clients."""
+    close_clients()
+    try:
+        with (
+            mock.patch.object(cli, "get_settings", lambda: settings),
+            mock.patch.object(cli, "get_db", lambda: db),
+        ):
+            yield
+    finally:
+        close_clients()
+
+
+def _scale(path: str, body: Any, copies: int) -> Any:
+    """Repeat an activity list ``copies`` times, offsetting every copy's id."""
+    if copies <= 1 or not path.endswith("/activities") or not isinstance(body, list):
+        return body
+    scaled = list(body)
+    for n in range(1, copies):
+        for item in body:
+            copy = dict(item) if isinstance(item, dict) else item
+            for key in ("id", "activityId"):
+                if isinstance(copy, dict) and isinstance(copy.get(key), int):
+                    copy[key] += n * 10**9
+                elif isinstance(copy, dict) and isinstance(copy.get(key), str):
+                    copy[key] = f"{copy[key]}-{n}"
+            scaled.append(copy)
+    return scaled
+
+
+def _shift_dates(raw: bytes, days: int) -> bytes:
+    """Move every ISO date at the start of a JSON string forward by ``days``."""
+    if not days:
+        return raw
+
+    def shift(match: re.Match[bytes]) -> bytes:
+        try:
+            day = date.fromisoformat(match.group(1).decode()) + timedelta(days=days)
+        except ValueError:
+            return match.group(0)
+        return b'"' + day.isoformat().encode()
+
+    return _DATE.sub(shift, raw)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serves recorded exchanges with configurable latency, errors and payload scale."""
+
+    def __init__(
+        self,
+        recordings: Path = RECORDINGS_DIR,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        scale: int = 1,
+        seed: int | None = None,
+        port: int = 0,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.exchanges: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        for path in sorted(recordings.glob("*.json")):
+            recording = json.loads(path.read_text())
+            days = (date.today() - date.fromisoformat(recording["recorded_on"])).days
+            for exchange in recording["exchanges"]:
+                body = _scale(exchange["path"], exchange["body"], scale)
+                exchange = {**exchange, "raw": _shift_dates(json.dumps(body).encode(), days)}
+                self.exchanges.setdefault((exchange["method"], exchange["path"]), []).append(
+                    exchange
+                )
+        self.thread = threading.Thread(target=self.serve_forever, args=(0.01,), daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL the replay server listens on."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def match(self, method: str, path: str, query: dict[str, str]) -> dict[str, Any] | None:
+        """Get the recorded exchange for a request (see the module docstring), or None."""
+        candidates = self.exchanges.get((method, path), [])
+        if "page" in query:
+            candidates = [e for e in candidates if e["query"].get("page") == query["page"]]
+            if not candidates and (method, path) in self.exchanges:
+                return {"status": 200, "headers": {}, "raw": b"[]"}
+        if not candidates:
+            return None
+        return max(candidates, key=lambda e: sum(e["query"].get(k) == v for k, v in query.items()))
+
+    def fail(self) -> bool:
+        """Count a request and decide whether to answer it with an injected error."""
+        with self.lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            self.errors += failed
+        return failed
+
+    def __enter__(self) -> "ReplayServer":
+        """Start serving the recordings in a background thread."""
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: ReplayServer
+
+    def _respond(self) -> None:
+        url = urlsplit(self.path)
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.server.latency)
+        exchange = self.server.match(self.command, url.path, dict(parse_qsl(url.query)))
+        headers: dict[str, str] = {"Content-Type": "application/json"}
+        if self.server.fail():
+            status, body = 503, b"{}"
+        elif exchange is None:
+            status, body = 404, b"{}"
+        else:
+            status, body = exchange["status"], exchange["raw"]
+            headers.update(exchange["headers"])
+            if body.startswith(b"{") and b'"expires_at"' in body:
+                # Recorded tokens have long expired: hand out one valid for the run
+                token = {**json.loads(body), "expires_at": int(time.time()) + 6 * 3600}
+                body = json.dumps(token).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _respond  # noqa: N815
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def record(out_dir: Path) -> None:
+    """Run the report against the live APIs and save the sanitized responses."""
+    settings = get_settings().model_copy(update={"http_cache_max_mb": 0})
+    recorder = Recorder(settings)
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = settings.model_copy(update={"db_path": Path(tmp) / "record.db"})
+        db = Database(settings.db_path)
+        db.init_schema()
+        with report_environment(settings, db):
+            recorder.attach()
+            with contextlib.redirect_stdout(None):
+                cli.generate_report()
+            recorder.save(out_dir)
+    for source, exchanges in recorder.exchanges.items():
+        print(f"{SOURCES[source].label}: {len(exchanges)} responses recorded")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="record the live APIs' responses")
+    rec.add_argument("--out", type=Path, default=RECORDINGS_DIR)
+    serve = commands.add_parser("serve", help="replay recorded responses")
+    serve.add_argument("--recordings", type=Path, default=RECORDINGS_DIR)
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="share answered with 503")
+    serve.add_argument("--scale", type=int, default=1, help="copies of every recorded list")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.out)
+        return
+    server = ReplayServer(
+        args.recordings, args.latency, args.error_rate, args.scale, port=args.port
+    )
+    print(f"Replaying {args.recordings} at {server.url} (API_STAND_IN_URL)")
+    with contextlib.suppress(KeyboardInterrupt):
+        server.serve_forever()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
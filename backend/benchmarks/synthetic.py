@@ -0,0 +1,443 @@
+"""Synthetic multi-year training history for benchmarks and scale tests.
+
+The history is driven by one daily training-load process — progressive 4-week
+blocks, rest days, off-season breaks and illness gaps — and everything else is
+derived from it the way the real data relates:
+
+* CTL/ATL/TSB come from the Banister filter over the loads, ramp rate and A:C
+  ratio from those;
+* distance, run counts, streaks and week/month volumes come from the daily km;
+* HRV falls and resting HR rises with fatigue (negative TSB), and HRV follows the
+  previous night's sleep; subjective fatigue/soreness track ATL.
+
+Snapshots are spread over the days like a scheduler fetching several times a day,
+so ``rows`` beyond one per day adds intraday duplicates rather than centuries of
+history. Notes, goals, gear, health events, annotations, alerts, personal records,
+one activity per run day (also in the Smashrun and Strava caches), the
+wellness days and the ``fitness_days`` series are generated alongside, scaled to
+the history; the most recent runs also get second-by-second streams.
+
+Usage (from backend/):
+    python -m benchmarks.synthetic data/synthetic.db --rows 10000 [--years 10]
+"""
+
+import argparse
+import json
+import math
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from training_status.database import Database
+from training_status.database.schema import INSERT_SNAPSHOT
+from training_status.services.critical_speed import update_critical_speed_history
+from training_status.services.fitness import simulate
+from training_status.services.metric_stats import rebuild_metric_stats
+from training_status.services.pace_curve import update_best_efforts
+from training_status.services.streams import store_streams
+
+DEFAULT_YEARS = 10
+LOAD_PER_KM = 6.0
+STREAMED_RUNS = 30
+_INT_COLUMNS = (
+    "resting_hr",
+    "rest_days",
+    "sleep_secs",
+    "sleep_quality",
+    "steps",
+    "stress",
+    "mood",
+    "fatigue",
+    "soreness",
+    "max_hr",
+    "run_count",
+    "longest_break_days",
+    "weather_humidity",
+    "hr_zone_z1_secs",
+    "hr_zone_z2_secs",
+    "hr_zone_z3_secs",
+    "hr_zone_z4_secs",
+    "hr_zone_z5_secs",
+)
+_PR_DISTANCES = [("1k", 1000), ("5k", 5000), ("10k", 10000), ("Half", 21097), ("Marathon", 42195)]
+
+
+@dataclass(frozen=True)
+class SyntheticHistory:
+    """What ``generate`` wrote."""
+
+    days: int
+    snapshots: int
+    notes: int
+    goals: int
+    activities: int
+    first_day: str
+    last_day: str
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    c = np.concatenate(([0.0], np.cumsum(x)))
+    idx = np.arange(1, len(x) + 1)
+    return c[idx] - c[np.maximum(0, idx - window)]
+
+
+def _lag(x: np.ndarray, days: int, fill: float = 0.0) -> np.ndarray:
+    out = np.full_like(x, fill)
+    if days < len(x):
+        out[days:] = x[:-days]
+    return out
+
+
+def _ar1(rng: np.random.Generator, n: int, phi: float, sigma: float) -> np.ndarray:
+    """Autocorrelated (AR(1)) noise: day-to-day wander rather than white noise."""
+    shocks = rng.normal(0, sigma, n)
+    out = np.empty(n)
+    prev = 0.0
+    for i in range(n):
+        prev = phi * prev + shocks[i]
+        out[i] = prev
+    return out
+
+
+def daily_series(days: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """Correlated daily metrics for ``days`` days (index 0 is the oldest day)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+
+    # Training load: 4-week blocks (3 build, 1 recovery), growing through the year
+    block_week = (t // 7) % 4
+    season = 0.5 * (1 - np.cos(2 * np.pi * (t % 365) / 365))
+    weekly_km = 25 + 35 * season
+    weekly_km = weekly_km * np.where(block_week == 3, 0.65, 1.0 + 0.08 * block_week)
+    run_day = rng.random(days) > np.where((t % 7) == 0, 0.85, 0.2)
+    long_run = (t % 7) == 6
+    km = np.where(run_day, weekly_km / 5.5 * rng.lognormal(0, 0.25, days), 0.0)
+    km[long_run & run_day] *= 1.8
+
+    # Off-season breaks and illness gaps
+    off = (t % 365) < 10
+    for start in rng.integers(0, max(1, days), size=max(1, days // 120)):
+        off[start : start + int(rng.integers(3, 12))] = True
+    km[off] = 0.0
+    km = np.round(km, 2)
+    load = km * LOAD_PER_KM * rng.uniform(0.9, 1.3, days)
+
+    ctl, atl, tsb = (a[0] for a in simulate(30.0, 30.0, load[None, :]))
+    ramp = ctl - _lag(ctl, 7, fill=30.0)
+    ac_ratio = np.divide(atl, ctl, out=np.ones(days), where=ctl > 0)
+
+    sleep_secs = np.clip(7.4 * 3600 + _ar1(rng, days, 0.5, 2400), 4 * 3600, 10 * 3600)
+    sleep_score = np.clip(40 + (sleep_secs / 3600 - 5) * 12 + rng.normal(0, 5, days), 20, 100)
+    hrv = 55 + 0.35 * tsb + 0.15 * (_lag(sleep_score, 1) - 75) + _ar1(rng, days, 0.7, 3.0)
+    resting_hr = 52 - 0.12 * (ctl - 40) - 0.12 * tsb + _ar1(rng, days, 0.6, 1.2)
+    fatigue = np.clip(np.round(3 + (atl - ctl) / 12 + rng.normal(0, 0.6, days)), 1, 5)
+
+    weekly = _rolling_sum(km, 7)
+    ran = km > 0
+    runs = np.cumsum(ran)
+    # Days since the last run
+    last_run = np.maximum.accumulate(np.where(ran, t, -1))
+    rest_days = np.where(last_run >= 0, t - last_run, t + 1)
+    mean7 = _rolling_sum(load, 7) / 7
+    var7 = np.maximum(_rolling_sum(load**2, 7) / 7 - mean7**2, 0)
+    monotony = np.divide(mean7, np.sqrt(var7), out=np.zeros(days), where=var7 > 1)
+    cs = 3.2 + 0.012 * (ctl - 40) + _ar1(rng, days, 0.95, 0.01)
+    zone_secs = km * 330  # ~5:30/km
+
+    return {
+        "load": load,
+        "km": km,
+        "ctl": ctl,
+        "atl": atl,
+        "tsb": tsb,
+        "ramp_rate": ramp,
+        "ac_ratio": ac_ratio,
+        "resting_hr": np.round(resting_hr),
+        "hrv": hrv,
+        "sleep_secs": np.round(sleep_secs),
+        "sleep_quality": np.clip(np.round(sleep_score / 25), 1, 4),
+        "sleep_score": sleep_score,
+        "rest_days": rest_days.astype(float),
+        "monotony": monotony,
+        "training_strain": _rolling_sum(load, 7) * monotony,
+        "vo2max": 48 + 0.1 * ctl + _ar1(rng, days, 0.98, 0.05),
+        "steps": np.round(6000 + km * 1300 + rng.normal(0, 1500, days)),
+        "stress": np.clip(np.round(35 - 0.4 * tsb + rng.normal(0, 8, days)), 0, 100),
+        "mood": np.clip(np.round(3.5 + tsb / 20 + rng.normal(0, 0.7, days)), 1, 5),
+        "fatigue": fatigue,
+        "soreness": np.clip(fatigue + np.round(rng.normal(0, 0.6, days)), 1, 5),
+        "avg_cadence": np.where(ran, 170 + rng.normal(0, 4, days), np.nan),
+        "max_hr": np.where(ran, np.round(165 + rng.normal(0, 8, days)), np.nan),
+        "hr_zone_z1_secs": np.round(zone_secs * 0.25),
+        "hr_zone_z2_secs": np.round(zone_secs * 0.5),
+        "hr_zone_z3_secs": np.round(zone_secs * 0.15),
+        "hr_zone_z4_secs": np.round(zone_secs * 0.08),
+        "hr_zone_z5_secs": np.round(zone_secs * 0.02),
+        "elevation_gain_m": np.round(km * rng.uniform(5, 20, days)),
+        "critical_speed": cs,
+        "d_prime": 200 + _ar1(rng, days, 0.95, 2.0),
+        "total_distance_km": np.cumsum(km),
+        "run_count": runs.astype(float),
+        "longest_run_km": np.maximum.accumulate(km),
+        "week_0_km": weekly,
+        "week_1_km": _lag(weekly, 7),
+        "week_2_km": _lag(weekly, 14),
+        "week_3_km": _lag(weekly, 21),
+        "week_4_km": _lag(weekly, 28),
+        "last_month_km": _rolling_sum(km, 28),
+        "longest_break_days": np.maximum.accumulate(rest_days).astype(float),
+        "avg_days_run_per_week": np.round(runs / np.maximum(t + 1, 7) * 7, 2),
+        "weather_temp": 8 - 10 * np.cos(2 * np.pi * (t % 365) / 365) + rng.normal(0, 3, days),
+        "weather_humidity": np.clip(np.round(70 + rng.normal(0, 12, days)), 20, 100),
+        "weather_wind_speed": np.abs(rng.normal(4, 2, days)),
+    }
+
+
+def _pace(speed: float) -> str:
+    secs = round(1000 / speed)
+    return f"{secs // 60}:{secs % 60:02d}"
+
+
+def run_streams(
+    seconds: int, speed: float, seed: int = 0, drift: float = 0.05
+) -> dict[str, np.ndarray]:
+    """Second-by-second streams of a steady run whose HR drifts up by ``drift``."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(seconds, dtype=float)
+    warmup = np.minimum(t / 300, 1.0)  # HR settles over the first 5 minutes
+    velocity = np.clip(speed + _ar1(rng, seconds, 0.95, 0.03), 0.5, None)
+    heartrate = (95 + (135 - 95) * warmup) * (1 + drift * t / max(seconds, 1))
+    heading = np.cumsum(rng.normal(0, 0.02, seconds))
+    metres = np.cumsum(velocity)
+    return {
+        "time": t,
+        "heartrate": np.round(heartrate + rng.normal(0, 1.5, seconds)),
+        "velocity_smooth": np.round(velocity, 3),
+        "cadence": np.round(85 + rng.normal(0, 1, seconds), 1),
+        "altitude": np.round(30 + 8 * np.sin(metres / 1500) + _ar1(rng, seconds, 0.9, 0.1), 1),
+        "lat": 59.33 + np.cumsum(velocity * np.cos(heading)) / 111_320,
+        "lng": 18.06 + np.cumsum(velocity * np.sin(heading)) / 56_800,
+    }
+
+
+def _snapshot_rows(series: dict[str, np.ndarray], start: date, rows: int, seed: int) -> list[dict]:
+    days = len(series["km"])
+    rng = np.random.default_rng(seed + 1)
+    per_day = np.full(days, rows // days)
+    per_day[days - rows % days :] += 1  # remainder goes to the most recent days
+    out: list[dict] = []
+    for i in range(days):
+        if not per_day[i]:
+            continue
+        day = start + timedelta(days=i)
+        v = {k: (None if math.isnan(x[i]) else float(x[i])) for k, x in series.items()}
+        base = {
+            **{k: v[k] for k in v if k not in ("load", "km")},
+            "hrv_sdnn": None,
+            "spo2": None,
+            "readiness": None,
+            "weight": round(70 + float(rng.normal(0, 0.4)), 1),
+            "body_fat": None,
+            "motivation": None,
+            "comments": None,
+            "icu_rpe": None,
+            "feel": None,
+            "avg_pace": _pace(v["critical_speed"] * 0.85),
+            "longest_streak": 21,
+            "longest_streak_date": start.isoformat(),
+            "longest_break_date": start.isoformat(),
+            "days_run_am": int(v["run_count"] * 0.6),
+            "days_run_pm": int(v["run_count"] * 0.4),
+            "days_run_both": 0,
+            "most_often_run_day": "Saturday",
+            "weather_temp_feels_like": v["weather_temp"] - 2,
+            "weather_type": "Rain" if rng.random() < 0.3 else "Cloudy",
+            "strava_weekly_km": None,
+            "strava_total_km": None,
+            "strava_run_count": None,
+            "strava_ytd_km": None,
+            "intervals_json": "{}",
+            "smashrun_json": "{}",
+        }
+        for k in _INT_COLUMNS:
+            base[k] = None if base[k] is None else int(base[k])
+        hours = np.linspace(6, 22, per_day[i]) if per_day[i] > 1 else [8.0]
+        for h in hours:
+            minute = int(round(float(h) * 60))
+            recorded_at = f"{day.isoformat()}T{minute // 60:02d}:{minute % 60:02d}:00"
+            out.append({**base, "recorded_at": recorded_at})
+    return out
+
+
+def generate(
+    db: Database,
+    rows: int,
+    years: float = DEFAULT_YEARS,
+    seed: int = 0,
+    end: date | None = None,
+) -> SyntheticHistory:
+    """Fill ``db`` with ``rows`` snapshots over at most ``years`` years ending at ``end``."""
+    days = max(1, min(rows, int(years * 365)))
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    series = daily_series(days, seed)
+    snapshots = _snapshot_rows(series, start, rows, seed)
+    rng = np.random.default_rng(seed + 2)
+
+    with db.connection() as conn:
+        conn.executemany(INSERT_SNAPSHOT, snapshots)
+        conn.executemany(
+            "INSERT OR REPLACE INTO fitness_days (day, load, ctl, atl) VALUES (?, ?, ?, ?)",
+            [
+                (
+                    (start + timedelta(days=i)).isoformat(),
+                    round(float(series["load"][i]), 1),
+                    round(float(series["ctl"][i]), 4),
+                    round(float(series["atl"][i]), 4),
+                )
+                for i in range(days)
+            ],
+        )
+
+    wellness = []
+    for i in range(days):
+        day = (start + timedelta(days=i)).isoformat()
+        vo2max = round(float(series["vo2max"][i]), 1) if i % 10 == 0 else None
+        record = {"id": day, "ctl": round(float(series["ctl"][i]), 2), "vo2max": vo2max}
+        wellness.append((day, vo2max, json.dumps(record)))
+    db.upsert_wellness_days(wellness)
+    db.set_sync_cursor("intervals", "wellness", end.isoformat())
+
+    note_days = np.flatnonzero(rng.random(days) < 0.2)
+    for i in note_days:
+        db.create_note(
+            (start + timedelta(days=int(i))).isoformat(),
+            f"{series['km'][i]:.1f} km, felt {int(series['fatigue'][i])}/5",
+        )
+
+    goals = 0
+    for i in range(0, days, 90):
+        # A new quarterly weekly-volume goal replaces the previous one
+        for goal in db.get_active_goals():
+            db.deactivate_goal(goal["id"])
+        target = round(30 + 20 * float(rng.random()))
+        db.create_goal("weekly_km", target, (start + timedelta(days=i)).isoformat())
+        goals += 1
+    db.create_goal("monthly_km", 160.0, (end - timedelta(days=60)).isoformat())
+    goals += 1
+
+    km_total = float(series["km"].sum())
+    for shoe in range(max(1, int(km_total // 700))):
+        db.create_gear(f"Shoe {shoe + 1}", "shoe", "Synthetic", start.isoformat(), 700.0)
+    for i in rng.integers(0, days, size=max(1, days // 60)):
+        d = start + timedelta(days=int(i))
+        db.create_health_event(
+            d.isoformat(), (d + timedelta(days=4)).isoformat(), "illness", "Cold", None
+        )
+    for i in rng.integers(0, days, size=max(1, days // 30)):
+        db.create_annotation((start + timedelta(days=int(i))).isoformat(), "hrv", "Travel")
+    for i in rng.integers(0, days, size=max(1, days // 40)):
+        db.create_alert(
+            day=(start + timedelta(days=int(i))).isoformat(),
+            metric="hrv",
+            detector="ewma",
+            severity="warning",
+            value=40.0,
+            baseline_mean=55.0,
+            baseline_std=4.0,
+            statistic=1.4,
+            message="HRV suppressed",
+        )
+    best = float(series["critical_speed"].max())
+    for label, metres in _PR_DISTANCES:
+        secs = metres / (best * (1.05 if metres <= 1000 else 0.95 - metres / 500000))
+        db.upsert_record_if_pr(label, metres, round(secs, 1), _pace(metres / secs), end.isoformat())
+
+    run_days = np.flatnonzero(series["km"] > 0)
+    speeds = series["critical_speed"] * rng.uniform(0.7, 0.9, days)
+    with db.connection() as conn:
+        conn.executemany(
+            """INSERT OR REPLACE INTO activities
+               (id, start_date_local, sport, distance_m, moving_time_secs, average_hr,
+                updated_at)
+               VALUES (?, ?, 'run', ?, ?, ?, ?)""",
+            [
+                (
+                    f"s{i}",
+                    f"{(start + timedelta(days=int(i))).isoformat()}T07:00:00",
+                    float(series["km"][i]) * 1000,
+                    float(series["km"][i]) * 1000 / speeds[i],
+                    145.0,
+                    end.isoformat(),
+                )
+                for i in run_days
+            ],
+        )
+    db.upsert_smashrun_activities(
+        [
+            (
+                int(i),
+                f"{(start + timedelta(days=int(i))).isoformat()}T07:00:00",
+                "running",
+                round(float(series["km"][i]), 2),
+                "{}",
+            )
+            for i in run_days
+        ]
+    )
+    db.set_sync_cursor("smashrun", "activities", str(int(run_days[-1])) if len(run_days) else "0")
+    db.upsert_strava_activities(
+        [
+            (
+                int(i),
+                f"{(start + timedelta(days=int(i))).isoformat()}T06:00:00Z",
+                f"{(start + timedelta(days=int(i))).isoformat()}T07:00:00Z",
+                "Run",
+                float(series["km"][i]) * 1000,
+                float(series["km"][i]) * 1000 / speeds[i],
+            )
+            for i in run_days
+        ]
+    )
+    for i in run_days[-STREAMED_RUNS:]:
+        seconds = int(series["km"][i] * 1000 / speeds[i])
+        store_streams(db, f"s{i}", run_streams(seconds, float(speeds[i]), seed + int(i)))
+    update_best_efforts(db)
+    update_critical_speed_history(db, today=end)
+
+    rebuild_metric_stats(db)
+    return SyntheticHistory(
+        days=days,
+        snapshots=len(snapshots),
+        notes=len(note_days),
+        goals=goals,
+        activities=len(run_days),
+        first_day=start.isoformat(),
+        last_day=end.isoformat(),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("db_path", type=Path)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--years", type=float, default=DEFAULT_YEARS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.db_path.exists():
+        parser.error(f"{args.db_path} already exists")
+    db = Database(args.db_path)
+    db.init_schema()
+    history = generate(db, args.rows, args.years, args.seed)
+    print(
+        f"Wrote {history.snapshots} snapshots over {history.days} days "
+        f"({history.first_day} → {history.last_day}), {history.notes} notes, "
+        f"{history.goals} goals, {history.activities} activities to {args.db_path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """Entry point for python -m training_status."""
 
-from training_status.cli import generate_report
+from training_status.cli import main
 
 if __name__ == "__main__":
-    generate_report()
+    main()
@@ -4,6 +4,7 @@ import csv
 import io
 import logging
 from contextlib import asynccontextmanager, redirect_stderr, redirect_stdout
+from datetime import date, timedelta
 from pathlib import Path
 from typing import Any
 
@@ -17,10 +18,12 @@ from .config import get_settings
 from .database import SNAPSHOT_COLUMNS, get_db
 from .models import (
     AdherenceReport,
+    AlertList,
     AnnotationCreate,
     AnnotationList,
     ConsistencyScore,
     CorrelationsResponse,
+    CriticalSpeedHistoryResponse,
     DetrainingResponse,
     FetchResponse,
     GearCreate,
@@ -33,14 +36,18 @@ from .models import (
     HealthEventUpdate,
     HrDriftResponse,
     InjuryRisk,
+    InjuryRiskSeries,
     NoteCreate,
     NoteList,
     OverloadResponse,
+    PaceCurveResponse,
     PersonalRecordsResponse,
     ProjectionsResponse,
     RacePredictorResponse,
     ReadinessScore,
     Recommendation,
+    ScenarioRequest,
+    ScenarioResponse,
     SharedLinkCreate,
     SleepInsightsResponse,
     Snapshot,
@@ -52,23 +59,13 @@ from .models import (
     WeeklySummary,
     WorkoutSuggestion,
 )
-from .services.analytics import (
-    calculate_consistency_score,
-    calculate_detraining,
-    calculate_goal_adherence,
-    calculate_hr_drift,
-    calculate_injury_risk,
-    calculate_overload,
-    calculate_projections,
-    calculate_race_predictions,
-    calculate_readiness_score,
-    calculate_sleep_insights,
-    calculate_taper,
-    calculate_training_zones,
-    calculate_weekly_summary,
-    get_recommendation,
-    suggest_workout,
-)
+from .services.analytics import calculate_taper, suggest_workout
+from .services.critical_speed import WINDOWS, critical_speed_trend
+from .services.decoupling import hr_drift_trend
+from .services.injury_risk import summarize_injury_risk
+from .services.materialized import get_analytic, refresh_goal_analytics
+from .services.pace_curve import mean_max_curve
+from .services.scenarios import simulate_scenarios
 
 logger = logging.getLogger(__name__)
 
@@ -233,6 +230,7 @@ def create_goal(goal: GoalCreate) -> dict[str, Any]:
     db.create_goal(
         goal_type=goal.goal_type, target_value=goal.target_value, period_start=goal.period_start
     )
+    refresh_goal_analytics(db)
     return {"success": True}
 
 
@@ -241,6 +239,7 @@ def delete_goal(goal_id: int) -> dict[str, Any]:
     """Deactivate a goal."""
     db = get_db()
     db.deactivate_goal(goal_id)
+    refresh_goal_analytics(db)
     return {"success": True}
 
 
@@ -250,251 +249,55 @@ def delete_goal(goal_id: int) -> dict[str, Any]:
 @app.get("/api/analytics/consistency", response_model=ConsistencyScore)
 def get_consistency_score() -> dict[str, Any]:
     """Calculate training consistency score (0-100)."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(columns=["week_0_km", "rest_days", "monotony"], limit=28)
-
-    if len(rows) < 7:
-        return {
-            "score": None,
-            "reason": "Not enough data",
-            "assessment": "N/A",
-            "volume_score": None,
-            "rest_score": None,
-            "monotony_score": None,
-        }
-
-    volumes = [r[0] for r in rows if r[0] is not None]
-    rest_days = [r[1] for r in rows if r[1] is not None]
-    monotony_values = [r[2] for r in rows if r[2] is not None]
-
-    return calculate_consistency_score(volumes, rest_days, monotony_values)
+    return get_analytic(get_db(), "consistency")
 
 
 @app.get("/api/analytics/recommendation", response_model=Recommendation)
 def get_workout_recommendation() -> dict[str, Any]:
     """Get recovery/workout recommendation based on current state."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=["tsb", "hrv", "resting_hr", "sleep_score", "fatigue", "soreness"], limit=1
-    )
-
-    if not rows:
-        return {
-            "recommendation": "No data available",
-            "reason": "Take a run to get started!",
-            "urgency": "low",
-            "color": "blue",
-        }
-
-    tsb, hrv, resting_hr, sleep_score, fatigue, soreness = rows[0]
-    return get_recommendation(tsb, hrv, resting_hr, sleep_score, fatigue)
+    return get_analytic(get_db(), "recommendation")
 
 
 @app.get("/api/analytics/projections", response_model=ProjectionsResponse)
 def get_projections() -> dict[str, Any]:
     """Project fitness/fatigue for next 7 days."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(columns=["ctl", "atl", "tsb", "ramp_rate"], limit=1)
-
-    if not rows:
-        return {"projections": [], "debug": "No snapshots found"}
-
-    ctl, atl, tsb, ramp_rate = rows[0]
-    if ctl is None or atl is None:
-        return {"projections": [], "debug": f"CTL={ctl}, ATL={atl} - missing data"}
-
-    projections, days_to_positive = calculate_projections(ctl, atl, ramp_rate)
-    return {
-        "projections": projections,
-        "current": {"ctl": ctl, "atl": atl, "tsb": tsb},
-        "days_to_positive_tsb": days_to_positive,
-    }
+    return get_analytic(get_db(), "projections")
 
 
 @app.get("/api/analytics/injury-risk", response_model=InjuryRisk)
 def get_injury_risk() -> dict[str, Any]:
     """Calculate injury risk score based on multiple factors."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=[
-            "ctl",
-            "atl",
-            "ramp_rate",
-            "ac_ratio",
-            "rest_days",
-            "hrv",
-            "sleep_score",
-            "fatigue",
-        ],
-        limit=14,
-    )
+    return get_analytic(get_db(), "injury_risk")
+
 
-    return calculate_injury_risk(rows)
+@app.get("/api/analytics/injury-risk/series", response_model=InjuryRiskSeries)
+def get_injury_risk_series(
+    start: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    days: int = Query(90, ge=1, le=3650, description="Range length when start is omitted"),
+) -> dict[str, Any]:
+    """Daily injury risk history between start and end (inclusive)."""
+    points = get_analytic(get_db(), "injury_risk_series")["points"]
+    if end is not None:
+        points = [p for p in points if p["day"] <= end]
+    if start is None and points:
+        last = date.fromisoformat(points[-1]["day"])
+        start = (last - timedelta(days=days - 1)).isoformat()
+    if start is not None:
+        points = [p for p in points if p["day"] >= start]
+    return {"start": start, "end": end, "points": points, "summary": summarize_injury_risk(points)}
 
 
 @app.get("/api/analytics/correlations", response_model=CorrelationsResponse)
 def get_correlations() -> dict[str, Any]:
     """Find correlations in training data."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=[
-            "week_0_km",
-            "hrv",
-            "sleep_score",
-            "weather_temp",
-            "avg_cadence",
-            "elevation_gain_m",
-            "icu_rpe",
-            "feel",
-        ],
-        limit=30,
-    )
-
-    insights = []
-
-    if len(rows) < 10:
-        return {
-            "insights": [],
-            "data_points": len(rows),
-            "message": "Need more data for correlation analysis",
-        }
-
-    # Extract columns
-    volumes = [r[0] for r in rows if r[0] is not None]
-    hrvs = [r[1] for r in rows if r[1] is not None]
-    sleep_scores = [r[2] for r in rows if r[2] is not None]
-    temps = [r[3] for r in rows if r[3] is not None]
-
-    # Correlation 1: Volume vs HRV
-    if len(volumes) >= 10 and len(hrvs) >= 10:
-        high_vol_days = [i for i, v in enumerate(volumes) if v > 35]
-        low_vol_days = [i for i, v in enumerate(volumes) if v < 20]
-
-        if high_vol_days and low_vol_days:
-            high_vol_hrv = [hrvs[i] for i in high_vol_days if i < len(hrvs)]
-            low_vol_hrv = [hrvs[i] for i in low_vol_days if i < len(hrvs)]
-
-            if high_vol_hrv and low_vol_hrv:
-                avg_high = sum(high_vol_hrv) / len(high_vol_hrv)
-                avg_low = sum(low_vol_hrv) / len(low_vol_hrv)
-                diff_pct = ((avg_low - avg_high) / avg_high) * 100 if avg_high > 0 else 0
-
-                if diff_pct > 10:
-                    insights.append(
-                        {
-                            "type": "volume_recovery",
-                            "title": "High Volume Impact",
-                            "description": (
-                                f"Your HRV is {diff_pct:.0f}% lower after"
-                                " high volume weeks (>35km). Consider more recovery."
-                            ),
-                            "recommendation": "Schedule easier days after high volume",
-                        }
-                    )
-
-    # Correlation 2: Temperature
-    if len(temps) >= 10:
-        insights.append(
-            {
-                "type": "weather",
-                "title": "Temperature Sweet Spot",
-                "description": (
-                    f"You've run in temps from {min(temps):.0f}°C to {max(temps):.0f}°C."
-                    " Most runners perform best at 8-15°C."
-                ),
-                "recommendation": "Adjust pace expectations in extreme temps",
-            }
-        )
-
-    # Correlation 3: Sleep vs recovery
-    if len(sleep_scores) >= 10 and len(hrvs) >= 10:
-        good_sleep = [hrvs[i] for i, s in enumerate(sleep_scores) if s > 75 and i < len(hrvs)]
-        poor_sleep = [hrvs[i] for i, s in enumerate(sleep_scores) if s < 60 and i < len(hrvs)]
-
-        if good_sleep and poor_sleep:
-            avg_good = sum(good_sleep) / len(good_sleep)
-            avg_poor = sum(poor_sleep) / len(poor_sleep)
-            diff = ((avg_good - avg_poor) / avg_poor) * 100 if avg_poor > 0 else 0
-
-            if diff > 15:
-                insights.append(
-                    {
-                        "type": "sleep_recovery",
-                        "title": "Sleep Matters",
-                        "description": (
-                            f"Good sleep (>75 score) correlates with {diff:.0f}% higher HRV."
-                            " Sleep is your superpower!"
-                        ),
-                        "recommendation": "Prioritize 7+ hours of quality sleep",
-                    }
-                )
-
-    # Correlation 4: Rest day pattern
-    rest_rows = db.get_snapshots_for_analytics(columns=["rest_days", "hrv"], limit=20)
-    rest_data = [(r[0], r[1]) for r in rest_rows if r[0] is not None and r[1] is not None]
-
-    if len(rest_data) >= 10:
-        after_rest = [hrv for rest, hrv in rest_data if rest == 0]
-        after_break = [hrv for rest, hrv in rest_data if rest >= 2]
-
-        if after_rest and after_break and len(after_rest) > 2 and len(after_break) > 2:
-            avg_after_rest = sum(after_rest) / len(after_rest)
-            avg_after_break = sum(after_break) / len(after_break)
-
-            if avg_after_break > avg_after_rest * 1.1:
-                insights.append(
-                    {
-                        "type": "rest_recovery",
-                        "title": "Rest Days Work",
-                        "description": (
-                            f"HRV is {((avg_after_break / avg_after_rest - 1) * 100):.0f}%"
-                            " higher after 2+ rest days. Trust the process!"
-                        ),
-                        "recommendation": "Don't skip planned rest days",
-                    }
-                )
-
-    return {
-        "insights": insights,
-        "data_points": len(rows),
-        "message": f"Analyzed {len(rows)} snapshots"
-        if insights
-        else "Keep logging data - correlations will appear with more entries",
-    }
+    return get_analytic(get_db(), "correlations")
 
 
 @app.get("/api/analytics/race-predictor", response_model=RacePredictorResponse)
 def get_race_prediction() -> dict[str, Any]:
     """Predict race times based on critical speed and recent training."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=["critical_speed", "d_prime", "ctl", "week_0_km", "avg_pace"], limit=1
-    )
-
-    if not rows or rows[0][0] is None:
-        return {
-            "predictions": [],
-            "critical_speed_ms": None,
-            "d_prime_meters": None,
-            "fitness_level": "unknown",
-            "message": (
-                "Need critical speed data for race predictions. Complete a few hard efforts (1-5K)."
-            ),
-        }
-
-    cs, d_prime, ctl, week_km, avg_pace = rows[0]
-
-    predictions = calculate_race_predictions(cs, d_prime, ctl, avg_pace)
-
-    readiness = "excellent" if ctl and ctl > 40 else "good" if ctl and ctl > 25 else "building"
-
-    return {
-        "predictions": predictions,
-        "critical_speed_ms": cs,
-        "d_prime_meters": d_prime,
-        "fitness_level": readiness,
-        "message": f"Predictions based on Critical Speed model. Current fitness: {readiness}.",
-    }
+    return get_analytic(get_db(), "race_predictor")
 
 
 # --- DETRAINING ENDPOINT ---
@@ -503,31 +306,7 @@ def get_race_prediction() -> dict[str, Any]:
 @app.get("/api/analytics/detraining", response_model=DetrainingResponse)
 def get_detraining() -> dict[str, Any]:
     """Estimate fitness/fatigue decay if training stops today."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(columns=["ctl", "atl"], limit=1)
-
-    if not rows or rows[0][0] is None or rows[0][1] is None:
-        return {
-            "points": [],
-            "current_ctl": 0.0,
-            "current_atl": 0.0,
-            "message": "No current fitness data available",
-        }
-
-    ctl, atl = rows[0]
-    points = calculate_detraining(ctl, atl)
-    week6_ctl = points[-1]["ctl"] if points else ctl
-    pct_lost = round((1 - week6_ctl / ctl) * 100) if ctl > 0 else 0
-
-    return {
-        "points": points,
-        "current_ctl": ctl,
-        "current_atl": atl,
-        "message": (
-            f"After 6 weeks without training, CTL drops ~{pct_lost}%"
-            f" (from {ctl:.0f} to {week6_ctl:.0f})"
-        ),
-    }
+    return get_analytic(get_db(), "detraining")
 
 
 # --- WEEKLY SUMMARY ENDPOINT ---
@@ -536,11 +315,7 @@ def get_detraining() -> dict[str, Any]:
 @app.get("/api/analytics/summary", response_model=WeeklySummary)
 def get_weekly_summary() -> dict[str, Any]:
     """Get a 7-day training digest vs the previous 7 days."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=["ctl", "atl", "tsb", "hrv", "week_0_km", "rest_days"], limit=14
-    )
-    return calculate_weekly_summary(rows)
+    return get_analytic(get_db(), "weekly_summary")
 
 
 # --- GOAL ADHERENCE ENDPOINT ---
@@ -549,21 +324,7 @@ def get_weekly_summary() -> dict[str, Any]:
 @app.get("/api/analytics/adherence", response_model=list[AdherenceReport])
 def get_goal_adherence() -> list[dict[str, Any]]:
     """Show adherence history for active weekly_km goals."""
-    db = get_db()
-    goals = db.get_active_goals()
-    weekly_goals = [g for g in goals if g["goal_type"] == "weekly_km"]
-
-    if not weekly_goals:
-        return []
-
-    rows = db.get_snapshots_for_analytics(columns=["recorded_at", "week_0_km"], limit=60)
-
-    reports = []
-    for goal in weekly_goals:
-        report = calculate_goal_adherence(goal["target_value"], rows)
-        reports.append(report)
-
-    return reports
+    return get_analytic(get_db(), "goal_adherence")
 
 
 # --- PERSONAL RECORDS ENDPOINTS ---
@@ -577,6 +338,23 @@ def get_personal_records() -> dict[str, Any]:
     return {"records": [dict(r) for r in rows]}
 
 
+# --- ALERTS ENDPOINTS ---
+
+
+@app.get("/api/alerts", response_model=AlertList)
+def get_alerts(
+    limit: int = Query(50, ge=1, le=200),
+    before_id: int | None = Query(None, ge=1),
+    metric: str | None = None,
+) -> dict[str, Any]:
+    """Get anomaly alerts newest first, paginated by ``before_id``."""
+    db = get_db()
+    rows = db.get_alerts(limit=limit + 1, before_id=before_id, metric=metric)
+    items = [dict(r) for r in rows[:limit]]
+    has_more = len(rows) > limit
+    return {"items": items, "next_before_id": items[-1]["id"] if has_more else None}
+
+
 # --- TRAINING NOTES ENDPOINTS ---
 
 
@@ -663,22 +441,7 @@ def export_csv() -> StreamingResponse:
 @app.get("/api/analytics/readiness", response_model=ReadinessScore)
 def get_readiness() -> dict[str, Any]:
     """Composite training readiness score 0-100."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=["tsb", "hrv", "sleep_score", "fatigue", "soreness"], limit=8
-    )
-    if not rows:
-        return {"score": 50, "label": "Unknown", "components": {}}
-
-    tsb, hrv_latest, sleep_score, fatigue, soreness = rows[0]
-    hrv_trend_pct: float | None = None
-    hrv_values = [r[1] for r in rows if r[1] is not None]
-    if len(hrv_values) >= 3:
-        baseline = sum(hrv_values[1:]) / len(hrv_values[1:])
-        if baseline > 0:
-            hrv_trend_pct = ((hrv_values[0] - baseline) / baseline) * 100
-
-    return calculate_readiness_score(tsb, hrv_trend_pct, sleep_score, fatigue, soreness)
+    return get_analytic(get_db(), "readiness")
 
 
 @app.get("/api/analytics/workout-suggestion", response_model=WorkoutSuggestion)
@@ -701,48 +464,48 @@ def get_workout_suggestion() -> dict[str, Any]:
 @app.get("/api/analytics/overload", response_model=OverloadResponse)
 def get_overload() -> dict[str, Any]:
     """Progressive overload tracking - week-over-week volume changes."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=["week_0_km", "week_1_km", "week_2_km", "week_3_km", "week_4_km"], limit=1
-    )
-    return calculate_overload(rows)
+    return get_analytic(get_db(), "overload")
 
 
 @app.get("/api/analytics/zones", response_model=TrainingZonesResponse)
 def get_training_zones() -> dict[str, Any]:
     """Compute HR and pace training zones."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=["resting_hr", "max_hr", "critical_speed"], limit=1
-    )
-    if not rows:
-        return {"hr_zones": [], "pace_zones": [], "data_quality": "none"}
-    resting_hr, max_hr, critical_speed = rows[0]
-    return calculate_training_zones(resting_hr, max_hr, critical_speed)
+    return get_analytic(get_db(), "training_zones")
 
 
 @app.get("/api/analytics/hr-drift", response_model=HrDriftResponse)
-def get_hr_drift() -> dict[str, Any]:
-    """HR zone drift analysis for easy sessions."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=[
-            "hr_zone_z1_secs", "hr_zone_z2_secs", "hr_zone_z3_secs",
-            "hr_zone_z4_secs", "hr_zone_z5_secs", "recorded_at",
-        ],
-        limit=60,
-    )
-    return calculate_hr_drift(rows)
+def get_hr_drift(
+    start: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    days: int = Query(90, ge=1, le=3650, description="Range length when start is omitted"),
+) -> dict[str, Any]:
+    """Aerobic decoupling trend over the easy runs between start and end (inclusive)."""
+    return hr_drift_trend(get_db(), start, end, days)
+
+
+@app.get("/api/analytics/pace-curve", response_model=PaceCurveResponse)
+def get_pace_curve(
+    period: str = Query("42d", pattern=r"^(42d|90d|season|all)$"),
+) -> dict[str, Any]:
+    """Mean-maximal pace curve (best effort per duration and distance) of a period."""
+    return mean_max_curve(get_db(), period)
+
+
+@app.get("/api/analytics/critical-speed", response_model=CriticalSpeedHistoryResponse)
+def get_critical_speed_history(
+    window: int = Query(42, description="Window length in days (42 or 90)"),
+    days: int = Query(365, ge=1, le=3650),
+) -> dict[str, Any]:
+    """Critical speed / D' fitted over rolling windows, with 95% bootstrap intervals."""
+    if window not in WINDOWS:
+        raise HTTPException(status_code=422, detail=f"window must be one of {list(WINDOWS)}")
+    return critical_speed_trend(get_db(), window, days)
 
 
 @app.get("/api/analytics/sleep-insights", response_model=SleepInsightsResponse)
 def get_sleep_insights() -> dict[str, Any]:
     """Sleep optimization insights."""
-    db = get_db()
-    rows = db.get_snapshots_for_analytics(
-        columns=["sleep_secs", "sleep_score", "hrv"], limit=60
-    )
-    return calculate_sleep_insights(rows)
+    return get_analytic(get_db(), "sleep_insights")
 
 
 @app.get("/api/analytics/taper", response_model=TaperResponse)
@@ -752,9 +515,29 @@ def get_taper(
 ) -> dict[str, Any]:
     """Calculate taper schedule toward a race date."""
     db = get_db()
-    rows = db.get_snapshots_for_analytics(columns=["ctl"], limit=1)
+    rows = db.get_snapshots_for_analytics(columns=["ctl", "atl"], limit=1)
     current_ctl = rows[0][0] if rows and rows[0][0] is not None else 30.0
-    return calculate_taper(race_date, current_ctl, model)
+    current_atl = rows[0][1] if rows else None
+    return calculate_taper(race_date, current_ctl, model, current_atl)
+
+
+@app.post("/api/analytics/scenarios", response_model=ScenarioResponse)
+def run_scenarios(request: ScenarioRequest) -> dict[str, Any]:
+    """Simulate a grid of training/taper scenarios to race day and rank them."""
+    db = get_db()
+    rows = db.get_snapshots_for_analytics(columns=["ctl", "atl"], limit=1)
+    current_ctl = rows[0][0] if rows and rows[0][0] is not None else 30.0
+    current_atl = rows[0][1] if rows else None
+    return simulate_scenarios(
+        request.race_date,
+        current_ctl,
+        current_atl,
+        grid=request.grid.model_dump(),
+        target_tsb=request.target_tsb,
+        top=request.top,
+        include_trajectories=request.include_trajectories,
+        workers=get_settings().scenario_workers,
+    )
 
 
 # --- GEAR ENDPOINTS ---
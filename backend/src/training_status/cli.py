@@ -1,12 +1,31 @@
 """CLI entry point for fetching and displaying training status."""
 
-import json
-from datetime import datetime
+import argparse
+from datetime import date, datetime, timedelta
+from pathlib import Path
 
 from .config import get_settings
 from .database import Database, get_db
+from .services.critical_speed import update_critical_speed_history
+from .services.decoupling import update_activity_decoupling
+from .services.fetch import SourceResult
+from .services.http import http_stats
+from .services.importer import ImportStats, import_directory
 from .services.intervals import IntervalsClient
-from .services.smashrun import SmashrunClient
+from .services.materialized import refresh_analytics
+from .services.metric_stats import rebuild_metric_stats
+from .services.pace_curve import update_best_efforts
+from .services.pipeline import run_post_insert_stages
+from .services.sources import (
+    SOURCES,
+    SourceAdapter,
+    enabled_sources,
+    run_sources,
+    snapshot_columns,
+    snapshot_ready,
+    snapshot_row,
+)
+from .services.streams import sync_activity_streams
 
 # --- DISPLAY HELPERS ---
 
@@ -158,79 +177,21 @@ def print_history(db: Database) -> None:
         )
 
 
-def prepare_snapshot_data(iv: dict, sr: dict) -> dict:
-    """Prepare data for database insertion."""
-    return {
-        "recorded_at": datetime.now().isoformat(timespec="seconds"),
-        "ctl": iv.get("ctl"),
-        "atl": iv.get("atl"),
-        "tsb": iv.get("tsb"),
-        "ramp_rate": iv.get("ramp_rate"),
-        "ac_ratio": iv.get("ac_ratio"),
-        "resting_hr": iv.get("resting_hr"),
-        "hrv": iv.get("hrv"),
-        "hrv_sdnn": iv.get("hrv_sdnn"),
-        "sleep_secs": iv.get("sleep_secs"),
-        "sleep_quality": iv.get("sleep_quality"),
-        "rest_days": iv.get("rest_days"),
-        "monotony": iv.get("monotony"),
-        "training_strain": iv.get("training_strain"),
-        "vo2max": iv.get("vo2max"),
-        "sleep_score": iv.get("sleep_score"),
-        "steps": iv.get("steps"),
-        "spo2": iv.get("spo2"),
-        "stress": iv.get("stress"),
-        "readiness": iv.get("readiness"),
-        "weight": iv.get("weight"),
-        "body_fat": iv.get("body_fat"),
-        "mood": iv.get("mood"),
-        "motivation": iv.get("motivation"),
-        "fatigue": iv.get("fatigue"),
-        "soreness": iv.get("soreness"),
-        "comments": iv.get("comments"),
-        "elevation_gain_m": iv.get("elevation_gain_m"),
-        "avg_cadence": iv.get("avg_cadence"),
-        "max_hr": iv.get("max_hr"),
-        "hr_zone_z1_secs": iv.get("hr_zone_z1_secs"),
-        "hr_zone_z2_secs": iv.get("hr_zone_z2_secs"),
-        "hr_zone_z3_secs": iv.get("hr_zone_z3_secs"),
-        "hr_zone_z4_secs": iv.get("hr_zone_z4_secs"),
-        "hr_zone_z5_secs": iv.get("hr_zone_z5_secs"),
-        "icu_rpe": iv.get("icu_rpe"),
-        "feel": iv.get("feel"),
-        "critical_speed": iv.get("critical_speed"),
-        "d_prime": iv.get("d_prime"),
-        "total_distance_km": sr.get("total_distance_km"),
-        "run_count": sr.get("run_count"),
-        "longest_run_km": sr.get("longest_run_km"),
-        "avg_pace": sr.get("avg_pace"),
-        "week_0_km": sr.get("week_0_km"),
-        "week_1_km": sr.get("week_1_km"),
-        "week_2_km": sr.get("week_2_km"),
-        "week_3_km": sr.get("week_3_km"),
-        "week_4_km": sr.get("week_4_km"),
-        "last_month_km": sr.get("last_month_km"),
-        "longest_streak": sr.get("longest_streak"),
-        "longest_streak_date": sr.get("longest_streak_date"),
-        "longest_break_days": sr.get("longest_break_days"),
-        "longest_break_date": sr.get("longest_break_date"),
-        "avg_days_run_per_week": sr.get("avg_days_run_per_week"),
-        "days_run_am": sr.get("days_run_am"),
-        "days_run_pm": sr.get("days_run_pm"),
-        "days_run_both": sr.get("days_run_both"),
-        "most_often_run_day": sr.get("most_often_run_day"),
-        "weather_temp": sr.get("weather_temp"),
-        "weather_temp_feels_like": sr.get("weather_temp_feels_like"),
-        "weather_humidity": sr.get("weather_humidity"),
-        "weather_wind_speed": sr.get("weather_wind_speed"),
-        "weather_type": sr.get("weather_type"),
-        "strava_weekly_km": sr.get("strava_weekly_km"),
-        "strava_total_km": sr.get("strava_total_km"),
-        "strava_run_count": sr.get("strava_run_count"),
-        "strava_ytd_km": sr.get("strava_ytd_km"),
-        "intervals_json": json.dumps(iv.get("_raw", {})),
-        "smashrun_json": json.dumps(sr.get("_raw", {})),
-    }
+def print_cache_stats(before: dict[str, dict], after: dict[str, dict]) -> None:
+    """Print each source's HTTP cache hit ratio and bytes saved between two ``http_stats``."""
+    for source, stats in after.items():
+        delta = {
+            key: stats[key] - before.get(source, {}).get(key, 0)
+            for key in ("cache_hits", "cache_revalidated", "cache_misses", "bytes_saved")
+        }
+        served = delta["cache_hits"] + delta["cache_revalidated"]
+        total = served + delta["cache_misses"]
+        if total:
+            label = SOURCES[source].label if source in SOURCES else source
+            print(
+                f"  {label} cache: {served}/{total} hits "
+                f"({served / total:.0%}), {delta['bytes_saved'] / 1024:.1f} KB saved"
+            )
 
 
 def generate_report() -> None:
@@ -239,38 +200,21 @@ def generate_report() -> None:
 
     settings = get_settings()
 
-    # Fetch from Intervals.icu
-    print("\nFetching Intervals.icu...", end=" ", flush=True)
-    try:
-        intervals_client = IntervalsClient(settings)
-        iv = intervals_client.get_wellness()
-        print("ok")
-    except Exception as e:
-        iv = {}
-        print(f"ERROR: {e}")
-
-    # Fetch from Smashrun
-    print("Fetching Smashrun...", end=" ", flush=True)
-    try:
-        smashrun_client = SmashrunClient(settings)
-        sr = smashrun_client.get_stats()
-        print("ok")
-    except Exception as e:
-        sr = {}
-        print(f"ERROR: {e}")
-
-    # Fetch from Strava (optional)
-    if settings.strava_refresh_token:
-        print("Fetching Strava...", end=" ", flush=True)
-        try:
-            from .services.strava import StravaClient
-
-            strava_client = StravaClient(settings)
-            strava_data = strava_client.get_stats()
-            sr.update(strava_data)
-            print("ok")
-        except Exception as e:
-            print(f"ERROR: {e}")
+    db = get_db()
+
+    # Fetch every registered source, concurrently where their dependencies allow;
+    # one that fails or misses its deadline is left out
+    def report(adapter: SourceAdapter, result: SourceResult) -> None:
+        status = f"ok ({result.secs:.1f}s)" if result.ok else f"ERROR: {result.error}"
+        print(f"  {adapter.label}: {status}")
+
+    print(f"\nFetching {', '.join(a.label for a in enabled_sources(settings))}...")
+    before = http_stats()
+    results = run_sources(settings, db, on_result=report)
+    print_cache_stats(before, http_stats())
+
+    iv = results["intervals"].data
+    sr = results["smashrun"].data
 
     # Display Intervals.icu data
     print("\n[Intervals.icu - Training Load & Health]")
@@ -283,11 +227,13 @@ def generate_report() -> None:
         print(f"  {key}: {val}")
 
     # Save to database
-    db = get_db()
-    if iv and sr:
-        data = prepare_snapshot_data(iv, sr)
-        db.insert_snapshot(data)
+    if snapshot_ready(results):
+        db.add_snapshot_columns(snapshot_columns())
+        snapshot_id = db.insert_snapshot(snapshot_row(results))
         print(f"\nSnapshot saved to {settings.db_path}")
+        failed = run_post_insert_stages(db, snapshot_id)
+        if failed:
+            print(f"  Post-insert stage(s) failed: {', '.join(failed)}")
 
     # Detect personal records from fetched activities
     pr_candidates = iv.get("_raw", {}).get("pr_candidates", [])
@@ -310,5 +256,80 @@ def generate_report() -> None:
     print_history(db)
 
 
+def rebuild_stats() -> None:
+    """Recompute the metric_stats baselines from the full snapshot history."""
+    days = rebuild_metric_stats(get_db())
+    print(f"Rebuilt metric stats from {days} days of history")
+
+
+def sync_streams(days: int) -> None:
+    """Backfill activity streams for the last ``days`` days from Intervals.icu."""
+    client = IntervalsClient(get_settings())
+    oldest = (date.today() - timedelta(days=days)).isoformat()
+    activities = client.get_activities(oldest, date.today().isoformat())
+    db = get_db()
+    synced = sync_activity_streams(db, client, activities)
+    update_activity_decoupling(db, sorted(db.get_streamed_activity_ids()))
+    if update_best_efforts(db):
+        update_critical_speed_history(db)
+        refresh_analytics(db, ["race_predictor", "training_zones"])
+    print(f"Stored streams for {synced} of {len(activities)} activities since {oldest}")
+
+
+def import_files(directory: Path, workers: int | None) -> None:
+    """Import the FIT/GPX/TCX files under ``directory`` into the local activities."""
+    db = get_db()
+    shown = False
+
+    def progress(stats: ImportStats) -> None:
+        nonlocal shown
+        shown = True
+        print(
+            f"  {stats.files} files: {stats.imported} imported, {stats.skipped} skipped, "
+            f"{stats.failed} failed ({stats.files_per_sec:.0f} files/s)",
+            end="\r",
+            flush=True,
+        )
+
+    stats = import_directory(db, directory, workers, on_progress=progress)
+    if shown:
+        print()
+    print(
+        f"Imported {stats.imported} of {stats.files} files from {directory} in {stats.secs:.1f}s "
+        f"({stats.files_per_sec:.0f} files/s); {stats.skipped} already imported, "
+        f"{stats.failed} failed"
+    )
+    for path, error in stats.errors[:10]:
+        print(f"  {path}: {error}")
+    if stats.run_ids:
+        update_activity_decoupling(db, stats.run_ids)
+        if update_best_efforts(db, stats.run_ids):
+            update_critical_speed_history(db)
+            refresh_analytics(db, ["race_predictor", "training_zones"])
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Parse the command line and run the requested command (default: fetch)."""
+    parser = argparse.ArgumentParser(prog="training_status")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("fetch", help="fetch data, print the report and save a snapshot")
+    commands.add_parser("rebuild-stats", help="recompute metric_stats from full history")
+    streams = commands.add_parser("sync-streams", help="download activity streams")
+    streams.add_argument("--days", type=int, default=30, help="how far back (default: 30)")
+    files = commands.add_parser("import", help="import FIT/GPX/TCX files from a directory tree")
+    files.add_argument("directory", type=Path)
+    files.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild-stats":
+        rebuild_stats()
+    elif args.command == "sync-streams":
+        sync_streams(args.days)
+    elif args.command == "import":
+        import_files(args.directory, args.workers)
+    else:
+        generate_report()
+
+
 if __name__ == "__main__":
-    generate_report()
+    main()
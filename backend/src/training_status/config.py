@@ -3,6 +3,7 @@
 from functools import lru_cache
 from pathlib import Path
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -40,6 +41,52 @@ class Settings(BaseSettings):
     cors_origins: list[str] = ["http://localhost:5173"]
     api_timeout: int = 30
 
+    # Outgoing requests: per-source timeouts in seconds (unset = api_timeout)
+    intervals_timeout: int | None = None
+    smashrun_timeout: int | None = None
+    strava_timeout: int | None = None
+    # Seconds each source may take in total during a fetch, all requests and
+    # retries included (unset = two of its request timeouts)
+    fetch_deadline: int | None = None
+    # Send every source's requests to a local stand-in that replays recorded
+    # responses (python -m benchmarks.replay serve) instead of the real APIs.
+    # Requires a db_path (and an enabled http_cache_path) outside data/.
+    api_stand_in_url: str | None = None
+    # On-disk cache of upstream GET responses, revalidated with ETag/Last-Modified
+    # and bounded by evicting the least recently used (0 MB = off)
+    http_cache_path: Path = base_dir / "data" / "http_cache.db"
+    http_cache_max_mb: int = 64
+    # Seconds a response is served without revalidating, by "source:URL path
+    # pattern", e.g. {"smashrun:*/my/stats": 7200}; overrides the built-in TTLs
+    http_cache_ttls: dict[str, int] = {}
+
+    # Download per-activity streams (HR, pace, cadence, altitude, GPS) on fetch
+    sync_streams: bool = False
+
+    # Scenario simulator: worker processes for very large grids (0 = single process)
+    scenario_workers: int = 0
+
+    @model_validator(mode="after")
+    def _stand_in_outside_data_dir(self) -> "Settings":
+        """Refuse to replay recorded responses into the real database or HTTP cache.
+
+        Replayed snapshots, activities, sync cursors and redacted OAuth tokens would
+        otherwise replace or shadow the real ones.
+        """
+        if not self.api_stand_in_url:
+            return self
+        data_dir = (self.base_dir / "data").resolve()
+        paths = {"DB_PATH": self.db_path}
+        if self.http_cache_max_mb > 0:
+            paths["HTTP_CACHE_PATH"] = self.http_cache_path
+        for name, path in paths.items():
+            if path.resolve().is_relative_to(data_dir):
+                raise ValueError(
+                    f"API_STAND_IN_URL is set but {name} ({path}) is inside {data_dir};"
+                    f" point {name} at a throwaway location"
+                )
+        return self
+
     model_config = {
         "env_file": Path(__file__).parent.parent.parent.parent / ".env",
         "env_file_encoding": "utf-8",
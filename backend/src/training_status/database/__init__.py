@@ -1,6 +1,6 @@
 """Database module."""
 
-from .db import Database, get_db
-from .schema import SNAPSHOT_COLUMNS
+from .db import Database, get_db, on_source_write
+from .schema import NUMERIC_SNAPSHOT_COLUMNS, SNAPSHOT_COLUMNS
 
-__all__ = ["Database", "get_db", "SNAPSHOT_COLUMNS"]
+__all__ = ["Database", "get_db", "on_source_write", "NUMERIC_SNAPSHOT_COLUMNS", "SNAPSHOT_COLUMNS"]
@@ -1,30 +1,166 @@
 """Database connection and query management."""
 
+import re
 import sqlite3
-from collections.abc import Iterator
+import threading
+from collections.abc import Callable, Iterable, Iterator
 from contextlib import contextmanager
 from pathlib import Path
 
 from .schema import (
+    CREATE_ACTIVITIES_SPORT_INDEX,
+    CREATE_ACTIVITIES_START_INDEX,
+    CREATE_ACTIVITIES_TABLE,
+    CREATE_ACTIVITY_BEST_EFFORTS_TABLE,
+    CREATE_ACTIVITY_DECOUPLING_TABLE,
+    CREATE_ACTIVITY_STREAMS_TABLE,
+    CREATE_ALERTS_TABLE,
+    CREATE_ANALYTICS_INPUTS_TABLE,
+    CREATE_ANALYTICS_RESULTS_TABLE,
     CREATE_ANNOTATIONS_TABLE,
+    CREATE_ANOMALY_STATE_TABLE,
+    CREATE_BEST_EFFORTS_TARGET_INDEX,
+    CREATE_CRITICAL_SPEED_HISTORY_TABLE,
+    CREATE_FITNESS_DAYS_TABLE,
     CREATE_GEAR_TABLE,
     CREATE_GOALS_TABLE,
     CREATE_HEALTH_EVENTS_TABLE,
+    CREATE_IMPORTED_FILES_TABLE,
+    CREATE_METRIC_STATS_TABLE,
+    CREATE_OAUTH_TOKENS_TABLE,
     CREATE_PERSONAL_RECORDS_TABLE,
     CREATE_SHARED_LINKS_TABLE,
+    CREATE_SMASHRUN_ACTIVITIES_START_INDEX,
+    CREATE_SMASHRUN_ACTIVITIES_TABLE,
+    CREATE_SNAPSHOTS_RECORDED_AT_INDEX,
     CREATE_SNAPSHOTS_TABLE,
+    CREATE_STRAVA_ACTIVITIES_START_INDEX,
+    CREATE_STRAVA_ACTIVITIES_TABLE,
+    CREATE_SYNC_STATE_TABLE,
     CREATE_TRAINING_NOTES_TABLE,
+    CREATE_WELLNESS_DAYS_TABLE,
+    CREATE_WELLNESS_VO2MAX_INDEX,
     INSERT_SNAPSHOT,
     MIGRATIONS,
     SNAPSHOT_COLUMNS,
 )
 
+_source_write_listeners: list[Callable[[], None]] = []
+
+# Named parameters of INSERT_SNAPSHOT, in order
+_INSERT_SNAPSHOT_KEYS = re.findall(r":(\w+)", INSERT_SNAPSHOT)
+
+# Period bucketing for goal adherence: (start of the period holding {d}, start of the next)
+GOAL_PERIODS = {
+    "week": (
+        "date({d}, '-' || ((CAST(strftime('%w', {d}) AS INTEGER) + 6) % 7) || ' days')",
+        "date({d}, '+7 days')",
+    ),
+    "month": ("date({d}, 'start of month')", "date({d}, '+1 month')"),
+    "year": ("date({d}, 'start of year')", "date({d}, '+1 year')"),
+}
+
+# Daily km comes from week_0_km (km so far this Monday-based week), last snapshot per day:
+# the day-over-day increase within a week, plus the week_1_km remainder for km logged
+# after the previous week's last snapshot. Periods run gap-free from the one holding
+# :start (or the first data) to the latest data; streak numbers each achieved period
+# within its run of consecutive achieved periods (gaps and islands).
+_GOAL_PERIODS_QUERY = """
+    WITH ranked AS (
+        SELECT substr(recorded_at, 1, 10) AS day, week_0_km, week_1_km,
+               ROW_NUMBER() OVER (
+                   PARTITION BY substr(recorded_at, 1, 10) ORDER BY recorded_at DESC
+               ) AS rn
+        FROM snapshots
+        WHERE week_0_km IS NOT NULL
+    ),
+    days AS (
+        SELECT day, week_0_km, week_1_km, {week_of_day} AS week_start
+        FROM ranked WHERE rn = 1
+    ),
+    steps AS (
+        SELECT day, week_start, week_0_km, week_1_km,
+               LAG(week_start) OVER (ORDER BY day) AS prev_week_start,
+               LAG(week_0_km) OVER (ORDER BY day) AS prev_week_0_km
+        FROM days
+    ),
+    daily_km AS (
+        SELECT day,
+               CASE WHEN prev_week_start = week_start
+                    THEN week_0_km - prev_week_0_km ELSE week_0_km END AS km
+        FROM steps
+        UNION ALL
+        SELECT date(week_start, '-1 day'), MAX(week_1_km - prev_week_0_km, 0)
+        FROM steps
+        WHERE prev_week_start = date(week_start, '-7 days') AND week_1_km IS NOT NULL
+    ),
+    bounds AS (
+        SELECT {period_of_start} AS first_period, {period_of_last} AS last_period
+        FROM (SELECT MIN(day) AS first_day, MAX(day) AS last_day FROM daily_km)
+    ),
+    periods(period_start) AS (
+        SELECT first_period FROM bounds WHERE first_period <= last_period
+        UNION ALL
+        SELECT {next_period} FROM periods, bounds WHERE period_start < last_period
+    ),
+    totals AS (
+        SELECT {period_of_day} AS period_start, SUM(km) AS actual_km
+        FROM daily_km GROUP BY 1
+    ),
+    scored AS (
+        SELECT p.period_start, COALESCE(t.actual_km, 0) AS actual_km,
+               COALESCE(t.actual_km, 0) >= :target AS achieved,
+               p.period_start = {period_of_today} AS in_progress,
+               ROW_NUMBER() OVER (ORDER BY p.period_start) AS idx
+        FROM periods p LEFT JOIN totals t USING (period_start)
+    ),
+    islands AS (
+        SELECT *, idx - ROW_NUMBER() OVER (PARTITION BY achieved ORDER BY idx) AS island
+        FROM scored
+    )
+    SELECT period_start, actual_km, achieved, in_progress,
+           CASE WHEN achieved
+                THEN ROW_NUMBER() OVER (PARTITION BY achieved, island ORDER BY idx)
+                ELSE 0 END AS streak
+    FROM islands
+    ORDER BY period_start
+"""
+
+
+def _bump_analytics_input(conn: sqlite3.Connection, table: str) -> None:
+    """Count a write to a table materialized analytics read (see ``analytics_inputs``)."""
+    conn.execute(
+        """INSERT INTO analytics_inputs (name, generation) VALUES (?, 1)
+           ON CONFLICT(name) DO UPDATE SET generation = generation + 1""",
+        (table,),
+    )
+
+
+def on_source_write(listener: Callable[[], None]) -> None:
+    """Register a callback run after a write to source data (e.g. cache invalidation).
+
+    Source data is what everything else is derived from: snapshots, goals and
+    activities. Writes to derived and cache tables (analytics results, metric
+    stats, best efforts...) do not call it, so reads that refresh those keep
+    caches warm.
+    """
+    if listener not in _source_write_listeners:
+        _source_write_listeners.append(listener)
+
+
+def _source_written() -> None:
+    for listener in _source_write_listeners:
+        listener()
+
 
 class Database:
     """SQLite database manager."""
 
     def __init__(self, db_path: Path):
         self.db_path = db_path
+        self._added_snapshot_columns: set[str] = set()  # see add_snapshot_columns
+        self._commit_lock = threading.Lock()
+        self._expired = False  # see expire
         self._ensure_dir()
 
     def _ensure_dir(self) -> None:
@@ -37,10 +173,28 @@ class Database:
         conn = sqlite3.connect(self.db_path)
         try:
             yield conn
-            conn.commit()
+            with self._commit_lock:
+                if self._expired and conn.in_transaction:
+                    conn.rollback()
+                    raise RuntimeError("Database handle expired; transaction rolled back")
+                conn.commit()
         finally:
             conn.close()
 
+    def detached(self) -> "Database":
+        """Get a new handle on the same database file, e.g. for a worker thread."""
+        return Database(self.db_path)
+
+    def expire(self) -> None:
+        """Stop this handle from committing: every later write is rolled back.
+
+        For handles given to work that may outlive its caller (a fetch past its
+        deadline), so nothing it writes lands after the caller moved on. A
+        commit in progress finishes first; the next one raises RuntimeError.
+        """
+        with self._commit_lock:
+            self._expired = True
+
     def init_schema(self) -> None:
         """Initialize database schema with migrations."""
         with self.connection() as conn:
@@ -53,6 +207,30 @@ class Database:
             conn.execute(CREATE_HEALTH_EVENTS_TABLE)
             conn.execute(CREATE_ANNOTATIONS_TABLE)
             conn.execute(CREATE_SHARED_LINKS_TABLE)
+            conn.execute(CREATE_ANALYTICS_RESULTS_TABLE)
+            conn.execute(CREATE_ANALYTICS_INPUTS_TABLE)
+            conn.execute(CREATE_FITNESS_DAYS_TABLE)
+            conn.execute(CREATE_METRIC_STATS_TABLE)
+            conn.execute(CREATE_SNAPSHOTS_RECORDED_AT_INDEX)
+            conn.execute(CREATE_ALERTS_TABLE)
+            conn.execute(CREATE_ANOMALY_STATE_TABLE)
+            conn.execute(CREATE_ACTIVITIES_TABLE)
+            conn.execute(CREATE_ACTIVITIES_START_INDEX)
+            conn.execute(CREATE_ACTIVITIES_SPORT_INDEX)
+            conn.execute(CREATE_ACTIVITY_STREAMS_TABLE)
+            conn.execute(CREATE_ACTIVITY_DECOUPLING_TABLE)
+            conn.execute(CREATE_ACTIVITY_BEST_EFFORTS_TABLE)
+            conn.execute(CREATE_BEST_EFFORTS_TARGET_INDEX)
+            conn.execute(CREATE_CRITICAL_SPEED_HISTORY_TABLE)
+            conn.execute(CREATE_SYNC_STATE_TABLE)
+            conn.execute(CREATE_WELLNESS_DAYS_TABLE)
+            conn.execute(CREATE_WELLNESS_VO2MAX_INDEX)
+            conn.execute(CREATE_SMASHRUN_ACTIVITIES_TABLE)
+            conn.execute(CREATE_SMASHRUN_ACTIVITIES_START_INDEX)
+            conn.execute(CREATE_OAUTH_TOKENS_TABLE)
+            conn.execute(CREATE_STRAVA_ACTIVITIES_TABLE)
+            conn.execute(CREATE_STRAVA_ACTIVITIES_START_INDEX)
+            conn.execute(CREATE_IMPORTED_FILES_TABLE)
 
             # Apply migrations
             for col, typ in MIGRATIONS:
@@ -60,12 +238,49 @@ class Database:
                     conn.execute(f"ALTER TABLE snapshots ADD COLUMN {col} {typ}")
                 except sqlite3.OperationalError:
                     pass  # Column already exists
+            try:
+                conn.execute(
+                    "ALTER TABLE analytics_results"
+                    " ADD COLUMN input_generation INTEGER NOT NULL DEFAULT 0"
+                )
+            except sqlite3.OperationalError:
+                pass  # Column already exists
 
     def insert_snapshot(self, data: dict) -> int:
-        """Insert a new snapshot. Returns the new row ID."""
+        """Insert a new snapshot. Returns the new row ID.
+
+        Besides INSERT_SNAPSHOT's columns, writes the keys that are columns
+        added with ``add_snapshot_columns``; other keys are ignored.
+        """
+        query = INSERT_SNAPSHOT
+        extra = [c for c in data if c in self._added_snapshot_columns]
+        if extra:
+            cols = [*_INSERT_SNAPSHOT_KEYS, *extra]
+            query = (
+                f"INSERT INTO snapshots ({', '.join(cols)}) "
+                f"VALUES ({', '.join(f':{c}' for c in cols)})"
+            )
         with self.connection() as conn:
-            cursor = conn.execute(INSERT_SNAPSHOT, data)
-            return cursor.lastrowid  # type: ignore[return-value]
+            cursor = conn.execute(query, data)
+        _source_written()
+        return cursor.lastrowid  # type: ignore[return-value]
+
+    def add_snapshot_columns(self, columns: dict[str, str]) -> list[str]:
+        """Add the snapshot columns (name -> SQL type) that do not exist yet.
+
+        Lets a data source contribute columns without a migration; from then on
+        ``insert_snapshot`` writes them too. Returns the names of the columns added.
+        """
+        invalid = [c for c, typ in columns.items() if not (c.isidentifier() and typ.isidentifier())]
+        if invalid:
+            raise ValueError(f"Invalid column definition(s): {invalid}")
+        with self.connection() as conn:
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(snapshots)")}
+            added = [c for c in columns if c not in existing]
+            for col in added:
+                conn.execute(f"ALTER TABLE snapshots ADD COLUMN {col} {columns[col]}")
+        self._added_snapshot_columns.update(c for c in columns if c not in _INSERT_SNAPSHOT_KEYS)
+        return added
 
     def get_latest_snapshot(self) -> tuple | None:
         """Get the most recent snapshot."""
@@ -86,10 +301,13 @@ class Database:
             ).fetchall()
         return total, rows
 
-    def get_snapshots_for_analytics(self, columns: list[str], limit: int = 30) -> list[tuple]:
-        """Get specific columns for analytics.
+    def get_snapshots_for_analytics(
+        self, columns: list[str], limit: int | None = 30
+    ) -> list[tuple]:
+        """Get specific columns for analytics, newest first.
 
         Only columns present in SNAPSHOT_COLUMNS are allowed; unknown names raise ValueError.
+        ``limit=None`` returns the full history.
         """
         _valid = set(SNAPSHOT_COLUMNS)
         invalid = [c for c in columns if c not in _valid]
@@ -98,7 +316,8 @@ class Database:
         cols = ", ".join(columns)
         with self.connection() as conn:
             return conn.execute(  # type: ignore[return-value]
-                f"SELECT {cols} FROM snapshots ORDER BY recorded_at DESC LIMIT ?", (limit,)
+                f"SELECT {cols} FROM snapshots ORDER BY recorded_at DESC LIMIT ?",
+                (-1 if limit is None else limit,),
             ).fetchall()
 
     def get_history(self, days: int = 7) -> list[tuple]:
@@ -137,11 +356,44 @@ class Database:
                    VALUES (?, ?, ?, ?, 1)""",
                 (datetime.now().isoformat(), goal_type, target_value, period_start),
             )
+        _source_written()
 
     def deactivate_goal(self, goal_id: int) -> None:
         """Deactivate a goal."""
         with self.connection() as conn:
             conn.execute("UPDATE goals SET is_active = 0 WHERE id = ?", (goal_id,))
+        _source_written()
+
+    def get_goal_periods(
+        self, period: str, target: float, start: str | None = None, today: str | None = None
+    ) -> list[sqlite3.Row]:
+        """Km per goal period (week/month/year) since ``start``, with adherence streaks.
+
+        Rows: period_start, actual_km, achieved, in_progress (the period holding
+        ``today``) and streak (position within the current run of achieved periods,
+        0 when missed). ``start=None`` goes back to the first snapshot.
+        """
+        from datetime import date
+
+        if period not in GOAL_PERIODS:
+            raise ValueError(f"Unknown goal period: {period}")
+        bucket, step = GOAL_PERIODS[period]
+        query = _GOAL_PERIODS_QUERY.format(
+            week_of_day=GOAL_PERIODS["week"][0].format(d="day"),
+            period_of_start=bucket.format(d="COALESCE(:start, first_day)"),
+            period_of_last=bucket.format(d="last_day"),
+            next_period=step.format(d="period_start"),
+            period_of_day=bucket.format(d="day"),
+            period_of_today=bucket.format(d=":today"),
+        )
+        params = {
+            "target": target,
+            "start": start[:10] if start else None,
+            "today": today or date.today().isoformat(),
+        }
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(query, params).fetchall()  # type: ignore[return-value]
 
     # --- Personal Records ---
 
@@ -374,12 +626,723 @@ class Database:
         with self.connection() as conn:
             conn.execute("UPDATE shared_links SET is_active = 0 WHERE token = ?", (token,))
 
+    # --- Materialized Analytics ---
+
+    def get_analytics_result(self, name: str, inputs: Iterable[str] = ()) -> sqlite3.Row | None:
+        """Get a stored analytics result together with the state of its inputs now.
+
+        The row always carries ``latest_snapshot_id`` and ``latest_input_generation``
+        (the summed write counters of the ``inputs`` tables) so callers can detect
+        staleness without a second query; the other columns are NULL if nothing is
+        stored yet.
+        """
+        inputs = list(inputs)
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(  # type: ignore[no-any-return]
+                f"""SELECT r.version, r.snapshot_id, r.input_generation, r.computed_at,
+                           r.payload,
+                           (SELECT MAX(id) FROM snapshots) AS latest_snapshot_id,
+                           (SELECT COALESCE(SUM(generation), 0) FROM analytics_inputs
+                            WHERE name IN ({", ".join("?" * len(inputs))}))
+                               AS latest_input_generation
+                    FROM (SELECT 1) LEFT JOIN analytics_results r ON r.name = ?""",
+                (*inputs, name),
+            ).fetchone()
+
+    def save_analytics_result(
+        self,
+        name: str,
+        version: int,
+        snapshot_id: int | None,
+        payload: str,
+        input_generation: int = 0,
+    ) -> None:
+        """Insert or replace the stored JSON payload for one analytic."""
+        from datetime import datetime
+
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT INTO analytics_results
+                   (name, version, snapshot_id, computed_at, payload, input_generation)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET
+                       version=excluded.version, snapshot_id=excluded.snapshot_id,
+                       computed_at=excluded.computed_at, payload=excluded.payload,
+                       input_generation=excluded.input_generation""",
+                (
+                    name,
+                    version,
+                    snapshot_id,
+                    datetime.now().isoformat(),
+                    payload,
+                    input_generation,
+                ),
+            )
+
+    def get_latest_snapshot_id(self) -> int | None:
+        """Get the ID of the newest snapshot (None if the table is empty)."""
+        with self.connection() as conn:
+            return conn.execute("SELECT MAX(id) FROM snapshots").fetchone()[0]  # type: ignore[no-any-return]
+
+    def get_snapshot_columns(self, snapshot_id: int, columns: list[str]) -> tuple | None:
+        """Get specific columns of one snapshot by ID.
+
+        Allowed columns are SNAPSHOT_COLUMNS plus the raw payload columns
+        (``intervals_json``, ``smashrun_json``); unknown names raise ValueError.
+        """
+        _valid = {*SNAPSHOT_COLUMNS, "intervals_json", "smashrun_json"}
+        invalid = [c for c in columns if c not in _valid]
+        if invalid:
+            raise ValueError(f"Unknown column(s) requested: {invalid}")
+        with self.connection() as conn:
+            return conn.execute(  # type: ignore[no-any-return]
+                f"SELECT {', '.join(columns)} FROM snapshots WHERE id = ?", (snapshot_id,)
+            ).fetchone()
+
+    def get_snapshots_after(self, snapshot_id: int, columns: list[str]) -> list[tuple]:
+        """Get specific columns of every snapshot with ID > ``snapshot_id``, oldest ID first."""
+        invalid = [c for c in columns if c not in set(SNAPSHOT_COLUMNS)]
+        if invalid:
+            raise ValueError(f"Unknown column(s) requested: {invalid}")
+        with self.connection() as conn:
+            return conn.execute(  # type: ignore[return-value]
+                f"SELECT {', '.join(columns)} FROM snapshots WHERE id > ? ORDER BY id",
+                (snapshot_id,),
+            ).fetchall()
+
+    def get_snapshots_between(self, columns: list[str], start: str, end: str) -> list[tuple]:
+        """Get ``recorded_at`` plus the columns for start <= recorded_at < end, oldest first."""
+        invalid = [c for c in columns if c not in set(SNAPSHOT_COLUMNS)]
+        if invalid:
+            raise ValueError(f"Unknown column(s) requested: {invalid}")
+        with self.connection() as conn:
+            return conn.execute(  # type: ignore[return-value]
+                f"""SELECT recorded_at, {", ".join(columns)} FROM snapshots
+                    WHERE recorded_at >= ? AND recorded_at < ? ORDER BY recorded_at""",
+                (start, end),
+            ).fetchall()
+
+    # --- Fitness Series ---
+
+    def get_fitness_days(self, limit: int | None = None) -> list[sqlite3.Row]:
+        """Get daily load/CTL/ATL rows, newest first (``limit=None`` for all)."""
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                "SELECT day, load, ctl, atl FROM fitness_days ORDER BY day DESC LIMIT ?",
+                (-1 if limit is None else limit,),
+            ).fetchall()
+
+    def get_latest_fitness_day(self) -> sqlite3.Row | None:
+        """Get the newest fitness day row."""
+        rows = self.get_fitness_days(limit=1)
+        return rows[0] if rows else None
+
+    def get_fitness_day_before(self, day: str) -> sqlite3.Row | None:
+        """Get the newest fitness day row strictly before ``day``."""
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(  # type: ignore[no-any-return]
+                """SELECT day, load, ctl, atl FROM fitness_days
+                   WHERE day < ? ORDER BY day DESC LIMIT 1""",
+                (day,),
+            ).fetchone()
+
+    def upsert_fitness_day(self, day: str, load: float, ctl: float, atl: float) -> None:
+        """Insert or replace one day of the fitness series."""
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT INTO fitness_days (day, load, ctl, atl) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(day) DO UPDATE SET
+                       load=excluded.load, ctl=excluded.ctl, atl=excluded.atl""",
+                (day, load, ctl, atl),
+            )
+            _bump_analytics_input(conn, "fitness_days")
+
+    # --- Metric Stats ---
+
+    def get_metric_stats(
+        self, metrics: list[str] | None = None, window_days: int | None = None
+    ) -> list[sqlite3.Row]:
+        """Get stored running stats, optionally filtered by metric names and window."""
+        query = "SELECT * FROM metric_stats WHERE 1=1"
+        params: list[object] = []
+        if metrics is not None:
+            query += f" AND metric IN ({', '.join('?' * len(metrics))})"
+            params.extend(metrics)
+        if window_days is not None:
+            query += " AND window_days = ?"
+            params.append(window_days)
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(query, params).fetchall()
+
+    def get_metric_stats_snapshot_id(self) -> int | None:
+        """Get the ID of the last snapshot applied to ``metric_stats`` (None if empty)."""
+        with self.connection() as conn:
+            return conn.execute("SELECT MIN(snapshot_id) FROM metric_stats").fetchone()[0]  # type: ignore[no-any-return]
+
+    def replace_metric_stats(self, rows: list[tuple], clear: bool = False) -> None:
+        """Upsert running stats rows in one transaction (``clear`` empties the table first).
+
+        Row order: metric, window_days, n, mean, m2, ewma, ewm_var, prev_ewma,
+        prev_ewm_var, last_day, last_value, snapshot_id.
+        """
+        from datetime import datetime
+
+        now = datetime.now().isoformat()
+        with self.connection() as conn:
+            if clear:
+                conn.execute("DELETE FROM metric_stats")
+            conn.executemany(
+                """INSERT OR REPLACE INTO metric_stats
+                   (metric, window_days, n, mean, m2, ewma, ewm_var, prev_ewma,
+                    prev_ewm_var, last_day, last_value, snapshot_id, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(*row, now) for row in rows],
+            )
+
+    # --- Alerts ---
+
+    def create_alert(
+        self,
+        day: str,
+        metric: str,
+        detector: str,
+        severity: str,
+        value: float,
+        baseline_mean: float,
+        baseline_std: float,
+        statistic: float,
+        message: str,
+        snapshot_id: int | None = None,
+    ) -> int:
+        """Insert an alert. Returns the new row ID."""
+        from datetime import datetime
+
+        with self.connection() as conn:
+            cursor = conn.execute(
+                """INSERT INTO alerts
+                   (created_at, day, metric, detector, severity, value, baseline_mean,
+                    baseline_std, statistic, message, snapshot_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    datetime.now().isoformat(),
+                    day,
+                    metric,
+                    detector,
+                    severity,
+                    value,
+                    baseline_mean,
+                    baseline_std,
+                    statistic,
+                    message,
+                    snapshot_id,
+                ),
+            )
+            return cursor.lastrowid  # type: ignore[return-value]
+
+    def get_alerts(
+        self, limit: int = 50, before_id: int | None = None, metric: str | None = None
+    ) -> list[sqlite3.Row]:
+        """Get alerts newest first, starting below ``before_id`` (keyset pagination)."""
+        query = "SELECT * FROM alerts WHERE id < ?"
+        params: list[object] = [before_id if before_id is not None else 2**63 - 1]
+        if metric is not None:
+            query += " AND metric = ?"
+            params.append(metric)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(query, params).fetchall()
+
+    def delete_alerts(self, metric: str, day: str) -> None:
+        """Delete the alerts raised for one metric on one day."""
+        with self.connection() as conn:
+            conn.execute("DELETE FROM alerts WHERE metric = ? AND day = ?", (metric, day))
+
+    def get_anomaly_states(self) -> list[sqlite3.Row]:
+        """Get the per-metric anomaly detector state."""
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute("SELECT * FROM anomaly_state").fetchall()
+
+    def save_anomaly_state(
+        self,
+        metric: str,
+        day: str,
+        ewma: float,
+        cusum: float,
+        ewma_alarm: bool,
+        cusum_alarm: bool,
+        prev_ewma: float,
+        prev_cusum: float,
+        prev_ewma_alarm: bool,
+        prev_cusum_alarm: bool,
+    ) -> None:
+        """Insert or replace one metric's detector state."""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO anomaly_state VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    metric,
+                    day,
+                    ewma,
+                    cusum,
+                    int(ewma_alarm),
+                    int(cusum_alarm),
+                    prev_ewma,
+                    prev_cusum,
+                    int(prev_ewma_alarm),
+                    int(prev_cusum_alarm),
+                ),
+            )
+
+    # --- Activities & Streams ---
+
+    def upsert_activity(
+        self,
+        activity_id: str,
+        start_date_local: str,
+        sport: str | None = None,
+        distance_m: float | None = None,
+        moving_time_secs: float | None = None,
+        average_hr: float | None = None,
+    ) -> None:
+        """Insert or update one activity's summary."""
+        from datetime import datetime
+
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO activities
+                   (id, start_date_local, sport, distance_m, moving_time_secs, average_hr,
+                    updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    activity_id,
+                    start_date_local,
+                    sport,
+                    distance_m,
+                    moving_time_secs,
+                    average_hr,
+                    datetime.now().isoformat(),
+                ),
+            )
+        _source_written()
+
+    def get_activities(
+        self, start: str | None = None, end: str | None = None, sport: str | None = None
+    ) -> list[sqlite3.Row]:
+        """Get activities oldest first, optionally within [start, end] days and one sport."""
+        query = """SELECT * FROM activities
+                   WHERE start_date_local >= ? AND start_date_local < date(?, '+1 day')"""
+        params: list[object] = [start or "", end or "9999-12-30"]
+        if sport is not None:
+            query += " AND sport = ?"
+            params.append(sport)
+        query += " ORDER BY start_date_local"
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(query, params).fetchall()
+
+    def save_activity_streams(self, activity_id: str, rows: list[tuple]) -> None:
+        """Replace an activity's streams (dropping what was derived from the old ones).
+
+        rows: (stream, dtype, scale, base, length, data, nulls) as encoded by services.streams.
+        """
+        with self.connection() as conn:
+            conn.execute("DELETE FROM activity_streams WHERE activity_id = ?", (activity_id,))
+            conn.execute("DELETE FROM activity_decoupling WHERE activity_id = ?", (activity_id,))
+            conn.execute("DELETE FROM activity_best_efforts WHERE activity_id = ?", (activity_id,))
+            conn.executemany(
+                """INSERT INTO activity_streams
+                   (activity_id, stream, dtype, scale, base, length, data, nulls)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(activity_id, *row) for row in rows],
+            )
+
+    def get_activity_streams(
+        self, activity_id: str, streams: list[str] | None = None
+    ) -> list[sqlite3.Row]:
+        """Get an activity's encoded streams, optionally only the named ones."""
+        query = "SELECT * FROM activity_streams WHERE activity_id = ?"
+        params: list[object] = [activity_id]
+        if streams is not None:
+            query += f" AND stream IN ({', '.join('?' * len(streams))})"
+            params.extend(streams)
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(query, params).fetchall()
+
+    def get_streamed_activity_ids(self) -> set[str]:
+        """Ids of the activities that have streams stored."""
+        with self.connection() as conn:
+            rows = conn.execute("SELECT DISTINCT activity_id FROM activity_streams").fetchall()
+        return {r[0] for r in rows}
+
+    def get_activity_decoupling(self, activity_ids: list[str]) -> list[sqlite3.Row]:
+        """Get the stored decoupling results for the given activities."""
+        if not activity_ids:
+            return []
+        placeholders = ", ".join("?" * len(activity_ids))
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(  # type: ignore[return-value]
+                f"SELECT * FROM activity_decoupling WHERE activity_id IN ({placeholders})",
+                activity_ids,
+            ).fetchall()
+
+    def save_activity_decoupling(
+        self,
+        activity_id: str,
+        version: int,
+        duration_secs: float,
+        avg_hr: float | None,
+        avg_speed: float | None,
+        ef_first: float | None,
+        ef_second: float | None,
+        decoupling_pct: float | None,
+        steady: bool,
+    ) -> None:
+        """Insert or replace one activity's decoupling result."""
+        from datetime import datetime
+
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO activity_decoupling VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    activity_id,
+                    version,
+                    duration_secs,
+                    avg_hr,
+                    avg_speed,
+                    ef_first,
+                    ef_second,
+                    decoupling_pct,
+                    int(steady),
+                    datetime.now().isoformat(),
+                ),
+            )
+
+    def save_best_efforts(self, activity_id: str, version: int, rows: list[tuple]) -> None:
+        """Replace an activity's best efforts; rows are (kind, target, value)."""
+        with self.connection() as conn:
+            conn.execute("DELETE FROM activity_best_efforts WHERE activity_id = ?", (activity_id,))
+            conn.executemany(
+                "INSERT INTO activity_best_efforts VALUES (?, ?, ?, ?, ?)",
+                [(activity_id, kind, target, value, version) for kind, target, value in rows],
+            )
+
+    def get_best_effort_versions(self) -> dict[str, int]:
+        """Version of the stored best efforts per activity."""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT activity_id, MIN(version) FROM activity_best_efforts GROUP BY activity_id"
+            ).fetchall()
+        return {r[0]: r[1] for r in rows}
+
+    def get_activity_best_efforts(self, activity_id: str) -> list[sqlite3.Row]:
+        """Get one activity's best efforts ordered by kind and target."""
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                """SELECT kind, target, value FROM activity_best_efforts
+                   WHERE activity_id = ? ORDER BY kind, target""",
+                (activity_id,),
+            ).fetchall()
+
+    def get_mean_max_curve(
+        self, kind: str, start: str | None = None, end: str | None = None
+    ) -> list[sqlite3.Row]:
+        """Best effort per target over the activities within [start, end] days.
+
+        kind "duration": the longest distance per target seconds; kind "distance":
+        the shortest time per target metres. Rows are (target, value, activity_id,
+        date) ordered by target; ties go to the earliest activity.
+        """
+        if kind not in ("duration", "distance"):
+            raise ValueError(f"Unknown effort kind: {kind}")
+        order = "e.value DESC" if kind == "duration" else "e.value"
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                f"""SELECT target, value, activity_id, date FROM (
+                       SELECT e.target, e.value, e.activity_id,
+                              substr(a.start_date_local, 1, 10) AS date,
+                              ROW_NUMBER() OVER (
+                                  PARTITION BY e.target ORDER BY {order}, a.start_date_local
+                              ) AS rank
+                       FROM activity_best_efforts e
+                       JOIN activities a ON a.id = e.activity_id
+                       WHERE e.kind = ?
+                         AND a.start_date_local >= ?
+                         AND a.start_date_local < date(?, '+1 day')
+                   )
+                   WHERE rank = 1
+                   ORDER BY target""",
+                (kind, start or "", end or "9999-12-30"),
+            ).fetchall()
+
+    def get_best_efforts(self, kind: str, targets: list[float]) -> list[sqlite3.Row]:
+        """Every activity's efforts at the given targets: (date, activity_id, target, value).
+
+        Ordered by activity start.
+        """
+        placeholders = ", ".join("?" * len(targets))
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                f"""SELECT substr(a.start_date_local, 1, 10) AS date, e.activity_id,
+                           e.target, e.value
+                    FROM activity_best_efforts e
+                    JOIN activities a ON a.id = e.activity_id
+                    WHERE e.kind = ? AND e.target IN ({placeholders})
+                    ORDER BY a.start_date_local, e.activity_id, e.target""",
+                [kind, *targets],
+            ).fetchall()
+
+    # --- Critical Speed History ---
+
+    def replace_critical_speed_history(self, rows: list[tuple]) -> None:
+        """Replace the whole critical speed series in one transaction.
+
+        Row order: day, window_days, critical_speed, d_prime, cs_low, cs_high,
+        d_prime_low, d_prime_high, efforts.
+        """
+        from datetime import datetime
+
+        now = datetime.now().isoformat()
+        with self.connection() as conn:
+            conn.execute("DELETE FROM critical_speed_history")
+            conn.executemany(
+                "INSERT INTO critical_speed_history VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*row, now) for row in rows],
+            )
+            _bump_analytics_input(conn, "critical_speed_history")
+
+    def get_critical_speed_history(
+        self, window_days: int, start: str | None = None, end: str | None = None
+    ) -> list[sqlite3.Row]:
+        """Get one window length's critical speed series, oldest first."""
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                """SELECT * FROM critical_speed_history
+                   WHERE window_days = ? AND day >= ? AND day <= ?
+                   ORDER BY day""",
+                (window_days, start or "", end or "9999-12-31"),
+            ).fetchall()
+
+    def get_latest_critical_speed(self, window_days: int) -> sqlite3.Row | None:
+        """Get the most recent critical speed fit for a window length."""
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(
+                """SELECT * FROM critical_speed_history WHERE window_days = ?
+                   ORDER BY day DESC LIMIT 1""",
+                (window_days,),
+            ).fetchone()
+
+    # --- Sync State ---
+
+    def get_sync_cursor(self, source: str, endpoint: str) -> str | None:
+        """Get how far the last incremental sync of a source endpoint got, if ever."""
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT cursor FROM sync_state WHERE source = ? AND endpoint = ?",
+                (source, endpoint),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_sync_cursor(self, source: str, endpoint: str, cursor: str) -> None:
+        """Record how far a source endpoint has been synced."""
+        from datetime import datetime
+
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT INTO sync_state (source, endpoint, cursor, updated_at)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(source, endpoint) DO UPDATE SET
+                       cursor=excluded.cursor, updated_at=excluded.updated_at""",
+                (source, endpoint, cursor, datetime.now().isoformat()),
+            )
+
+    # --- Wellness ---
+
+    def upsert_wellness_days(self, rows: list[tuple]) -> None:
+        """Insert or replace wellness days: (day, vo2max, data JSON) rows."""
+        from datetime import datetime
+
+        now = datetime.now().isoformat()
+        with self.connection() as conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO wellness_days (day, vo2max, data, updated_at)
+                   VALUES (?, ?, ?, ?)""",
+                [(*row, now) for row in rows],
+            )
+
+    def get_latest_wellness_day(self) -> sqlite3.Row | None:
+        """Get the newest stored wellness day."""
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(  # type: ignore[no-any-return]
+                "SELECT day, vo2max, data FROM wellness_days ORDER BY day DESC LIMIT 1"
+            ).fetchone()
+
+    def get_latest_vo2max(self) -> float | None:
+        """Get the most recent non-null VO2max (served by the partial index)."""
+        with self.connection() as conn:
+            row = conn.execute(
+                """SELECT vo2max FROM wellness_days WHERE vo2max IS NOT NULL
+                   ORDER BY day DESC LIMIT 1"""
+            ).fetchone()
+        return row[0] if row else None
+
+    # --- Smashrun Activities ---
+
+    def upsert_smashrun_activities(self, rows: list[tuple]) -> None:
+        """Insert or replace cached Smashrun activities.
+
+        rows: (id, start_date_local, activity_type, distance_km, data JSON).
+        """
+        from datetime import datetime
+
+        now = datetime.now().isoformat()
+        with self.connection() as conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO smashrun_activities
+                   (id, start_date_local, activity_type, distance_km, data, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [(*row, now) for row in rows],
+            )
+
+    def get_latest_smashrun_activity(self, activity_type: str | None = None) -> sqlite3.Row | None:
+        """Get the most recently started cached Smashrun activity, optionally of one type."""
+        query = "SELECT * FROM smashrun_activities"
+        params: list[object] = []
+        if activity_type is not None:
+            query += " WHERE activity_type = ?"
+            params.append(activity_type)
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(  # type: ignore[no-any-return]
+                query + " ORDER BY start_date_local DESC LIMIT 1", params
+            ).fetchone()
+
+    def get_smashrun_km(self, start: str, end: str, activity_type: str = "running") -> float:
+        """Get the cached km of one activity type within [start, end] days."""
+        with self.connection() as conn:
+            row = conn.execute(
+                """SELECT COALESCE(SUM(distance_km), 0) FROM smashrun_activities
+                   WHERE activity_type = ?
+                     AND start_date_local >= ? AND start_date_local < date(?, '+1 day')""",
+                (activity_type, start, end),
+            ).fetchone()
+        return float(row[0])
+
+    # --- Strava ---
+
+    def get_oauth_token(self, source: str) -> sqlite3.Row | None:
+        """Get a source's cached OAuth tokens."""
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(  # type: ignore[no-any-return]
+                "SELECT * FROM oauth_tokens WHERE source = ?", (source,)
+            ).fetchone()
+
+    def save_oauth_token(
+        self, source: str, access_token: str, refresh_token: str | None, expires_at: float
+    ) -> None:
+        """Cache a source's OAuth tokens (replacing the previous ones)."""
+        from datetime import datetime
+
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO oauth_tokens
+                   (source, access_token, refresh_token, expires_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (source, access_token, refresh_token, expires_at, datetime.now().isoformat()),
+            )
+
+    def upsert_strava_activities(self, rows: list[tuple]) -> None:
+        """Insert or replace Strava activity summaries.
+
+        rows: (id, start_date, start_date_local, type, distance_m, moving_time_secs).
+        """
+        from datetime import datetime
+
+        now = datetime.now().isoformat()
+        with self.connection() as conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO strava_activities
+                   (id, start_date, start_date_local, type, distance_m, moving_time_secs,
+                    updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                [(*row, now) for row in rows],
+            )
+
+    def get_strava_km(self, start: str, end: str, activity_type: str = "Run") -> float:
+        """Get the synced Strava km of one activity type within [start, end] days."""
+        with self.connection() as conn:
+            row = conn.execute(
+                """SELECT COALESCE(SUM(distance_m), 0) / 1000.0 FROM strava_activities
+                   WHERE type = ?
+                     AND start_date_local >= ? AND start_date_local < date(?, '+1 day')""",
+                (activity_type, start, end),
+            ).fetchone()
+        return float(row[0])
+
+    # --- Imported Files ---
+
+    def get_imported_file_hashes(self) -> set[str]:
+        """Content hashes of every activity file imported so far."""
+        with self.connection() as conn:
+            rows = conn.execute("SELECT content_hash FROM imported_files").fetchall()
+        return {r[0] for r in rows}
+
+    def save_imported_activities(
+        self, files: list[tuple], activities: list[tuple], streams: list[tuple]
+    ) -> None:
+        """Store a batch of imported activity files in one transaction.
+
+        files: (content_hash, path, activity_id);
+        activities: (id, start_date_local, sport, distance_m, moving_time_secs, average_hr);
+        streams: (activity_id, stream, dtype, scale, base, length, data, nulls).
+        """
+        from datetime import datetime
+
+        now = datetime.now().isoformat()
+        with self.connection() as conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO activities
+                   (id, start_date_local, sport, distance_m, moving_time_secs, average_hr,
+                    updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                [(*row, now) for row in activities],
+            )
+            conn.executemany(
+                """INSERT OR REPLACE INTO activity_streams
+                   (activity_id, stream, dtype, scale, base, length, data, nulls)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                streams,
+            )
+            conn.executemany(
+                """INSERT OR REPLACE INTO imported_files
+                   (content_hash, path, activity_id, imported_at)
+                   VALUES (?, ?, ?, ?)""",
+                [(*row, now) for row in files],
+            )
+        _source_written()
+
 
 # Singleton instance — intentionally process-scoped.
 # This works correctly with a single uvicorn worker (the default for this project).
 # If you ever switch to multi-worker mode (--workers N > 1), each worker gets its
 # own copy of this variable, which is safe with SQLite (one writer at a time) but
-# means schema init runs once per worker. Do not share this instance across threads.
+# means schema init runs once per worker. Do not share this instance across threads:
+# hand other threads a ``detached()`` handle (as ``run_sources`` does per fetcher).
 _db_instance: Database | None = None
 
 
@@ -72,6 +72,20 @@ SNAPSHOT_COLUMNS = [
     "strava_ytd_km",
 ]
 
+# Snapshot columns that are not numeric metrics
+_NON_NUMERIC_COLUMNS = {
+    "id",
+    "recorded_at",
+    "comments",
+    "avg_pace",
+    "longest_streak_date",
+    "longest_break_date",
+    "most_often_run_day",
+    "weather_type",
+}
+
+NUMERIC_SNAPSHOT_COLUMNS = [c for c in SNAPSHOT_COLUMNS if c not in _NON_NUMERIC_COLUMNS]
+
 # Schema migrations - columns added over time
 MIGRATIONS = [
     ("week_0_km", "REAL"),
@@ -276,6 +290,266 @@ CREATE_SHARED_LINKS_TABLE = """
     )
 """
 
+CREATE_ANALYTICS_RESULTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS analytics_results (
+        name         TEXT PRIMARY KEY,
+        version      INTEGER NOT NULL,
+        snapshot_id  INTEGER,
+        computed_at  TEXT NOT NULL,
+        payload      TEXT NOT NULL,
+        input_generation  INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+# Write counter per derived table that materialized analytics read besides
+# snapshots and goals (fitness_days, critical_speed_history); its writers bump it
+CREATE_ANALYTICS_INPUTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS analytics_inputs (
+        name        TEXT PRIMARY KEY,
+        generation  INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+
+CREATE_FITNESS_DAYS_TABLE = """
+    CREATE TABLE IF NOT EXISTS fitness_days (
+        day   TEXT PRIMARY KEY,
+        load  REAL NOT NULL,
+        ctl   REAL NOT NULL,
+        atl   REAL NOT NULL
+    )
+"""
+
+CREATE_METRIC_STATS_TABLE = """
+    CREATE TABLE IF NOT EXISTS metric_stats (
+        metric        TEXT NOT NULL,
+        window_days   INTEGER NOT NULL,
+        n             INTEGER NOT NULL,
+        mean          REAL NOT NULL,
+        m2            REAL NOT NULL,
+        ewma          REAL,
+        ewm_var       REAL NOT NULL,
+        prev_ewma     REAL,
+        prev_ewm_var  REAL NOT NULL,
+        last_day      TEXT,
+        last_value    REAL,
+        snapshot_id   INTEGER NOT NULL,
+        updated_at    TEXT NOT NULL,
+        PRIMARY KEY (metric, window_days)
+    )
+"""
+
+CREATE_ALERTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS alerts (
+        id             INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at     TEXT NOT NULL,
+        day            TEXT NOT NULL,
+        metric         TEXT NOT NULL,
+        detector       TEXT NOT NULL,
+        severity       TEXT NOT NULL,
+        value          REAL NOT NULL,
+        baseline_mean  REAL NOT NULL,
+        baseline_std   REAL NOT NULL,
+        statistic      REAL NOT NULL,
+        message        TEXT NOT NULL,
+        snapshot_id    INTEGER
+    )
+"""
+
+CREATE_ANOMALY_STATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS anomaly_state (
+        metric            TEXT PRIMARY KEY,
+        day               TEXT NOT NULL,
+        ewma              REAL NOT NULL,
+        cusum             REAL NOT NULL,
+        ewma_alarm        INTEGER NOT NULL,
+        cusum_alarm       INTEGER NOT NULL,
+        prev_ewma         REAL NOT NULL,
+        prev_cusum        REAL NOT NULL,
+        prev_ewma_alarm   INTEGER NOT NULL,
+        prev_cusum_alarm  INTEGER NOT NULL
+    )
+"""
+
+CREATE_ACTIVITIES_TABLE = """
+    CREATE TABLE IF NOT EXISTS activities (
+        id                TEXT PRIMARY KEY,
+        start_date_local  TEXT NOT NULL,
+        sport             TEXT,
+        distance_m        REAL,
+        moving_time_secs  REAL,
+        average_hr        REAL,
+        updated_at        TEXT NOT NULL
+    )
+"""
+
+# One row per (activity, stream): the first sample as an integer (value * scale)
+# in base, then zlib-compressed deltas of the given little-endian dtype, plus an
+# optional packed bitmask of the samples that were missing
+CREATE_ACTIVITY_STREAMS_TABLE = """
+    CREATE TABLE IF NOT EXISTS activity_streams (
+        activity_id  TEXT NOT NULL,
+        stream       TEXT NOT NULL,
+        dtype        TEXT NOT NULL,
+        scale        REAL NOT NULL,
+        base         INTEGER NOT NULL,
+        length       INTEGER NOT NULL,
+        data         BLOB NOT NULL,
+        nulls        BLOB,
+        PRIMARY KEY (activity_id, stream)
+    ) WITHOUT ROWID
+"""
+
+# Per-activity aerobic decoupling computed from the streams (services/decoupling.py)
+CREATE_ACTIVITY_DECOUPLING_TABLE = """
+    CREATE TABLE IF NOT EXISTS activity_decoupling (
+        activity_id     TEXT PRIMARY KEY,
+        version         INTEGER NOT NULL,
+        duration_secs   REAL NOT NULL,
+        avg_hr          REAL,
+        avg_speed       REAL,
+        ef_first        REAL,
+        ef_second       REAL,
+        decoupling_pct  REAL,
+        steady          INTEGER NOT NULL,
+        computed_at     TEXT NOT NULL
+    )
+"""
+
+# Per-activity mean-maximal efforts from the streams (services/pace_curve.py):
+# kind "duration" holds the farthest distance (m) covered in target seconds,
+# kind "distance" the shortest time (s) over target metres
+CREATE_ACTIVITY_BEST_EFFORTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS activity_best_efforts (
+        activity_id  TEXT NOT NULL,
+        kind         TEXT NOT NULL,
+        target       REAL NOT NULL,
+        value        REAL NOT NULL,
+        version      INTEGER NOT NULL,
+        PRIMARY KEY (activity_id, kind, target)
+    ) WITHOUT ROWID
+"""
+
+CREATE_BEST_EFFORTS_TARGET_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_best_efforts_target ON activity_best_efforts (kind, target)
+"""
+
+# Critical speed / D' fitted over rolling windows of best efforts, with bootstrap
+# confidence intervals (services/critical_speed.py); day is the window's last day
+CREATE_CRITICAL_SPEED_HISTORY_TABLE = """
+    CREATE TABLE IF NOT EXISTS critical_speed_history (
+        day             TEXT NOT NULL,
+        window_days     INTEGER NOT NULL,
+        critical_speed  REAL NOT NULL,
+        d_prime         REAL NOT NULL,
+        cs_low          REAL,
+        cs_high         REAL,
+        d_prime_low     REAL,
+        d_prime_high    REAL,
+        efforts         INTEGER NOT NULL,
+        updated_at      TEXT NOT NULL,
+        PRIMARY KEY (window_days, day)
+    ) WITHOUT ROWID
+"""
+
+# How far each incremental sync has got, per source and endpoint: a date or an
+# id, whatever the endpoint pages by
+CREATE_SYNC_STATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS sync_state (
+        source      TEXT NOT NULL,
+        endpoint    TEXT NOT NULL,
+        cursor      TEXT NOT NULL,
+        updated_at  TEXT NOT NULL,
+        PRIMARY KEY (source, endpoint)
+    ) WITHOUT ROWID
+"""
+
+# One Intervals.icu wellness record per day, as returned (data is the JSON object)
+CREATE_WELLNESS_DAYS_TABLE = """
+    CREATE TABLE IF NOT EXISTS wellness_days (
+        day         TEXT PRIMARY KEY,
+        vo2max      REAL,
+        data        TEXT NOT NULL,
+        updated_at  TEXT NOT NULL
+    )
+"""
+
+CREATE_WELLNESS_VO2MAX_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_wellness_vo2max ON wellness_days (day)
+    WHERE vo2max IS NOT NULL
+"""
+
+# Smashrun's activity list, cached locally and synced from the newest seen id on
+# (data is the activity JSON as returned)
+CREATE_SMASHRUN_ACTIVITIES_TABLE = """
+    CREATE TABLE IF NOT EXISTS smashrun_activities (
+        id                INTEGER PRIMARY KEY,
+        start_date_local  TEXT NOT NULL,
+        activity_type     TEXT,
+        distance_km       REAL,
+        data              TEXT NOT NULL,
+        updated_at        TEXT NOT NULL
+    )
+"""
+
+# Covers the weekly/monthly distance sums
+CREATE_SMASHRUN_ACTIVITIES_START_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_smashrun_activities_start
+    ON smashrun_activities (activity_type, start_date_local, distance_km)
+"""
+
+# OAuth tokens kept across processes (Strava rotates the refresh token on use)
+CREATE_OAUTH_TOKENS_TABLE = """
+    CREATE TABLE IF NOT EXISTS oauth_tokens (
+        source         TEXT PRIMARY KEY,
+        access_token   TEXT NOT NULL,
+        refresh_token  TEXT,
+        expires_at     REAL NOT NULL,
+        updated_at     TEXT NOT NULL
+    )
+"""
+
+# Strava activity summaries, synced by start time from the stored ``after`` cursor
+CREATE_STRAVA_ACTIVITIES_TABLE = """
+    CREATE TABLE IF NOT EXISTS strava_activities (
+        id                INTEGER PRIMARY KEY,
+        start_date        TEXT NOT NULL,
+        start_date_local  TEXT NOT NULL,
+        type              TEXT,
+        distance_m        REAL,
+        moving_time_secs  REAL,
+        updated_at        TEXT NOT NULL
+    )
+"""
+
+# Covers the weekly distance sums
+CREATE_STRAVA_ACTIVITIES_START_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_strava_activities_start
+    ON strava_activities (type, start_date_local, distance_m)
+"""
+
+CREATE_ACTIVITIES_START_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_activities_start ON activities (start_date_local)
+"""
+
+# Covers the per-sport date ranges (e.g. the runs behind the HR drift trend)
+CREATE_ACTIVITIES_SPORT_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_activities_sport ON activities (sport, start_date_local)
+"""
+
+# Activity files imported from disk, by SHA-256 of their content (services/importer.py)
+CREATE_IMPORTED_FILES_TABLE = """
+    CREATE TABLE IF NOT EXISTS imported_files (
+        content_hash  TEXT PRIMARY KEY,
+        path          TEXT NOT NULL,
+        activity_id   TEXT NOT NULL,
+        imported_at   TEXT NOT NULL
+    ) WITHOUT ROWID
+"""
+
+CREATE_SNAPSHOTS_RECORDED_AT_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_snapshots_recorded_at ON snapshots (recorded_at)
+"""
+
 INSERT_SNAPSHOT = """
     INSERT INTO snapshots (
         recorded_at,
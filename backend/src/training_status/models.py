@@ -174,6 +174,7 @@ class Projection(BaseModel):
     ctl: float
     atl: float
     tsb: float
+    load: float | None = None
     zone: str
 
 
@@ -205,6 +206,41 @@ class InjuryRisk(BaseModel):
     recommendations: list[str | None]
 
 
+class InjuryRiskPoint(BaseModel):
+    """Injury risk score and its inputs for one day."""
+
+    day: str
+    risk_score: int
+    risk_level: str
+    acute_load: float | None = None
+    chronic_load: float | None = None
+    acwr: float | None = None
+    ramp_rate: float | None = None
+    avg_rest_days: float | None = None
+    hrv_change_pct: float | None = None
+    factors: list[str]
+
+
+class InjuryRiskSummary(BaseModel):
+    """Counts and peak over the requested range."""
+
+    days: int
+    mean_score: float | None = None
+    peak_score: int | None = None
+    peak_day: str | None = None
+    elevated_days: int
+    high_days: int
+
+
+class InjuryRiskSeries(BaseModel):
+    """Daily injury risk history."""
+
+    start: str | None = None
+    end: str | None = None
+    points: list[InjuryRiskPoint]
+    summary: InjuryRiskSummary
+
+
 class CorrelationInsight(BaseModel):
     """Data-driven insight."""
 
@@ -214,12 +250,26 @@ class CorrelationInsight(BaseModel):
     recommendation: str
 
 
+class CorrelationPair(BaseModel):
+    """Significant lagged correlation between two metrics (x leads y by lag_days)."""
+
+    x: str
+    y: str
+    lag_days: int
+    pearson_r: float
+    spearman_rho: float
+    n: int
+    p_value: float
+    q_value: float
+
+
 class CorrelationsResponse(BaseModel):
     """Correlations analysis response."""
 
     insights: list[CorrelationInsight]
     data_points: int
     message: str
+    pairs: list[CorrelationPair] = []
 
 
 class RacePrediction(BaseModel):
@@ -230,6 +280,8 @@ class RacePrediction(BaseModel):
     predicted_time: str
     predicted_pace: str
     typical_range: str
+    time_fast: str | None = None
+    time_slow: str | None = None
 
 
 class RacePredictorResponse(BaseModel):
@@ -237,6 +289,8 @@ class RacePredictorResponse(BaseModel):
 
     predictions: list[RacePrediction]
     critical_speed_ms: float | None = None
+    critical_speed_low_ms: float | None = None
+    critical_speed_high_ms: float | None = None
     d_prime_meters: float | None = None
     fitness_level: str
     message: str
@@ -281,22 +335,27 @@ class WeeklySummary(BaseModel):
 # --- Goal Adherence Models ---
 
 
-class WeekAdherence(BaseModel):
-    """Single week adherence entry."""
+class PeriodAdherence(BaseModel):
+    """Single goal period (week, month or year) adherence entry."""
 
-    week_start: str
+    period_start: str
     planned_km: float
     actual_km: float
     achieved: bool
+    in_progress: bool = False
 
 
 class AdherenceReport(BaseModel):
     """Goal adherence report."""
 
+    goal_id: int
+    goal_type: str
+    period: str
     target_km: float
     overall_pct: int | None = None
     streak: int
-    weeks: list[WeekAdherence]
+    longest_streak: int = 0
+    periods: list[PeriodAdherence]
     message: str
 
 
@@ -452,15 +511,76 @@ class TrainingZonesResponse(BaseModel):
 
 class HrDriftPoint(BaseModel):
     date: str
-    z2_ratio: float
-    easy_pct: float
+    activity_id: str
+    decoupling_pct: float
+    efficiency: float
+    avg_hr: float
+    duration_min: float
 
 
 class HrDriftResponse(BaseModel):
+    start: str
+    end: str
     points: list[HrDriftPoint]
     assessment: str
     message: str
     trend: str
+    avg_decoupling_pct: float | None = None
+
+
+class DurationEffort(BaseModel):
+    """Best effort over one duration."""
+
+    secs: int
+    distance_m: float
+    speed_ms: float
+    pace: str
+    activity_id: str
+    date: str
+
+
+class DistanceEffort(BaseModel):
+    """Best time over one distance."""
+
+    distance_m: int
+    secs: float
+    speed_ms: float
+    pace: str
+    activity_id: str
+    date: str
+
+
+class PaceCurveResponse(BaseModel):
+    """Mean-maximal pace curve of one period."""
+
+    period: str
+    start: str | None = None
+    end: str
+    durations: list[DurationEffort]
+    distances: list[DistanceEffort]
+    critical_speed: float | None = None
+    d_prime: float | None = None
+
+
+class CriticalSpeedPoint(BaseModel):
+    """One stored CS/D' fit with its confidence intervals."""
+
+    day: str
+    critical_speed: float
+    d_prime: float
+    cs_low: float | None = None
+    cs_high: float | None = None
+    d_prime_low: float | None = None
+    d_prime_high: float | None = None
+    efforts: int
+
+
+class CriticalSpeedHistoryResponse(BaseModel):
+    """Stored CS/D' series of one window length."""
+
+    window_days: int
+    points: list[CriticalSpeedPoint]
+    latest: CriticalSpeedPoint | None = None
 
 
 # --- Sleep Insights Models ---
@@ -488,6 +608,7 @@ class TaperWeek(BaseModel):
     target_volume_pct: float
     reduction_pct: float
     projected_ctl: float
+    projected_tsb: float | None = None
 
 
 class TaperResponse(BaseModel):
@@ -497,9 +618,105 @@ class TaperResponse(BaseModel):
     current_ctl: float | None = None
     model: str | None = None
     weeks: list[TaperWeek]
+    race_day_ctl: float | None = None
+    race_day_tsb: float | None = None
     error: str | None = None
 
 
+class ScenarioGrid(BaseModel):
+    """Scenario template grid; every combination of the values is simulated."""
+
+    weekly_volume_pct: list[float] | None = Field(None, min_length=1)
+    weekly_progression_pct: list[float] | None = Field(None, min_length=1)
+    rest_days_per_week: list[int] | None = Field(None, min_length=1)
+    taper_weeks: list[int] | None = Field(None, min_length=1)
+    taper_shape: list[str] | None = Field(None, min_length=1)
+
+
+class ScenarioRequest(BaseModel):
+    """What-if simulation request."""
+
+    race_date: str
+    grid: ScenarioGrid = ScenarioGrid()
+    target_tsb: float = 10.0
+    top: int = Field(10, ge=1, le=100)
+    include_trajectories: bool = True
+
+
+class ScenarioParams(BaseModel):
+    """Parameter set of one simulated scenario."""
+
+    weekly_volume_pct: float
+    weekly_progression_pct: float
+    rest_days_per_week: int
+    taper_weeks: int
+    taper_shape: str
+
+
+class ScenarioPoint(BaseModel):
+    """Daily load and fitness state on a scenario trajectory."""
+
+    day: int
+    load: float
+    ctl: float
+    atl: float
+    tsb: float
+
+
+class ScenarioResult(BaseModel):
+    """Ranked scenario with its race-day fitness and trajectory."""
+
+    rank: int
+    params: ScenarioParams
+    race_day_ctl: float
+    race_day_atl: float
+    race_day_tsb: float
+    score: float
+    trajectory: list[ScenarioPoint]
+
+
+class ScenarioResponse(BaseModel):
+    """What-if simulation result, best scenarios first."""
+
+    race_date: str
+    days_to_race: int | None = None
+    current: dict | None = None
+    baseline_load: float | None = None
+    target_tsb: float | None = None
+    evaluated: int | None = None
+    scenarios: list[ScenarioResult]
+    error: str | None = None
+
+
+# --- Alert Models ---
+
+
+class Alert(BaseModel):
+    """Anomaly alert raised by the ingest pipeline."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: str
+    day: str
+    metric: str
+    detector: str
+    severity: str
+    value: float
+    baseline_mean: float
+    baseline_std: float
+    statistic: float
+    message: str
+    snapshot_id: int | None = None
+
+
+class AlertList(BaseModel):
+    """Page of alerts, newest first; pass ``next_before_id`` to get the next page."""
+
+    items: list[Alert]
+    next_before_id: int | None = None
+
+
 # --- Gear Models ---
 
 
@@ -0,0 +1,463 @@
+"""Parsing of device activity files: FIT, GPX and TCX, optionally gzipped.
+
+Every parser returns an ``ActivityFile``: the summary fields of the
+``activities`` table plus the sample streams under ``services.streams``'s names
+(``time`` in seconds from the first sample, ``heartrate``, ``velocity_smooth``,
+``cadence``, ``altitude``, ``lat``, ``lng``). Only the standard library is used:
+FIT is decoded from its definition and data messages (one ``struct`` unpack per
+message, skipping every field that is not needed), GPX and TCX are read with
+``iterparse`` one track point at a time.
+
+Files store UTC times; start times are converted to local time with the FIT
+file's own offset when it has one, else with this machine's time zone. Speed
+and distance are derived from the positions when a file has none, and moving
+time from the samples faster than ``MOVING_SPEED``.
+"""
+
+import functools
+import gzip
+import io
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+from xml.etree.ElementTree import Element, iterparse
+
+import numpy as np
+
+FILE_FORMATS = ("fit", "gpx", "tcx")
+MOVING_SPEED = 0.5  # m/s; slower samples do not count towards moving time
+EARTH_RADIUS_M = 6_371_000.0
+
+# Sport names as Intervals.icu's lowercased activity types (what ``activities`` holds)
+SPORTS = {
+    "running": "run",
+    "run": "run",
+    "trail_running": "run",
+    "treadmill": "run",
+    "cycling": "ride",
+    "biking": "ride",
+    "ride": "ride",
+    "walking": "walk",
+    "walk": "walk",
+    "hiking": "hike",
+    "hike": "hike",
+    "swimming": "swim",
+    "swim": "swim",
+}
+
+
+@dataclass
+class ActivityFile:
+    """One parsed activity: summary plus streams (NaN marks a missing sample)."""
+
+    start_date_local: str
+    sport: str | None = None
+    distance_m: float | None = None
+    moving_time_secs: float | None = None
+    average_hr: float | None = None
+    streams: dict[str, np.ndarray] = field(default_factory=dict)
+
+
+def file_format(path: Path) -> str | None:
+    """Get a file's format from its name (``run.fit``, ``run.gpx.gz``...), None if unsupported."""
+    suffixes = [s.lower() for s in path.suffixes[-2:]]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes.pop()
+    fmt = suffixes[-1].lstrip(".") if suffixes else ""
+    return fmt if fmt in FILE_FORMATS else None
+
+
+def parse_activity(name: str, content: bytes) -> ActivityFile:
+    """Parse a file's content; ``name`` gives the format. Raises ValueError if unreadable."""
+    fmt = file_format(Path(name))
+    if fmt is None:
+        raise ValueError(f"Unsupported activity file: {name}")
+    if name.lower().endswith(".gz"):
+        try:
+            content = gzip.decompress(content)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"Bad gzip data: {e}") from None
+    if fmt == "fit":
+        return parse_fit(content)
+    try:
+        return (parse_gpx if fmt == "gpx" else parse_tcx)(content)
+    except SyntaxError as e:  # ParseError
+        raise ValueError(f"Bad XML: {e}") from None
+
+
+# --- SAMPLES ---
+
+
+@dataclass
+class _Track:
+    """Samples as read from a file, before derivation of the missing streams."""
+
+    times: list[float] = field(default_factory=list)  # Unix seconds
+    columns: dict[str, list[float | None]] = field(
+        default_factory=lambda: {
+            name: []
+            for name in ("lat", "lng", "altitude", "heartrate", "cadence", "distance", "speed")
+        }
+    )
+
+    def add(self, when: float, **values: float | None) -> None:
+        self.times.append(when)
+        for name, column in self.columns.items():
+            column.append(values.get(name))
+
+
+def _haversine(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Metres between consecutive positions (NaN where either is missing)."""
+    lat, lng = np.radians(lat), np.radians(lng)
+    a = (
+        np.sin(np.diff(lat) / 2) ** 2
+        + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lng) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _column(values: list[float | None]) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _to_local(utc: datetime, offset: timedelta | None = None) -> str:
+    local = utc + offset if offset is not None else utc.astimezone().replace(tzinfo=None)
+    return local.replace(tzinfo=None).isoformat(timespec="seconds")
+
+
+def _finish(
+    track: _Track,
+    sport: str | None,
+    start: datetime | None = None,
+    utc_offset: timedelta | None = None,
+    distance_m: float | None = None,
+    moving_time_secs: float | None = None,
+    average_hr: float | None = None,
+) -> ActivityFile:
+    """Build the activity from its samples; summary values given here win over derived ones."""
+    if start is None:
+        if not track.times:
+            raise ValueError("No samples and no start time")
+        start = datetime.fromtimestamp(track.times[0], timezone.utc)
+    activity = ActivityFile(
+        _to_local(start, utc_offset), SPORTS.get((sport or "").lower().strip(), sport or None)
+    )
+    if track.times:
+        times = np.array(track.times, dtype=np.float64)
+        cols = {name: _column(values) for name, values in track.columns.items()}
+        dt = np.diff(times)
+        distance, speed = cols["distance"], cols["speed"]
+        if np.isnan(distance).all() and not np.isnan(cols["lat"]).all():
+            steps = np.nan_to_num(_haversine(cols["lat"], cols["lng"]))
+            distance = np.concatenate(([0.0], np.cumsum(steps)))
+        if np.isnan(speed).all() and not np.isnan(distance).all():
+            filled = np.fmax.accumulate(np.nan_to_num(distance, nan=0.0))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step_speed = np.where(dt > 0, np.diff(filled) / dt, np.nan)
+            speed = np.concatenate(([0.0], step_speed)) if len(times) > 1 else np.zeros(1)
+        if not np.isnan(distance).all():
+            activity.distance_m = float(np.nanmax(distance))
+        if not np.isnan(speed).all():
+            activity.moving_time_secs = float(dt[np.nan_to_num(speed[1:]) >= MOVING_SPEED].sum())
+        if not np.isnan(cols["heartrate"]).all():
+            activity.average_hr = round(float(np.nanmean(cols["heartrate"])), 1)
+        streams = {
+            "time": times - times[0],
+            "heartrate": cols["heartrate"],
+            "velocity_smooth": speed,
+            "cadence": cols["cadence"],
+            "altitude": cols["altitude"],
+            "lat": cols["lat"],
+            "lng": cols["lng"],
+        }
+        activity.streams = {
+            name: values for name, values in streams.items() if not np.isnan(values).all()
+        }
+    for name, value in (
+        ("distance_m", distance_m),
+        ("moving_time_secs", moving_time_secs),
+        ("average_hr", average_hr),
+    ):
+        if value is not None:
+            setattr(activity, name, value)
+    return activity
+
+
+# --- FIT ---
+
+FIT_EPOCH = 631065600  # 1989-12-31T00:00:00Z, where FIT timestamps count from
+_RECORD, _SESSION, _ACTIVITY = 20, 18, 34
+# Decoded fields by global message number: field number -> name
+_FIT_FIELDS = {
+    _RECORD: {
+        253: "timestamp",
+        0: "lat",
+        1: "lng",
+        2: "altitude",
+        78: "enhanced_altitude",
+        3: "heartrate",
+        4: "cadence",
+        5: "distance",
+        6: "speed",
+        73: "enhanced_speed",
+    },
+    _SESSION: {2: "start_time", 5: "sport", 7: "elapsed", 8: "timer", 9: "distance", 16: "hr"},
+    _ACTIVITY: {253: "timestamp", 5: "local_timestamp"},
+}
+# FIT base type (low 5 bits) -> (struct format, invalid value)
+_FIT_TYPES: dict[int, tuple[str, int | None]] = {
+    0x00: ("B", 0xFF),
+    0x01: ("b", 0x7F),
+    0x02: ("B", 0xFF),
+    0x03: ("h", 0x7FFF),
+    0x04: ("H", 0xFFFF),
+    0x05: ("i", 0x7FFFFFFF),
+    0x06: ("I", 0xFFFFFFFF),
+    0x08: ("f", None),
+    0x09: ("d", None),
+    0x0A: ("B", 0),
+    0x0B: ("H", 0),
+    0x0C: ("I", 0),
+    0x0E: ("q", 2**63 - 1),
+    0x0F: ("Q", 2**64 - 1),
+    0x10: ("Q", 0),
+}
+_FIT_SPORTS = {1: "run", 2: "ride", 5: "swim", 11: "walk", 17: "hike"}
+_SEMICIRCLE = 180 / 2**31
+
+
+def _fit_messages(data: bytes) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield ``(global message number, decoded fields)`` for the messages in ``_FIT_FIELDS``."""
+    if len(data) < 12 or data[8:12] != b".FIT":
+        raise ValueError("Not a FIT file")
+    header_size = data[0]
+    end = min(len(data), header_size + struct.unpack_from("<I", data, 4)[0])
+    definitions: dict[int, tuple[int, struct.Struct, list[tuple[str, int | None]]]] = {}
+    pos, last_timestamp = header_size, 0
+    try:
+        while pos < end:
+            header = data[pos]
+            pos += 1
+            time_offset = None
+            if header & 0x80:  # compressed timestamp header: data message, 5-bit time offset
+                local, time_offset = (header >> 5) & 0x03, header & 0x1F
+            elif header & 0x40:  # definition message
+                endian = ">" if data[pos + 1] else "<"
+                global_num = struct.unpack_from(f"{endian}H", data, pos + 2)[0]
+                count = data[pos + 4]
+                pos += 5
+                wanted = _FIT_FIELDS.get(global_num, {})
+                layout, names = [], []
+                for num, size, base in struct.iter_unpack("BBB", data[pos : pos + 3 * count]):
+                    kind = _FIT_TYPES.get(base & 0x1F)
+                    if num in wanted and kind and struct.calcsize(kind[0]) == size:
+                        layout.append(kind[0])
+                        names.append((wanted[num], kind[1]))
+                    else:
+                        layout.append(f"{size}x")
+                pos += 3 * count
+                if header & 0x20:  # developer fields: skipped
+                    dev_count = data[pos]
+                    layout.append(f"{sum(data[pos + 2 : pos + 1 + 3 * dev_count : 3])}x")
+                    pos += 1 + 3 * dev_count
+                definitions[header & 0x0F] = (
+                    global_num,
+                    struct.Struct(endian + "".join(layout)),
+                    names,
+                )
+                continue
+            else:
+                local = header & 0x0F
+            if local not in definitions:
+                raise ValueError(f"FIT data message without a definition at byte {pos - 1}")
+            global_num, layout_struct, names = definitions[local]
+            values = layout_struct.unpack_from(data, pos)
+            pos += layout_struct.size
+            message = {
+                name: value for (name, invalid), value in zip(names, values) if value != invalid
+            }
+            if "timestamp" in message:
+                last_timestamp = message["timestamp"]
+            elif time_offset is not None:
+                timestamp = (last_timestamp & ~0x1F) + time_offset
+                if time_offset < (last_timestamp & 0x1F):
+                    timestamp += 0x20
+                message["timestamp"] = last_timestamp = timestamp
+            if names:
+                yield global_num, message
+    except (IndexError, struct.error):
+        raise ValueError(f"Truncated FIT file at byte {pos}") from None
+
+
+def parse_fit(data: bytes) -> ActivityFile:
+    """Parse a FIT activity file: record messages as samples, session totals as the summary."""
+    track = _Track()
+    session: dict[str, Any] = {}
+    utc_offset = None
+    for global_num, msg in _fit_messages(data):
+        if global_num == _RECORD and "timestamp" in msg:
+            altitude = msg.get("enhanced_altitude", msg.get("altitude"))
+            speed = msg.get("enhanced_speed", msg.get("speed"))
+            track.add(
+                msg["timestamp"] + FIT_EPOCH,
+                lat=msg["lat"] * _SEMICIRCLE if "lat" in msg else None,
+                lng=msg["lng"] * _SEMICIRCLE if "lng" in msg else None,
+                altitude=altitude / 5 - 500 if altitude is not None else None,
+                heartrate=msg.get("heartrate"),
+                cadence=msg.get("cadence"),
+                distance=msg["distance"] / 100 if "distance" in msg else None,
+                speed=speed / 1000 if speed is not None else None,
+            )
+        elif global_num == _SESSION and not session:
+            session = msg
+        elif global_num == _ACTIVITY and "local_timestamp" in msg and "timestamp" in msg:
+            utc_offset = timedelta(seconds=msg["local_timestamp"] - msg["timestamp"])
+    start = None
+    if "start_time" in session:
+        start = datetime.fromtimestamp(session["start_time"] + FIT_EPOCH, timezone.utc)
+    timer = session.get("timer", session.get("elapsed"))
+    return _finish(
+        track,
+        _FIT_SPORTS.get(session.get("sport", -1)),
+        start,
+        utc_offset,
+        distance_m=session["distance"] / 100 if "distance" in session else None,
+        moving_time_secs=timer / 1000 if timer is not None else None,
+        average_hr=session.get("hr"),
+    )
+
+
+# --- GPX / TCX ---
+
+# Track point child elements (any namespace) -> sample field
+_GPX_POINT = {
+    "time": "time",
+    "ele": "altitude",
+    "hr": "heartrate",
+    "cad": "cadence",
+    "speed": "speed",
+}
+_TCX_POINT = {
+    "Time": "time",
+    "LatitudeDegrees": "lat",
+    "LongitudeDegrees": "lng",
+    "AltitudeMeters": "altitude",
+    "DistanceMeters": "distance",
+    "Value": "heartrate",
+    "Cadence": "cadence",
+    "RunCadence": "cadence",
+    "Speed": "speed",
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _local_name(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _float(text: str | None) -> float | None:
+    try:
+        return float(text) if text else None
+    except ValueError:
+        return None
+
+
+def _timestamp(text: str | None) -> float | None:
+    """Get the Unix time of an ISO 8601 time (UTC unless it says otherwise)."""
+    if not text:
+        return None
+    text = text.strip().replace("Z", "+00:00")
+    if "." in text:  # drop fractional seconds, whose digits vary across devices
+        head, _, rest = text.partition(".")
+        text = head + rest.lstrip("0123456789")
+    try:
+        when = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+def _elements(content: bytes, *tags: str) -> Iterator[tuple[str, Element]]:
+    """Yield ``(local tag, element)`` for each completed element named in ``tags``."""
+    for _, elem in iterparse(io.BytesIO(content), events=("end",)):
+        name = _local_name(elem.tag)
+        if name in tags:
+            yield name, elem
+
+
+def _add_point(track: _Track, elem: Element, fields: dict[str, str], **values: Any) -> None:
+    """Add a track point from its descendants' text (one pass, any namespace)."""
+    text = {}
+    for child in elem.iter():
+        name = fields.get(_local_name(child.tag))
+        if name is not None and child.text:
+            text.setdefault(name, child.text)
+    when = _timestamp(text.pop("time", None))
+    if when is not None:
+        track.add(when, **{name: _float(value) for name, value in text.items()}, **values)
+
+
+def parse_gpx(content: bytes) -> ActivityFile:
+    """Parse a GPX track (Garmin ``TrackPointExtension`` HR and cadence included)."""
+    track = _Track()
+    sport = None
+    for name, elem in _elements(content, "trkpt", "type", "trkseg"):
+        if name == "trkpt":
+            _add_point(
+                track, elem, _GPX_POINT, lat=_float(elem.get("lat")), lng=_float(elem.get("lon"))
+            )
+            elem.clear()
+        elif name == "type" and sport is None:
+            sport = (elem.text or "").strip() or None
+        elif name == "trkseg":
+            elem.clear()
+    return _finish(track, sport)
+
+
+def parse_tcx(content: bytes) -> ActivityFile:
+    """Parse a TCX activity: track points as samples, lap totals as the summary."""
+    track = _Track()
+    sport = None
+    start = None
+    laps: list[tuple[float, float | None, float | None]] = []  # (secs, metres, avg HR)
+    for name, elem in _elements(content, "Trackpoint", "Track", "Lap", "Activity"):
+        if name == "Trackpoint":
+            _add_point(track, elem, _TCX_POINT)
+            elem.clear()
+        elif name == "Track":
+            elem.clear()
+        elif name == "Lap":
+            lap_start = _timestamp(elem.get("StartTime"))
+            if start is None and lap_start is not None:
+                start = datetime.fromtimestamp(lap_start, timezone.utc)
+            totals = {_local_name(child.tag): child for child in elem}
+            hr = totals.get("AverageHeartRateBpm")
+            laps.append(
+                (
+                    _float(totals["TotalTimeSeconds"].text) or 0.0
+                    if "TotalTimeSeconds" in totals
+                    else 0.0,
+                    _float(totals["DistanceMeters"].text) if "DistanceMeters" in totals else None,
+                    _float(hr[0].text) if hr is not None and len(hr) else None,
+                )
+            )
+            elem.clear()
+        elif name == "Activity":
+            sport = elem.get("Sport")
+            elem.clear()
+    lap_metres = [m for _, m, _ in laps if m is not None]
+    lap_hr = [(secs, hr) for secs, _, hr in laps if hr is not None and secs]
+    hr_secs = sum(secs for secs, _ in lap_hr)
+    return _finish(
+        track,
+        sport,
+        start,
+        distance_m=sum(lap_metres) if lap_metres else None,
+        moving_time_secs=sum(secs for secs, _, _ in laps) or None,
+        average_hr=round(sum(s * hr for s, hr in lap_hr) / hr_secs, 1) if hr_secs else None,
+    )
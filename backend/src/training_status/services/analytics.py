@@ -1,30 +1,55 @@
 """Analytics and calculation utilities."""
 
-import statistics
+from datetime import date
+
+import numpy as np
+
+from .fitness import simulate, trend_load
+from .memo import memoize
+from .timeseries import rows_to_matrix, to_array, valid
 
 
 def calculate_consistency_score(
     volumes: list[float], rest_days: list[int], monotony_values: list[float]
 ) -> dict:
     """Calculate training consistency score (0-100)."""
-    if not volumes:
+    vol = valid(to_array(volumes))
+    rest = valid(to_array(rest_days))
+    mono = valid(to_array(monotony_values))
+    return score_consistency(
+        volume_n=int(vol.size),
+        volume_mean=float(vol.mean()) if vol.size else None,
+        volume_std=float(vol.std(ddof=1)) if vol.size >= 2 else None,
+        avg_rest=float(rest.mean()) if rest.size else None,
+        avg_monotony=float(mono.mean()) if mono.size else None,
+    )
+
+
+def score_consistency(
+    volume_n: int,
+    volume_mean: float | None,
+    volume_std: float | None,
+    avg_rest: float | None,
+    avg_monotony: float | None,
+) -> dict:
+    """Consistency score (0-100) from summary statistics of the scoring window."""
+    if volume_n == 0 or volume_mean is None:
         return {"score": None, "reason": "No volume data", "assessment": "N/A"}
 
     # Volume consistency (lower variance = higher score)
-    try:
-        mean_vol = statistics.mean(volumes)
-        cv = statistics.stdev(volumes) / mean_vol if mean_vol > 0 else 1
+    if volume_n >= 2 and volume_std is not None:
+        cv = volume_std / volume_mean if volume_mean > 0 else 1
         volume_score = max(0, min(100, 100 - (cv * 100)))
-    except statistics.StatisticsError:
+    else:
         volume_score = 50
 
     # Rest day regularity (ideal: 1-2 rest days per week)
-    avg_rest = sum(rest_days) / len(rest_days) if rest_days else 7
-    rest_score = max(0, min(100, 100 - abs(avg_rest - 1.5) * 30))
+    rest_avg = avg_rest if avg_rest is not None else 7
+    rest_score = max(0, min(100, 100 - abs(rest_avg - 1.5) * 30))
 
     # Monotony score (ideal: 1.0-1.5)
-    avg_mono = sum(monotony_values) / len(monotony_values) if monotony_values else 2
-    mono_score = max(0, min(100, 100 - abs(avg_mono - 1.25) * 50))
+    mono_avg = avg_monotony if avg_monotony is not None else 2
+    mono_score = max(0, min(100, 100 - abs(mono_avg - 1.25) * 50))
 
     # Overall score
     overall = int((volume_score * 0.4) + (rest_score * 0.3) + (mono_score * 0.3))
@@ -112,62 +137,70 @@ def get_recommendation(
 
 
 def calculate_projections(
-    ctl: float, atl: float, ramp_rate: float | None
+    ctl: float,
+    atl: float,
+    ramp_rate: float | None,
+    planned_loads: list[float] | None = None,
+    days: int = 7,
 ) -> tuple[list[dict], int | None]:
-    """Project fitness/fatigue for next 7 days.
+    """Project fitness/fatigue forward under a planned daily load.
+
+    ``planned_loads[i]`` is the load on day ``i + 1``. Without a plan, the load that
+    continues the current ramp rate is assumed for every day.
 
     Returns:
         (projections list, days_to_positive_tsb or None if already positive / never reached)
 
     """
-    current_tsb = ctl - atl
-    already_positive = current_tsb > 0
+    if planned_loads is None:
+        planned_loads = [trend_load(ctl, ramp_rate)] * days
+    loads = np.asarray(planned_loads, dtype=float)
+    proj_ctl, proj_atl, proj_tsb = simulate(ctl, atl, loads)
 
+    already_positive = ctl - atl > 0
     projections = []
     days_to_positive: int | None = None
 
-    for day in range(1, 8):
-        proj_ctl = ctl + (ramp_rate or 0) * (day / 7)
-        proj_atl = atl * (0.9**day)  # ATL decays ~10% per day if no training
-        proj_tsb = proj_ctl - proj_atl
+    for i in range(len(loads)):
+        tsb = round(float(proj_tsb[i]), 1)
         projections.append(
             {
-                "day": day,
-                "ctl": round(proj_ctl, 1),
-                "atl": round(proj_atl, 1),
-                "tsb": round(proj_tsb, 1),
-                "zone": ("Optimal" if proj_tsb > 5 else "Grey" if proj_tsb > -10 else "Overreach"),
+                "day": i + 1,
+                "ctl": round(float(proj_ctl[i]), 1),
+                "atl": round(float(proj_atl[i]), 1),
+                "tsb": tsb,
+                "load": round(float(loads[i]), 1),
+                "zone": ("Optimal" if tsb > 5 else "Grey" if tsb > -10 else "Overreach"),
             }
         )
-        if days_to_positive is None and not already_positive and proj_tsb > 0:
-            days_to_positive = day
+        if days_to_positive is None and not already_positive and proj_tsb[i] > 0:
+            days_to_positive = i + 1
 
     return projections, (None if already_positive else days_to_positive)
 
 
+@memoize()
 def calculate_detraining(ctl: float, atl: float, weeks: int = 6) -> list[dict]:
     """Project CTL/ATL/TSB decay if training stops today.
 
-    Uses standard time constants: CTL τ=42 days, ATL τ=7 days.
+    Zero-load simulation with the standard time constants (CTL τ=42 days, ATL τ=7 days).
     Returns one data point per week (days 0, 7, 14, ... weeks*7).
     """
+    proj_ctl, proj_atl, _ = simulate(ctl, atl, np.zeros(weeks * 7))
+    unit_ctl, _, _ = simulate(1.0, 1.0, np.zeros(weeks * 7))
     points = []
     for w in range(weeks + 1):
         d = w * 7
-        # Exponential decay: x(t) = x0 * (1 - 1/τ)^t
-        decay_ctl = (1 - 1 / 42) ** d
-        decay_atl = (1 - 1 / 7) ** d
-        proj_ctl = round(ctl * decay_ctl, 1)
-        proj_atl = round(atl * decay_atl, 1)
-        proj_tsb = round(proj_ctl - proj_atl, 1)
-        pct_ctl_lost = round((1 - decay_ctl) * 100, 1)
+        c = float(proj_ctl[d - 1]) if d else ctl
+        a = float(proj_atl[d - 1]) if d else atl
+        decay_ctl = float(unit_ctl[d - 1]) if d else 1.0
         points.append(
             {
                 "week": w,
-                "ctl": proj_ctl,
-                "atl": proj_atl,
-                "tsb": proj_tsb,
-                "ctl_pct_lost": pct_ctl_lost,
+                "ctl": round(c, 1),
+                "atl": round(a, 1),
+                "tsb": round(round(c, 1) - round(a, 1), 1),
+                "ctl_pct_lost": round((1 - decay_ctl) * 100, 1),
             }
         )
     return points
@@ -190,37 +223,39 @@ def calculate_weekly_summary(rows: list[tuple]) -> dict:
             "message": "No data available",
         }
 
-    recent = rows[:7]
-    previous = rows[7:14] if len(rows) >= 14 else []
+    # Columns as arrays, most recent first (same order as rows)
+    m = rows_to_matrix(rows[:14], 6)
+    ctl, tsb, hrv, week_km, rest = m[:, 0], m[:, 2], m[:, 3], m[:, 4], m[:, 5]
+    has_previous = len(rows) >= 14
 
     # CTL change: latest vs oldest in the window (or vs previous week's latest)
-    ctls = [r[0] for r in recent if r[0] is not None]
+    ctls = valid(ctl[:7])
     ctl_change: float | None = None
-    if ctls:
-        if previous:
-            prev_ctls = [r[0] for r in previous if r[0] is not None]
-            if prev_ctls:
-                ctl_change = round(ctls[0] - prev_ctls[0], 1)
-        elif len(ctls) >= 2:
-            ctl_change = round(ctls[0] - ctls[-1], 1)
+    if ctls.size:
+        if has_previous:
+            prev_ctls = valid(ctl[7:14])
+            if prev_ctls.size:
+                ctl_change = round(float(ctls[0] - prev_ctls[0]), 1)
+        elif ctls.size >= 2:
+            ctl_change = round(float(ctls[0] - ctls[-1]), 1)
 
     # Weekly km: use the most recent week_0_km snapshot
-    week_kms = [r[4] for r in recent if r[4] is not None]
-    total_km = round(week_kms[0], 1) if week_kms else None
+    week_kms = valid(week_km[:7])
+    total_km = round(float(week_kms[0]), 1) if week_kms.size else None
 
     # Avg HRV
-    hrvs = [r[3] for r in recent if r[3] is not None]
-    avg_hrv: float | None = round(sum(hrvs) / len(hrvs), 1) if hrvs else None
+    hrvs = valid(hrv[:7])
+    avg_hrv: float | None = round(float(hrvs.mean()), 1) if hrvs.size else None
 
     # Rest days (most recent snapshot value)
-    rest_vals = [r[5] for r in recent if r[5] is not None]
-    rest_days = rest_vals[0] if rest_vals else None
+    rest_vals = valid(rest[:7])
+    rest_days = int(rest_vals[0]) if rest_vals.size else None
 
     # TSB trend
-    tsbs = [r[2] for r in recent if r[2] is not None]
-    if len(tsbs) >= 3:
-        recent_tsb = sum(tsbs[:3]) / 3
-        older_tsb = sum(tsbs[-3:]) / 3
+    tsbs = valid(tsb[:7])
+    if tsbs.size >= 3:
+        recent_tsb = float(tsbs[:3].mean())
+        older_tsb = float(tsbs[-3:].mean())
         if recent_tsb > older_tsb + 2:
             tsb_trend = "improving"
         elif recent_tsb < older_tsb - 2:
@@ -253,82 +288,72 @@ def calculate_weekly_summary(rows: list[tuple]) -> dict:
     }
 
 
-def calculate_goal_adherence(weekly_km_target: float, snapshot_rows: list[tuple]) -> dict:
-    """Calculate adherence to a weekly km goal over the last 8 weeks.
+GOAL_TYPE_PERIODS = {"weekly_km": "week", "monthly_km": "month", "yearly_km": "year"}
 
-    snapshot_rows columns: recorded_at (ISO str), week_0_km
-    Returns per-week achieved/target and overall adherence %.
-    """
-    from datetime import datetime, timedelta
 
-    if not snapshot_rows:
-        return {
-            "target_km": weekly_km_target,
-            "overall_pct": None,
-            "streak": 0,
-            "weeks": [],
-            "message": "No data available",
-        }
+def calculate_goal_adherence(
+    target_km: float, period_rows: list[tuple], period: str = "week"
+) -> dict:
+    """Summarize adherence to a km-per-period goal.
 
-    # Group snapshots by ISO week (Monday-based)
-    week_data: dict[str, list[float]] = {}
-    for row in snapshot_rows:
-        recorded_at_str, week_km = row[0], row[1]
-        if week_km is None:
-            continue
-        try:
-            dt = datetime.fromisoformat(recorded_at_str)
-        except ValueError:
-            continue
-        # ISO week start (Monday)
-        week_start = (dt - timedelta(days=dt.weekday())).strftime("%Y-%m-%d")
-        week_data.setdefault(week_start, []).append(week_km)
-
-    # Take the max week_0_km per week (most recent fetch that week is most accurate)
-    weeks_sorted = sorted(week_data.keys(), reverse=True)[:8]
-
-    week_results = []
-    for ws in weeks_sorted:
-        actual_km = max(week_data[ws])
-        achieved = actual_km >= weekly_km_target
-        week_results.append(
+    period_rows columns: period_start, actual_km, achieved, in_progress, streak
+    (oldest first, as returned by ``Database.get_goal_periods``). An unfinished
+    current period only counts once its target is already met.
+    Returns per-period results (most recent first), overall adherence % and streaks.
+    """
+    report: dict = {
+        "period": period,
+        "target_km": target_km,
+        "overall_pct": None,
+        "streak": 0,
+        "longest_streak": 0,
+        "periods": [],
+    }
+    if not period_rows:
+        return {**report, "message": "No data available"}
+
+    results = []
+    streaks = []  # of the periods that count towards adherence, most recent first
+    achieved_count = 0
+    for period_start, actual_km, achieved, in_progress, streak in reversed(period_rows):
+        results.append(
             {
-                "week_start": ws,
-                "planned_km": weekly_km_target,
+                "period_start": period_start,
+                "planned_km": target_km,
                 "actual_km": round(actual_km, 1),
-                "achieved": achieved,
+                "achieved": bool(achieved),
+                "in_progress": bool(in_progress),
             }
         )
+        if achieved or not in_progress:
+            streaks.append(streak)
+            achieved_count += bool(achieved)
 
-    if not week_results:
-        return {
-            "target_km": weekly_km_target,
-            "overall_pct": None,
-            "streak": 0,
-            "weeks": [],
-            "message": "Not enough weekly data",
-        }
-
-    achieved_count = sum(1 for w in week_results if w["achieved"])
-    overall_pct = round(achieved_count / len(week_results) * 100)
-
-    # Current streak (consecutive achieved weeks from most recent)
-    streak = 0
-    for w in week_results:
-        if w["achieved"]:
-            streak += 1
-        else:
-            break
+    if not streaks:
+        return {**report, "periods": results, "message": f"First {period} in progress"}
 
+    overall_pct = round(achieved_count / len(streaks) * 100)
     return {
-        "target_km": weekly_km_target,
+        **report,
         "overall_pct": overall_pct,
-        "streak": streak,
-        "weeks": week_results,
-        "message": f"Hit goal {achieved_count}/{len(week_results)} weeks ({overall_pct}%)",
+        "streak": streaks[0],
+        "longest_streak": max(streaks),
+        "periods": results,
+        "message": f"Hit goal {achieved_count}/{len(streaks)} {period}s ({overall_pct}%)",
     }
 
 
+def injury_risk_level(risk_score: int) -> tuple[str, str]:
+    """Map an injury risk score to its level and headline message."""
+    if risk_score >= 60:
+        return "high", "🔴 HIGH INJURY RISK: Multiple warning signs. Take rest days immediately."
+    if risk_score >= 40:
+        return "elevated", "🟠 ELEVATED RISK: Several factors concerning. Reduce intensity/volume."
+    if risk_score >= 20:
+        return "moderate", "🟡 MODERATE RISK: Some warning signs. Monitor closely."
+    return "low", "🟢 LOW RISK: Training load appears sustainable."
+
+
 def calculate_injury_risk(rows: list[tuple]) -> dict:
     """Calculate injury risk score based on multiple factors."""
     if len(rows) < 7:
@@ -342,6 +367,7 @@ def calculate_injury_risk(rows: list[tuple]) -> dict:
 
     latest = rows[0]
     ctl, atl, ramp_rate, ac_ratio, rest_days, hrv, sleep_score, fatigue = latest
+    week = rows_to_matrix(rows[:7], 8)
 
     risk_factors = []
     risk_score = 0
@@ -403,10 +429,10 @@ def calculate_injury_risk(rows: list[tuple]) -> dict:
             )
 
     # Factor 3: Rest days pattern
-    rest_days_list = [r[4] for r in rows[:7] if r[4] is not None]
-    avg_rest = 0
-    if rest_days_list:
-        avg_rest = sum(rest_days_list) / len(rest_days_list)
+    rest_days_list = valid(week[:, 4])
+    avg_rest = 0.0
+    if rest_days_list.size:
+        avg_rest = float(rest_days_list.mean())
         if avg_rest < 0.5:
             risk_score += 15
             risk_factors.append(
@@ -429,10 +455,10 @@ def calculate_injury_risk(rows: list[tuple]) -> dict:
             )
 
     # Factor 4: HRV trend
-    hrv_values = [r[5] for r in rows[:7] if r[5] is not None]
-    if len(hrv_values) >= 3:
-        recent_avg = sum(hrv_values[:3]) / 3
-        older_avg = sum(hrv_values[-3:]) / 3
+    hrv_values = valid(week[:, 5])
+    if hrv_values.size >= 3:
+        recent_avg = float(hrv_values[:3].mean())
+        older_avg = float(hrv_values[-3:].mean())
         hrv_change = ((recent_avg - older_avg) / older_avg) * 100 if older_avg > 0 else 0
 
         if hrv_change < -15:
@@ -480,19 +506,7 @@ def calculate_injury_risk(rows: list[tuple]) -> dict:
             }
         )
 
-    # Determine risk level
-    if risk_score >= 60:
-        risk_level = "high"
-        message = "🔴 HIGH INJURY RISK: Multiple warning signs. Take rest days immediately."
-    elif risk_score >= 40:
-        risk_level = "elevated"
-        message = "🟠 ELEVATED RISK: Several factors concerning. Reduce intensity/volume."
-    elif risk_score >= 20:
-        risk_level = "moderate"
-        message = "🟡 MODERATE RISK: Some warning signs. Monitor closely."
-    else:
-        risk_level = "low"
-        message = "🟢 LOW RISK: Training load appears sustainable."
+    risk_level, message = injury_risk_level(risk_score)
 
     return {
         "risk_score": min(100, risk_score),
@@ -503,15 +517,47 @@ def calculate_injury_risk(rows: list[tuple]) -> dict:
             "Reduce volume by 20-30%" if risk_score >= 40 else "Maintain current load",
             "Prioritize sleep (>7 hours)" if sleep_score and sleep_score < 70 else None,
             "Add 1-2 rest days this week" if avg_rest < 1 else None,
-            "Monitor HRV daily" if hrv_values and len(hrv_values) > 0 else None,
+            "Monitor HRV daily" if hrv_values.size > 0 else None,
         ],
     }
 
 
+def _race_time(meters: float, cs: float, d_prime: float | None) -> float:
+    """Predicted time (s) over ``meters`` from the critical speed model."""
+    if meters < 2000:
+        # Short distance - D' plays bigger role
+        t = meters / cs
+        for _ in range(3):  # 3 iterations for convergence
+            v = cs + (d_prime or 0) / t if t > 0 else cs
+            t = meters / v if v > 0 else t
+        return t
+    # Longer distance - CS dominant
+    effective_d = min(d_prime or 0, meters * 0.1)  # D' contribution diminishes
+    return (meters - effective_d * 0.5) / cs
+
+
+def _format_race_time(t: float) -> str:
+    total_min = int(t // 60)
+    total_sec = int(t % 60)
+    if total_min >= 60:
+        return f"{total_min // 60}:{total_min % 60:02d}:{total_sec:02d}"
+    return f"{total_min}:{total_sec:02d}"
+
+
+@memoize()
 def calculate_race_predictions(
-    cs: float, d_prime: float | None, ctl: float | None, avg_pace: str | None
+    cs: float,
+    d_prime: float | None,
+    ctl: float | None,
+    avg_pace: str | None,
+    cs_low: float | None = None,
+    cs_high: float | None = None,
 ) -> list[dict]:
-    """Predict race times based on critical speed model."""
+    """Predict race times based on critical speed model.
+
+    With a confidence interval for CS (``cs_low``/``cs_high``), each prediction
+    also gets the fastest and slowest time within it.
+    """
     distances = [
         ("800m", 800, "2:00-2:30"),
         ("1 mile", 1609, "4:30-6:00"),
@@ -526,18 +572,7 @@ def calculate_race_predictions(
         if cs <= 0:
             continue
 
-        # Simplified critical speed model
-        if meters < 2000:
-            # Short distance - D' plays bigger role
-            t = meters / cs
-            for _ in range(3):  # 3 iterations for convergence
-                v = cs + (d_prime or 0) / t if t > 0 else cs
-                t = meters / v if v > 0 else t
-        else:
-            # Longer distance - CS dominant
-            effective_d = min(d_prime or 0, meters * 0.1)  # D' contribution diminishes
-            t = (meters - effective_d * 0.5) / cs
-
+        t = _race_time(meters, cs, d_prime)
         if t <= 0:
             continue
 
@@ -546,24 +581,17 @@ def calculate_race_predictions(
         pace_min = int(pace_sec_per_km // 60)
         pace_sec = int(pace_sec_per_km % 60)
 
-        total_min = int(t // 60)
-        total_sec = int(t % 60)
-        if total_min >= 60:
-            h = total_min // 60
-            m = total_min % 60
-            time_str = f"{h}:{m:02d}:{total_sec:02d}"
-        else:
-            time_str = f"{total_min}:{total_sec:02d}"
-
-        predictions.append(
-            {
-                "distance": name,
-                "meters": meters,
-                "predicted_time": time_str,
-                "predicted_pace": f"{pace_min}:{pace_sec:02d}/km",
-                "typical_range": typical_range,
-            }
-        )
+        prediction = {
+            "distance": name,
+            "meters": meters,
+            "predicted_time": _format_race_time(t),
+            "predicted_pace": f"{pace_min}:{pace_sec:02d}/km",
+            "typical_range": typical_range,
+        }
+        if cs_low and cs_high and 0 < cs_low <= cs_high:
+            prediction["time_fast"] = _format_race_time(_race_time(meters, cs_high, d_prime))
+            prediction["time_slow"] = _format_race_time(_race_time(meters, cs_low, d_prime))
+        predictions.append(prediction)
 
     return predictions
 
@@ -719,6 +747,7 @@ def calculate_overload(week_rows: list[tuple]) -> dict:
     return {"weeks": weeks, "safe": not any_flagged, "recommendation": recommendation}
 
 
+@memoize()
 def calculate_training_zones(
     resting_hr: int | None,
     max_hr: int | None,
@@ -777,51 +806,43 @@ def calculate_training_zones(
     return {"hr_zones": hr_zones, "pace_zones": pace_zones, "data_quality": data_quality}
 
 
-def calculate_hr_drift(rows: list[tuple]) -> dict:
-    """Analyze HR zone time to detect cardiac drift on easy sessions.
+def calculate_hr_drift(points: list[dict]) -> dict:
+    """Trend of aerobic decoupling (Pa:HR) across easy runs.
 
-    rows columns: hr_zone_z1_secs, hr_zone_z2_secs, hr_zone_z3_secs,
-                  hr_zone_z4_secs, hr_zone_z5_secs, recorded_at.
+    points: one dict per run, newest first, with at least date and decoupling_pct
+    (see services.decoupling). Lower decoupling means better aerobic endurance.
     """
-    points = []
-    for row in rows:
-        z1, z2, z3, z4, z5, recorded_at = row
-        if None in (z1, z2, z3):
-            continue
-        total = (z1 or 0) + (z2 or 0) + (z3 or 0) + (z4 or 0) + (z5 or 0)
-        if total < 600:
-            continue
-        easy_secs = (z1 or 0) + (z2 or 0)
-        easy_pct = easy_secs / total * 100
-        if easy_pct < 70:
-            continue
-        z2_ratio = (z2 or 0) / easy_secs * 100 if easy_secs > 0 else 0
-        points.append({
-            "date": recorded_at[:10] if isinstance(recorded_at, str) else str(recorded_at)[:10],
-            "z2_ratio": round(z2_ratio, 1),
-            "easy_pct": round(easy_pct, 1),
-        })
-
     if len(points) < 3:
         return {
-            "points": points, "assessment": "insufficient_data",
-            "message": "Need more easy run sessions with HR zone data.",
+            "points": points,
+            "assessment": "insufficient_data",
+            "message": "Need at least 3 steady easy runs with HR and pace streams.",
             "trend": "unknown",
+            "avg_decoupling_pct": None,
         }
 
+    decoupling = np.array([p["decoupling_pct"] for p in points], dtype=float)
     mid = len(points) // 2
-    older_avg = sum(p["z2_ratio"] for p in points[mid:]) / len(points[mid:])
-    recent_avg = sum(p["z2_ratio"] for p in points[:mid]) / len(points[:mid])
-    drift_change = recent_avg - older_avg
-
-    if drift_change > 5:
-        trend, message = "improving", "Cardiac drift is decreasing - aerobic efficiency improving."
-    elif drift_change < -5:
-        trend, message = "declining", "Increasing drift - may indicate accumulated fatigue or overheating."
+    recent_avg, older_avg = float(decoupling[:mid].mean()), float(decoupling[mid:].mean())
+    change = older_avg - recent_avg
+
+    if change > 1:
+        trend, message = "improving", "Decoupling is decreasing - aerobic efficiency improving."
+    elif change < -1:
+        trend = "declining"
+        message = "Increasing decoupling - may indicate accumulated fatigue or overheating."
     else:
-        trend, message = "stable", "Cardiac drift stable - consistent aerobic fitness."
+        trend, message = "stable", "Decoupling stable - consistent aerobic fitness."
 
-    return {"points": points, "assessment": "ok", "message": message, "trend": trend}
+    avg = round(float(decoupling.mean()), 2)
+    assessment = "aerobically_fit" if recent_avg < 5 else "needs_base"
+    return {
+        "points": points,
+        "assessment": assessment,
+        "message": message,
+        "trend": trend,
+        "avg_decoupling_pct": avg,
+    }
 
 
 def calculate_sleep_insights(rows: list[tuple]) -> dict:
@@ -830,31 +851,35 @@ def calculate_sleep_insights(rows: list[tuple]) -> dict:
     rows columns: sleep_secs, sleep_score, hrv
     """
     insights = []
-    sleep_secs_list = [(r[0], r[2]) for r in rows if r[0] is not None and r[2] is not None]
-    sleep_score_list = [(r[1], r[2]) for r in rows if r[1] is not None and r[2] is not None]
-
-    # Optimal sleep duration
-    if len(sleep_secs_list) >= 10:
-        buckets: dict[int, list[float]] = {}
-        for secs, hrv in sleep_secs_list:
-            hrs = int(secs / 3600)
-            buckets.setdefault(hrs, []).append(hrv)
-        if buckets:
-            best_hrs = max(buckets, key=lambda h: sum(buckets[h]) / len(buckets[h]))
-            best_avg = sum(buckets[best_hrs]) / len(buckets[best_hrs])
-            insights.append({
-                "type": "optimal_duration", "title": "Optimal Sleep Duration",
+    m = rows_to_matrix(rows, 3)
+    secs, score, hrv = m[:, 0], m[:, 1], m[:, 2]
+    has_secs = ~np.isnan(secs) & ~np.isnan(hrv)
+    has_score = ~np.isnan(score) & ~np.isnan(hrv)
+
+    # Optimal sleep duration: mean HRV per whole-hour bucket
+    if has_secs.sum() >= 10:
+        hours = (secs[has_secs] // 3600).astype(int)
+        bucket_hrv = hrv[has_secs]
+        buckets, inverse = np.unique(hours, return_inverse=True)
+        means = np.bincount(inverse, weights=bucket_hrv) / np.bincount(inverse)
+        best = int(np.argmax(means))
+        best_hrs, best_avg = int(buckets[best]), float(means[best])
+        insights.append(
+            {
+                "type": "optimal_duration",
+                "title": "Optimal Sleep Duration",
                 "finding": f"Your HRV averages {best_avg:.0f} ms after {best_hrs}h of sleep.",
                 "recommendation": f"Aim for {best_hrs}h of sleep for best recovery.",
-            })
+            }
+        )
 
     # Sleep score threshold
-    if len(sleep_score_list) >= 10:
-        good = [hrv for score, hrv in sleep_score_list if score >= 75]
-        poor = [hrv for score, hrv in sleep_score_list if score < 60]
-        if good and poor:
-            avg_good = sum(good) / len(good)
-            avg_poor = sum(poor) / len(poor)
+    if has_score.sum() >= 10:
+        good = hrv[has_score & (score >= 75)]
+        poor = hrv[has_score & (score < 60)]
+        if good.size and poor.size:
+            avg_good = float(good.mean())
+            avg_poor = float(poor.mean())
             diff_pct = ((avg_good - avg_poor) / avg_poor * 100) if avg_poor > 0 else 0
             if abs(diff_pct) > 10:
                 insights.append({
@@ -873,13 +898,30 @@ def calculate_sleep_insights(rows: list[tuple]) -> dict:
     return {"insights": insights, "data_points": len(rows)}
 
 
+def taper_reduction_pct(taper_model: str, week: int, taper_weeks: int) -> float:
+    """Volume reduction (% of normal) for taper ``week`` (1-based) of ``taper_weeks``."""
+    if taper_model == "linear":
+        return (week / taper_weeks) * 30
+    if taper_model == "step":
+        return 20 if week < taper_weeks else 30
+    return (1 - (0.7**week)) * 40  # exponential
+
+
+@memoize(scope=date.today)
 def calculate_taper(
     race_date_str: str,
     current_ctl: float,
     taper_model: str = "exponential",
+    current_atl: float | None = None,
 ) -> dict:
-    """Compute week-by-week volume reduction for race taper."""
-    from datetime import date, datetime
+    """Compute week-by-week volume reduction for race taper.
+
+    The taper occupies the final weeks before the race; until then, training is
+    assumed to hold CTL steady (daily load = current CTL). Each taper week's load is
+    that baseline scaled by its volume %, and CTL/ATL are simulated day by day
+    up to race morning (the state ``simulate_scenarios`` reports too).
+    """
+    from datetime import datetime
 
     try:
         race_date = datetime.strptime(race_date_str, "%Y-%m-%d").date()
@@ -892,35 +934,37 @@ def calculate_taper(
     if days_out <= 0:
         return {"error": "Race date must be in the future.", "weeks": [], "race_date": race_date_str}
 
-    taper_weeks = min(3, days_out // 7)
+    horizon = days_out - 1  # training days before race morning
+    taper_weeks = min(3, horizon // 7)
     if taper_weeks < 1:
         return {
             "error": f"Only {days_out} days to race - too close for a full taper.",
             "weeks": [], "race_date": race_date_str,
         }
 
-    weeks = []
+    atl = current_ctl if current_atl is None else current_atl
+    taper_start = horizon - taper_weeks * 7
+    loads = np.full(horizon, float(current_ctl))
+    plan = []
     for w in range(1, taper_weeks + 1):
-        if taper_model == "linear":
-            reduction_pct = (w / taper_weeks) * 30
-        elif taper_model == "step":
-            reduction_pct = 20 if w < taper_weeks else 30
-        else:  # exponential
-            reduction_pct = (1 - (0.7 ** w)) * 40
-
+        reduction_pct = taper_reduction_pct(taper_model, w, taper_weeks)
         target_volume_pct = round(100 - reduction_pct, 1)
-        days_decay = w * 7
-        proj_ctl = round(
-            current_ctl * ((1 - 1 / 42) ** days_decay * (target_volume_pct / 100 + 0.3)), 1
-        )
+        first = taper_start + (w - 1) * 7
+        loads[first : first + 7] = current_ctl * target_volume_pct / 100
+        plan.append((w, reduction_pct, target_volume_pct, first + 7))
 
+    proj_ctl, _, proj_tsb = simulate(current_ctl, atl, loads)
+
+    weeks = []
+    for w, reduction_pct, target_volume_pct, week_end in plan:
         weeks.append({
             "week": w,
             "label": f"T-{taper_weeks - w + 1}",
-            "days_to_race": days_out - (w - 1) * 7,
+            "days_to_race": horizon - (taper_start + (w - 1) * 7),
             "target_volume_pct": target_volume_pct,
             "reduction_pct": round(reduction_pct, 1),
-            "projected_ctl": proj_ctl,
+            "projected_ctl": round(float(proj_ctl[week_end - 1]), 1),
+            "projected_tsb": round(float(proj_tsb[week_end - 1]), 1),
         })
 
     return {
@@ -930,4 +974,6 @@ def calculate_taper(
         "current_ctl": current_ctl,
         "model": taper_model,
         "weeks": weeks,
+        "race_day_ctl": round(float(proj_ctl[-1]), 1),
+        "race_day_tsb": round(float(proj_tsb[-1]), 1),
     }
@@ -0,0 +1,131 @@
+"""Online anomaly detection on recovery metrics.
+
+Each monitored metric runs two control charts over its daily values, standardised
+against the metric's 28-day baseline from ``metric_stats`` (excluding the current
+day):
+
+* an EWMA chart, ``z = λ·u + (1 - λ)·z_prev``, which signals when ``z`` crosses
+  ``L·sqrt(λ / (2 - λ))`` in the adverse direction (a marked recent shift);
+* a one-sided CUSUM, ``s = max(0, s_prev + u - k)``, which signals when ``s``
+  exceeds ``h`` (a small but sustained shift, e.g. HRV suppressed for days).
+
+``u`` is the standardised value signed so that positive means "worse". A chart
+raises one alert when it enters the alarm state and re-arms once it leaves it.
+Detector state lives in ``anomaly_state``; alerts go to ``alerts``.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+
+from ..database import Database
+from .metric_stats import get_baselines
+
+logger = logging.getLogger(__name__)
+
+BASELINE_WINDOW = 28
+MIN_BASELINE_DAYS = 10
+
+EWMA_LAMBDA = 0.3
+EWMA_L = 3.0
+CUSUM_K = 0.5
+CUSUM_H = 4.0
+
+
+@dataclass(frozen=True)
+class MonitoredMetric:
+    """A metric to watch and which direction is adverse."""
+
+    label: str
+    unit: str
+    # +1: high values are bad (resting HR), -1: low values are bad (HRV)
+    direction: int
+
+
+MONITORED: dict[str, MonitoredMetric] = {
+    "hrv": MonitoredMetric("HRV", "ms", -1),
+    "resting_hr": MonitoredMetric("Resting HR", "bpm", +1),
+}
+
+_EWMA_LIMIT = EWMA_L * math.sqrt(EWMA_LAMBDA / (2 - EWMA_LAMBDA))
+
+
+def _message(metric: MonitoredMetric, detector: str, value: float, mean: float) -> str:
+    word = "elevated" if metric.direction > 0 else "suppressed"
+    if detector == "cusum":
+        return (
+            f"{metric.label} has been {word} for several days"
+            f" (today {value:.0f} {metric.unit} vs baseline {mean:.0f} {metric.unit})"
+        )
+    return (
+        f"{metric.label} {word}: {value:.0f} {metric.unit}"
+        f" vs {BASELINE_WINDOW}-day baseline {mean:.0f} {metric.unit}"
+    )
+
+
+def detect_anomalies(db: Database, snapshot_id: int) -> list[int]:
+    """Advance every monitored metric's charts with one snapshot's values.
+
+    A second snapshot on the same day replays that day from the previous state
+    (replacing any alerts it raised). Snapshots older than the detector state are
+    ignored. Returns the IDs of the alerts raised.
+    """
+    row = db.get_snapshot_columns(snapshot_id, ["recorded_at", *MONITORED])
+    if row is None:
+        return []
+    day = row[0][:10]
+    values = dict(zip(MONITORED, row[1:], strict=True))
+    baselines = get_baselines(db, list(MONITORED), BASELINE_WINDOW, exclude_latest=True)
+    states = {r["metric"]: r for r in db.get_anomaly_states()}
+
+    raised = []
+    for name, metric in MONITORED.items():
+        state = states.get(name)
+        ewma, cusum, ewma_alarm, cusum_alarm = 0.0, 0.0, False, False
+        if state is not None:
+            if day < state["day"]:
+                logger.info("Skipping anomaly check for %s: %s predates state", name, day)
+                continue
+            if day == state["day"]:
+                # Replay today from the state before today's first snapshot
+                db.delete_alerts(name, day)
+                prefix = "prev_"
+            else:
+                prefix = ""
+            ewma, cusum = state[f"{prefix}ewma"], state[f"{prefix}cusum"]
+            ewma_alarm = bool(state[f"{prefix}ewma_alarm"])
+            cusum_alarm = bool(state[f"{prefix}cusum_alarm"])
+        prev = (ewma, cusum, ewma_alarm, cusum_alarm)
+
+        value, base = values[name], baselines[name]
+        std = base.std
+        if value is not None and base.n >= MIN_BASELINE_DAYS and std:
+            u = metric.direction * (value - base.mean) / std
+            ewma = EWMA_LAMBDA * u + (1 - EWMA_LAMBDA) * ewma
+            cusum = max(0.0, cusum + u - CUSUM_K)
+
+            signals = []
+            if ewma > _EWMA_LIMIT and not ewma_alarm:
+                signals.append(("ewma", "warning", ewma))
+            if cusum > CUSUM_H and not cusum_alarm:
+                signals.append(("cusum", "danger", cusum))
+            ewma_alarm, cusum_alarm = ewma > _EWMA_LIMIT, cusum > CUSUM_H
+
+            for detector, severity, statistic in signals:
+                raised.append(
+                    db.create_alert(
+                        day=day,
+                        metric=name,
+                        detector=detector,
+                        severity=severity,
+                        value=value,
+                        baseline_mean=round(base.mean, 2),
+                        baseline_std=round(std, 2),
+                        statistic=round(statistic, 3),
+                        message=_message(metric, detector, value, base.mean),
+                        snapshot_id=snapshot_id,
+                    )
+                )
+
+        db.save_anomaly_state(name, day, ewma, cusum, ewma_alarm, cusum_alarm, *prev)
+    return raised
@@ -0,0 +1,238 @@
+"""Lagged correlation engine over snapshot metrics.
+
+Every pair of numeric metrics is correlated at lags of 0–7 days on the daily
+resampled history (``x`` on day ``t`` against ``y`` on day ``t + lag``). NULLs are
+handled by pairwise deletion: each pair uses exactly the days where both values
+exist. All pairs for one lag are computed at once with masked matrix products.
+
+Significance comes from the Fisher z-transform and is controlled for the number of
+pairs tested with the Benjamini–Hochberg false discovery rate.
+
+Spearman's rho ranks each metric once over its whole history and then applies the
+pairwise-deleted Pearson formula to the ranks; this is a close approximation of
+re-ranking each pair's overlapping subset and keeps the computation vectorized.
+"""
+
+import math
+from typing import Any
+
+import numpy as np
+
+MAX_LAG_DAYS = 7
+MIN_OVERLAP = 14
+FDR_ALPHA = 0.05
+
+# Metrics that are derived from one another; correlations inside a group are trivial.
+_RELATED_GROUPS = [
+    {"ctl", "atl", "tsb", "ramp_rate", "ac_ratio", "monotony", "training_strain"},
+    {
+        "week_0_km",
+        "week_1_km",
+        "week_2_km",
+        "week_3_km",
+        "week_4_km",
+        "last_month_km",
+        "total_distance_km",
+        "run_count",
+        "longest_run_km",
+        "strava_weekly_km",
+        "strava_total_km",
+        "strava_run_count",
+        "strava_ytd_km",
+    },
+    {"longest_streak", "longest_break_days", "avg_days_run_per_week"},
+    {"days_run_am", "days_run_pm", "days_run_both"},
+    {"hr_zone_z1_secs", "hr_zone_z2_secs", "hr_zone_z3_secs", "hr_zone_z4_secs", "hr_zone_z5_secs"},
+    {"hrv", "hrv_sdnn"},
+    {"sleep_secs", "sleep_quality", "sleep_score"},
+    {"critical_speed", "d_prime"},
+    {"weather_temp", "weather_temp_feels_like"},
+]
+
+_LABELS = {
+    "ctl": "fitness (CTL)",
+    "atl": "fatigue (ATL)",
+    "tsb": "form (TSB)",
+    "ac_ratio": "acute:chronic ratio",
+    "resting_hr": "resting HR",
+    "hrv": "HRV",
+    "hrv_sdnn": "HRV (SDNN)",
+    "spo2": "SpO2",
+    "vo2max": "VO2max",
+    "icu_rpe": "RPE",
+    "max_hr": "max HR",
+    "week_0_km": "weekly km",
+    "weather_temp": "temperature",
+    "weather_temp_feels_like": "feels-like temperature",
+}
+
+
+def label(column: str) -> str:
+    """Human-readable name for a snapshot metric."""
+    return _LABELS.get(column, column.replace("_", " "))
+
+
+def _group_ids(columns: list[str]) -> np.ndarray:
+    """Group index per column; ungrouped columns get a group of their own."""
+    ids = np.arange(len(_RELATED_GROUPS), len(_RELATED_GROUPS) + len(columns))
+    for g, group in enumerate(_RELATED_GROUPS):
+        for i, col in enumerate(columns):
+            if col in group:
+                ids[i] = g
+    return ids
+
+
+def rank_columns(matrix: np.ndarray) -> np.ndarray:
+    """Average ranks (1-based, ties averaged) of each column; NaN stays NaN."""
+    out = np.full(matrix.shape, np.nan)
+    for c in range(matrix.shape[1]):
+        mask = ~np.isnan(matrix[:, c])
+        v = matrix[mask, c]
+        if not v.size:
+            continue
+        order = np.argsort(v, kind="mergesort")
+        sv = v[order]
+        first = np.concatenate(([True], sv[1:] != sv[:-1]))
+        starts = np.flatnonzero(first)
+        ends = np.append(starts[1:], len(sv))
+        avg = (starts + ends + 1) / 2
+        ranks = np.empty(len(v))
+        ranks[order] = avg[np.cumsum(first) - 1]
+        out[mask, c] = ranks
+    return out
+
+
+def pairwise_pearson(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Pearson r between every column of ``x`` and every column of ``y``.
+
+    Rows are aligned observations; NaN marks a missing value and only rows where
+    both columns are present count for that pair. Returns ``(r, n)`` matrices of
+    shape ``(x_cols, y_cols)``; ``r`` is NaN below ``MIN_OVERLAP`` or for constants.
+    """
+    vx, vy = ~np.isnan(x), ~np.isnan(y)
+    fx, fy = vx.astype(float), vy.astype(float)
+
+    def _centred(a: np.ndarray, va: np.ndarray) -> np.ndarray:
+        # Centre on column means so the sums below stay well conditioned
+        count = va.sum(axis=0)
+        total = np.where(va, a, 0.0).sum(axis=0)
+        mean = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+        return np.where(va, a - mean, 0.0)
+
+    zx, zy = _centred(x, vx), _centred(y, vy)
+    n = fx.T @ fy
+    sx, sy = zx.T @ fy, fx.T @ zy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = zx.T @ zy - sx * sy / n
+        var_x = (zx * zx).T @ fy - sx * sx / n
+        var_y = fx.T @ (zy * zy) - sy * sy / n
+        r = cov / np.sqrt(var_x * var_y)
+    r[(n < MIN_OVERLAP) | ~np.isfinite(r) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    return np.clip(r, -1.0, 1.0), n
+
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def p_values(r: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Two-sided p-values for correlations via the Fisher z-transform."""
+    z = np.arctanh(np.clip(r, -0.999999, 0.999999)) * np.sqrt(np.maximum(n - 3, 0))
+    return _erfc(np.abs(z) / math.sqrt(2)).astype(float)
+
+
+def benjamini_hochberg(p: np.ndarray) -> np.ndarray:
+    """Benjamini–Hochberg adjusted p-values (q-values)."""
+    m = len(p)
+    if not m:
+        return p.copy()
+    order = np.argsort(p)
+    ranked = p[order] * m / np.arange(1, m + 1)
+    q = np.minimum.accumulate(ranked[::-1])[::-1]
+    out = np.empty(m)
+    out[order] = np.minimum(q, 1.0)
+    return out
+
+
+def find_correlations(
+    matrix: np.ndarray,
+    columns: list[str],
+    max_lag: int = MAX_LAG_DAYS,
+    alpha: float = FDR_ALPHA,
+) -> tuple[list[dict[str, Any]], int]:
+    """Significant lagged correlations in a daily ``(days, metrics)`` matrix.
+
+    Pairs of related metrics (see ``_RELATED_GROUPS``) and a metric against itself
+    are not tested. Results must pass the FDR threshold on Pearson r and agree in
+    sign with Spearman rho. Only the strongest lag is kept for each pair of metrics.
+
+    Returns ``(pairs sorted by |r| descending, number of pairs tested)``.
+    """
+    ranks = rank_columns(matrix)
+    groups = _group_ids(columns)
+    distinct = groups[:, None] != groups[None, :]
+    upper = np.triu(np.ones_like(distinct), k=1)
+
+    lags, xs, ys, rs, rhos, ns = [], [], [], [], [], []
+    for lag in range(max_lag + 1):
+        if lag >= len(matrix):
+            break
+        lead, follow = slice(0, len(matrix) - lag), slice(lag, len(matrix))
+        r, n = pairwise_pearson(matrix[lead], matrix[follow])
+        rho, _ = pairwise_pearson(ranks[lead], ranks[follow])
+        # Same-day correlation is symmetric: test each pair once
+        tested = (distinct & upper if lag == 0 else distinct) & ~np.isnan(r)
+        i, j = np.nonzero(tested)
+        lags.append(np.full(len(i), lag))
+        xs.append(i)
+        ys.append(j)
+        rs.append(r[i, j])
+        rhos.append(rho[i, j])
+        ns.append(n[i, j])
+
+    if not lags:
+        return [], 0
+    lag_a, x_a, y_a = np.concatenate(lags), np.concatenate(xs), np.concatenate(ys)
+    r_a, rho_a, n_a = np.concatenate(rs), np.concatenate(rhos), np.concatenate(ns)
+    p_a = p_values(r_a, n_a)
+    q_a = benjamini_hochberg(p_a)
+
+    keep = (q_a <= alpha) & (np.sign(r_a) == np.sign(rho_a))
+    best: dict[frozenset[int], int] = {}
+    for k in np.flatnonzero(keep)[np.argsort(-np.abs(r_a[keep]), kind="stable")]:
+        best.setdefault(frozenset((int(x_a[k]), int(y_a[k]))), int(k))
+
+    pairs = [
+        {
+            "x": columns[x_a[k]],
+            "y": columns[y_a[k]],
+            "lag_days": int(lag_a[k]),
+            "pearson_r": round(float(r_a[k]), 3),
+            "spearman_rho": round(float(rho_a[k]), 3),
+            "n": int(n_a[k]),
+            "p_value": float(f"{p_a[k]:.3g}"),
+            "q_value": float(f"{q_a[k]:.3g}"),
+        }
+        for k in best.values()
+    ]
+    return pairs, len(r_a)
+
+
+def describe(pair: dict[str, Any]) -> dict[str, str]:
+    """Turn one correlation result into a dashboard insight."""
+    x, y, lag = label(pair["x"]), label(pair["y"]), pair["lag_days"]
+    direction = "higher" if pair["pearson_r"] > 0 else "lower"
+    strength = "Strong" if abs(pair["pearson_r"]) >= 0.5 else "Moderate"
+    stats = f"(r = {pair['pearson_r']:+.2f}, n = {pair['n']} days)"
+    if lag == 0:
+        description = f"Days with higher {x} tend to have {direction} {y} {stats}."
+        recommendation = f"Track {x} alongside {y}."
+    else:
+        when = "the next day" if lag == 1 else f"{lag} days later"
+        description = f"Higher {x} is followed by {direction} {y} {when} {stats}."
+        recommendation = f"Use {x} as an early signal for {y}."
+    return {
+        "type": "correlation",
+        "title": f"{strength} link: {x} → {y}" if lag else f"{strength} link: {x} ↔ {y}",
+        "description": description,
+        "recommendation": recommendation,
+    }
@@ -0,0 +1,183 @@
+"""Critical speed / D' over rolling windows of best efforts, with confidence intervals.
+
+For every window (the last 42 and 90 days, ending every ``STEP_DAYS`` back from
+today through the whole effort history) the best 1-5 km times of at least two
+minutes are taken from ``activity_best_efforts`` and ``speed = CS + D' / t`` is
+fitted by least squares. Uncertainty comes from bootstrap resampling of each
+window's efforts: ``BOOTSTRAP_SAMPLES`` resamples for a batch of windows are
+fitted as one (windows, samples, efforts) array, with the least-squares sums
+taken along the last axis, and their percentiles give the confidence interval.
+
+The series is stored in ``critical_speed_history``; race predictions and pace
+zones read the latest ``CS_WINDOW`` fit from it.
+"""
+
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+
+from ..database import Database
+from .pace_curve import CS_DISTANCES, CS_MIN_SECS
+
+WINDOWS = (42, 90)
+CS_WINDOW = 42  # the window race predictions and zones use
+STEP_DAYS = 7
+BOOTSTRAP_SAMPLES = 1000
+CONFIDENCE = 0.95
+MIN_BOOTSTRAP_EFFORTS = 3  # fewer points give no meaningful interval
+SEED = 0  # fixed so the stored intervals only change when the efforts do
+CHUNK_WINDOWS = 128  # windows fitted per batch, bounding the bootstrap arrays
+
+
+def fit_lines(x: np.ndarray, y: np.ndarray, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Least-squares ``y = intercept + slope * x`` along the last axis, where mask is set.
+
+    Returns (intercept, slope) arrays; NaN where the masked x values do not vary.
+    """
+    m = mask.astype(np.float64)
+    n = m.sum(axis=-1)
+    sx, sy = (m * x).sum(axis=-1), (m * y).sum(axis=-1)
+    sxx, sxy = (m * x * x).sum(axis=-1), (m * x * y).sum(axis=-1)
+    den = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ok = np.abs(den) > 1e-12 * np.maximum(n * sxx, 1e-300)
+        slope = np.where(ok, (n * sxy - sx * sy) / np.where(ok, den, 1.0), np.nan)
+        intercept = np.where(ok, (sy - slope * sx) / np.where(n > 0, n, 1.0), np.nan)
+    return intercept, slope
+
+
+def window_efforts(
+    days: np.ndarray, secs: np.ndarray, ends: np.ndarray, window_days: int
+) -> np.ndarray:
+    """Best time per distance in each window: (windows, distances), inf where none.
+
+    days: day ordinal per activity; secs: (activities, distances) times, inf
+    where an activity has no usable effort; ends: last day ordinal per window.
+    """
+    inside = (days[None, :] > ends[:, None] - window_days) & (days[None, :] <= ends[:, None])
+    return np.where(inside[:, :, None], secs[None, :, :], np.inf).min(axis=1)
+
+
+def fit_windows(
+    best: np.ndarray, samples: int = BOOTSTRAP_SAMPLES, seed: int = SEED
+) -> dict[str, np.ndarray]:
+    """Fit CS/D' with bootstrap intervals for every window of best times at once.
+
+    best: (windows, distances) best times, inf where missing. Returns arrays per
+    window: critical_speed, d_prime, their low/high bounds and the effort count.
+    """
+    distances = np.asarray(CS_DISTANCES, dtype=np.float64)
+    have = np.isfinite(best)
+    n = have.sum(axis=1)
+
+    # Pack each window's efforts to the front so resampling can draw from [0, n)
+    order = np.argsort(~have, axis=1, kind="stable")
+    t = np.take_along_axis(np.where(have, best, 1.0), order, axis=1)
+    d = np.broadcast_to(distances, best.shape)
+    d = np.take_along_axis(d, order, axis=1)
+    x, y = 1.0 / t, d / t
+    packed = np.arange(best.shape[1])[None, :] < n[:, None]
+
+    cs, d_prime = fit_lines(x, y, packed)
+
+    rng = np.random.default_rng(seed)
+    draws = (rng.random((best.shape[0], samples, best.shape[1])) * n[:, None, None]).astype(int)
+    draws = np.minimum(draws, best.shape[1] - 1)
+    bx = np.take_along_axis(x[:, None, :], draws, axis=2)
+    by = np.take_along_axis(y[:, None, :], draws, axis=2)
+    boot_cs, boot_dp = fit_lines(bx, by, np.broadcast_to(packed[:, None, :], draws.shape))
+
+    tail = (1 - CONFIDENCE) / 2 * 100
+    enough = n >= MIN_BOOTSTRAP_EFFORTS
+    bounds = {}
+    for name, boot in (("cs", boot_cs), ("d_prime", boot_dp)):
+        finite = np.isfinite(boot).any(axis=1) & enough
+        boot = np.where(finite[:, None], boot, 0.0)  # keeps nanpercentile off all-NaN rows
+        lo, hi = np.nanpercentile(boot, [tail, 100 - tail], axis=1)
+        bounds[f"{name}_low"] = np.where(finite, lo, np.nan)
+        bounds[f"{name}_high"] = np.where(finite, hi, np.nan)
+
+    return {"critical_speed": cs, "d_prime": d_prime, "efforts": n, **bounds}
+
+
+def _optional(value: float, digits: int) -> float | None:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def update_critical_speed_history(db: Database, today: date | None = None) -> int:
+    """Refit every window over the whole effort history and store the series.
+
+    Returns the number of stored fits.
+    """
+    today = today or date.today()
+    efforts = db.get_best_efforts("distance", [float(d) for d in CS_DISTANCES])
+    column = {float(d): i for i, d in enumerate(CS_DISTANCES)}
+    activity_rows: dict[str, int] = {}
+    days: list[int] = []
+    secs = np.full((len({r["activity_id"] for r in efforts}), len(CS_DISTANCES)), np.inf)
+    for r in efforts:
+        row = activity_rows.setdefault(r["activity_id"], len(activity_rows))
+        if row == len(days):
+            days.append(date.fromisoformat(r["date"]).toordinal())
+        if r["value"] >= CS_MIN_SECS:
+            secs[row, column[r["target"]]] = r["value"]
+
+    rows = []
+    if days:
+        first, last = min(days), today.toordinal()
+        ends = np.arange(last, first - 1, -STEP_DAYS)[::-1]
+        for window_days in WINDOWS:
+            for chunk in range(0, len(ends), CHUNK_WINDOWS):
+                rows.extend(
+                    _history_rows(
+                        ends[chunk : chunk + CHUNK_WINDOWS], window_days, np.array(days), secs
+                    )
+                )
+    db.replace_critical_speed_history(rows)
+    return len(rows)
+
+
+def _history_rows(
+    ends: np.ndarray, window_days: int, days: np.ndarray, secs: np.ndarray
+) -> list[tuple]:
+    fits = fit_windows(window_efforts(days, secs, ends, window_days))
+    rows = []
+    for i, end in enumerate(ends):
+        cs, dp = fits["critical_speed"][i], fits["d_prime"][i]
+        if fits["efforts"][i] < 2 or not cs > 0:
+            continue
+        rows.append(
+            (
+                date.fromordinal(int(end)).isoformat(),
+                window_days,
+                round(float(cs), 4),
+                round(float(dp), 2),
+                _optional(fits["cs_low"][i], 4),
+                _optional(fits["cs_high"][i], 4),
+                _optional(fits["d_prime_low"][i], 2),
+                _optional(fits["d_prime_high"][i], 2),
+                int(fits["efforts"][i]),
+            )
+        )
+    return rows
+
+
+def current_critical_speed(db: Database) -> dict[str, Any] | None:
+    """Latest ``CS_WINDOW`` fit from the stored history, or None."""
+    row = db.get_latest_critical_speed(CS_WINDOW)
+    return dict(row) if row is not None else None
+
+
+def critical_speed_trend(db: Database, window_days: int = CS_WINDOW, days: int = 365) -> dict:
+    """Get the stored CS/D' series of one window length over the last ``days`` days."""
+    start = (date.today() - timedelta(days=days - 1)).isoformat()
+    points = [
+        {k: r[k] for k in r.keys() if k not in ("window_days", "updated_at")}
+        for r in db.get_critical_speed_history(window_days, start)
+    ]
+    return {
+        "window_days": window_days,
+        "points": points,
+        "latest": points[-1] if points else None,
+    }
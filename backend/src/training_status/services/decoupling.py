@@ -0,0 +1,156 @@
+"""Aerobic decoupling (Pa:HR) of runs, from their HR and pace streams.
+
+The efficiency factor EF is speed (m/min) per heartbeat (bpm), time-weighted over
+the moving samples after a warm-up. Decoupling compares the two halves of a run's
+moving time: ``(EF_first - EF_second) / EF_first * 100``. A well-developed aerobic
+base holds EF steady on easy runs (decoupling under ~5%); HR creeping up at the
+same pace shows as positive decoupling.
+
+A run only says something about aerobic fitness when the effort is steady, so
+rolling means over sliding windows of the moving samples flag runs whose pace
+varies too much (intervals, hills, stop-and-go) as not steady. Results are
+stored per activity in ``activity_decoupling`` and recomputed only when the
+activity's streams change or ``VERSION`` is bumped.
+"""
+
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+
+from ..database import Database
+from .analytics import calculate_hr_drift
+from .streams import RUN_SPORTS, load_streams
+
+VERSION = 1
+
+WARMUP_SECS = 600
+MIN_MOVING_SECS = 20 * 60
+MIN_SPEED = 1.0  # m/s; slower samples count as stopped
+MAX_GAP_SECS = 5.0  # a longer gap between samples is a pause, not moving time
+WINDOW_SECS = 300
+STEADY_CV = 0.10  # max coefficient of variation of the rolling pace
+EASY_HR_FRACTION = 0.80  # of the athlete's max HR
+
+
+def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    c = np.concatenate(([0.0], np.cumsum(x)))
+    return (c[window:] - c[:-window]) / window
+
+
+def analyze_run(streams: dict[str, np.ndarray]) -> dict[str, Any] | None:
+    """Decoupling metrics of one run, or None without HR and speed streams.
+
+    ``decoupling_pct``/``ef_*`` are None when the run has less than
+    ``MIN_MOVING_SECS`` of moving time after the warm-up.
+    """
+    hr, speed = streams.get("heartrate"), streams.get("velocity_smooth")
+    if hr is None or speed is None or len(hr) != len(speed) or not len(hr):
+        return None
+    t = streams.get("time")
+    if t is None or len(t) != len(hr):
+        t = np.arange(len(hr), dtype=np.float64)
+
+    dt = np.diff(t, prepend=t[0] - 1.0)
+    dt = np.where((dt > 0) & (dt <= MAX_GAP_SECS), dt, 0.0)
+    moving = (speed >= MIN_SPEED) & (hr > 0) & ~np.isnan(hr) & ~np.isnan(speed)
+    elapsed_moving = np.cumsum(dt * moving)
+    keep = moving & (elapsed_moving > WARMUP_SECS) & (dt > 0)
+    w, v, h = dt[keep], speed[keep], hr[keep]
+    duration = float(w.sum())
+
+    result: dict[str, Any] = {
+        "duration_secs": round(float(elapsed_moving[-1]), 1),
+        "avg_hr": round(float(np.average(h, weights=w)), 1) if duration else None,
+        "avg_speed": round(float(np.average(v, weights=w)), 3) if duration else None,
+        "ef_first": None,
+        "ef_second": None,
+        "decoupling_pct": None,
+        "steady": False,
+    }
+    if duration < MIN_MOVING_SECS:
+        return result
+
+    # Halves of the analysed moving time
+    first = np.cumsum(w) <= duration / 2
+    efs = []
+    for half in (first, ~first):
+        efs.append(np.sum(v[half] * w[half]) * 60 / np.sum(h[half] * w[half]))
+    ef_first, ef_second = efs
+
+    # Steadiness: variation of the pace averaged over sliding windows
+    window = max(1, int(round(WINDOW_SECS / float(np.median(w)))))
+    rolling = _rolling_mean(v, window) if len(v) >= window else v
+    cv = float(np.std(rolling) / np.mean(rolling))
+
+    return {
+        **result,
+        "ef_first": round(float(ef_first), 4),
+        "ef_second": round(float(ef_second), 4),
+        "decoupling_pct": round(float((ef_first - ef_second) / ef_first * 100), 2),
+        "steady": cv <= STEADY_CV,
+    }
+
+
+def update_activity_decoupling(db: Database, activity_ids: list[str]) -> dict[str, dict]:
+    """Get the decoupling results for ``activity_ids``, computing the missing ones.
+
+    Activities without usable HR/speed streams are left out.
+    """
+    results = {
+        r["activity_id"]: dict(r)
+        for r in db.get_activity_decoupling(activity_ids)
+        if r["version"] == VERSION
+    }
+    for activity_id in activity_ids:
+        if activity_id in results:
+            continue
+        metrics = analyze_run(load_streams(db, activity_id))
+        if metrics is None:
+            continue
+        db.save_activity_decoupling(activity_id, VERSION, **metrics)
+        results[activity_id] = {"activity_id": activity_id, **metrics}
+    return results
+
+
+def athlete_max_hr(db: Database) -> float | None:
+    """Highest max HR recorded across the snapshot history."""
+    values = [r[0] for r in db.get_snapshots_for_analytics(["max_hr"]) if r[0]]
+    return float(max(values)) if values else None
+
+
+def hr_drift_trend(
+    db: Database, start: str | None = None, end: str | None = None, days: int = 90
+) -> dict[str, Any]:
+    """Decoupling trend over the easy runs between start and end (inclusive).
+
+    ``start`` defaults to ``days`` before ``end`` (default today). Easy runs are
+    steady with an average HR up to ``EASY_HR_FRACTION`` of the max HR.
+    """
+    end = end or date.today().isoformat()
+    start = start or (date.fromisoformat(end) - timedelta(days=days - 1)).isoformat()
+    runs = [r for r in db.get_activities(start, end) if r["sport"] in RUN_SPORTS]
+    streamed = db.get_streamed_activity_ids()
+    ids = [r["id"] for r in runs if r["id"] in streamed]
+    results = update_activity_decoupling(db, ids)
+
+    max_hr = athlete_max_hr(db)
+    hr_limit = max_hr * EASY_HR_FRACTION if max_hr else None
+    points = []
+    for run in reversed(runs):  # newest first
+        m = results.get(run["id"])
+        if m is None or m["decoupling_pct"] is None or not m["steady"]:
+            continue
+        if hr_limit is not None and m["avg_hr"] > hr_limit:
+            continue
+        points.append(
+            {
+                "date": run["start_date_local"][:10],
+                "activity_id": run["id"],
+                "decoupling_pct": m["decoupling_pct"],
+                "efficiency": round((m["ef_first"] + m["ef_second"]) / 2, 3),
+                "avg_hr": m["avg_hr"],
+                "duration_min": round(m["duration_secs"] / 60, 1),
+            }
+        )
+    return {"start": start, "end": end, **calculate_hr_drift(points)}
@@ -0,0 +1,91 @@
+"""Concurrent fetching of the data sources behind a report.
+
+Intervals.icu, Smashrun and Strava do not depend on each other, so each runs
+on its own worker thread and a fetch takes as long as the slowest source
+rather than the sum of all three. Every source has a deadline (all of its
+requests and retries together); one that fails or misses it is reported and
+left out, and the report goes ahead with the sources that answered.
+
+A source that misses its deadline is not interrupted: its thread finishes in
+the background, bounded by the HTTP timeouts and retry budget. Fetchers that
+write must therefore not share the caller's ``Database``: ``run_sources`` gives
+each its own handle and expires it when ``fetch_sources`` returns, so a late
+fetcher's writes are rolled back rather than racing what the caller does next.
+"""
+
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..config import Settings
+from .http import source_timeout
+
+DEADLINE_TIMEOUTS = 2  # default deadline in request timeouts: room for one slow retry
+
+
+@dataclass
+class SourceResult:
+    """What one source returned, or why it did not."""
+
+    data: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+    secs: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the source returned in time and without error."""
+        return self.error is None
+
+
+def source_deadline(settings: Settings, source: str) -> float:
+    """Get the seconds ``source`` may take: ``fetch_deadline``, else two request timeouts."""
+    if settings.fetch_deadline is not None:
+        return float(settings.fetch_deadline)
+    return DEADLINE_TIMEOUTS * source_timeout(settings, source)
+
+
+def fetch_sources(
+    fetchers: dict[str, Callable[[], dict[str, Any]]], deadlines: dict[str, float | None]
+) -> dict[str, SourceResult]:
+    """Run every fetcher concurrently and collect each result by its deadline.
+
+    A deadline of None waits for the fetcher however long it takes. Never
+    raises for a failing source: its ``SourceResult`` carries the error and
+    empty data instead.
+    """
+    results: dict[str, SourceResult] = {}
+    if not fetchers:
+        return results
+    start = time.monotonic()
+    finished: dict[str, float] = {}
+    pool = ThreadPoolExecutor(max_workers=len(fetchers), thread_name_prefix="fetch")
+    try:
+        futures = {}
+        for source, fetch in fetchers.items():
+            future = pool.submit(fetch)
+            future.add_done_callback(
+                lambda _, source=source: finished.setdefault(source, time.monotonic())
+            )
+            futures[source] = future
+        for source, future in futures.items():
+            deadline = deadlines[source]
+            remaining = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - (time.monotonic() - start))
+            try:
+                data = future.result(timeout=remaining)
+            except FutureTimeout:
+                error = f"no response within {deadline:g}s"
+                results[source] = SourceResult(error=error, secs=time.monotonic() - start)
+                continue
+            except Exception as e:
+                results[source] = SourceResult(error=str(e) or type(e).__name__)
+            else:
+                results[source] = SourceResult(data=data or {})
+            results[source].secs = finished.get(source, time.monotonic()) - start
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
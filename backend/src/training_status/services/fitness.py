@@ -0,0 +1,166 @@
+"""Fitness-fatigue (Banister impulse-response) engine.
+
+CTL (fitness) and ATL (fatigue) are exponentially weighted filters over the daily
+training load, using the Intervals.icu / TrainingPeaks convention:
+
+    x[t] = x[t-1] + (load[t] - x[t-1]) / tau        (decay d = 1 - 1/tau per day)
+
+``step`` advances a state by one day (used to keep ``fitness_days`` current as new
+days arrive); ``simulate`` projects forward under a planned-load vector in one
+vectorized pass and broadcasts over leading dimensions, so a ``(scenarios, days)``
+load matrix is simulated in a single call.
+"""
+
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+
+from ..database import Database
+
+CTL_TAU = 42.0
+ATL_TAU = 7.0
+
+# Largest exponent allowed in the chunked closed form (exp(600) ~ 1e260).
+_MAX_EXPONENT = 600.0
+
+# If the stored series is further behind than this, loads for the gap are unknown
+# (Intervals only reports the last week of activities), so we re-seed instead.
+_MAX_BACKFILL_DAYS = 7
+
+
+@dataclass(frozen=True)
+class FitnessState:
+    """CTL/ATL at the end of a day, with the time constants that produced them."""
+
+    ctl: float
+    atl: float
+    ctl_tau: float = CTL_TAU
+    atl_tau: float = ATL_TAU
+
+    @property
+    def tsb(self) -> float:
+        """Training stress balance (form)."""
+        return self.ctl - self.atl
+
+    def step(self, load: float) -> "FitnessState":
+        """Advance one day with the given training load."""
+        return replace(
+            self,
+            ctl=self.ctl + (load - self.ctl) / self.ctl_tau,
+            atl=self.atl + (load - self.atl) / self.atl_tau,
+        )
+
+
+def _filter(x0: Any, loads: np.ndarray, tau: float) -> np.ndarray:
+    """Run the exponential filter over the last axis of ``loads``.
+
+    Returns values for days 1..n (the day-0 seed ``x0`` is not included). ``x0`` may
+    be a scalar or an array broadcastable to ``loads.shape[:-1]``.
+    """
+    if tau < 1:
+        raise ValueError("Time constant must be >= 1 day")
+    n = loads.shape[-1]
+    seed = np.broadcast_to(np.asarray(x0, dtype=float), loads.shape[:-1]).copy()
+    out = np.empty(loads.shape, dtype=float)
+    if n == 0:
+        return out
+    if tau == 1:
+        out[...] = loads
+        return out
+
+    d = 1.0 - 1.0 / tau
+    log_d = np.log(d)
+    chunk = max(1, int(_MAX_EXPONENT / -log_d))
+    for start in range(0, n, chunk):
+        stop = min(n, start + chunk)
+        k = np.arange(1, stop - start + 1, dtype=float)
+        # x[k] = d^k * (x0 + (1-d) * sum_{j<=k} d^-j * load[j])
+        scaled = np.cumsum(loads[..., start:stop] * np.exp(-k * log_d), axis=-1)
+        out[..., start:stop] = np.exp(k * log_d) * (seed[..., None] + (1.0 - d) * scaled)
+        seed = out[..., stop - 1]
+    return out
+
+
+def simulate(
+    ctl: Any,
+    atl: Any,
+    planned_loads: Any,
+    ctl_tau: float = CTL_TAU,
+    atl_tau: float = ATL_TAU,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Project CTL/ATL/TSB forward under a planned daily load.
+
+    ``planned_loads`` has shape ``(..., days)``; element ``[..., i]`` is the load on
+    day ``i + 1``. ``ctl``/``atl`` are scalars or arrays broadcastable to the leading
+    dimensions. Returns ``(ctl, atl, tsb)`` arrays with the same shape as the loads.
+    """
+    loads = np.asarray(planned_loads, dtype=float)
+    if loads.ndim == 0:
+        raise ValueError("planned_loads must have a days axis")
+    ctl_out = _filter(ctl, loads, ctl_tau)
+    atl_out = _filter(atl, loads, atl_tau)
+    return ctl_out, atl_out, ctl_out - atl_out
+
+
+def trend_load(ctl: float, ramp_rate: float | None, ctl_tau: float = CTL_TAU) -> float:
+    """Constant daily load that keeps CTL rising at ``ramp_rate`` per week (initially)."""
+    return max(0.0, ctl + (ramp_rate or 0.0) * ctl_tau / 7)
+
+
+# --- PERSISTED DAILY SERIES ---
+
+
+def update_fitness_days(
+    db: Database,
+    daily_loads: dict[str, float],
+    seed_ctl: float | None,
+    seed_atl: float | None,
+    today: str,
+) -> int:
+    """Bring ``fitness_days`` up to ``today``, one filter step per new day.
+
+    ``daily_loads`` maps ISO dates to that day's total training load (missing days
+    are rest days). ``seed_ctl``/``seed_atl`` are the upstream values for ``today``
+    and are only used to seed an empty series or re-seed after a long gap.
+    Today's row is recomputed from yesterday on every call, since today's load
+    grows as activities are added. Returns the number of days written.
+    """
+    last = db.get_latest_fitness_day()
+    today_d = date.fromisoformat(today)
+
+    if last is not None and last["day"] == today:
+        prev = db.get_fitness_day_before(today)
+        if prev is None:
+            # Series was seeded today — keep the upstream values, refresh the load.
+            db.upsert_fitness_day(today, daily_loads.get(today, 0.0), last["ctl"], last["atl"])
+            return 1
+        last = prev
+
+    gap = (today_d - date.fromisoformat(last["day"])).days if last is not None else None
+    if last is None or gap is None or gap > _MAX_BACKFILL_DAYS or gap < 0:
+        if seed_ctl is None or seed_atl is None:
+            return 0
+        db.upsert_fitness_day(today, daily_loads.get(today, 0.0), seed_ctl, seed_atl)
+        return 1
+
+    state = FitnessState(ctl=last["ctl"], atl=last["atl"])
+    day = date.fromisoformat(last["day"])
+    written = 0
+    while day < today_d:
+        day += timedelta(days=1)
+        key = day.isoformat()
+        load = daily_loads.get(key, 0.0)
+        state = state.step(load)
+        db.upsert_fitness_day(key, load, round(state.ctl, 4), round(state.atl, 4))
+        written += 1
+    return written
+
+
+def recent_daily_load(db: Database, days: int = 7) -> float | None:
+    """Average daily load over the last ``days`` stored days (None if no series)."""
+    rows = db.get_fitness_days(limit=days)
+    if not rows:
+        return None
+    return float(np.mean([r["load"] for r in rows]))
@@ -0,0 +1,399 @@
+"""Shared HTTP layer for the source clients (Intervals.icu, Smashrun, Strava).
+
+Each source gets one process-wide ``HttpClient``: a ``requests.Session`` whose
+connection pool keeps connections alive across calls and client instances, so
+a fetch pays the TCP/TLS handshake once per host instead of once per request.
+
+Requests that fail with a connection error, a timeout or a retryable status
+(429, 5xx) are retried with exponential backoff and jitter. A ``Retry-After``
+header (seconds or HTTP date) takes precedence over the computed delay; one
+longer than ``max_backoff`` is not waited for and the response is returned.
+Every attempt is counted per source (requests, retries, errors, bytes, latency)
+and logged at DEBUG. Sources with published rate limits (``RATE_LIMITS``) also
+get a ``RateLimitGovernor`` that holds requests back before a limit is reached.
+
+GETs go through the on-disk ``HttpCache`` (see ``http_cache``) unless
+``HTTP_CACHE_MAX_MB`` is 0: fresh responses are served without a request and
+stale ones are revalidated with their ``ETag``/``Last-Modified``. Hits,
+revalidations, misses and the bytes not downloaded are counted per source.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import Settings
+from .http_cache import DEFAULT_TTLS, HttpCache, cache_key, cacheable, ttl_for
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+POOL_SIZE = 8  # connections kept per host (concurrent fetches share a source's pool)
+
+# Requests allowed per rate-limit window (RATE_LIMIT_WINDOWS seconds), by source:
+# Strava's read limits, 100 per 15 minutes and 1000 per day
+RATE_LIMITS: dict[str, tuple[int, ...]] = {"strava": (100, 1000)}
+RATE_LIMIT_WINDOWS = (900, 86400)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and how long to retry a failed request."""
+
+    retries: int = 3
+    backoff: float = 0.5  # s; the first retry waits around this long, then doubles
+    max_backoff: float = 30.0
+    statuses: frozenset[int] = RETRY_STATUSES
+
+
+@dataclass
+class HttpStats:
+    """Counters for one source's traffic."""
+
+    requests: int = 0  # attempts, including retries
+    retries: int = 0
+    errors: int = 0  # attempts that raised (connection errors, timeouts)
+    bytes_received: int = 0
+    latency_secs: float = 0.0
+    max_latency_secs: float = 0.0
+    cache_hits: int = 0  # served from the cache without a request
+    cache_revalidated: int = 0  # served from the cache after a 304
+    cache_misses: int = 0
+    bytes_saved: int = 0  # cached body bytes not downloaded again
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, latency: float, nbytes: int = 0, error: bool = False) -> None:
+        """Count one attempt: its latency, body size and whether it raised."""
+        with self.lock:
+            self.requests += 1
+            self.errors += int(error)
+            self.bytes_received += nbytes
+            self.latency_secs += latency
+            self.max_latency_secs = max(self.max_latency_secs, latency)
+
+    def record_cache(self, outcome: str, saved: int = 0) -> None:
+        """Count a cached GET: ``hits``, ``revalidated`` or ``misses``."""
+        with self.lock:
+            name = f"cache_{outcome}"
+            setattr(self, name, getattr(self, name) + 1)
+            self.bytes_saved += saved
+
+    def as_dict(self) -> dict[str, float]:
+        """Get the counters as plain values (latencies rounded to ms), e.g. for JSON."""
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "bytes_received": self.bytes_received,
+                "latency_secs": round(self.latency_secs, 3),
+                "max_latency_secs": round(self.max_latency_secs, 3),
+                "cache_hits": self.cache_hits,
+                "cache_revalidated": self.cache_revalidated,
+                "cache_misses": self.cache_misses,
+                "bytes_saved": self.bytes_saved,
+            }
+
+
+def retry_after(response: requests.Response) -> float | None:
+    """Seconds the server asked us to wait (``Retry-After``), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(tz=timezone.utc)).total_seconds())
+
+
+class RateLimitGovernor:
+    """Token buckets for fixed rate-limit windows, synced from the server's headers.
+
+    Each window's bucket holds the requests still allowed in it and refills to the
+    limit when the window rolls over. Windows are aligned to the epoch, so
+    15-minute windows start on the quarter hour and daily ones at midnight UTC,
+    which is how Strava counts. ``acquire`` takes a token from every bucket,
+    sleeping until the next rollover while one is empty; ``update`` lowers the
+    buckets to what ``X-RateLimit-Limit``/``X-RateLimit-Usage`` (and the stricter
+    ``X-ReadRateLimit-*``, if sent) say is left, so requests made by other
+    processes are accounted for too.
+    """
+
+    HEADERS = ("X-RateLimit", "X-ReadRateLimit")
+
+    def __init__(
+        self,
+        limits: tuple[int, ...],
+        windows: tuple[int, ...] = RATE_LIMIT_WINDOWS,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.windows = windows
+        self.limits = list(limits)
+        self.tokens = [float(limit) for limit in limits]
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        now = clock()
+        self._periods = [int(now // w) for w in windows]
+        self.waited_secs = 0.0
+
+    def _refill(self, now: float) -> None:
+        for i, window in enumerate(self.windows):
+            period = int(now // window)
+            if period != self._periods[i]:
+                self._periods[i] = period
+                self.tokens[i] = float(self.limits[i])
+
+    def acquire(self) -> float:
+        """Take one request from every window, waiting for a rollover if needed.
+
+        Returns the seconds waited.
+        """
+        waited = 0.0
+        with self.lock:
+            while True:
+                now = self.clock()
+                self._refill(now)
+                empty = [i for i, tokens in enumerate(self.tokens) if tokens < 1]
+                if not empty:
+                    break
+                # Sleep to just past the latest rollover that refills an empty bucket
+                wait = max((self._periods[i] + 1) * self.windows[i] - now for i in empty)
+                logger.info("rate limit reached, waiting %.0f s", wait)
+                self.sleep(wait + 0.01)
+                waited += wait + 0.01
+            self.tokens = [tokens - 1 for tokens in self.tokens]
+            self.waited_secs += waited
+        return waited
+
+    def update(self, response: requests.Response) -> None:
+        """Lower the buckets to the remaining requests the response headers report."""
+        with self.lock:
+            self._refill(self.clock())
+            for prefix in self.HEADERS:
+                limits = _header_ints(response, f"{prefix}-Limit")
+                usage = _header_ints(response, f"{prefix}-Usage")
+                if len(limits) != len(self.windows) or len(usage) != len(self.windows):
+                    continue
+                for i, (limit, used) in enumerate(zip(limits, usage)):
+                    self.limits[i] = min(self.limits[i], limit)
+                    self.tokens[i] = min(self.tokens[i], float(limit - used))
+
+
+def _header_ints(response: requests.Response, name: str) -> list[int]:
+    """Comma-separated integers of a header such as ``X-RateLimit-Usage: 12,340``."""
+    try:
+        return [int(v) for v in response.headers.get(name, "").split(",") if v.strip()]
+    except ValueError:
+        return []
+
+
+class HttpClient:
+    """A pooled session for one source, with retries and per-source counters."""
+
+    def __init__(
+        self,
+        source: str,
+        timeout: float,
+        policy: RetryPolicy | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        governor: RateLimitGovernor | None = None,
+        cache: HttpCache | None = None,
+        ttls: dict[str, int] | None = None,
+    ) -> None:
+        self.source = source
+        self.timeout = timeout
+        self.policy = policy or RetryPolicy()
+        self.sleep = sleep
+        self.governor = governor
+        self.cache = cache
+        self.ttls = ttls or {}  # URL path pattern -> seconds served without revalidating
+        self.stats = HttpStats()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter: half fixed, half random."""
+        cap = min(self.policy.max_backoff, self.policy.backoff * 2**attempt)
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request, retrying connection errors, timeouts and retryable statuses.
+
+        Returns the last response (callers still ``raise_for_status``); re-raises
+        the last exception when every attempt failed to get a response. GETs are
+        answered from the cache when it holds a fresh or revalidated copy, except
+        ``stream=True`` ones: their body is left unread for the caller to iterate.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if method != "GET" or self.cache is None or kwargs.get("stream"):
+            return self._send(method, url, **kwargs)
+
+        key = cache_key(self.source, url, kwargs.get("params"))
+        ttl = ttl_for(self.ttls, url)
+        cached = self.cache.get(key)
+        if cached is not None and cached.age() < ttl:
+            self.stats.record_cache("hits", len(cached.body))
+            logger.debug("%s GET %s served from cache (%.0f s old)", self.source, url, cached.age())
+            return cached.to_response()
+        if cached is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **cached.validators()}
+
+        response = self._send(method, url, **kwargs)
+        if cached is not None and response.status_code == 304:
+            self.cache.refresh(key)
+            self.stats.record_cache("revalidated", len(cached.body) - len(response.content))
+            return cached.to_response()
+        self.stats.record_cache("misses")
+        has_validators = "ETag" in response.headers or "Last-Modified" in response.headers
+        if cacheable(response) and (ttl > 0 or has_validators):
+            self.cache.put(key, response)
+        return response
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        attempt = 0
+        while True:
+            if self.governor is not None:
+                self.governor.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.stats.record(time.perf_counter() - start, error=True)
+                logger.debug("%s %s %s failed: %s", self.source, method, url, e)
+                if attempt >= self.policy.retries:
+                    raise
+                delay = self._delay(attempt)
+            else:
+                latency = time.perf_counter() - start
+                # A streamed body is not read here: count what the server announced
+                if kwargs.get("stream"):
+                    nbytes = int(response.headers.get("Content-Length") or 0)
+                else:
+                    nbytes = len(response.content)
+                self.stats.record(latency, nbytes)
+                if self.governor is not None:
+                    self.governor.update(response)
+                logger.debug(
+                    "%s %s %s -> %s in %.0f ms, %d bytes",
+                    self.source,
+                    method,
+                    url,
+                    response.status_code,
+                    latency * 1000,
+                    nbytes,
+                )
+                if response.status_code not in self.policy.statuses:
+                    return response
+                if attempt >= self.policy.retries:
+                    return response
+                wait = retry_after(response)
+                if wait is not None and wait > self.policy.max_backoff:
+                    return response
+                delay = wait if wait is not None else self._delay(attempt)
+                response.close()  # release the connection before retrying
+            attempt += 1
+            with self.stats.lock:
+                self.stats.retries += 1
+            self.sleep(delay)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a GET with this client's retries (see ``request``)."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a POST with this client's retries (see ``request``)."""
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+
+_clients: dict[str, HttpClient] = {}
+_clients_lock = threading.Lock()
+
+
+def source_timeout(settings: Settings, source: str) -> float:
+    """Get the source's timeout setting (e.g. ``intervals_timeout``), else ``api_timeout``."""
+    value = getattr(settings, f"{source}_timeout", None)
+    return float(value if value is not None else settings.api_timeout)
+
+
+def source_url(settings: Settings, source: str, url: str) -> str:
+    """Get ``url``, or its path on the stand-in server when ``API_STAND_IN_URL`` is set.
+
+    ``https://api.smashrun.com/v1`` becomes ``<stand-in>/smashrun/v1``: one
+    server can replay every source (see ``benchmarks/replay.py``).
+    """
+    if not settings.api_stand_in_url:
+        return url
+    return f"{settings.api_stand_in_url.rstrip('/')}/{source}{urlsplit(url).path}"
+
+
+def cache_ttls(settings: Settings, source: str) -> dict[str, int]:
+    """Get the source's freshness TTLs: ``HTTP_CACHE_TTLS`` overrides, then ``DEFAULT_TTLS``.
+
+    Override keys are ``"<source>:<URL path pattern>"``, e.g. ``"smashrun:*/my/stats"``.
+    """
+    overrides = {
+        key.partition(":")[2]: ttl
+        for key, ttl in settings.http_cache_ttls.items()
+        if key.partition(":")[0] == source
+    }
+    for pattern, ttl in DEFAULT_TTLS.get(source, {}).items():
+        overrides.setdefault(pattern, ttl)  # overrides stay first: the first match wins
+    return overrides
+
+
+def http_client(source: str, settings: Settings) -> HttpClient:
+    """Get the shared pooled client for ``source``, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(source)
+        if client is None:
+            limits = RATE_LIMITS.get(source)
+            max_bytes = settings.http_cache_max_mb * 1024 * 1024
+            client = _clients[source] = HttpClient(
+                source,
+                source_timeout(settings, source),
+                governor=RateLimitGovernor(limits) if limits else None,
+                cache=HttpCache(settings.http_cache_path, max_bytes) if max_bytes > 0 else None,
+                ttls=cache_ttls(settings, source),
+            )
+        else:
+            client.timeout = source_timeout(settings, source)
+        return client
+
+
+def http_stats() -> dict[str, dict[str, float]]:
+    """Traffic counters per source since start (or the last ``close_clients``)."""
+    with _clients_lock:
+        return {source: client.stats.as_dict() for source, client in _clients.items()}
+
+
+def close_clients() -> None:
+    """Close every shared session (their pools and counters start over on next use)."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,197 @@
+"""On-disk cache of upstream GET responses, revalidated with conditional requests.
+
+Payloads such as Smashrun ``my/stats``, the Strava athlete or Intervals.icu pace
+curves rarely change between fetches. ``HttpClient`` keeps every successful GET
+here (one SQLite file next to the database, keyed by URL and query, never by
+credentials) and then:
+
+* serves it without a request while it is younger than its endpoint's
+  freshness TTL (``DEFAULT_TTLS``, overridable with ``HTTP_CACHE_TTLS``);
+* otherwise sends ``If-None-Match``/``If-Modified-Since`` from the stored
+  ``ETag``/``Last-Modified`` and serves a ``304`` from the cache.
+
+The file is bounded to ``HTTP_CACHE_MAX_MB``; the least recently used
+responses are evicted first.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import requests
+
+# Seconds a cached response is served without revalidating, by source and URL
+# path pattern; anything else is revalidated on every use
+DEFAULT_TTLS: dict[str, dict[str, int]] = {
+    "intervals": {"*/activity-pace-curves": 3600},
+    "smashrun": {"*/my/stats": 3600},
+    "strava": {"*/athlete": 86400, "*/athletes/*/stats": 900},
+}
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        key            TEXT PRIMARY KEY,
+        url            TEXT NOT NULL,
+        status         INTEGER NOT NULL,
+        headers        TEXT NOT NULL,
+        body           BLOB NOT NULL,
+        etag           TEXT,
+        last_modified  TEXT,
+        size           INTEGER NOT NULL,
+        stored_at      REAL NOT NULL,
+        accessed_at    REAL NOT NULL
+    )
+"""
+_ACCESS_INDEX = "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """One stored response."""
+
+    url: str
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+    stored_at: float
+
+    def age(self, now: float | None = None) -> float:
+        """Get the seconds since the response was stored."""
+        return (now if now is not None else time.time()) - self.stored_at
+
+    def validators(self) -> dict[str, str]:
+        """Get the conditional request headers this response can be revalidated with."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """Rebuild a ``requests.Response`` callers cannot tell from a fresh one."""
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers.update(self.headers)
+        response._content = self.body
+        response.url = self.url
+        response.encoding = "utf-8"
+        return response
+
+
+def cache_key(source: str, url: str, params: dict | None = None) -> str:
+    """Hash of the source, URL and sorted query parameters."""
+    query = urlencode(sorted((params or {}).items()), doseq=True)
+    return hashlib.sha256(f"{source} {url}?{query}".encode()).hexdigest()
+
+
+def ttl_for(ttls: dict[str, int], url: str) -> int:
+    """Get the freshness TTL of the first pattern matching the URL's path (0 if none)."""
+    path = urlsplit(url).path
+    return next((ttl for pattern, ttl in ttls.items() if fnmatch(path, pattern)), 0)
+
+
+def cacheable(response: requests.Response) -> bool:
+    """Whether a GET response may be stored."""
+    control = response.headers.get("Cache-Control", "").lower()
+    return response.status_code == 200 and "no-store" not in control
+
+
+class HttpCache:
+    """A size-bounded LRU of responses in one SQLite file, safe across threads."""
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(_SCHEMA)
+            conn.execute(_ACCESS_INDEX)
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Get a stored response (marking it recently used), or None."""
+        with self._connection() as conn:
+            row = conn.execute(
+                """SELECT url, status, headers, body, etag, last_modified, stored_at
+                   FROM responses WHERE key = ?""",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        url, status, headers, *rest = row
+        return CachedResponse(url, status, json.loads(headers), *rest)
+
+    def put(self, key: str, response: requests.Response) -> None:
+        """Store a response, then evict the least recently used ones over the size bound."""
+        body = response.content
+        now = time.time()
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        }
+        with self._connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO responses
+                   (key, url, status, headers, body, etag, last_modified, size, stored_at,
+                    accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    key,
+                    response.url,
+                    response.status_code,
+                    json.dumps(headers),
+                    body,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    len(body),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(conn)
+
+    def refresh(self, key: str) -> None:
+        """Restart a response's freshness after the server confirmed it (304)."""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+
+    def size(self) -> int:
+        """Get the stored body bytes."""
+        with self._connection() as conn:
+            return int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0])
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evict = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            evict.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", evict)
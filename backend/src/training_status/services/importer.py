@@ -0,0 +1,169 @@
+"""Bulk import of device activity files (FIT, GPX, TCX) from a directory tree.
+
+``import_directory`` walks the tree lazily and hands the files to a process
+pool. Each worker reads a file, hashes its bytes (SHA-256) and, unless that
+content was imported before, parses it (``services.activity_files``) and
+encodes its streams; the parent process only writes the results, in batches of
+``BATCH_SIZE`` files per transaction. At most ``IN_FLIGHT_PER_WORKER`` files
+per worker are queued or in progress at any time, so memory stays flat however
+many files the tree holds.
+
+An imported activity's id is ``file-`` plus the first 16 hex digits of its
+content hash, so the same file under another name or path is imported once.
+Streams are stored for runs only, like the Intervals.icu stream sync. Files
+that fail to parse are reported and tried again on the next import.
+"""
+
+import hashlib
+import os
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ..database import Database
+from .activity_files import file_format, parse_activity
+from .streams import RUN_SPORTS, encode_stream
+
+BATCH_SIZE = 50  # files written per transaction
+IN_FLIGHT_PER_WORKER = 4
+
+_known_hashes: frozenset[str] = frozenset()  # per worker process, see _init_worker
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """What a worker made of one file."""
+
+    path: str
+    content_hash: str | None = None
+    activity: tuple | None = None  # activities row
+    streams: list[tuple] = field(default_factory=list)  # activity_streams rows
+    skipped: bool = False  # content imported before
+    error: str | None = None
+
+
+@dataclass
+class ImportStats:
+    """Outcome of one import run."""
+
+    files: int = 0
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    secs: float = 0.0
+    run_ids: list[str] = field(default_factory=list)  # imported runs, for derived metrics
+    errors: list[tuple[str, str]] = field(default_factory=list)  # (path, error)
+
+    @property
+    def files_per_sec(self) -> float:
+        """Files examined per second of wall time (0 before the run is timed)."""
+        return self.files / self.secs if self.secs else 0.0
+
+
+def iter_activity_files(root: Path) -> Iterator[Path]:
+    """Yield every FIT/GPX/TCX file (gzipped or not) under ``root``, directory by directory."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = Path(dirpath, name)
+            if file_format(path) is not None:
+                yield path
+
+
+def _init_worker(known_hashes: frozenset[str]) -> None:
+    global _known_hashes
+    _known_hashes = known_hashes
+
+
+def read_activity_file(path: str) -> FileResult:
+    """Hash and, unless already imported, parse and encode one file (runs in a worker)."""
+    try:
+        content = Path(path).read_bytes()
+    except OSError as e:
+        return FileResult(path, error=str(e))
+    content_hash = hashlib.sha256(content).hexdigest()
+    if content_hash in _known_hashes:
+        return FileResult(path, content_hash, skipped=True)
+    try:
+        activity = parse_activity(path, content)
+    except ValueError as e:
+        return FileResult(path, content_hash, error=str(e))
+    activity_id = f"file-{content_hash[:16]}"
+    streams = []
+    if activity.sport in RUN_SPORTS:
+        streams = [
+            (activity_id, *encode_stream(name, values).row())
+            for name, values in activity.streams.items()
+        ]
+    row = (
+        activity_id,
+        activity.start_date_local,
+        activity.sport,
+        activity.distance_m,
+        activity.moving_time_secs,
+        activity.average_hr,
+    )
+    return FileResult(path, content_hash, row, streams)
+
+
+def import_directory(
+    db: Database,
+    root: Path,
+    workers: int | None = None,
+    on_progress: Callable[[ImportStats], None] | None = None,
+) -> ImportStats:
+    """Import every activity file under ``root`` not imported yet, across ``workers`` processes.
+
+    ``workers`` defaults to the CPU count. ``on_progress`` is called after every
+    written batch.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = ImportStats()
+    start = time.perf_counter()
+    seen: set[str] = set()  # hashes imported by this run
+    batch: list[FileResult] = []
+
+    def flush() -> None:
+        db.save_imported_activities(
+            [(r.content_hash, r.path, r.activity[0]) for r in batch],  # type: ignore[index]
+            [r.activity for r in batch],
+            [row for r in batch for row in r.streams],
+        )
+        batch.clear()
+        stats.secs = time.perf_counter() - start
+        if on_progress:
+            on_progress(stats)
+
+    def collect(result: FileResult) -> None:
+        stats.files += 1
+        if result.error is not None:
+            stats.failed += 1
+            stats.errors.append((result.path, result.error))
+        elif result.skipped or result.content_hash in seen:
+            stats.skipped += 1
+        else:
+            seen.add(result.content_hash)  # type: ignore[arg-type]
+            stats.imported += 1
+            if result.streams:
+                stats.run_ids.append(result.activity[0])  # type: ignore[index]
+            batch.append(result)
+            if len(batch) >= BATCH_SIZE:
+                flush()
+
+    known = frozenset(db.get_imported_file_hashes())
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(known,)) as pool:
+        pending: set[Future[FileResult]] = set()
+        for path in iter_activity_files(root):
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future.result())
+            pending.add(pool.submit(read_activity_file, str(path)))
+        for future in wait(pending).done:
+            collect(future.result())
+    if batch:
+        flush()
+    stats.secs = time.perf_counter() - start
+    return stats
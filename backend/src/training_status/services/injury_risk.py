@@ -0,0 +1,177 @@
+"""Injury-risk history: the ``calculate_injury_risk`` score for every past day.
+
+The daily series is scored in one vectorized pass instead of re-running the
+single-point assessment per day. The factors and thresholds are the same:
+
+* ramp rate and fatigue/sleep values as recorded that day;
+* the acute:chronic workload ratio, taken as ATL/CTL — exponentially weighted
+  7- and 42-day load averages — from ``fitness_days`` where that series exists and
+  from the snapshots before it;
+* average rest days over the trailing 7 days;
+* HRV change, the mean of the last 3 days against days 5-7 back.
+
+Only days with a snapshot are scored, starting from the 7th such day.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from ..database import Database
+from .analytics import injury_risk_level
+from .timeseries import load_daily, rolling_count, rolling_mean, shift
+
+MIN_HISTORY_DAYS = 7
+
+COLUMNS = ["ctl", "atl", "ramp_rate", "rest_days", "hrv", "sleep_score", "fatigue"]
+
+# (input, [(test, points, factor), ...]): the first matching band of each input scores
+_Band = tuple[Callable[[np.ndarray], np.ndarray], int, str]
+_FACTORS: list[tuple[str, list[_Band]]] = [
+    (
+        "ramp_rate",
+        [
+            (lambda x: x > 8, 30, "Extreme ramp rate"),
+            (lambda x: x > 5, 20, "High ramp rate"),
+            (lambda x: x > 3, 10, "Elevated ramp rate"),
+        ],
+    ),
+    (
+        "acwr",
+        [
+            (lambda x: x > 1.5, 25, "Very high fatigue load"),
+            (lambda x: x > 1.3, 15, "High fatigue load"),
+        ],
+    ),
+    (
+        "avg_rest_days",
+        [
+            (lambda x: x < 0.5, 15, "Insufficient rest"),
+            (lambda x: x > 4, 10, "Inconsistent training"),
+        ],
+    ),
+    (
+        "hrv_change_pct",
+        [
+            (lambda x: x < -15, 20, "Significant HRV drop"),
+            (lambda x: x < -10, 10, "HRV declining"),
+        ],
+    ),
+    ("sleep_score", [(lambda x: x < 60, 10, "Poor sleep recovery")]),
+    ("fatigue", [(lambda x: x >= 4, 15, "High subjective fatigue")]),
+]
+
+
+def _fitness_on_grid(db: Database, days: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ATL and CTL from ``fitness_days`` aligned to ``days`` (NaN where absent)."""
+    atl, ctl = np.full(len(days), np.nan), np.full(len(days), np.nan)
+    rows = db.get_fitness_days()
+    if not rows or not len(days):
+        return atl, ctl
+    offsets = (np.array([r["day"] for r in rows], dtype="datetime64[D]") - days[0]).astype(int)
+    inside = (offsets >= 0) & (offsets < len(days))
+    atl[offsets[inside]] = [r["atl"] for r, ok in zip(rows, inside, strict=True) if ok]
+    ctl[offsets[inside]] = [r["ctl"] for r, ok in zip(rows, inside, strict=True) if ok]
+    return atl, ctl
+
+
+def score_series(inputs: dict[str, np.ndarray]) -> tuple[np.ndarray, list[list[str]]]:
+    """Score aligned daily factor inputs.
+
+    Returns ``(scores capped at 100, factor names per day)``. NaN inputs never score.
+    """
+    n = len(next(iter(inputs.values())))
+    scores = np.zeros(n, dtype=int)
+    hits: list[tuple[np.ndarray, str]] = []
+    for name, bands in _FACTORS:
+        x = inputs[name]
+        taken = np.zeros(n, dtype=bool)
+        for test, points, factor in bands:
+            with np.errstate(invalid="ignore"):
+                hit = test(x) & ~taken
+            scores += points * hit
+            taken |= hit
+            hits.append((hit, factor))
+    factors: list[list[str]] = [[] for _ in range(n)]
+    for hit, factor in hits:
+        for i in np.flatnonzero(hit):
+            factors[i].append(factor)
+    return np.minimum(scores, 100), factors
+
+
+def _num(x: float, digits: int) -> float | None:
+    return None if np.isnan(x) else round(float(x), digits)
+
+
+def calculate_injury_risk_series(db: Database) -> list[dict[str, Any]]:
+    """Injury-risk score and its inputs for every scoreable day, oldest first."""
+    days, m = load_daily(db, COLUMNS)
+    if not len(days):
+        return []
+    col = {c: m[:, i] for i, c in enumerate(COLUMNS)}
+
+    atl, ctl = _fitness_on_grid(db, days)
+    atl = np.where(np.isnan(atl), col["atl"], atl)
+    ctl = np.where(np.isnan(ctl), col["ctl"], ctl)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        acwr = np.where(ctl > 0, atl / ctl, np.nan)
+
+        hrv = col["hrv"]
+        recent, older = rolling_mean(hrv, 3), shift(rolling_mean(hrv, 3), 4)
+        hrv_change = np.where(
+            (rolling_count(hrv, MIN_HISTORY_DAYS) >= 3) & (older > 0),
+            (recent - older) / older * 100,
+            np.nan,
+        )
+
+    inputs = {
+        "ramp_rate": col["ramp_rate"],
+        "acwr": acwr,
+        "avg_rest_days": rolling_mean(col["rest_days"], MIN_HISTORY_DAYS),
+        "hrv_change_pct": hrv_change,
+        "sleep_score": col["sleep_score"],
+        "fatigue": col["fatigue"],
+    }
+    scores, factors = score_series(inputs)
+
+    has_snapshot = ~np.isnan(m).all(axis=1)
+    scoreable = has_snapshot & (np.cumsum(has_snapshot) >= MIN_HISTORY_DAYS)
+    points = []
+    for i in np.flatnonzero(scoreable):
+        score = int(scores[i])
+        points.append(
+            {
+                "day": str(days[i]),
+                "risk_score": score,
+                "risk_level": injury_risk_level(score)[0],
+                "acute_load": _num(atl[i], 1),
+                "chronic_load": _num(ctl[i], 1),
+                "acwr": _num(acwr[i], 2),
+                "ramp_rate": _num(inputs["ramp_rate"][i], 1),
+                "avg_rest_days": _num(inputs["avg_rest_days"][i], 1),
+                "hrv_change_pct": _num(hrv_change[i], 1),
+                "factors": factors[i],
+            }
+        )
+    return points
+
+
+def summarize_injury_risk(points: list[dict[str, Any]]) -> dict[str, Any]:
+    """Summarize a slice of the series: scored days, mean, peak and days at risk."""
+    levels = [p["risk_level"] for p in points]
+    summary: dict[str, Any] = {
+        "days": len(points),
+        "mean_score": None,
+        "peak_score": None,
+        "peak_day": None,
+        "elevated_days": levels.count("elevated"),
+        "high_days": levels.count("high"),
+    }
+    if points:
+        scores = np.array([p["risk_score"] for p in points])
+        peak = int(np.argmax(scores))
+        summary["mean_score"] = round(float(scores.mean()), 1)
+        summary["peak_score"] = int(scores[peak])
+        summary["peak_day"] = points[peak]["day"]
+    return summary
@@ -1,11 +1,15 @@
 """Intervals.icu API client."""
 
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
 from typing import Any, cast
 
 import requests
 
 from ..config import Settings
+from ..database import Database
+from .http import http_client, source_url
 
 # Standard race distances for PR detection: (label, target_meters)
 _PR_DISTANCES = [
@@ -18,6 +22,9 @@ _PR_DISTANCES = [
 ]
 _PR_TOLERANCE = 0.08  # ±8% distance tolerance
 
+API_URL = "https://intervals.icu/api/v1"
+WELLNESS_REFETCH_DAYS = 3  # recent days Intervals.icu may still revise (late uploads, edits)
+
 
 def extract_pr_candidates(activities: list[dict]) -> list[dict]:
     """Find run activities that match standard race distances (±8%).
@@ -64,28 +71,68 @@ class IntervalsClient:
     def __init__(self, settings: Settings):
         self.settings = settings
         self.auth = ("API_KEY", settings.intervals_api_key)
-        self.base_url = f"https://intervals.icu/api/v1/athlete/{settings.intervals_id}"
+        self.api_url = source_url(settings, "intervals", API_URL)
+        self.base_url = f"{self.api_url}/athlete/{settings.intervals_id}"
+        self.http = http_client("intervals", settings)
+
+    def _get(self, endpoint: str, params: dict | None = None) -> dict:
+        """Make authenticated GET request to an athlete endpoint."""
+        return self._get_url(f"{self.base_url}/{endpoint}", params)
 
-    def _get(self, endpoint: str, params: dict | None = None, timeout: int = 10) -> dict:
+    def _get_url(self, url: str, params: dict | None = None) -> dict:
         """Make authenticated GET request."""
-        url = f"{self.base_url}/{endpoint}"
-        response = requests.get(url, auth=self.auth, params=params, timeout=timeout)
+        response = self.http.get(url, auth=self.auth, params=params)
         response.raise_for_status()
         return cast(dict, response.json())
 
-    def get_wellness(self) -> dict[str, Any]:
-        """Get wellness data from Intervals.icu.
+    def get_activities(self, oldest: str, newest: str) -> list[dict[str, Any]]:
+        """Get activity summaries between two dates (YYYY-MM-DD), newest first."""
+        return cast(list, self._get("activities", params={"oldest": oldest, "newest": newest}))
+
+    def get_activity_streams(self, activity_id: str, types: list[str]) -> list[dict[str, Any]]:
+        """Get an activity's sample streams: a list of {type, data[, data2]}."""
+        url = f"{self.api_url}/activity/{activity_id}/streams.json"
+        return cast(list, self._get_url(url, params={"types": ",".join(types)}))
+
+    def sync_wellness(self, db: Database) -> int:
+        """Fetch the wellness days since the last sync into ``wellness_days``.
+
+        The first sync takes the range Intervals.icu returns by default; later
+        ones only the days from ``WELLNESS_REFETCH_DAYS`` before the stored
+        cursor through today. Returns the number of days stored.
+        """
+        cursor = db.get_sync_cursor("intervals", "wellness")
+        params = None
+        if cursor is not None:
+            oldest = date.fromisoformat(cursor) - timedelta(days=WELLNESS_REFETCH_DAYS)
+            params = {"oldest": oldest.isoformat(), "newest": date.today().isoformat()}
+
+        rows = [
+            (str(entry["id"]), entry.get("vo2max"), json.dumps(entry))
+            for entry in cast(list, self._get("wellness", params))
+            if entry.get("id")
+        ]
+        if rows:
+            db.upsert_wellness_days(rows)
+            db.set_sync_cursor("intervals", "wellness", max(row[0] for row in rows))
+        return len(rows)
+
+    def get_wellness(self, db: Database) -> dict[str, Any]:
+        """Get wellness data from Intervals.icu, synced incrementally into ``db``.
 
         Returns training load, HRV, sleep, and other health metrics.
         """
         raw: dict[str, Any] = {"wellness": {}, "pace_curves": {}, "activities": []}
 
-        # Get wellness data
-        wellness_list = self._get("wellness")
-        if not wellness_list:
+        # The recent activities do not depend on the wellness data: fetch both at once
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="intervals") as pool:
+            recent = pool.submit(self._get_recent_activities)
+            self.sync_wellness(db)
+        latest_day = db.get_latest_wellness_day()
+        if latest_day is None:
             raise RuntimeError("No wellness data returned")
 
-        latest = wellness_list[-1]
+        latest = json.loads(latest_day["data"])
         raw["wellness"] = latest
 
         # Extract core metrics
@@ -120,24 +167,22 @@ class IntervalsClient:
             "comments": latest.get("comments"),
         }
 
-        # VO2max fallback - search history for most recent non-null value
+        # VO2max fallback - most recent stored non-null value
         if result["vo2max"] is None:
-            for entry in reversed(wellness_list):
-                if entry.get("vo2max") is not None:
-                    result["vo2max"] = entry["vo2max"]
-                    break
-
-        # Critical Speed calculation
-        result.update(self._calculate_critical_speed(raw))
+            result["vo2max"] = db.get_latest_vo2max()
 
         # Activity data for rest days, monotony, strain
-        result.update(self._get_activity_metrics(raw))
+        result.update(self._get_activity_metrics(raw, recent.result()))
 
         result["_raw"] = raw
         return result
 
-    def _calculate_critical_speed(self, raw: dict) -> dict[str, float | None]:
-        """Calculate Critical Speed and D' from pace curves."""
+    def get_critical_speed(self, raw: dict) -> dict[str, float | None]:
+        """Calculate Critical Speed and D' from Intervals.icu pace curves.
+
+        Only a fallback for when the local best-effort store
+        (services.pace_curve) has no 1-5 km efforts yet.
+        """
         cs_oldest = (datetime.now() - timedelta(days=42)).strftime("%Y-%m-%d")
         cs_newest = datetime.now().strftime("%Y-%m-%d")
 
@@ -192,16 +237,20 @@ class IntervalsClient:
 
         return {"critical_speed": None, "d_prime": None}
 
-    def _get_activity_metrics(self, raw: dict) -> dict[str, Any]:
-        """Calculate metrics from recent activities."""
-        import statistics
-
+    def _get_recent_activities(self) -> list[dict[str, Any]] | None:
+        """Get the last week's activities, or None if Intervals.icu refused."""
         today_str = datetime.now().strftime("%Y-%m-%d")
         week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-
         try:
-            acts = self._get("activities", params={"oldest": week_ago, "newest": today_str})
+            return self.get_activities(week_ago, today_str)
         except requests.HTTPError:
+            return None
+
+    def _get_activity_metrics(self, raw: dict, acts: list[dict[str, Any]] | None) -> dict[str, Any]:
+        """Calculate metrics from recent activities."""
+        import statistics
+
+        if acts is None:
             return {
                 "rest_days": None,
                 "monotony": None,
@@ -267,6 +316,7 @@ class IntervalsClient:
         for a in acts:
             d = a["start_date_local"][:10]
             load_by_day[d] = load_by_day.get(d, 0) + (a.get("icu_training_load") or 0)
+        raw["daily_loads"] = load_by_day
 
         daily_loads = [
             load_by_day.get((date.today() - timedelta(days=i)).isoformat(), 0) for i in range(7)
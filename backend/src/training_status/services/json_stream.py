@@ -0,0 +1,87 @@
+"""Incremental parsing of JSON arrays from a response stream.
+
+``response.json()`` on an activity list decodes the whole body and builds
+every element's object graph before the first one can be used. ``iter_array``
+instead decodes the body chunk by chunk and yields one element at a time,
+together with the element's exact source text, so callers can keep a compact
+record of the fields they need and store the original JSON as is, without
+ever holding more than one element (and one chunk) in memory.
+"""
+
+import codecs
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+CHUNK_SIZE = 64 * 1024  # bytes read from the stream at a time
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_decoder = json.JSONDecoder()
+
+
+def iter_array(chunks: Iterable[bytes]) -> Iterator[tuple[Any, str]]:
+    """Yield ``(element, source text)`` for each element of a JSON array.
+
+    ``chunks`` is the UTF-8 body in pieces of any size (e.g.
+    ``response.iter_content(CHUNK_SIZE)``). Raises ``ValueError`` if the body
+    is not a JSON array or ends early.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    stream = iter(chunks)
+    buf, pos = "", 0
+    exhausted = False
+
+    def more() -> bool:
+        nonlocal buf, pos, exhausted
+        if exhausted:
+            return False
+        chunk = next(stream, None)
+        if chunk is None:
+            exhausted = True
+            buf = buf[pos:] + decode(b"", final=True)
+        else:
+            buf = buf[pos:] + decode(chunk)
+        pos = 0
+        return True
+
+    def skip_whitespace() -> str:
+        """Get the next significant character (reading on as needed), "" at the end."""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not more():
+                return ""
+
+    if skip_whitespace() != "[":
+        raise ValueError("expected a JSON array")
+    pos += 1
+    if skip_whitespace() == "]":
+        return
+    while True:
+        if not skip_whitespace():
+            raise ValueError("unterminated JSON array")
+        while True:
+            try:
+                element, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not more():
+                    raise ValueError("unterminated JSON array") from None
+                continue
+            # A number is only complete once something other than digits follows
+            number = isinstance(element, (int, float)) and not isinstance(element, bool)
+            if number and not exhausted and all(c in _NUMBER_CHARS for c in buf[end:]):
+                more()
+                continue
+            break
+        yield element, buf[pos:end]
+        pos = end
+        separator = skip_whitespace()
+        pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"expected ',' or ']' in JSON array, got {separator!r}")
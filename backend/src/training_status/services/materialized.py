@@ -0,0 +1,398 @@
+"""Materialized analytics.
+
+Every analytic here is computed from stored data: snapshots and goals, and for
+some the derived ``fitness_days`` and ``critical_speed_history`` tables (an
+``Analytic``'s ``inputs``). It is computed once per new snapshot (by the
+post-insert pipeline) and stored as versioned JSON in ``analytics_results``. GET
+handlers serve the stored payload directly and only fall back to a live
+computation when the stored row is missing, was built by an older builder
+version, predates the newest snapshot, or predates a write to one of its input
+tables (the database counts those writes, see ``analytics_inputs``). Analytics
+that depend on today's date (``dated``) are also recomputed once the day changes.
+
+Bump an analytic's ``version`` whenever its builder output changes shape or meaning.
+"""
+
+import json
+import logging
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+import numpy as np
+
+from ..database import NUMERIC_SNAPSHOT_COLUMNS, Database
+from .analytics import (
+    GOAL_TYPE_PERIODS,
+    calculate_detraining,
+    calculate_goal_adherence,
+    calculate_injury_risk,
+    calculate_overload,
+    calculate_projections,
+    calculate_race_predictions,
+    calculate_readiness_score,
+    calculate_sleep_insights,
+    calculate_training_zones,
+    calculate_weekly_summary,
+    get_recommendation,
+    score_consistency,
+)
+from .correlations import MIN_OVERLAP, describe, find_correlations
+from .critical_speed import current_critical_speed
+from .fitness import recent_daily_load
+from .injury_risk import calculate_injury_risk_series
+from .metric_stats import get_baselines
+from .timeseries import load_daily
+
+logger = logging.getLogger(__name__)
+
+MAX_CORRELATION_INSIGHTS = 5
+MAX_CORRELATION_PAIRS = 50
+
+
+@dataclass(frozen=True)
+class Analytic:
+    """A materializable analytic: builder function plus payload version."""
+
+    version: int
+    build: Callable[[Database], Any]
+    uses_goals: bool = False
+    inputs: tuple[str, ...] = ()  # derived tables read besides snapshots and goals
+    dated: bool = False  # payload depends on today's date
+
+
+# --- BUILDERS ---
+
+
+def build_consistency(db: Database) -> dict[str, Any]:
+    """Training consistency score (0-100) over the last 28 days."""
+    stats = get_baselines(db, ["week_0_km", "rest_days", "monotony"], window_days=28)
+    volume, rest, monotony = stats["week_0_km"], stats["rest_days"], stats["monotony"]
+
+    if volume.n < 7:
+        return {
+            "score": None,
+            "reason": "Not enough data",
+            "assessment": "N/A",
+            "volume_score": None,
+            "rest_score": None,
+            "monotony_score": None,
+        }
+
+    return score_consistency(
+        volume_n=volume.n,
+        volume_mean=volume.mean,
+        volume_std=volume.std,
+        avg_rest=rest.mean if rest.n else None,
+        avg_monotony=monotony.mean if monotony.n else None,
+    )
+
+
+def build_recommendation(db: Database) -> dict[str, Any]:
+    """Recovery/workout recommendation based on the latest snapshot."""
+    rows = db.get_snapshots_for_analytics(
+        columns=["tsb", "hrv", "resting_hr", "sleep_score", "fatigue", "soreness"], limit=1
+    )
+
+    if not rows:
+        return {
+            "recommendation": "No data available",
+            "reason": "Take a run to get started!",
+            "urgency": "low",
+            "color": "blue",
+        }
+
+    tsb, hrv, resting_hr, sleep_score, fatigue, soreness = rows[0]
+    return get_recommendation(tsb, hrv, resting_hr, sleep_score, fatigue)
+
+
+def build_projections(db: Database) -> dict[str, Any]:
+    """7-day fitness/fatigue projection from the latest snapshot."""
+    rows = db.get_snapshots_for_analytics(columns=["ctl", "atl", "tsb", "ramp_rate"], limit=1)
+
+    if not rows:
+        return {"projections": [], "debug": "No snapshots found"}
+
+    ctl, atl, tsb, ramp_rate = rows[0]
+    if ctl is None or atl is None:
+        return {"projections": [], "debug": f"CTL={ctl}, ATL={atl} - missing data"}
+
+    # Continue at the recent average daily load if we have the series, else hold the trend
+    recent_load = recent_daily_load(db)
+    planned = None if recent_load is None else [recent_load] * 7
+    projections, days_to_positive = calculate_projections(ctl, atl, ramp_rate, planned)
+    return {
+        "projections": projections,
+        "current": {"ctl": ctl, "atl": atl, "tsb": tsb},
+        "days_to_positive_tsb": days_to_positive,
+    }
+
+
+def build_injury_risk(db: Database) -> dict[str, Any]:
+    """Injury risk assessment over the last 14 snapshots."""
+    rows = db.get_snapshots_for_analytics(
+        columns=[
+            "ctl",
+            "atl",
+            "ramp_rate",
+            "ac_ratio",
+            "rest_days",
+            "hrv",
+            "sleep_score",
+            "fatigue",
+        ],
+        limit=14,
+    )
+    return calculate_injury_risk(rows)
+
+
+def build_injury_risk_series(db: Database) -> dict[str, Any]:
+    """Injury risk scored for every day of the history."""
+    return {"points": calculate_injury_risk_series(db)}
+
+
+def build_correlations(db: Database) -> dict[str, Any]:
+    """Significant lagged correlations across all numeric metrics, ranked as insights."""
+    _, matrix = load_daily(db, NUMERIC_SNAPSHOT_COLUMNS)
+    data_points = int((~np.isnan(matrix)).any(axis=1).sum())
+
+    if data_points < MIN_OVERLAP:
+        return {
+            "insights": [],
+            "data_points": data_points,
+            "message": "Need more data for correlation analysis",
+            "pairs": [],
+        }
+
+    pairs, tested = find_correlations(matrix, NUMERIC_SNAPSHOT_COLUMNS)
+    return {
+        "insights": [describe(p) for p in pairs[:MAX_CORRELATION_INSIGHTS]],
+        "data_points": data_points,
+        "message": (
+            f"{len(pairs)} significant relationships among {tested} metric pairs tested"
+            f" over {data_points} days"
+            if pairs
+            else "Keep logging data - correlations will appear with more entries"
+        ),
+        "pairs": pairs[:MAX_CORRELATION_PAIRS],
+    }
+
+
+def build_race_predictor(db: Database) -> dict[str, Any]:
+    """Race time predictions from the latest critical speed fit and its interval.
+
+    Falls back to the critical speed stored on the latest snapshot when there is no
+    fitted history yet.
+    """
+    rows = db.get_snapshots_for_analytics(
+        columns=["critical_speed", "d_prime", "ctl", "week_0_km", "avg_pace"], limit=1
+    )
+    fit = current_critical_speed(db)
+    cs, d_prime, ctl, _week_km, avg_pace = rows[0] if rows else (None,) * 5
+    cs_low = cs_high = None
+    if fit is not None:
+        cs, d_prime = fit["critical_speed"], fit["d_prime"]
+        cs_low, cs_high = fit["cs_low"], fit["cs_high"]
+
+    if cs is None:
+        return {
+            "predictions": [],
+            "critical_speed_ms": None,
+            "d_prime_meters": None,
+            "fitness_level": "unknown",
+            "message": (
+                "Need critical speed data for race predictions. Complete a few hard efforts (1-5K)."
+            ),
+        }
+
+    predictions = calculate_race_predictions(cs, d_prime, ctl, avg_pace, cs_low, cs_high)
+
+    readiness = "excellent" if ctl and ctl > 40 else "good" if ctl and ctl > 25 else "building"
+    interval = (
+        f" CS {cs:.2f} m/s (95% CI {cs_low:.2f}-{cs_high:.2f})."
+        if cs_low is not None and cs_high is not None
+        else ""
+    )
+
+    return {
+        "predictions": predictions,
+        "critical_speed_ms": cs,
+        "critical_speed_low_ms": cs_low,
+        "critical_speed_high_ms": cs_high,
+        "d_prime_meters": d_prime,
+        "fitness_level": readiness,
+        "message": (
+            f"Predictions based on Critical Speed model.{interval} Current fitness: {readiness}."
+        ),
+    }
+
+
+def build_detraining(db: Database) -> dict[str, Any]:
+    """Fitness/fatigue decay if training stops today."""
+    rows = db.get_snapshots_for_analytics(columns=["ctl", "atl"], limit=1)
+
+    if not rows or rows[0][0] is None or rows[0][1] is None:
+        return {
+            "points": [],
+            "current_ctl": 0.0,
+            "current_atl": 0.0,
+            "message": "No current fitness data available",
+        }
+
+    ctl, atl = rows[0]
+    points = calculate_detraining(ctl, atl)
+    week6_ctl = points[-1]["ctl"] if points else ctl
+    pct_lost = round((1 - week6_ctl / ctl) * 100) if ctl > 0 else 0
+
+    return {
+        "points": points,
+        "current_ctl": ctl,
+        "current_atl": atl,
+        "message": (
+            f"After 6 weeks without training, CTL drops ~{pct_lost}%"
+            f" (from {ctl:.0f} to {week6_ctl:.0f})"
+        ),
+    }
+
+
+def build_weekly_summary(db: Database) -> dict[str, Any]:
+    """7-day training digest vs the previous 7 days."""
+    rows = db.get_snapshots_for_analytics(
+        columns=["ctl", "atl", "tsb", "hrv", "week_0_km", "rest_days"], limit=14
+    )
+    return calculate_weekly_summary(rows)
+
+
+def build_goal_adherence(db: Database) -> list[dict[str, Any]]:
+    """Adherence history for every active goal, since its period_start."""
+    reports = []
+    for goal in db.get_active_goals():
+        period = GOAL_TYPE_PERIODS.get(goal["goal_type"])
+        if period is None:
+            continue
+        rows = db.get_goal_periods(period, goal["target_value"], start=goal["period_start"])
+        report = calculate_goal_adherence(goal["target_value"], [tuple(r) for r in rows], period)
+        reports.append({"goal_id": goal["id"], "goal_type": goal["goal_type"], **report})
+    return reports
+
+
+def build_readiness(db: Database) -> dict[str, Any]:
+    """Composite training readiness score 0-100."""
+    rows = db.get_snapshots_for_analytics(
+        columns=["tsb", "hrv", "sleep_score", "fatigue", "soreness"], limit=1
+    )
+    if not rows:
+        return {"score": 50, "label": "Unknown", "components": {}}
+
+    tsb, hrv_latest, sleep_score, fatigue, soreness = rows[0]
+    # HRV vs the previous days of the 7-day window
+    hrv_base = get_baselines(db, ["hrv"], window_days=7, exclude_latest=True)["hrv"]
+    hrv_trend_pct: float | None = None
+    if hrv_latest is not None and hrv_base.n >= 2 and hrv_base.mean > 0:
+        hrv_trend_pct = ((hrv_latest - hrv_base.mean) / hrv_base.mean) * 100
+
+    return calculate_readiness_score(tsb, hrv_trend_pct, sleep_score, fatigue, soreness)
+
+
+def build_overload(db: Database) -> dict[str, Any]:
+    """Week-over-week volume changes from the latest snapshot."""
+    rows = db.get_snapshots_for_analytics(
+        columns=["week_0_km", "week_1_km", "week_2_km", "week_3_km", "week_4_km"], limit=1
+    )
+    return calculate_overload(rows)
+
+
+def build_training_zones(db: Database) -> dict[str, Any]:
+    """HR zones from the latest snapshot, pace zones from the latest critical speed fit."""
+    rows = db.get_snapshots_for_analytics(
+        columns=["resting_hr", "max_hr", "critical_speed"], limit=1
+    )
+    if not rows:
+        return {"hr_zones": [], "pace_zones": [], "data_quality": "none"}
+    resting_hr, max_hr, critical_speed = rows[0]
+    fit = current_critical_speed(db)
+    if fit is not None:
+        critical_speed = fit["critical_speed"]
+    return calculate_training_zones(resting_hr, max_hr, critical_speed)
+
+
+def build_sleep_insights(db: Database) -> dict[str, Any]:
+    """Sleep vs HRV insights over the last 60 snapshots."""
+    rows = db.get_snapshots_for_analytics(columns=["sleep_secs", "sleep_score", "hrv"], limit=60)
+    return calculate_sleep_insights(rows)
+
+
+ANALYTICS: dict[str, Analytic] = {
+    "consistency": Analytic(2, build_consistency),
+    "recommendation": Analytic(1, build_recommendation),
+    "projections": Analytic(2, build_projections, inputs=("fitness_days",)),
+    "injury_risk": Analytic(1, build_injury_risk),
+    "injury_risk_series": Analytic(1, build_injury_risk_series, inputs=("fitness_days",)),
+    "correlations": Analytic(2, build_correlations),
+    "race_predictor": Analytic(2, build_race_predictor, inputs=("critical_speed_history",)),
+    "detraining": Analytic(1, build_detraining),
+    "weekly_summary": Analytic(1, build_weekly_summary),
+    "goal_adherence": Analytic(2, build_goal_adherence, uses_goals=True, dated=True),
+    "readiness": Analytic(2, build_readiness),
+    "overload": Analytic(1, build_overload),
+    "training_zones": Analytic(2, build_training_zones, inputs=("critical_speed_history",)),
+    "sleep_insights": Analytic(1, build_sleep_insights),
+}
+
+
+# --- STORE ---
+
+
+def _materialize(db: Database, name: str, state: Any) -> Any:
+    """Compute one analytic live and persist it. Returns the computed payload.
+
+    ``state`` is the ``get_analytics_result`` row read before building, so a write
+    landing meanwhile leaves the stored result stale rather than wrongly fresh.
+    """
+    spec = ANALYTICS[name]
+    payload = spec.build(db)
+    db.save_analytics_result(
+        name,
+        spec.version,
+        state["latest_snapshot_id"],
+        json.dumps(payload),
+        state["latest_input_generation"],
+    )
+    return payload
+
+
+def refresh_analytics(db: Database, names: Iterable[str] | None = None) -> list[str]:
+    """Recompute and store analytics (all of them by default).
+
+    A failing builder is logged and skipped so one bad analytic cannot block the rest.
+    Returns the names that were refreshed successfully.
+    """
+    refreshed = []
+    for name in names if names is not None else ANALYTICS:
+        try:
+            _materialize(db, name, db.get_analytics_result(name, ANALYTICS[name].inputs))
+            refreshed.append(name)
+        except Exception as e:
+            logger.error("Materializing analytic %s failed: %s", name, e)
+    return refreshed
+
+
+def refresh_goal_analytics(db: Database) -> list[str]:
+    """Recompute only the analytics that depend on goals (call after goal changes)."""
+    return refresh_analytics(db, [n for n, spec in ANALYTICS.items() if spec.uses_goals])
+
+
+def get_analytic(db: Database, name: str) -> Any:
+    """Serve a stored analytic, recomputing it first if missing or stale."""
+    spec = ANALYTICS[name]
+    row = db.get_analytics_result(name, spec.inputs)
+    if (
+        row["payload"] is not None
+        and row["version"] == spec.version
+        and row["snapshot_id"] == row["latest_snapshot_id"]
+        and row["input_generation"] == row["latest_input_generation"]
+        and (not spec.dated or row["computed_at"][:10] == date.today().isoformat())
+    ):
+        return json.loads(row["payload"])
+    return _materialize(db, name, row)
@@ -0,0 +1,158 @@
+"""Memoization for pure analytics functions.
+
+``@memoize`` caches a function's results in a bounded LRU with an optional TTL.
+Arguments are normalized into the cache key: floats are rounded to ``precision``
+decimals (the precision values are stored at, so 45.00001 and 45.0 hit the same
+entry), lists and dicts become tuples. Cached values are deep-copied on the way in
+and out, so callers may mutate what they get back.
+
+All caches share one generation counter. ``invalidate()`` bumps it and every
+cache drops its entries on next use; ``Database`` calls it after writes to source
+data (snapshots, goals, activities). Memoized functions are pure, so this only
+bounds how long results of old inputs linger; writes to derived tables, which GET
+handlers make too, leave the caches alone.
+"""
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, ParamSpec, TypeVar
+
+from ..database import on_source_write
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+DEFAULT_MAXSIZE = 128
+DEFAULT_PRECISION = 4
+
+_generation = 0
+_registry: dict[str, "_Cache"] = {}
+
+
+@dataclass(frozen=True)
+class CacheInfo:
+    """Hit/miss statistics for one memoized function."""
+
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+    ttl: float | None
+
+
+def invalidate() -> None:
+    """Drop every memoized result (lazily, on each cache's next use)."""
+    global _generation
+    _generation += 1
+
+
+on_source_write(invalidate)
+
+
+def _normalize(value: Any, precision: int) -> Hashable:
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        return round(value, precision)
+    if isinstance(value, list | tuple):
+        return tuple(_normalize(v, precision) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v, precision)) for k, v in value.items()))
+    return value  # type: ignore[no-any-return]
+
+
+class _Cache:
+    """LRU + TTL store behind one memoized function."""
+
+    def __init__(self, maxsize: int, ttl: float | None) -> None:
+        self.maxsize, self.ttl = maxsize, ttl
+        self.entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.generation = _generation
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        with self.lock:
+            if self.generation != _generation:
+                self.entries.clear()
+                self.generation = _generation
+            entry = self.entries.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() < entry[0]):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        with self.lock:
+            if generation != _generation:
+                return  # a write landed while computing; the value may be stale
+            expires = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, len(self.entries), self.maxsize, self.ttl)
+
+
+def memoize(
+    maxsize: int = DEFAULT_MAXSIZE,
+    ttl: float | None = None,
+    precision: int = DEFAULT_PRECISION,
+    scope: Callable[[], Hashable] | None = None,
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Cache a pure function's results.
+
+    ``ttl`` is in seconds (``None`` keeps entries until evicted or invalidated).
+    ``scope`` adds an implicit input to the key, e.g. ``date.today`` for results
+    that depend on the current date. The wrapper gains ``cache_info()`` and
+    ``cache_clear()``.
+    """
+    if maxsize < 1:
+        raise ValueError("maxsize must be at least 1")
+
+    def decorator(fn: Callable[P, R]) -> Callable[P, R]:
+        cache = _Cache(maxsize, ttl)
+        _registry[f"{fn.__module__}.{fn.__qualname__}"] = cache
+
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            key = (
+                _normalize(args, precision),
+                _normalize(kwargs, precision),
+                scope() if scope is not None else None,
+            )
+            generation = _generation
+            found, value = cache.get(key)
+            if found:
+                return copy.deepcopy(value)  # type: ignore[no-any-return]
+            result = fn(*args, **kwargs)
+            cache.put(key, copy.deepcopy(result), generation)
+            return result
+
+        wrapper.cache_info = cache.info  # type: ignore[attr-defined]
+        wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> dict[str, CacheInfo]:
+    """Statistics for every memoized function, keyed by qualified name."""
+    return {name: cache.info() for name, cache in _registry.items()}
@@ -0,0 +1,265 @@
+"""Running per-metric baselines (the ``metric_stats`` table).
+
+For every numeric snapshot metric and trailing window of 7/28/60/365 days the store
+keeps the count, mean and Welford sum of squared deviations of the daily values in
+the window, plus an EWMA mean/variance with span = window. Values are daily: the
+last snapshot of a day is that day's value, so a second snapshot on the same day
+replaces the first.
+
+``sync_metric_stats`` applies snapshots newer than the last one applied, in O(1) per
+metric and window: one Welford update per new value and one Welford removal per
+value leaving the window. ``rebuild_metric_stats`` recomputes everything from the
+full history; it runs on first use and whenever snapshots arrive out of order.
+"""
+
+import copy
+import logging
+import math
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+
+from ..database import NUMERIC_SNAPSHOT_COLUMNS, Database
+from .timeseries import ewma, load_daily, valid
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (7, 28, 60, 365)
+METRICS = NUMERIC_SNAPSHOT_COLUMNS
+
+
+@dataclass
+class RunningStats:
+    """Windowed Welford mean/variance plus EWMA mean/variance for one metric."""
+
+    metric: str
+    window_days: int
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    ewma: float | None = None
+    ewm_var: float = 0.0
+    # EWMA state before the latest day's value, so a same-day replacement can redo it
+    prev_ewma: float | None = None
+    prev_ewm_var: float = 0.0
+    last_day: str | None = None
+    last_value: float | None = None
+
+    @property
+    def alpha(self) -> float:
+        """EWMA smoothing factor (span = window)."""
+        return 2.0 / (self.window_days + 1)
+
+    @property
+    def variance(self) -> float | None:
+        """Sample variance of the values in the window (None below two values)."""
+        return self.m2 / (self.n - 1) if self.n >= 2 else None
+
+    @property
+    def std(self) -> float | None:
+        """Sample standard deviation of the values in the window."""
+        var = self.variance
+        return math.sqrt(var) if var is not None else None
+
+    @property
+    def ewm_std(self) -> float:
+        """Exponentially weighted standard deviation."""
+        return math.sqrt(self.ewm_var)
+
+    def add(self, x: float) -> None:
+        """Add a value to the window (Welford update)."""
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x: float) -> None:
+        """Remove a value that is leaving the window (inverse Welford update)."""
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.n -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.n
+        self.m2 = max(0.0, self.m2 - delta * (x - self.mean))
+
+    def observe(self, day: str, x: float | None) -> None:
+        """Record ``day``'s value, replacing an earlier value for the same day."""
+        if day == self.last_day:
+            if self.last_value is not None:
+                self.remove(self.last_value)
+            self.ewma, self.ewm_var = self.prev_ewma, self.prev_ewm_var
+        else:
+            self.prev_ewma, self.prev_ewm_var = self.ewma, self.ewm_var
+
+        if x is not None:
+            self.add(x)
+            if self.ewma is None:
+                self.ewma, self.ewm_var = x, 0.0
+            else:
+                diff = x - self.ewma
+                incr = self.alpha * diff
+                self.ewma += incr
+                self.ewm_var = (1 - self.alpha) * (self.ewm_var + diff * incr)
+        self.last_day, self.last_value = day, x
+
+    def without_latest(self) -> "RunningStats":
+        """Copy of these stats with the latest day's value taken out of the window.
+
+        This is the baseline to compare today's value against.
+        """
+        base = copy.copy(self)
+        if base.last_value is not None:
+            base.remove(base.last_value)
+            base.ewma, base.ewm_var = base.prev_ewma, base.prev_ewm_var
+        return base
+
+    def as_row(self, snapshot_id: int) -> tuple:
+        """Row tuple for ``Database.replace_metric_stats``."""
+        return (
+            self.metric,
+            self.window_days,
+            self.n,
+            self.mean,
+            self.m2,
+            self.ewma,
+            self.ewm_var,
+            self.prev_ewma,
+            self.prev_ewm_var,
+            self.last_day,
+            self.last_value,
+            snapshot_id,
+        )
+
+
+def _from_row(row: object) -> RunningStats:
+    keys = RunningStats.__dataclass_fields__
+    return RunningStats(**{k: row[k] for k in keys})  # type: ignore[index]
+
+
+def _ewm_state(x: np.ndarray, alpha: float) -> tuple[float | None, float, float | None, float]:
+    """Compute the final (ewma, ewm_var, prev_ewma, prev_ewm_var) of a daily series."""
+    v = valid(x)
+    if not v.size:
+        return None, 0.0, None, 0.0
+    mean = ewma(v, alpha=alpha)
+    # var[t] = (1 - a) * var[t-1] + a * (1 - a) * (x[t] - mean[t-1])^2, i.e. an EWMA
+    u = np.zeros(v.size)
+    u[1:] = (1 - alpha) * (v[1:] - mean[:-1]) ** 2
+    var = ewma(u, alpha=alpha)
+    if np.isnan(x[-1]):
+        # Latest day had no value: "before today" equals the current state
+        return float(mean[-1]), float(var[-1]), float(mean[-1]), float(var[-1])
+    if v.size == 1:
+        return float(mean[-1]), 0.0, None, 0.0
+    return float(mean[-1]), float(var[-1]), float(mean[-2]), float(var[-2])
+
+
+def rebuild_metric_stats(db: Database) -> int:
+    """Recompute every metric/window from the full history.
+
+    Returns the number of days in the history.
+    """
+    snapshot_id = db.get_latest_snapshot_id()
+    days, matrix = load_daily(db, METRICS)
+    if snapshot_id is None or not len(days):
+        db.replace_metric_stats([], clear=True)
+        return 0
+
+    last_day = str(days[-1])
+    rows = []
+    for j, metric in enumerate(METRICS):
+        x = matrix[:, j]
+        last_value = None if np.isnan(x[-1]) else float(x[-1])
+        for w in WINDOWS:
+            stats = RunningStats(metric, w, last_day=last_day, last_value=last_value)
+            in_window = valid(x[-w:])
+            if in_window.size:
+                stats.n = int(in_window.size)
+                stats.mean = float(in_window.mean())
+                stats.m2 = float(((in_window - stats.mean) ** 2).sum())
+            stats.ewma, stats.ewm_var, stats.prev_ewma, stats.prev_ewm_var = _ewm_state(
+                x, stats.alpha
+            )
+            rows.append(stats.as_row(snapshot_id))
+    db.replace_metric_stats(rows, clear=True)
+    logger.info("Rebuilt metric stats over %d days", len(days))
+    return len(days)
+
+
+def _daily_values(db: Database, start: date, end: date) -> list[tuple]:
+    """Last snapshot per day for ``start <= day <= end`` (rows of METRICS values)."""
+    rows = db.get_snapshots_between(
+        METRICS, start.isoformat(), (end + timedelta(days=1)).isoformat()
+    )
+    by_day: dict[str, tuple] = {}
+    for row in rows:
+        by_day[row[0][:10]] = row[1:]
+    return list(by_day.values())
+
+
+def _expire(db: Database, stats: dict[tuple[str, int], RunningStats], old: str, new: str) -> None:
+    """Remove the values that leave each window when the last day moves old → new."""
+    old_d, new_d = date.fromisoformat(old), date.fromisoformat(new)
+    for w in WINDOWS:
+        # Window ending on old covers (old - w, old]; ending on new covers (new - w, new]
+        start, end = old_d - timedelta(days=w - 1), new_d - timedelta(days=w)
+        if end < start:
+            continue
+        for values in _daily_values(db, start, end):
+            for metric, x in zip(METRICS, values, strict=True):
+                if x is not None:
+                    stats[(metric, w)].remove(x)
+
+
+def sync_metric_stats(db: Database) -> int:
+    """Apply snapshots newer than the last one applied to ``metric_stats``.
+
+    Returns the number of snapshots applied (or days rebuilt, if a rebuild was needed).
+    """
+    applied_id = db.get_metric_stats_snapshot_id()
+    if applied_id is None:
+        return rebuild_metric_stats(db)
+
+    new_rows = db.get_snapshots_after(applied_id, ["id", "recorded_at", *METRICS])
+    if not new_rows:
+        return 0
+
+    stats = {(s.metric, s.window_days): s for s in map(_from_row, db.get_metric_stats())}
+    last_day = max((s.last_day for s in stats.values() if s.last_day), default=None)
+    if len(stats) != len(METRICS) * len(WINDOWS) or last_day is None:
+        return rebuild_metric_stats(db)
+    if any(row[1][:10] < last_day for row in new_rows):
+        # Back-filled history: the running windows can't be rewound
+        return rebuild_metric_stats(db)
+
+    for row in new_rows:
+        day = row[1][:10]
+        if day != last_day:
+            _expire(db, stats, last_day, day)
+            last_day = day
+        for metric, x in zip(METRICS, row[2:], strict=True):
+            for w in WINDOWS:
+                stats[(metric, w)].observe(day, x)
+
+    db.replace_metric_stats([s.as_row(new_rows[-1][0]) for s in stats.values()])
+    return len(new_rows)
+
+
+def get_baselines(
+    db: Database, metrics: list[str], window_days: int, exclude_latest: bool = False
+) -> dict[str, RunningStats]:
+    """Return current stats for ``metrics`` over one window, brought up to date first.
+
+    With ``exclude_latest`` the latest day's value is taken out, giving the
+    baseline that value should be compared against. Unknown metrics get empty stats.
+    """
+    if window_days not in WINDOWS:
+        raise ValueError(f"window_days must be one of {WINDOWS}")
+    sync_metric_stats(db)
+    found = {s.metric: s for s in map(_from_row, db.get_metric_stats(metrics, window_days))}
+    out = {m: found.get(m, RunningStats(m, window_days)) for m in metrics}
+    if exclude_latest:
+        out = {m: s.without_latest() for m, s in out.items()}
+    return out
@@ -0,0 +1,214 @@
+"""Mean-maximal pace curve: best efforts per duration and distance, from streams.
+
+Each run's speed stream is integrated to cumulative distance and resampled to
+1 Hz of elapsed time. The best effort for a duration of D seconds is then the
+largest ``dist[i + D] - dist[i]`` (one vectorized pass per duration), and the
+best time over a distance X the smallest ``j - i`` with ``dist[j] >= dist[i] + X``
+(one ``searchsorted`` pass per distance over the monotonic cumulative distance).
+
+Efforts are stored per activity in ``activity_best_efforts`` as runs' streams
+arrive, so the curve for a period (last 42/90 days, the season, all time) is a
+single indexed aggregation, and critical speed is fitted from it without going
+back to Intervals.icu. Efforts are recomputed only when an activity's streams
+change or ``VERSION`` is bumped.
+"""
+
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+
+from ..database import Database
+from .streams import load_streams
+
+VERSION = 1
+
+DURATIONS = [30, 60, 120, 180, 300, 600, 900, 1200, 1800, 2700, 3600, 5400, 7200]  # s
+DISTANCES = [
+    400,
+    800,
+    1000,
+    1500,
+    1609,
+    2000,
+    3000,
+    4000,
+    5000,
+    10000,
+    15000,
+    21097,
+    30000,
+    42195,
+]  # m
+PERIODS = ("42d", "90d", "season", "all")
+
+MAX_GAP_SECS = 5.0  # a longer gap between samples is a pause: no distance is added
+MAX_SPEED = 12.0  # m/s; faster samples are GPS glitches
+
+# Critical speed fit: best times over 1-5 km, only efforts of at least 2 minutes
+CS_DISTANCES = (1000, 2000, 3000, 4000, 5000)
+CS_MIN_SECS = 120
+CS_DAYS = 42
+
+
+def _distance_per_second(streams: dict[str, np.ndarray]) -> np.ndarray | None:
+    """Cumulative distance (m) at every elapsed second, or None without speed."""
+    speed = streams.get("velocity_smooth")
+    if speed is None or len(speed) < 2:
+        return None
+    t = streams.get("time")
+    if t is None or len(t) != len(speed):
+        t = np.arange(len(speed), dtype=np.float64)
+    t = np.maximum.accumulate(np.nan_to_num(t))
+
+    dt = np.diff(t, prepend=t[0])
+    dt = np.where(dt <= MAX_GAP_SECS, dt, 0.0)
+    v = np.clip(np.nan_to_num(speed), 0.0, MAX_SPEED)
+    dist = np.cumsum(v * dt)
+    seconds = np.arange(np.ceil(t[0]), np.floor(t[-1]) + 1)
+    return np.interp(seconds, t, dist)
+
+
+def best_efforts(streams: dict[str, np.ndarray]) -> dict[str, dict[int, float]] | None:
+    """Best efforts of one activity, or None without a speed stream.
+
+    Returns {"duration": {secs: metres}, "distance": {metres: secs}} for the
+    targets in ``DURATIONS``/``DISTANCES`` the activity is long enough for.
+    """
+    dist = _distance_per_second(streams)
+    if dist is None:
+        return None
+    n = len(dist)
+    durations: dict[int, float] = {}
+    for secs in DURATIONS:
+        if secs >= n:
+            break
+        best = float(np.max(dist[secs:] - dist[:-secs]))
+        if best > 0:
+            durations[secs] = round(best, 1)
+
+    distances: dict[int, float] = {}
+    start = np.arange(n)
+    for metres in DISTANCES:
+        if dist[-1] - dist[0] < metres:
+            break
+        end = np.searchsorted(dist, dist + metres, side="left")
+        reached = end < n
+        distances[metres] = float(np.min(end[reached] - start[reached]))
+    return {"duration": durations, "distance": distances}
+
+
+def update_best_efforts(db: Database, activity_ids: list[str] | None = None) -> int:
+    """Compute best efforts for streamed activities that have none (or stale ones).
+
+    ``activity_ids`` defaults to every activity with streams. Returns the number
+    of activities (re)computed.
+    """
+    ids = sorted(db.get_streamed_activity_ids()) if activity_ids is None else activity_ids
+    versions = db.get_best_effort_versions()
+    updated = 0
+    for activity_id in ids:
+        if versions.get(activity_id) == VERSION:
+            continue
+        efforts = best_efforts(load_streams(db, activity_id))
+        if efforts is None:
+            continue
+        rows = [
+            (kind, float(target), value)
+            for kind, values in efforts.items()
+            for target, value in values.items()
+        ]
+        db.save_best_efforts(activity_id, VERSION, rows)
+        updated += 1
+    return updated
+
+
+def period_start(period: str, today: date) -> str | None:
+    """First day of a curve period ending today (None for all time)."""
+    if period == "all":
+        return None
+    if period == "season":
+        return today.replace(month=1, day=1).isoformat()
+    if period.endswith("d") and period[:-1].isdigit():
+        return (today - timedelta(days=int(period[:-1]) - 1)).isoformat()
+    raise ValueError(f"Unknown curve period: {period}")
+
+
+def fit_critical_speed(points: list[tuple[float, float]]) -> dict[str, float | None]:
+    """Fit speed = CS + D' / t by least squares over (secs, metres) best efforts."""
+    none: dict[str, float | None] = {"critical_speed": None, "d_prime": None}
+    if len(points) < 2:
+        return none
+    t = np.array([p[0] for p in points], dtype=np.float64)
+    d = np.array([p[1] for p in points], dtype=np.float64)
+    x, y = 1 / t, d / t
+    if np.ptp(x) == 0:
+        return none
+    d_prime, cs = np.polyfit(x, y, 1)
+    if cs <= 0:
+        return none
+    return {"critical_speed": round(float(cs), 4), "d_prime": round(float(d_prime), 2)}
+
+
+def _pace(speed: float) -> str:
+    secs = 1000 / speed
+    return f"{int(secs // 60)}:{int(secs % 60):02d}/km"
+
+
+def _cs_points(rows: list) -> list[tuple[float, float]]:
+    return [
+        (r["value"], r["target"])
+        for r in rows
+        if r["target"] in CS_DISTANCES and r["value"] >= CS_MIN_SECS
+    ]
+
+
+def local_critical_speed(db: Database, today: date | None = None) -> dict[str, float | None]:
+    """Critical speed and D' from the last ``CS_DAYS`` days of stored best efforts."""
+    today = today or date.today()
+    start = period_start(f"{CS_DAYS}d", today)
+    return fit_critical_speed(
+        _cs_points(db.get_mean_max_curve("distance", start, today.isoformat()))
+    )
+
+
+def mean_max_curve(db: Database, period: str = "42d", today: date | None = None) -> dict[str, Any]:
+    """Mean-maximal curve of a period: best effort per duration and per distance.
+
+    Streamed activities without stored efforts are processed first. Critical
+    speed and D' are fitted from the period's 1-5 km efforts.
+    """
+    today = today or date.today()
+    update_best_efforts(db)
+    start, end = period_start(period, today), today.isoformat()
+    distance_rows = db.get_mean_max_curve("distance", start, end)
+    durations = [
+        {
+            "secs": int(r["target"]),
+            "distance_m": r["value"],
+            "speed_ms": round(r["value"] / r["target"], 3),
+            "pace": _pace(r["value"] / r["target"]),
+            "activity_id": r["activity_id"],
+            "date": r["date"],
+        }
+        for r in db.get_mean_max_curve("duration", start, end)
+    ]
+    distances = [
+        {
+            "distance_m": int(r["target"]),
+            "secs": r["value"],
+            "speed_ms": round(r["target"] / r["value"], 3),
+            "pace": _pace(r["target"] / r["value"]),
+            "activity_id": r["activity_id"],
+            "date": r["date"],
+        }
+        for r in distance_rows
+    ]
+    return {
+        "period": period,
+        "start": start,
+        "end": end,
+        "durations": durations,
+        "distances": distances,
+        **fit_critical_speed(_cs_points(distance_rows)),
+    }
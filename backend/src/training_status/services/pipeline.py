@@ -0,0 +1,68 @@
+"""Post-insert ingest pipeline.
+
+Stages run in order after ``generate_report`` saves a snapshot. Each stage is
+isolated: a failure is logged and does not stop the stages after it, and never
+undoes the snapshot insert itself.
+"""
+
+import json
+import logging
+from collections.abc import Callable
+
+from ..database import Database
+from .anomaly import detect_anomalies
+from .fitness import update_fitness_days
+from .materialized import refresh_analytics
+from .metric_stats import sync_metric_stats
+
+logger = logging.getLogger(__name__)
+
+PostInsertStage = Callable[[Database, int], None]
+
+
+def _update_fitness(db: Database, snapshot_id: int) -> None:
+    """Advance the daily CTL/ATL series using the snapshot's per-day activity loads."""
+    row = db.get_snapshot_columns(snapshot_id, ["recorded_at", "ctl", "atl", "intervals_json"])
+    if row is None:
+        return
+    recorded_at, ctl, atl, intervals_json = row
+    raw = json.loads(intervals_json or "{}")
+    update_fitness_days(db, raw.get("daily_loads", {}), ctl, atl, today=recorded_at[:10])
+
+
+def _update_metric_stats(db: Database, snapshot_id: int) -> None:
+    sync_metric_stats(db)
+
+
+def _detect_anomalies(db: Database, snapshot_id: int) -> None:
+    raised = detect_anomalies(db, snapshot_id)
+    if raised:
+        logger.info("Raised %d alert(s) for snapshot %d", len(raised), snapshot_id)
+
+
+def _materialize_analytics(db: Database, snapshot_id: int) -> None:
+    refresh_analytics(db)
+
+
+# (name, stage) in execution order
+POST_INSERT_STAGES: list[tuple[str, PostInsertStage]] = [
+    ("update_fitness", _update_fitness),
+    ("update_metric_stats", _update_metric_stats),
+    ("detect_anomalies", _detect_anomalies),
+    ("materialize_analytics", _materialize_analytics),
+]
+
+
+def run_post_insert_stages(db: Database, snapshot_id: int) -> list[str]:
+    """Run every post-insert stage for a freshly inserted snapshot.
+
+    Returns the names of the stages that failed (empty list on full success).
+    """
+    failed = []
+    for name, stage in POST_INSERT_STAGES:
+        try:
+            stage(db, snapshot_id)
+        except Exception as e:
+            logger.error("Post-insert stage %s failed: %s", name, e)
+            failed.append(name)
+    return failed
@@ -0,0 +1,285 @@
+"""What-if training scenario simulator.
+
+A scenario is one combination of grid parameters: pre-taper weekly volume, weekly
+progression, rest days per week, taper length and taper shape. The whole grid is
+expanded into a ``(scenarios, days)`` daily-load matrix and simulated to race day
+in one broadcast pass through the fitness engine. Grids too large for one pass can
+be split across a process pool.
+
+Volumes are relative to the baseline daily load that holds CTL steady (the current
+CTL), the same assumption ``calculate_taper`` makes.
+
+Requests are bounded so one cannot exhaust memory or overflow the loads: the race
+is at most ``MAX_HORIZON_DAYS`` away, volume and progression stay within their
+ranges, and the grid times the horizon is at most ``MAX_CELLS`` scenario-days.
+"""
+
+import itertools
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+
+from .analytics import taper_reduction_pct
+from .fitness import simulate
+
+TAPER_SHAPES = ("exponential", "linear", "step")
+MAX_TAPER_WEEKS = 4
+MAX_SCENARIOS = 100_000
+MAX_HORIZON_DAYS = 365
+MAX_CELLS = 10_000_000  # scenarios x days simulated per request (80 MB per float64 matrix)
+VOLUME_PCT_RANGE = (0.0, 300.0)
+PROGRESSION_PCT_RANGE = (-50.0, 50.0)
+
+# Scenario×day cells above which the grid is split across a process pool (if enabled).
+POOL_THRESHOLD = 2_000_000
+
+# Ranking: score = race-day CTL - TSB_MISS_WEIGHT * |race-day TSB - target TSB|
+TSB_MISS_WEIGHT = 2.0
+
+# Rest-day positions within each 7-day block, spread through the week.
+_REST_DAY_POSITIONS = [
+    (),
+    (6,),
+    (2, 6),
+    (1, 3, 6),
+    (0, 2, 4, 6),
+    (0, 1, 3, 4, 6),
+    (0, 1, 2, 3, 4, 6),
+]
+_REST_MASK = np.array([[p in pos for p in range(7)] for pos in _REST_DAY_POSITIONS])
+
+# _TAPER_PCT[shape, taper_weeks, week] = volume % (week 0 = not tapering)
+_TAPER_PCT = np.full((len(TAPER_SHAPES), MAX_TAPER_WEEKS + 1, MAX_TAPER_WEEKS + 1), 100.0)
+for _s, _shape in enumerate(TAPER_SHAPES):
+    for _tw in range(1, MAX_TAPER_WEEKS + 1):
+        for _w in range(1, _tw + 1):
+            _TAPER_PCT[_s, _tw, _w] = round(100 - taper_reduction_pct(_shape, _w, _tw), 1)
+
+DEFAULT_GRID: dict[str, Sequence[Any]] = {
+    "weekly_volume_pct": (90.0, 100.0, 110.0),
+    "weekly_progression_pct": (0.0, 5.0),
+    "rest_days_per_week": (1, 2),
+    "taper_weeks": (1, 2, 3),
+    "taper_shape": TAPER_SHAPES,
+}
+
+
+def expand_grid(grid: dict[str, Sequence[Any]]) -> dict[str, np.ndarray]:
+    """Cartesian product of the grid values as parallel per-scenario arrays.
+
+    Missing keys take their ``DEFAULT_GRID`` values. Taper shapes are returned as
+    indices into ``TAPER_SHAPES``.
+    """
+    values = {key: list(grid.get(key) or default) for key, default in DEFAULT_GRID.items()}
+    unknown = set(values["taper_shape"]) - set(TAPER_SHAPES)
+    if unknown:
+        raise ValueError(f"Unknown taper shape(s): {sorted(unknown)}")
+    if not all(0 <= r <= 6 for r in values["rest_days_per_week"]):
+        raise ValueError("rest_days_per_week must be between 0 and 6")
+    if not all(0 <= t <= MAX_TAPER_WEEKS for t in values["taper_weeks"]):
+        raise ValueError(f"taper_weeks must be between 0 and {MAX_TAPER_WEEKS}")
+    for key, (low, high) in (
+        ("weekly_volume_pct", VOLUME_PCT_RANGE),
+        ("weekly_progression_pct", PROGRESSION_PCT_RANGE),
+    ):
+        if not all(low <= v <= high for v in values[key]):
+            raise ValueError(f"{key} must be between {low:g} and {high:g}")
+    values["taper_shape"] = [TAPER_SHAPES.index(s) for s in values["taper_shape"]]
+
+    n = int(np.prod([len(v) for v in values.values()]))
+    if n > MAX_SCENARIOS:
+        raise ValueError(f"Grid has {n} scenarios (max {MAX_SCENARIOS})")
+
+    axes = np.meshgrid(*[np.arange(len(v)) for v in values.values()], indexing="ij")
+    return {
+        key: np.asarray(vals)[idx.ravel()]
+        for (key, vals), idx in zip(values.items(), axes, strict=True)
+    }
+
+
+def build_load_matrix(params: dict[str, np.ndarray], horizon: int, baseline: float) -> np.ndarray:
+    """Daily planned load for every scenario, shape ``(scenarios, horizon)``.
+
+    Day ``d`` (0-based) is ``horizon - d`` days before race day; the taper occupies
+    the final ``taper_weeks * 7`` of them.
+    """
+    vol = params["weekly_volume_pct"][:, None] / 100
+    growth = 1 + params["weekly_progression_pct"][:, None] / 100
+    rest = params["rest_days_per_week"][:, None].astype(int)
+    taper_weeks = params["taper_weeks"][:, None].astype(int)
+    shape = params["taper_shape"][:, None].astype(int)
+
+    d = np.arange(horizon)[None, :]
+    days_to_race = horizon - d
+    in_taper = days_to_race <= taper_weeks * 7
+    week_of_taper = np.where(in_taper, taper_weeks - (days_to_race - 1) // 7, 0)
+
+    # Progression runs until the taper starts and then holds
+    last_build_day = np.maximum(horizon - taper_weeks * 7 - 1, 0)
+    build_weeks = np.minimum(d, last_build_day) // 7
+
+    taper_pct = _TAPER_PCT[shape, taper_weeks, week_of_taper] / 100
+    training_day = ~_REST_MASK[rest, d % 7]
+    per_training_day = 7 / (7 - rest)
+    return baseline * vol * growth**build_weeks * taper_pct * per_training_day * training_day
+
+
+def _evaluate_chunk(
+    args: tuple[dict[str, np.ndarray], int, float, float, float],
+) -> np.ndarray:
+    """Race-day (ctl, atl) for a chunk of scenarios, shape ``(2, scenarios)``."""
+    params, horizon, baseline, ctl, atl = args
+    loads = build_load_matrix(params, horizon, baseline)
+    proj_ctl, proj_atl, _ = simulate(ctl, atl, loads)
+    return np.stack([proj_ctl[:, -1], proj_atl[:, -1]])
+
+
+def evaluate(
+    params: dict[str, np.ndarray],
+    horizon: int,
+    baseline: float,
+    ctl: float,
+    atl: float,
+    workers: int = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Race-day CTL and ATL for every scenario.
+
+    With ``workers > 1`` and a grid above ``POOL_THRESHOLD`` cells, scenario chunks
+    are simulated in a process pool; otherwise everything runs in one pass.
+    """
+    n = len(params["taper_weeks"])
+    if workers > 1 and n * horizon > POOL_THRESHOLD:
+        bounds = np.linspace(0, n, workers + 1, dtype=int)
+        chunks = [
+            ({k: v[a:b] for k, v in params.items()}, horizon, baseline, ctl, atl)
+            for a, b in itertools.pairwise(bounds)
+            if b > a
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            result = np.concatenate(list(pool.map(_evaluate_chunk, chunks)), axis=1)
+    else:
+        result = _evaluate_chunk((params, horizon, baseline, ctl, atl))
+    return result[0], result[1]
+
+
+def simulate_scenarios(
+    race_date_str: str,
+    current_ctl: float,
+    current_atl: float | None,
+    grid: dict[str, Sequence[Any]] | None = None,
+    target_tsb: float = 10.0,
+    top: int = 10,
+    include_trajectories: bool = True,
+    workers: int = 0,
+) -> dict:
+    """Simulate every grid scenario to race day and rank them.
+
+    Race-day values are the state on race morning (after the last training day).
+    Returns the ``top`` scenarios by score, best first, with daily trajectories;
+    scenarios whose simulation is not finite are left out of the ranking.
+    """
+    try:
+        race_date = datetime.strptime(race_date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return {
+            "error": "Invalid date format. Use YYYY-MM-DD.",
+            "scenarios": [],
+            "race_date": race_date_str,
+        }
+
+    days_out = (race_date - date.today()).days
+    if days_out <= 1:
+        return {
+            "error": "Race date must be at least 2 days away.",
+            "scenarios": [],
+            "race_date": race_date_str,
+        }
+    if days_out > MAX_HORIZON_DAYS:
+        return {
+            "error": f"Race date must be at most {MAX_HORIZON_DAYS} days away.",
+            "scenarios": [],
+            "race_date": race_date_str,
+        }
+
+    try:
+        params = expand_grid(grid or {})
+    except ValueError as e:
+        return {"error": str(e), "scenarios": [], "race_date": race_date_str}
+
+    # Drop tapers longer than the time available
+    horizon = days_out - 1
+    fits = params["taper_weeks"] * 7 <= horizon
+    params = {k: v[fits] for k, v in params.items()}
+    if not len(params["taper_weeks"]):
+        return {
+            "error": f"Only {days_out} days to race - no scenario's taper fits.",
+            "scenarios": [],
+            "race_date": race_date_str,
+        }
+    cells = len(params["taper_weeks"]) * horizon
+    if cells > MAX_CELLS:
+        return {
+            "error": (
+                f"Grid x horizon is {cells} scenario-days (max {MAX_CELLS});"
+                " use fewer values or a nearer race date."
+            ),
+            "scenarios": [],
+            "race_date": race_date_str,
+        }
+
+    atl = current_ctl if current_atl is None else current_atl
+    baseline = float(current_ctl)
+    end_ctl, end_atl = evaluate(params, horizon, baseline, current_ctl, atl, workers)
+    with np.errstate(invalid="ignore"):
+        end_tsb = end_ctl - end_atl
+        score = end_ctl - TSB_MISS_WEIGHT * np.abs(end_tsb - target_tsb)
+
+    finite = np.flatnonzero(np.isfinite(score))
+    order = finite[np.argsort(-score[finite], kind="stable")][: max(top, 0)]
+    best = {k: v[order] for k, v in params.items()}
+    if include_trajectories and len(order):
+        loads = build_load_matrix(best, horizon, baseline)
+        traj_ctl, traj_atl, traj_tsb = simulate(current_ctl, atl, loads)
+
+    scenarios = []
+    for rank, i in enumerate(order):
+        entry: dict[str, Any] = {
+            "rank": rank + 1,
+            "params": {
+                "weekly_volume_pct": float(params["weekly_volume_pct"][i]),
+                "weekly_progression_pct": float(params["weekly_progression_pct"][i]),
+                "rest_days_per_week": int(params["rest_days_per_week"][i]),
+                "taper_weeks": int(params["taper_weeks"][i]),
+                "taper_shape": TAPER_SHAPES[int(params["taper_shape"][i])],
+            },
+            "race_day_ctl": round(float(end_ctl[i]), 1),
+            "race_day_atl": round(float(end_atl[i]), 1),
+            "race_day_tsb": round(float(end_tsb[i]), 1),
+            "score": round(float(score[i]), 2),
+            "trajectory": [],
+        }
+        if include_trajectories:
+            entry["trajectory"] = [
+                {
+                    "day": d + 1,
+                    "load": round(float(loads[rank, d]), 1),
+                    "ctl": round(float(traj_ctl[rank, d]), 1),
+                    "atl": round(float(traj_atl[rank, d]), 1),
+                    "tsb": round(float(traj_tsb[rank, d]), 1),
+                }
+                for d in range(horizon)
+            ]
+        scenarios.append(entry)
+
+    return {
+        "race_date": race_date_str,
+        "days_to_race": days_out,
+        "current": {"ctl": current_ctl, "atl": atl, "tsb": round(current_ctl - atl, 1)},
+        "baseline_load": round(baseline, 1),
+        "target_tsb": target_tsb,
+        "evaluated": int(len(score)),
+        "scenarios": scenarios,
+    }
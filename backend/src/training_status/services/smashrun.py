@@ -1,11 +1,44 @@
 """Smashrun API client."""
 
-from datetime import date, timedelta
+import itertools
+import json
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, cast
 
 import requests
 
 from ..config import Settings
+from ..database import Database
+from .http import http_client, source_url
+from .json_stream import CHUNK_SIZE, iter_array
+
+PAGE_SIZE = 100  # activities per page, Smashrun's maximum
+# fromDate overlap before the latest cached start: start times are local while
+# fromDate is UTC, and runs are sometimes uploaded days after they happened
+SINCE_MARGIN = timedelta(days=7)
+
+
+@dataclass(frozen=True, slots=True)
+class SmashrunActivity:
+    """The fields of a synced Smashrun activity that the cache is queried by."""
+
+    id: int
+    start_date_local: str
+    activity_type: str | None
+    distance_km: float | None
+
+    @classmethod
+    def from_json(cls, activity: dict[str, Any]) -> "SmashrunActivity":
+        """Build from one item of the ``my/activities`` response."""
+        return cls(
+            activity["activityId"],
+            activity["startDateTimeLocal"],
+            activity.get("activityType"),
+            activity.get("distance"),
+        )
 
 
 class SmashrunClient:
@@ -14,13 +47,17 @@ class SmashrunClient:
     def __init__(self, settings: Settings):
         self.settings = settings
         self.headers = {"Authorization": f"Bearer {settings.smashrun_token}"}
-        self.base_url = "https://api.smashrun.com/v1"
+        self.base_url = source_url(settings, "smashrun", "https://api.smashrun.com/v1")
+        self.http = http_client("smashrun", settings)
 
-    def _get(self, endpoint: str, timeout: int = 15) -> dict:
+    def _request(
+        self, endpoint: str, params: dict | None = None, stream: bool = False
+    ) -> requests.Response:
         """Make authenticated GET request."""
         url = f"{self.base_url}/{endpoint}"
-        response = requests.get(url, headers=self.headers, timeout=timeout)
+        response = self.http.get(url, headers=self.headers, params=params, stream=stream)
         if response.status_code in (401, 403):
+            response.close()
             raise PermissionError(
                 f"Smashrun token rejected (HTTP {response.status_code}). "
                 "The bearer token is temporary and will expire. "
@@ -28,18 +65,93 @@ class SmashrunClient:
                 "then copy the new access_token into your .env file."
             )
         response.raise_for_status()
-        return cast(dict, response.json())
+        return response
+
+    def _get(self, endpoint: str, params: dict | None = None) -> dict:
+        """Make authenticated GET request and decode the JSON body."""
+        return cast(dict, self._request(endpoint, params).json())
+
+    def _stream(
+        self, endpoint: str, params: dict | None = None
+    ) -> Iterator[tuple[dict[str, Any], str]]:
+        """Get a JSON array, yielding (element, its JSON text) as the body arrives."""
+        with self._request(endpoint, params, stream=True) as response:
+            yield from iter_array(response.iter_content(CHUNK_SIZE))
+
+    def sync_activities(self, db: Database) -> list[SmashrunActivity]:
+        """Fetch the activities newer than the last seen id into ``smashrun_activities``.
+
+        Pages (newest first) from ``fromDate`` a margin before the latest cached
+        start and stops at the first already-seen id. The first sync backfills the
+        whole history instead, recording the next page after every stored page
+        (the ``activities_backfill`` cursor) so a backfill cut off by the fetch
+        deadline resumes where it stopped. Each page is parsed as it streams in and
+        stored with every activity's JSON exactly as received. Returns the new
+        activities.
+        """
+        cursor = db.get_sync_cursor("smashrun", "activities")
+        last_id = int(cursor) if cursor is not None else None
+        backfill = db.get_sync_cursor("smashrun", "activities_backfill")
+        backfilling = last_id is None or bool(backfill)
+        params: dict[str, Any] = {"count": PAGE_SIZE}
+        latest = db.get_latest_smashrun_activity()
+        if not backfilling and latest is not None:
+            since = datetime.fromisoformat(latest["start_date_local"][:19]) - SINCE_MARGIN
+            params["fromDate"] = int(since.replace(tzinfo=timezone.utc).timestamp())
+
+        new: list[SmashrunActivity] = []
+        seen: set[int] = set()
+        top = last_id or 0
+        for page in itertools.count(int(backfill) if backfilling and backfill else 0):
+            rows, received = [], 0
+            for element, text in self._stream("my/activities", {**params, "page": page}):
+                received += 1
+                a = SmashrunActivity.from_json(element)
+                if a.id in seen or (not backfilling and a.id <= top):
+                    continue
+                new.append(a)
+                rows.append((a.id, a.start_date_local, a.activity_type, a.distance_km, text))
+            seen.update(row[0] for row in rows)
+            if rows:
+                db.upsert_smashrun_activities(rows)
+                top = max(top, *seen)
+            if backfilling:
+                done = received < PAGE_SIZE
+                db.set_sync_cursor("smashrun", "activities_backfill", "" if done else str(page + 1))
+                if top:
+                    db.set_sync_cursor("smashrun", "activities", str(top))
+                if done:
+                    break
+            elif received < PAGE_SIZE or len(rows) < received:
+                break
+
+        if new and not backfilling:
+            db.set_sync_cursor("smashrun", "activities", str(top))
+        return new
+
+    def _sync_activities(self, db: Database, raw: dict[str, Any]) -> list[SmashrunActivity]:
+        """Sync the activity cache; nothing new (with the error in ``raw``) if Smashrun refused."""
+        try:
+            return self.sync_activities(db)
+        except requests.HTTPError as e:
+            raw["error"] = str(e)
+            return []
 
-    def get_stats(self) -> dict[str, Any]:
+    def get_stats(self, db: Database) -> dict[str, Any]:
         """Get running statistics from Smashrun.
 
-        Returns lifetime stats, weekly totals, and activity data.
+        Returns lifetime stats, plus weekly and monthly totals from the local
+        activity cache, synced first.
         """
         raw: dict[str, Any] = {"stats": {}, "activities": []}
 
-        # Get lifetime stats
-        stats = self._get("my/stats")
+        # Lifetime stats and new activities are independent: fetch both at once
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="smashrun") as pool:
+            activities = pool.submit(self._sync_activities, db, raw)
+            stats = self._get("my/stats")
         raw["stats"] = stats
+        # Ids of the newly synced activities; their JSON is in smashrun_activities
+        raw["activities"] = [a.id for a in activities.result()]
 
         today = date.today()
 
@@ -59,46 +171,12 @@ class SmashrunClient:
         last_mo_end = first_this - timedelta(days=1)
         last_mo_start = last_mo_end.replace(day=1)
 
-        # Get activities
-        acts: list[dict[str, Any]]
-        try:
-            acts = self._get("my/activities")  # type: ignore[assignment]
-        except requests.HTTPError as e:
-            acts = []
-            raw["error"] = str(e)
-
-        raw["activities"] = acts
-
-        # Calculate weekly/monthly distances
-        week_0_km = 0.0
-        week_kms = [0.0] * 4
-        month_km = 0.0
-        latest_activity: dict | None = None
-
-        for a in acts:
-            if a.get("activityType") != "running":
-                continue
-
-            act_date = date.fromisoformat(a["startDateTimeLocal"][:10])
-            km = a.get("distance") or 0
-
-            # Current week
-            if this_week_mon <= act_date <= today:
-                week_0_km += km
-
-            # Previous weeks
-            for i, (mon, sun) in enumerate(weeks):
-                if mon <= act_date <= sun:
-                    week_kms[i] += km
-                    break
-
-            # Last month
-            if last_mo_start <= act_date <= last_mo_end:
-                month_km += km
-
-            # Track latest for weather data
-            if latest_activity is None:
-                latest_activity = a
+        # Weekly/monthly distances from the cache
+        week_0_km = db.get_smashrun_km(this_week_mon.isoformat(), today.isoformat())
+        week_kms = [db.get_smashrun_km(mon.isoformat(), sun.isoformat()) for mon, sun in weeks]
+        month_km = db.get_smashrun_km(last_mo_start.isoformat(), last_mo_end.isoformat())
+        latest_run = db.get_latest_smashrun_activity("running")
+        latest_activity = json.loads(latest_run["data"]) if latest_run is not None else None
 
         result: dict[str, Any] = {
             "total_distance_km": stats.get("totalDistance", 0),
@@ -0,0 +1,367 @@
+"""Data-source adapters behind a report.
+
+Every source a report draws on is a ``SourceAdapter`` in ``SOURCES``: how to
+fetch it, how its data maps onto snapshot columns (and their SQL types), which
+other sources it needs first, and where its raw payload is kept. Adding a
+source means registering an adapter; ``generate_report`` builds the snapshot
+row from the registry and the database adds any column it does not have yet.
+
+``run_sources`` executes the enabled adapters in dependency waves: every
+adapter whose dependencies have finished runs concurrently with the others of
+its wave (``fetch_sources``: own thread, deadline, timing, isolated failures).
+An adapter whose dependency failed is skipped with an error; a dependency
+that is disabled or not registered is ignored. Sources in ``runs_after`` are only
+waited for: the adapter runs whether they succeeded or not.
+
+Each fetch gets its own ``Database`` handle (``SourceContext.db``), expired once
+its wave is over: a fetch that missed its deadline keeps running in the
+background, but whatever it writes from then on is rolled back instead of
+landing after the report moved on to the snapshot and the pipeline.
+"""
+
+import json
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from ..config import Settings
+from ..database import Database
+from .critical_speed import update_critical_speed_history
+from .decoupling import update_activity_decoupling
+from .fetch import SourceResult, fetch_sources, source_deadline
+from .intervals import IntervalsClient
+from .pace_curve import local_critical_speed, update_best_efforts
+from .smashrun import SmashrunClient
+from .streams import sync_activity_streams
+
+
+@dataclass(frozen=True)
+class SourceContext:
+    """What an adapter's ``fetch`` gets: settings, database and its dependencies' data.
+
+    ``db`` is a handle for this fetch alone; it stops committing when the fetch's
+    wave is over.
+    """
+
+    settings: Settings
+    db: Database
+    inputs: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class SourceAdapter:
+    """A data source: fetch function plus the snapshot columns it contributes."""
+
+    name: str
+    label: str
+    fetch: Callable[[SourceContext], dict[str, Any]]
+    columns: dict[str, str] = field(default_factory=dict)  # snapshot column -> SQL type
+    # Maps fetched data to column values; default: the columns' keys of the data
+    normalize: Callable[[dict[str, Any]], dict[str, Any]] | None = None
+    depends_on: tuple[str, ...] = ()
+    runs_after: tuple[str, ...] = ()  # run after these too, but also when they failed
+    raw_column: str | None = None  # snapshot column keeping the data's "_raw" as JSON
+    required: bool = False  # no snapshot is saved unless this source succeeded
+    enabled: Callable[[Settings], bool] = lambda settings: True
+    # Seconds the fetch may take (None: no deadline); default: ``source_deadline``
+    deadline: Callable[[Settings], float | None] | None = None
+
+    def values(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Get this source's value for each of its columns (None where missing)."""
+        values = self.normalize(data) if self.normalize else data
+        return {column: values.get(column) for column in self.columns}
+
+
+SOURCES: dict[str, SourceAdapter] = {}
+
+
+def register_source(
+    adapter: SourceAdapter, sources: dict[str, SourceAdapter] = SOURCES
+) -> SourceAdapter:
+    """Add an adapter to a registry; a name or column already taken raises ValueError."""
+    if adapter.name in sources:
+        raise ValueError(f"Source {adapter.name!r} is already registered")
+    claimed = {
+        column: other.name
+        for other in sources.values()
+        for column in (*other.columns, other.raw_column)
+        if column
+    }
+    for column in (*adapter.columns, adapter.raw_column):
+        if column in claimed:
+            owner = claimed[column]
+            raise ValueError(f"Column {column!r} of {adapter.name!r} belongs to {owner!r}")
+    sources[adapter.name] = adapter
+    return adapter
+
+
+def snapshot_columns(sources: dict[str, SourceAdapter] = SOURCES) -> dict[str, str]:
+    """Get every column the registered sources fill, with its SQL type."""
+    columns: dict[str, str] = {}
+    for adapter in sources.values():
+        columns.update(adapter.columns)
+        if adapter.raw_column:
+            columns[adapter.raw_column] = "TEXT"
+    return columns
+
+
+def _waves(adapters: dict[str, SourceAdapter]) -> list[list[SourceAdapter]]:
+    """Group adapters into waves that only depend on earlier waves."""
+    waves: list[list[SourceAdapter]] = []
+    done: set[str] = set()
+    pending = dict(adapters)
+    while pending:
+        wave = [
+            adapter
+            for adapter in pending.values()
+            if all(
+                dep in done or dep not in adapters
+                for dep in (*adapter.depends_on, *adapter.runs_after)
+            )
+        ]
+        if not wave:
+            raise ValueError(f"Circular source dependencies among {sorted(pending)}")
+        waves.append(wave)
+        for adapter in wave:
+            done.add(adapter.name)
+            del pending[adapter.name]
+    return waves
+
+
+def run_sources(
+    settings: Settings,
+    db: Database,
+    sources: dict[str, SourceAdapter] = SOURCES,
+    on_result: Callable[[SourceAdapter, SourceResult], None] | None = None,
+) -> dict[str, SourceResult]:
+    """Fetch every enabled source, wave by wave, and collect each one's result.
+
+    Never raises for a failing source: its ``SourceResult`` carries the error
+    and empty data, and the sources depending on it are skipped. ``on_result``
+    is called as each result comes in (e.g. to print progress).
+    """
+    enabled = {name: a for name, a in sources.items() if a.enabled(settings)}
+    results: dict[str, SourceResult] = {}
+    for wave in _waves(enabled):
+        fetchers = {}
+        handles = []
+        for adapter in wave:
+            failed = [d for d in adapter.depends_on if d in results and not results[d].ok]
+            if failed:
+                results[adapter.name] = SourceResult(error=f"skipped: {', '.join(failed)} failed")
+                continue
+            handles.append(db.detached())
+            context = SourceContext(
+                settings,
+                handles[-1],
+                {d: results[d].data for d in adapter.depends_on if d in results},
+            )
+            fetchers[adapter.name] = lambda adapter=adapter, context=context: adapter.fetch(context)
+        deadlines = {
+            name: (
+                enabled[name].deadline(settings)
+                if enabled[name].deadline
+                else source_deadline(settings, name)
+            )
+            for name in fetchers
+        }
+        results.update(fetch_sources(fetchers, deadlines))
+        for handle in handles:
+            handle.expire()  # late fetches must not write past this point
+        if on_result:
+            for adapter in wave:
+                on_result(adapter, results[adapter.name])
+    return results
+
+
+def snapshot_row(
+    results: dict[str, SourceResult], sources: dict[str, SourceAdapter] = SOURCES
+) -> dict[str, Any]:
+    """Merge the sources' results into a snapshot row for ``Database.insert_snapshot``.
+
+    Every registered column is present: None for sources that failed, were
+    disabled or could not normalize their data.
+    """
+    row: dict[str, Any] = {"recorded_at": datetime.now().isoformat(timespec="seconds")}
+    for adapter in sources.values():
+        result = results.get(adapter.name)
+        data = result.data if result is not None and result.ok else {}
+        try:
+            row.update(adapter.values(data))
+        except Exception as e:
+            if result is not None:
+                result.error = f"normalize failed: {e}"
+            row.update(dict.fromkeys(adapter.columns))
+        if adapter.raw_column:
+            row[adapter.raw_column] = json.dumps(data.get("_raw", {}))
+    return row
+
+
+def snapshot_ready(
+    results: dict[str, SourceResult], sources: dict[str, SourceAdapter] = SOURCES
+) -> bool:
+    """Whether every required source succeeded."""
+    return all(
+        adapter.name in results and results[adapter.name].ok
+        for adapter in sources.values()
+        if adapter.required
+    )
+
+
+def enabled_sources(
+    settings: Settings, sources: Iterable[SourceAdapter] | None = None
+) -> list[SourceAdapter]:
+    """Get the sources a report with these settings fetches."""
+    return [a for a in (sources or SOURCES.values()) if a.enabled(settings)]
+
+
+# --- ADAPTERS ---
+
+
+def _columns(sql_type: str, *names: str) -> dict[str, str]:
+    return dict.fromkeys(names, sql_type)
+
+
+def _fetch_intervals(ctx: SourceContext) -> dict[str, Any]:
+    return IntervalsClient(ctx.settings).get_wellness(ctx.db)
+
+
+def _fetch_smashrun(ctx: SourceContext) -> dict[str, Any]:
+    return SmashrunClient(ctx.settings).get_stats(ctx.db)
+
+
+def _fetch_strava(ctx: SourceContext) -> dict[str, Any]:
+    from .strava import StravaClient
+
+    return StravaClient(ctx.settings, ctx.db).get_stats()
+
+
+def _sync_streams(ctx: SourceContext) -> dict[str, Any]:
+    """Download second-by-second streams for the activities Intervals.icu returned.
+
+    The critical speed history is refit only when new streams changed the best efforts.
+    """
+    activities = ctx.inputs.get("intervals", {}).get("_raw", {}).get("activities")
+    if not isinstance(activities, list):
+        return {"synced": 0}
+    synced = sync_activity_streams(ctx.db, IntervalsClient(ctx.settings), activities)
+    if synced:
+        update_activity_decoupling(ctx.db, sorted(ctx.db.get_streamed_activity_ids()))
+        if update_best_efforts(ctx.db):
+            update_critical_speed_history(ctx.db)
+    return {"synced": synced}
+
+
+def _critical_speed(ctx: SourceContext) -> dict[str, Any]:
+    """Get critical speed from the local best efforts; Intervals.icu pace curves as a fallback.
+
+    The fallback records the pace curves it used in the Intervals.icu raw payload.
+    """
+    cs = local_critical_speed(ctx.db)
+    if cs["critical_speed"] is None:
+        cs = IntervalsClient(ctx.settings).get_critical_speed(ctx.inputs["intervals"]["_raw"])
+    return cs
+
+
+register_source(
+    SourceAdapter(
+        name="intervals",
+        label="Intervals.icu",
+        fetch=_fetch_intervals,
+        columns={
+            **_columns("REAL", "ctl", "atl", "tsb", "ramp_rate", "ac_ratio"),
+            "resting_hr": "INTEGER",
+            **_columns("REAL", "hrv", "hrv_sdnn"),
+            **_columns("INTEGER", "sleep_secs", "sleep_quality", "rest_days"),
+            **_columns("REAL", "monotony", "training_strain", "vo2max", "sleep_score"),
+            "steps": "INTEGER",
+            **_columns("REAL", "spo2", "stress", "readiness", "weight", "body_fat"),
+            **_columns("INTEGER", "mood", "motivation", "fatigue", "soreness"),
+            "comments": "TEXT",
+            **_columns("REAL", "elevation_gain_m", "avg_cadence"),
+            **_columns(
+                "INTEGER",
+                "max_hr",
+                "hr_zone_z1_secs",
+                "hr_zone_z2_secs",
+                "hr_zone_z3_secs",
+                "hr_zone_z4_secs",
+                "hr_zone_z5_secs",
+                "icu_rpe",
+                "feel",
+            ),
+        },
+        raw_column="intervals_json",
+        required=True,
+    )
+)
+register_source(
+    SourceAdapter(
+        name="smashrun",
+        label="Smashrun",
+        fetch=_fetch_smashrun,
+        columns={
+            "total_distance_km": "REAL",
+            "run_count": "INTEGER",
+            "longest_run_km": "REAL",
+            "avg_pace": "TEXT",
+            **_columns(
+                "REAL",
+                "week_0_km",
+                "week_1_km",
+                "week_2_km",
+                "week_3_km",
+                "week_4_km",
+                "last_month_km",
+            ),
+            "longest_streak": "INTEGER",
+            "longest_streak_date": "TEXT",
+            "longest_break_days": "INTEGER",
+            "longest_break_date": "TEXT",
+            "avg_days_run_per_week": "REAL",
+            **_columns("INTEGER", "days_run_am", "days_run_pm", "days_run_both"),
+            "most_often_run_day": "TEXT",
+            **_columns("REAL", "weather_temp", "weather_temp_feels_like"),
+            "weather_humidity": "INTEGER",
+            "weather_wind_speed": "REAL",
+            "weather_type": "TEXT",
+        },
+        raw_column="smashrun_json",
+        required=True,
+    )
+)
+register_source(
+    SourceAdapter(
+        name="strava",
+        label="Strava",
+        fetch=_fetch_strava,
+        columns={
+            **_columns("REAL", "strava_weekly_km", "strava_total_km"),
+            "strava_run_count": "INTEGER",
+            "strava_ytd_km": "REAL",
+        },
+        enabled=lambda settings: bool(settings.strava_refresh_token),
+    )
+)
+register_source(
+    SourceAdapter(
+        name="streams",
+        label="Activity streams",
+        fetch=_sync_streams,
+        depends_on=("intervals",),
+        enabled=lambda settings: settings.sync_streams,
+        deadline=lambda settings: None,  # a backfill takes as long as it takes
+    )
+)
+register_source(
+    SourceAdapter(
+        name="critical_speed",
+        label="Critical speed",
+        fetch=_critical_speed,
+        columns=_columns("REAL", "critical_speed", "d_prime"),
+        depends_on=("intervals",),
+        runs_after=("streams",),  # its best efforts, if any arrived; the fallback needs none
+        deadline=lambda settings: source_deadline(settings, "intervals"),
+    )
+)
@@ -13,21 +13,73 @@ Setup:
 4. Add STRAVA_CLIENT_ID, STRAVA_CLIENT_SECRET, STRAVA_REFRESH_TOKEN to .env
 """
 
-from datetime import datetime, timedelta, timezone
+import itertools
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
 from typing import Any
 
 import requests
 
 from ..config import Settings
+from ..database import Database
+from .http import http_client, source_url
+from .json_stream import CHUNK_SIZE, iter_array
 
 _TOKEN_URL = "https://www.strava.com/oauth/token"
 _API_BASE = "https://www.strava.com/api/v3"
 
+PAGE_SIZE = 200  # activities per page, Strava's maximum
+# The after cursor re-reads this far back: runs are sometimes uploaded days later
+SYNC_OVERLAP = timedelta(days=7)
+
+
+@dataclass(frozen=True, slots=True)
+class StravaActivity:
+    """The fields of a Strava activity summary that are stored."""
+
+    id: int
+    start_date: str
+    start_date_local: str
+    type: str | None
+    distance_m: float | None
+    moving_time_secs: int | None
+
+    @classmethod
+    def from_json(cls, activity: dict[str, Any]) -> "StravaActivity":
+        """Build from one summary of the ``athlete/activities`` response."""
+        return cls(
+            activity["id"],
+            activity["start_date"],
+            activity["start_date_local"],
+            activity.get("type"),
+            activity.get("distance"),
+            activity.get("moving_time"),
+        )
+
+    @property
+    def row(self) -> tuple:
+        """Row tuple for ``Database.upsert_strava_activities``."""
+        return (
+            self.id,
+            self.start_date,
+            self.start_date_local,
+            self.type,
+            self.distance_m,
+            self.moving_time_secs,
+        )
+
 
 class StravaClient:
-    """Client for the Strava API using offline refresh-token flow."""
+    """Client for the Strava API using offline refresh-token flow.
+
+    Tokens are cached in ``db`` so a new process reuses a still-valid access
+    token (and the latest refresh token, which Strava rotates) instead of
+    refreshing again.
+    """
 
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, db: Database):
         if not (
             settings.strava_client_id
             and settings.strava_client_secret
@@ -37,60 +89,102 @@ class StravaClient:
         self.client_id = settings.strava_client_id
         self.client_secret = settings.strava_client_secret
         self.refresh_token = settings.strava_refresh_token
+        self.configured_refresh_token = settings.strava_refresh_token
+        self.db = db
         self._access_token: str | None = None
         self._token_expires_at: float = 0.0
+        self.token_url = source_url(settings, "strava", _TOKEN_URL)
+        self.base_url = source_url(settings, "strava", _API_BASE)
+        self.http = http_client("strava", settings)
 
     def _get_access_token(self) -> str:
-        """Refresh and cache the access token if expired."""
+        """Get a valid access token: from memory, the token cache, or a refresh."""
         now = datetime.now(tz=timezone.utc).timestamp()
         if self._access_token and now < self._token_expires_at - 60:
             return self._access_token
 
-        resp = requests.post(
-            _TOKEN_URL,
+        cached = self.db.get_oauth_token("strava")
+        if cached is not None:
+            self._access_token = cached["access_token"]
+            self._token_expires_at = float(cached["expires_at"])
+            self.refresh_token = cached["refresh_token"] or self.refresh_token
+            if now < self._token_expires_at - 60:
+                return self._access_token  # type: ignore[return-value]
+
+        try:
+            payload = self._refresh(self.refresh_token)
+        except requests.HTTPError:
+            if self.refresh_token == self.configured_refresh_token:
+                raise
+            # The cached token was superseded by re-authorising into .env
+            payload = self._refresh(self.configured_refresh_token)
+        self._access_token = payload["access_token"]
+        self._token_expires_at = float(payload["expires_at"])
+        self.refresh_token = payload.get("refresh_token") or self.refresh_token
+        self.db.save_oauth_token(
+            "strava", payload["access_token"], self.refresh_token, self._token_expires_at
+        )
+        return payload["access_token"]  # type: ignore[no-any-return]
+
+    def _refresh(self, refresh_token: str) -> dict[str, Any]:
+        resp = self.http.post(
+            self.token_url,
             data={
                 "client_id": self.client_id,
                 "client_secret": self.client_secret,
-                "refresh_token": self.refresh_token,
+                "refresh_token": refresh_token,
                 "grant_type": "refresh_token",
             },
-            timeout=15,
         )
         resp.raise_for_status()
-        payload = resp.json()
-        self._access_token = payload["access_token"]
-        self._token_expires_at = float(payload["expires_at"])
-        return self._access_token  # type: ignore[return-value]
+        return resp.json()  # type: ignore[no-any-return]
 
-    def _get(self, endpoint: str, params: dict | None = None) -> Any:
+    def _request(
+        self, endpoint: str, params: dict | None = None, stream: bool = False
+    ) -> requests.Response:
         token = self._get_access_token()
-        resp = requests.get(
-            f"{_API_BASE}/{endpoint}",
+        resp = self.http.get(
+            f"{self.base_url}/{endpoint}",
             headers={"Authorization": f"Bearer {token}"},
             params=params or {},
-            timeout=15,
+            stream=stream,
         )
         resp.raise_for_status()
-        return resp.json()
+        return resp
+
+    def _get(self, endpoint: str, params: dict | None = None) -> Any:
+        return self._request(endpoint, params).json()
+
+    def _stream(self, endpoint: str, params: dict | None = None) -> Iterator[tuple[Any, str]]:
+        """Get a JSON array, yielding (element, its JSON text) as the body arrives."""
+        with self._request(endpoint, params, stream=True) as resp:
+            yield from iter_array(resp.iter_content(CHUNK_SIZE))
 
     def get_stats(self) -> dict[str, Any]:
         """Fetch athlete profile and compute weekly/total running stats.
 
         Returns a dict compatible with the strava_* snapshot columns.
         """
-        athlete = self._get("athlete")
-        athlete_id = athlete.get("id")
-        if not athlete_id:
+        self._get_access_token()  # once, before the requests below share it
+
+        # New activities do not depend on the athlete: sync them meanwhile
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="strava") as pool:
+            synced = pool.submit(self.sync_activities)
+            athlete = self._get("athlete")
+            athlete_id = athlete.get("id")
+            stats = self._get(f"athletes/{athlete_id}/stats") if athlete_id else None
+        synced.result()
+        if stats is None:
             return {}
 
-        stats = self._get(f"athletes/{athlete_id}/stats")
-
         total_km = round((stats.get("all_run_totals", {}).get("distance") or 0) / 1000, 1)
         ytd_km = round((stats.get("ytd_run_totals", {}).get("distance") or 0) / 1000, 1)
         run_count = stats.get("all_run_totals", {}).get("count") or 0
 
-        # Weekly km: fetch recent activities and compute current-week total
-        weekly_km = self._get_weekly_km()
+        # Weekly km: this week's runs from the synced activities
+        today = date.today()
+        monday = today - timedelta(days=today.weekday())
+        weekly_km = round(self.db.get_strava_km(monday.isoformat(), today.isoformat()), 1)
 
         return {
             "strava_total_km": total_km,
@@ -99,20 +193,35 @@ class StravaClient:
             "strava_weekly_km": weekly_km,
         }
 
-    def _get_weekly_km(self) -> float:
-        """Compute km from Monday of the current week until today."""
-        now = datetime.now(tz=timezone.utc)
-        monday = now - timedelta(days=now.weekday())
-        monday_ts = int(monday.replace(hour=0, minute=0, second=0).timestamp())
-
-        activities = self._get(
-            "athlete/activities",
-            params={"after": monday_ts, "per_page": 100},
-        )
+    def sync_activities(self) -> int:
+        """Page through the activities started after the stored cursor into ``db``.
 
-        total = 0.0
-        for act in activities:
-            if act.get("type") == "Run":
-                total += act.get("distance", 0.0)
-
-        return round(total / 1000, 1)
+        The first sync backfills the whole history; the cursor (the latest start
+        seen, as a Unix time) advances after every page, so an interrupted
+        backfill resumes where it stopped. Pages are parsed as they stream in,
+        keeping only the stored fields. Returns the number of activities stored.
+        """
+        cursor = self.db.get_sync_cursor("strava", "activities")
+        after = 0
+        if cursor is not None:
+            after = max(0, int(cursor) - int(SYNC_OVERLAP.total_seconds()))
+
+        stored = 0
+        latest = int(cursor) if cursor is not None else 0
+        for page in itertools.count(1):
+            params = {"after": after, "page": page, "per_page": PAGE_SIZE}
+            batch = [
+                StravaActivity.from_json(a) for a, _ in self._stream("athlete/activities", params)
+            ]
+            if batch:
+                self.db.upsert_strava_activities([a.row for a in batch])
+                starts = (
+                    datetime.fromisoformat(a.start_date.replace("Z", "+00:00")).timestamp()
+                    for a in batch
+                )
+                latest = max(latest, int(max(starts)))
+                self.db.set_sync_cursor("strava", "activities", str(latest))
+                stored += len(batch)
+            if len(batch) < PAGE_SIZE:
+                break
+        return stored
@@ -0,0 +1,237 @@
+"""Per-activity sample streams (second-by-second HR, pace, cadence, altitude, GPS).
+
+Streams come from Intervals.icu and are stored one BLOB per (activity, stream) in
+``activity_streams``. Each stream is quantized to integers (``value * scale``),
+delta-encoded from its first sample so consecutive samples become small numbers,
+narrowed to the smallest integer dtype that holds the deltas and zlib-compressed.
+Missing samples are carried forward before encoding and restored as NaN from a
+packed bitmask.
+
+Decoding wraps the decompressed buffer with ``np.frombuffer`` (no copy) and
+rebuilds values with a single ``cumsum``. Decoded streams are read-only arrays
+kept in a bounded LRU, so repeated analyses of the same runs skip SQLite and zlib.
+"""
+
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import requests
+
+from ..database import Database
+
+logger = logging.getLogger(__name__)
+
+# Stream name -> quantization scale (stored integer = round(value * scale))
+STREAM_SCALES: dict[str, float] = {
+    "time": 1.0,  # s
+    "heartrate": 1.0,  # bpm
+    "velocity_smooth": 1000.0,  # m/s -> mm/s
+    "cadence": 10.0,
+    "altitude": 10.0,  # m -> dm
+    "lat": 1e7,  # degrees, ~1 cm
+    "lng": 1e7,
+}
+# What to request from Intervals.icu ("latlng" arrives as lat in data, lng in data2)
+INTERVALS_STREAM_TYPES = ["time", "heartrate", "velocity_smooth", "cadence", "altitude", "latlng"]
+RUN_SPORTS = ("run", "virtualrun", "treadmill", "trailrun")
+
+DEFAULT_CACHE_SIZE = 64
+_DELTA_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+@dataclass(frozen=True)
+class EncodedStream:
+    """One stream as stored in ``activity_streams``."""
+
+    stream: str
+    dtype: str
+    scale: float
+    base: int
+    length: int
+    data: bytes
+    nulls: bytes | None
+
+    def row(self) -> tuple:
+        """Column values for ``Database.save_activity_streams``."""
+        return (self.stream, self.dtype, self.scale, self.base, self.length, self.data, self.nulls)
+
+
+def encode_stream(stream: str, values: Sequence[float | None] | np.ndarray) -> EncodedStream:
+    """Quantize, delta-encode and compress one stream (``None``/NaN are missing)."""
+    scale = STREAM_SCALES[stream]
+    arr = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(arr)
+    if missing.any():
+        # Carry the previous sample forward so gaps cost no large deltas
+        idx = np.where(missing, 0, np.arange(len(arr)))
+        arr = np.nan_to_num(arr[np.maximum.accumulate(idx)])
+    quantized = np.rint(arr * scale).astype(np.int64)
+    base = int(quantized[0]) if len(quantized) else 0
+    deltas = np.diff(quantized, prepend=base)
+
+    dtype = np.dtype(np.int64).newbyteorder("<")
+    if len(deltas):
+        lo, hi = int(deltas.min()), int(deltas.max())
+        for candidate in _DELTA_DTYPES:
+            info = np.iinfo(candidate)
+            if info.min <= lo and hi <= info.max:
+                dtype = np.dtype(candidate).newbyteorder("<")
+                break
+    return EncodedStream(
+        stream=stream,
+        dtype=dtype.str,
+        scale=scale,
+        base=base,
+        length=len(deltas),
+        data=zlib.compress(deltas.astype(dtype).tobytes()),
+        nulls=zlib.compress(np.packbits(missing).tobytes()) if missing.any() else None,
+    )
+
+
+def decode_stream(
+    dtype: str, scale: float, base: int, length: int, data: bytes, nulls: bytes | None = None
+) -> np.ndarray:
+    """Rebuild a stream's float values (read-only; missing samples are NaN)."""
+    deltas = np.frombuffer(zlib.decompress(data), dtype=np.dtype(dtype), count=length)
+    values = (np.cumsum(deltas, dtype=np.int64) + base).astype(np.float64)
+    if scale != 1.0:
+        values /= scale
+    if nulls is not None:
+        mask = np.unpackbits(np.frombuffer(zlib.decompress(nulls), np.uint8), count=length)
+        values[mask.astype(bool)] = np.nan
+    values.flags.writeable = False
+    return values
+
+
+class StreamCache:
+    """Bounded LRU of decoded streams keyed by (database path, activity id)."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.entries: OrderedDict[tuple[str, str], dict[str, np.ndarray]] = OrderedDict()
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple[str, str]) -> dict[str, np.ndarray] | None:
+        """Return the cached streams and mark them recently used (None on a miss)."""
+        with self.lock:
+            streams = self.entries.get(key)
+            if streams is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return streams
+
+    def put(self, key: tuple[str, str], streams: dict[str, np.ndarray]) -> None:
+        """Cache streams, evicting the least recently used beyond ``maxsize``."""
+        with self.lock:
+            self.entries[key] = streams
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def discard(self, key: tuple[str, str]) -> None:
+        """Drop one entry, if cached."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the hit/miss counters."""
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+
+stream_cache = StreamCache()
+
+
+def store_streams(db: Database, activity_id: str, streams: dict[str, Sequence]) -> int:
+    """Encode and save an activity's streams (unknown names are ignored).
+
+    Returns the number of bytes stored.
+    """
+    encoded = [
+        encode_stream(name, values) for name, values in streams.items() if name in STREAM_SCALES
+    ]
+    db.save_activity_streams(activity_id, [e.row() for e in encoded])
+    stream_cache.discard((str(db.db_path), activity_id))
+    return sum(len(e.data) + len(e.nulls or b"") for e in encoded)
+
+
+def load_streams(db: Database, activity_id: str) -> dict[str, np.ndarray]:
+    """Load an activity's decoded streams ({} when none are stored), via the LRU."""
+    key = (str(db.db_path), activity_id)
+    streams = stream_cache.get(key)
+    if streams is None:
+        streams = {
+            row["stream"]: decode_stream(
+                row["dtype"], row["scale"], row["base"], row["length"], row["data"], row["nulls"]
+            )
+            for row in db.get_activity_streams(activity_id)
+        }
+        if streams:
+            stream_cache.put(key, streams)
+    return streams
+
+
+def parse_intervals_streams(payload: Iterable[dict[str, Any]]) -> dict[str, list]:
+    """Map an Intervals.icu ``streams.json`` response to our stream names."""
+    streams: dict[str, list] = {}
+    for item in payload:
+        kind, data = item.get("type"), item.get("data")
+        if not data:
+            continue
+        if kind == "latlng":
+            streams["lat"] = data
+            if item.get("data2"):
+                streams["lng"] = item["data2"]
+        elif kind in STREAM_SCALES:
+            streams[kind] = data
+    return streams
+
+
+def is_run(activity: dict[str, Any]) -> bool:
+    return str(activity.get("type", "")).lower() in RUN_SPORTS
+
+
+def sync_activity_streams(db: Database, client: Any, activities: list[dict[str, Any]]) -> int:
+    """Save summaries for ``activities`` and fetch streams for runs not stored yet.
+
+    ``client`` is an ``IntervalsClient``. A failed download is logged and skipped
+    (it is retried on the next sync). Returns the number of activities synced.
+    """
+    have = db.get_streamed_activity_ids()
+    synced = 0
+    for act in activities:
+        activity_id = str(act.get("id", ""))
+        if not activity_id or not act.get("start_date_local"):
+            continue
+        db.upsert_activity(
+            activity_id,
+            act["start_date_local"],
+            str(act.get("type", "")).lower() or None,
+            act.get("distance"),
+            act.get("moving_time") or act.get("elapsed_time"),
+            act.get("average_heartrate"),
+        )
+        if activity_id in have or not is_run(act):
+            continue
+        try:
+            payload = client.get_activity_streams(activity_id, INTERVALS_STREAM_TYPES)
+        except requests.RequestException as e:
+            logger.warning("Could not fetch streams for activity %s: %s", activity_id, e)
+            continue
+        streams = parse_intervals_streams(payload)
+        if streams:
+            store_streams(db, activity_id, streams)
+            synced += 1
+    return synced
@@ -0,0 +1,201 @@
+"""Vectorized time-series primitives for analytics.
+
+All series are float64 NumPy arrays ordered oldest → newest, with NaN standing in
+for NULL / missing values. Rolling windows are trailing (they end at the current
+element) and NaN-aware: missing values are skipped, not treated as zero.
+"""
+
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+import numpy as np
+
+from ..database import Database
+
+# Largest exponent we allow in the chunked EWMA closed form (exp(600) ~ 1e260).
+_MAX_EWMA_EXPONENT = 600.0
+
+
+def to_array(values: Iterable[Any]) -> np.ndarray:
+    """Convert a sequence of numbers/None into a float array (None → NaN)."""
+    return np.asarray(values if isinstance(values, Sequence) else list(values), dtype=float)
+
+
+def rows_to_matrix(rows: Sequence[Sequence[Any]], n_cols: int) -> np.ndarray:
+    """Convert DB rows (tuples of numbers/None) into a 2-D float array.
+
+    Returns an array of shape ``(len(rows), n_cols)``; an empty input gives ``(0, n_cols)``.
+    """
+    if not rows:
+        return np.empty((0, n_cols), dtype=float)
+    return np.asarray(rows, dtype=float).reshape(len(rows), n_cols)
+
+
+def load_columns(
+    db: Database, columns: list[str], limit: int | None = None
+) -> dict[str, np.ndarray]:
+    """Load numeric snapshot columns as oldest → newest arrays.
+
+    ``limit=None`` loads the full history.
+    """
+    rows = db.get_snapshots_for_analytics(columns=columns, limit=limit)
+    matrix = rows_to_matrix(rows, len(columns))[::-1]
+    return {col: np.ascontiguousarray(matrix[:, i]) for i, col in enumerate(columns)}
+
+
+def load_daily(
+    db: Database, columns: list[str], limit: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Load numeric snapshot columns resampled to one row per calendar day.
+
+    The last snapshot of each day wins and days without a snapshot are all-NaN rows,
+    so row offsets are day offsets. Returns ``(days, matrix)``: ``datetime64[D]``
+    dates oldest → newest and a ``(len(days), len(columns))`` float array.
+    ``limit`` counts snapshots, not days; ``None`` loads the full history.
+    """
+    rows = db.get_snapshots_for_analytics(columns=["recorded_at", *columns], limit=limit)
+    if not rows:
+        return np.empty(0, dtype="datetime64[D]"), np.empty((0, len(columns)))
+    rows = rows[::-1]
+    days = np.array([r[0][:10] for r in rows], dtype="datetime64[D]")
+    values = rows_to_matrix([r[1:] for r in rows], len(columns))
+
+    last_of_day = np.append(days[1:] != days[:-1], True)
+    days, values = days[last_of_day], values[last_of_day]
+    offsets = (days - days[0]).astype(int)
+    out = np.full((offsets[-1] + 1, len(columns)), np.nan)
+    out[offsets] = values
+    return days[0] + np.arange(offsets[-1] + 1), out
+
+
+def valid(x: np.ndarray) -> np.ndarray:
+    """Return the non-NaN values of ``x`` in their original order."""
+    return x[~np.isnan(x)]
+
+
+def _window_sums(x: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Trailing-window (count, sum, sum of squares) of the non-NaN values."""
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    mask = ~np.isnan(x)
+    # Centre on the overall mean so the sum-of-squares difference stays well conditioned.
+    centre = float(np.mean(x[mask])) if mask.any() else 0.0
+    xc = np.where(mask, x - centre, 0.0)
+
+    def _rolling(a: np.ndarray) -> np.ndarray:
+        c = np.concatenate(([0.0], np.cumsum(a)))
+        return c[window:] - c[:-window] if len(a) >= window else np.empty(0)
+
+    def _trailing(a: np.ndarray) -> np.ndarray:
+        c = np.cumsum(a)
+        head = c[: min(window - 1, len(a))]
+        return np.concatenate((head, _rolling(a)))
+
+    count = _trailing(mask.astype(float))
+    s1 = _trailing(xc)
+    s2 = _trailing(xc * xc)
+    return count, s1 + centre * count, s2 + 2 * centre * s1 + centre * centre * count
+
+
+def rolling_count(x: np.ndarray, window: int) -> np.ndarray:
+    """Count the non-NaN values in each trailing window."""
+    return _window_sums(x, window)[0]
+
+
+def rolling_mean(x: np.ndarray, window: int, min_periods: int = 1) -> np.ndarray:
+    """Trailing-window mean; NaN where fewer than ``min_periods`` values are present."""
+    count, s1, _ = _window_sums(x, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = s1 / count
+    out[count < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rolling_std(x: np.ndarray, window: int, min_periods: int = 2, ddof: int = 1) -> np.ndarray:
+    """Trailing-window standard deviation (sample std by default)."""
+    count, s1, s2 = _window_sums(x, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (s2 - s1 * s1 / count) / (count - ddof)
+    var = np.maximum(var, 0.0)
+    out = np.sqrt(var)
+    out[count < max(min_periods, ddof + 1)] = np.nan
+    return out
+
+
+def rolling_zscore(
+    x: np.ndarray, window: int, min_periods: int = 3, exclude_current: bool = True
+) -> np.ndarray:
+    """Z-score of each value against its trailing window.
+
+    With ``exclude_current`` the baseline is the ``window`` values *before* the current
+    one, which is what anomaly checks want (today vs the recent baseline).
+    """
+    base = shift(x, 1) if exclude_current else x
+    mean = rolling_mean(base, window, min_periods)
+    std = rolling_std(base, window, min_periods)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (x - mean) / std
+    z[~np.isfinite(z)] = np.nan
+    return z
+
+
+def shift(x: np.ndarray, periods: int) -> np.ndarray:
+    """Shift values forward by ``periods`` (positive = lag), padding with NaN."""
+    out = np.full_like(x, np.nan, dtype=float)
+    if periods == 0:
+        out[:] = x
+    elif periods > 0:
+        out[periods:] = x[:-periods] if periods < len(x) else out[periods:]
+    else:
+        out[:periods] = x[-periods:] if -periods < len(x) else out[:periods]
+    return out
+
+
+def ewma(x: np.ndarray, span: float | None = None, alpha: float | None = None) -> np.ndarray:
+    """Exponentially weighted moving average (recursive form, NaN-skipping).
+
+    ``y[0]`` is the first valid value and ``y[t] = y[t-1] + alpha * (x[t] - y[t-1])``.
+    Missing values carry the previous average forward. Give either ``span``
+    (``alpha = 2 / (span + 1)``) or ``alpha`` directly.
+
+    Evaluated in closed form per chunk, so there is no Python-level loop per element.
+    """
+    if alpha is None:
+        if span is None:
+            raise ValueError("Give span or alpha")
+        alpha = 2.0 / (span + 1.0)
+    if not 0 < alpha <= 1:
+        raise ValueError("alpha must be in (0, 1]")
+
+    out = np.full(len(x), np.nan)
+    mask = ~np.isnan(x)
+    if not mask.any():
+        return out
+    first = int(np.argmax(mask))
+    if alpha == 1.0:
+        idx = np.where(mask, np.arange(len(x)), -1)
+        np.maximum.accumulate(idx, out=idx)
+        out[first:] = x[idx[first:]]
+        return out
+
+    decay = 1.0 - alpha
+    log_d = np.log(decay)
+    # Exponent e[t] counts valid updates after the seed; NaNs do not advance it.
+    steps = mask[first:].astype(float)
+    steps[0] = 0.0
+    e = np.cumsum(steps)
+    contrib = np.where(mask[first:], x[first:], 0.0) * steps
+    chunk = max(1, int(_MAX_EWMA_EXPONENT / -log_d))
+
+    res = np.empty(len(e))
+    seed = float(x[first])
+    base = 0.0
+    start = 0
+    while start < len(e):
+        stop = max(int(np.searchsorted(e, base + chunk, side="right")), start + 1)
+        rel = e[start:stop] - base
+        scaled = np.cumsum(contrib[start:stop] * np.exp(-rel * log_d))
+        res[start:stop] = np.exp(rel * log_d) * (seed + alpha * scaled)
+        seed, base, start = float(res[stop - 1]), float(e[stop - 1]), stop
+    out[first:] = res
+    return out
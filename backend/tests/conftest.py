@@ -82,6 +82,12 @@ SNAPSHOT_DATA = {
 }
 
 
+@pytest.fixture(autouse=True)
+def _no_http_cache(monkeypatch):
+    """Keep clients built from default settings from writing data/http_cache.db."""
+    monkeypatch.setenv("HTTP_CACHE_MAX_MB", "0")
+
+
 @pytest.fixture
 def temp_db():
     """Create a temporary database for testing."""
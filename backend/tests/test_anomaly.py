@@ -0,0 +1,103 @@
+"""Tests for streaming anomaly detection and the alerts API."""
+
+import copy
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import Database
+from training_status.services.anomaly import detect_anomalies
+
+from .conftest import SNAPSHOT_DATA
+
+START = date(2026, 1, 1)
+
+
+def _insert(db: Database, i: int, hour: int = 8, **values: float | None) -> int:
+    data = copy.copy(SNAPSHOT_DATA)
+    data["recorded_at"] = f"{(START + timedelta(days=i)).isoformat()}T{hour:02d}:00:00"
+    data.update(values)
+    return db.insert_snapshot(data)
+
+
+def _history(db: Database, days: int = 30) -> None:
+    """Stable baseline: HRV around 55 ms, resting HR around 50 bpm."""
+    for i in range(days):
+        sid = _insert(db, i, hrv=55.0 + (i % 5) - 2, resting_hr=50 + (i % 3) - 1)
+        assert detect_anomalies(db, sid) == []
+
+
+def test_sustained_hrv_drop_raises_cusum_alert(temp_db: Database):
+    _history(temp_db)
+    raised = []
+    # About one standard deviation low: too small for the EWMA chart, but it adds up
+    for i in range(30, 40):
+        raised += detect_anomalies(temp_db, _insert(temp_db, i, hrv=53.0, resting_hr=50))
+
+    alerts = [dict(a) for a in temp_db.get_alerts()]
+    assert raised and len(alerts) == len(raised)
+    assert {(a["metric"], a["detector"]) for a in alerts} == {("hrv", "cusum")}
+    assert "suppressed" in alerts[0]["message"]
+
+
+def test_spike_alerts_once_while_in_alarm(temp_db: Database):
+    _history(temp_db)
+    detect_anomalies(temp_db, _insert(temp_db, 30, resting_hr=62))
+    detect_anomalies(temp_db, _insert(temp_db, 31, resting_hr=62))
+
+    alerts = [dict(a) for a in temp_db.get_alerts(metric="resting_hr")]
+    assert {(a["detector"], a["day"]) for a in alerts} == {
+        ("ewma", "2026-01-31"),
+        ("cusum", "2026-01-31"),
+    }
+    assert {a["severity"] for a in alerts} == {"warning", "danger"}
+    assert alerts[0]["baseline_mean"] == 50.0
+    assert "elevated" in alerts[0]["message"]
+
+
+def test_same_day_snapshot_replays_the_day(temp_db: Database):
+    _history(temp_db)
+    detect_anomalies(temp_db, _insert(temp_db, 30, resting_hr=62))
+    assert len(temp_db.get_alerts()) == 2
+
+    # A later snapshot the same day corrects the value: its alerts go away
+    detect_anomalies(temp_db, _insert(temp_db, 30, hour=20, resting_hr=50))
+    assert temp_db.get_alerts() == []
+    # ... and returning to the spike raises them again, once
+    detect_anomalies(temp_db, _insert(temp_db, 30, hour=21, resting_hr=62))
+    assert len(temp_db.get_alerts()) == 2
+
+
+def test_short_history_raises_nothing(temp_db: Database):
+    for i in range(5):
+        assert detect_anomalies(temp_db, _insert(temp_db, i, hrv=55.0 + i * 10)) == []
+
+
+def test_alerts_endpoint_keyset_pagination(temp_db: Database):
+    for i in range(5):
+        temp_db.create_alert(
+            day=f"2026-02-0{i + 1}",
+            metric="hrv" if i % 2 else "resting_hr",
+            detector="ewma",
+            severity="warning",
+            value=40.0,
+            baseline_mean=55.0,
+            baseline_std=3.0,
+            statistic=1.5,
+            message="HRV suppressed",
+        )
+
+    with patch("training_status.api.get_db", return_value=temp_db):
+        client = TestClient(app)
+        first = client.get("/api/alerts", params={"limit": 3}).json()
+        assert [a["id"] for a in first["items"]] == [5, 4, 3]
+        second = client.get(
+            "/api/alerts", params={"limit": 3, "before_id": first["next_before_id"]}
+        ).json()
+        assert [a["id"] for a in second["items"]] == [2, 1]
+        assert second["next_before_id"] is None
+
+        hrv = client.get("/api/alerts", params={"metric": "hrv"}).json()
+        assert [a["id"] for a in hrv["items"]] == [4, 2]
@@ -0,0 +1,47 @@
+"""Tests for the synthetic data generator and the benchmark suite."""
+
+from datetime import date
+
+import numpy as np
+
+from benchmarks.bench_suite import SKIPPED, all_case_names, compare, run_scale
+from benchmarks.synthetic import daily_series, generate
+from training_status.database import Database
+
+
+def test_generate_writes_requested_rows(temp_db: Database):
+    history = generate(temp_db, rows=500, years=1, end=date(2026, 6, 30))
+
+    assert (history.days, history.snapshots) == (365, 500)
+    total, _ = temp_db.get_snapshots(limit=1)
+    assert total == 500
+    latest = temp_db.get_snapshots_for_analytics(["recorded_at"], limit=1)[0][0]
+    assert latest.startswith("2026-06-30")
+    assert len(temp_db.get_fitness_days()) == 365
+    assert len(temp_db.get_active_goals()) == 2
+    assert temp_db.get_metric_stats_snapshot_id() == temp_db.get_latest_snapshot_id()
+
+
+def test_daily_series_is_correlated_like_real_data():
+    s = daily_series(3 * 365, seed=1)
+
+    def r(a: str, b: str) -> float:
+        return float(np.corrcoef(s[a], s[b])[0, 1])
+
+    assert r("tsb", "hrv") > 0.3
+    assert r("tsb", "resting_hr") < -0.3
+    assert r("km", "load") > 0.9
+    assert np.all(np.diff(s["total_distance_km"]) >= 0)
+    np.testing.assert_allclose(s["tsb"], s["ctl"] - s["atl"])
+
+
+def test_compare_needs_relative_and_absolute_slowdown():
+    baseline = {"fast": 0.2, "slow": 10.0, "new": 1.0}
+    results = {"fast": 0.5, "slow": 16.0, "steady": 3.0}
+    assert compare(results, baseline, threshold=0.5, min_delta=1.0) == ["slow"]
+
+
+def test_suite_covers_every_query_function_and_route():
+    results = run_scale(120, repeat=1)
+    assert all_case_names() - SKIPPED.keys() <= results.keys()
+    assert all(ms >= 0 for ms in results.values())
@@ -0,0 +1,100 @@
+"""Tests for the lagged correlation engine."""
+
+import copy
+
+import numpy as np
+import pytest
+
+from training_status.database import NUMERIC_SNAPSHOT_COLUMNS, Database
+from training_status.services.correlations import (
+    benjamini_hochberg,
+    find_correlations,
+    pairwise_pearson,
+    rank_columns,
+)
+from training_status.services.materialized import build_correlations
+
+from .conftest import SNAPSHOT_DATA
+
+
+def test_pairwise_pearson_uses_pairwise_deletion():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(60, 3))
+    y = x @ rng.normal(size=(3, 2)) + rng.normal(size=(60, 2))
+    x[rng.random((60, 3)) < 0.2] = np.nan
+    y[rng.random((60, 2)) < 0.2] = np.nan
+
+    r, n = pairwise_pearson(x, y)
+    for i in range(3):
+        for j in range(2):
+            both = ~np.isnan(x[:, i]) & ~np.isnan(y[:, j])
+            assert n[i, j] == both.sum()
+            assert r[i, j] == pytest.approx(np.corrcoef(x[both, i], y[both, j])[0, 1])
+
+
+def test_pairwise_pearson_constant_and_sparse_columns_are_nan():
+    x = np.column_stack([np.ones(30), np.arange(30.0)])
+    x[:20, 1] = np.nan
+    r, _ = pairwise_pearson(x, np.arange(30.0)[:, None])
+    assert np.isnan(r).all()
+
+
+def test_rank_columns_averages_ties():
+    m = np.array([[3.0], [1.0], [np.nan], [3.0], [2.0]])
+    assert rank_columns(m)[:, 0].tolist()[:2] == [3.5, 1.0]
+    assert np.isnan(rank_columns(m)[2, 0])
+
+
+def test_benjamini_hochberg_matches_reference():
+    p = np.array([0.01, 0.04, 0.03, 0.005, 0.5])
+    m = len(p)
+    order = np.argsort(p)
+    expected = np.empty(m)
+    running = 1.0
+    for rank in range(m, 0, -1):
+        k = order[rank - 1]
+        running = min(running, p[k] * m / rank)
+        expected[k] = running
+    np.testing.assert_allclose(benjamini_hochberg(p), expected)
+
+
+def test_finds_planted_lag_and_skips_noise():
+    rng = np.random.default_rng(1)
+    days = 200
+    columns = ["sleep_score", "hrv", "stress", "mood", "steps"]
+    m = rng.normal(size=(days, len(columns)))
+    # HRV follows sleep score two days later
+    m[2:, 1] = 0.8 * m[:-2, 0] + 0.3 * rng.normal(size=days - 2)
+    m[rng.random(m.shape) < 0.1] = np.nan
+
+    pairs, tested = find_correlations(m, columns)
+    assert tested > 0
+    top = pairs[0]
+    assert (top["x"], top["y"], top["lag_days"]) == ("sleep_score", "hrv", 2)
+    assert top["pearson_r"] > 0.8 and top["q_value"] < 0.05
+    assert len(pairs) <= 2
+
+
+def test_related_metrics_are_not_tested():
+    rng = np.random.default_rng(2)
+    ctl = rng.normal(size=100)
+    m = np.column_stack([ctl, ctl + 0.01 * rng.normal(size=100)])
+    pairs, tested = find_correlations(m, ["ctl", "atl"])
+    assert pairs == [] and tested == 0
+
+
+def test_build_correlations_from_snapshots(temp_db: Database):
+    rng = np.random.default_rng(3)
+    sleep = rng.normal(70, 10, 60)
+    for i in range(60):
+        data = copy.copy(SNAPSHOT_DATA)
+        data["recorded_at"] = f"2026-0{1 + i // 28}-{1 + i % 28:02d}T08:00:00"
+        data["sleep_score"] = float(sleep[i])
+        data["hrv"] = float(40 + 0.9 * (sleep[i - 1] - 70) + rng.normal(0, 2)) if i else None
+        temp_db.insert_snapshot(data)
+
+    result = build_correlations(temp_db)
+    assert result["data_points"] == 60
+    assert {"x": "sleep_score", "y": "hrv", "lag_days": 1}.items() <= result["pairs"][0].items()
+    assert result["insights"][0]["type"] == "correlation"
+    assert set(NUMERIC_SNAPSHOT_COLUMNS) >= {p["x"] for p in result["pairs"]}
@@ -0,0 +1,135 @@
+"""Tests for critical speed / D' fits over rolling windows with bootstrap intervals."""
+
+import copy
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import Database
+from training_status.services.analytics import calculate_race_predictions
+from training_status.services.critical_speed import (
+    fit_lines,
+    fit_windows,
+    update_critical_speed_history,
+    window_efforts,
+)
+from training_status.services.pace_curve import update_best_efforts
+from training_status.services.streams import store_streams
+
+from .conftest import SNAPSHOT_DATA
+
+TODAY = date(2026, 3, 1)
+CS, D_PRIME = 4.0, 200.0
+
+
+def _model_times(*distances: float) -> np.ndarray:
+    return np.array([(d - D_PRIME) / CS for d in distances])
+
+
+def test_fit_lines_is_vectorized():
+    x = np.array([[1.0, 2.0, 3.0], [1.0, 1.0, 1.0]])
+    y = 2.0 + 0.5 * x
+    intercept, slope = fit_lines(x, y, np.ones_like(x, dtype=bool))
+    assert intercept[0] == pytest.approx(2.0) and slope[0] == pytest.approx(0.5)
+    assert np.isnan(intercept[1])  # x does not vary
+
+    masked = fit_lines(np.array([1.0, 2.0, 9.0]), np.array([3.0, 4.0, 0.0]), np.array([1, 1, 0]))
+    assert masked[0] == pytest.approx(2.0)
+
+
+def test_exact_efforts_give_a_tight_interval():
+    best = np.vstack([_model_times(1000, 2000, 3000, 4000, 5000)])
+    fits = fit_windows(best)
+    assert fits["critical_speed"][0] == pytest.approx(CS)
+    assert fits["d_prime"][0] == pytest.approx(D_PRIME)
+    assert fits["cs_low"][0] == pytest.approx(CS) and fits["cs_high"][0] == pytest.approx(CS)
+
+
+def test_noisy_efforts_widen_the_interval():
+    times = _model_times(1000, 2000, 3000, 4000, 5000) * np.array([0.97, 1.03, 0.98, 1.02, 1.0])
+    two_only = np.where(np.arange(5) < 2, times, np.inf)
+    fits = fit_windows(np.vstack([times, two_only]))
+    assert fits["cs_low"][0] < fits["critical_speed"][0] < fits["cs_high"][0]
+    assert fits["d_prime_low"][0] < fits["d_prime"][0] < fits["d_prime_high"][0]
+    assert list(fits["efforts"]) == [5, 2]
+    assert np.isnan(fits["cs_low"][1])  # two efforts: a fit but no interval
+    # Same seed, same intervals
+    assert fit_windows(np.vstack([times]))["cs_high"][0] == fits["cs_high"][0]
+
+
+def test_window_efforts_take_the_best_time_inside_each_window():
+    days = np.array([10, 20, 60])
+    secs = np.array([[300.0, np.inf], [250.0, 900.0], [280.0, 800.0]])
+    best = window_efforts(days, secs, np.array([20, 60, 100]), window_days=42)
+    np.testing.assert_array_equal(best, [[250.0, 900.0], [250.0, 800.0], [280.0, 800.0]])
+
+
+def _add_efforts(db: Database, day: str, prefix: str, distances: list[int]) -> None:
+    """One run per distance at the speed the CS model predicts for it."""
+    for metres in distances:
+        secs = int(round((metres - D_PRIME) / CS))
+        speed = metres / secs
+        activity_id = f"{prefix}{metres}"
+        db.upsert_activity(activity_id, f"{day}T07:00:00", "run")
+        store_streams(
+            db,
+            activity_id,
+            {"time": np.arange(secs + 2, dtype=float), "velocity_smooth": np.full(secs + 2, speed)},
+        )
+
+
+def test_history_covers_all_windows(temp_db: Database):
+    _add_efforts(temp_db, "2026-01-05", "old", [1000, 3000, 5000])
+    _add_efforts(temp_db, "2026-02-20", "new", [1000, 2000, 4000])
+    update_best_efforts(temp_db)
+
+    stored = update_critical_speed_history(temp_db, today=TODAY)
+    recent = temp_db.get_critical_speed_history(42)
+    assert recent[-1]["day"] == "2026-03-01"
+    assert recent[-1]["efforts"] == 4  # February runs only: 1-4 km (3 km within the 4 km run)
+    assert recent[-1]["critical_speed"] == pytest.approx(CS, abs=0.05)
+    assert recent[-1]["cs_low"] <= recent[-1]["critical_speed"] <= recent[-1]["cs_high"]
+    assert temp_db.get_critical_speed_history(90)[-1]["efforts"] == 5
+    assert [r["day"] for r in recent][:2] == ["2026-01-11", "2026-01-18"]  # weekly back to Jan 5
+    assert stored == len(recent) + len(temp_db.get_critical_speed_history(90))
+
+    assert update_critical_speed_history(temp_db, today=TODAY) == stored  # replaced, not appended
+
+
+def test_predictions_and_zones_use_the_latest_fit(temp_db: Database):
+    data = copy.copy(SNAPSHOT_DATA)
+    data["max_hr"] = 190
+    temp_db.insert_snapshot(data)  # stores CS 3.5
+    _add_efforts(temp_db, "2026-02-20", "r", [1000, 2000, 3000, 4000, 5000])
+    update_best_efforts(temp_db)
+    update_critical_speed_history(temp_db, today=TODAY)
+
+    with patch("training_status.api.get_db", return_value=temp_db):
+        client = TestClient(app)
+        race = client.get("/api/analytics/race-predictor").json()
+        zones = client.get("/api/analytics/zones").json()
+        history = client.get("/api/analytics/critical-speed", params={"days": 3650}).json()
+        assert client.get("/api/analytics/critical-speed", params={"window": 30}).status_code == 422
+
+    assert race["critical_speed_ms"] == pytest.approx(CS, abs=0.05)
+    assert race["critical_speed_low_ms"] <= race["critical_speed_ms"]
+    assert "95% CI" in race["message"]
+    five_k = next(p for p in race["predictions"] if p["distance"] == "5K")
+    assert five_k["time_fast"] <= five_k["predicted_time"] <= five_k["time_slow"]
+    threshold = next(z for z in zones["pace_zones"] if z["zone"] == "Z4 Threshold")
+    assert threshold["speed_high_ms"] == pytest.approx(CS, abs=0.05)
+    assert history["latest"]["day"] == "2026-03-01"
+    assert history["latest"]["critical_speed"] == race["critical_speed_ms"]
+
+
+def test_prediction_range_needs_a_valid_interval():
+    plain = calculate_race_predictions(4.0, 200.0, 45.0, None)
+    assert "time_fast" not in plain[0]
+    ranged = calculate_race_predictions(4.0, 200.0, 45.0, None, 3.8, 4.2)
+    marathon = ranged[-1]
+    assert marathon["time_fast"] < marathon["predicted_time"] < marathon["time_slow"]
+    assert "time_fast" not in calculate_race_predictions(4.0, 200.0, 45.0, None, 4.2, 3.8)[0]
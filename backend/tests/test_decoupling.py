@@ -0,0 +1,132 @@
+"""Tests for aerobic decoupling from activity streams."""
+
+import copy
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import Database
+from training_status.services import decoupling
+from training_status.services.analytics import calculate_hr_drift
+from training_status.services.decoupling import analyze_run, hr_drift_trend
+from training_status.services.streams import store_streams
+
+from .conftest import SNAPSHOT_DATA
+
+
+def _run(
+    minutes: int = 60, hr: float = 140.0, drift: float = 0.0, speed: float = 3.0
+) -> dict[str, np.ndarray]:
+    """Constant pace; HR rises linearly by ``drift`` (fraction) over the run."""
+    t = np.arange(minutes * 60, dtype=float)
+    return {
+        "time": t,
+        "heartrate": hr * (1 + drift * t / len(t)),
+        "velocity_smooth": np.full(len(t), speed),
+    }
+
+
+def test_steady_run_without_drift_is_coupled():
+    result = analyze_run(_run())
+    assert result is not None
+    assert result["decoupling_pct"] == pytest.approx(0.0)
+    assert result["ef_first"] == pytest.approx(3.0 * 60 / 140, abs=1e-4)
+    assert result["steady"]
+    assert result["duration_secs"] == 3600
+
+
+def test_hr_drift_shows_as_decoupling():
+    result = analyze_run(_run(drift=0.10))
+    assert result is not None
+    # halves of minutes 10-60 average +3.75% and +7.92% HR at the same pace
+    expected = (1 - 1.0375 / 1.07917) * 100
+    assert result["decoupling_pct"] == pytest.approx(expected, abs=0.1)
+
+
+def test_warmup_and_stops_are_excluded():
+    run = _run(drift=0.0)
+    run["heartrate"][:600] = 100.0  # warm-up HR ignored
+    run["velocity_smooth"][1800:2100] = 0.0  # standing still
+    run["heartrate"][1800:2100] = 90.0
+    result = analyze_run(run)
+    assert result is not None
+    assert result["decoupling_pct"] == pytest.approx(0.0)
+    assert result["duration_secs"] == 3300
+
+    gap = _run()
+    gap["time"][1800:] += 600  # a paused recording adds no moving time
+    assert analyze_run(gap)["duration_secs"] == pytest.approx(3600, abs=1)  # type: ignore[index]
+
+
+def test_short_uneven_and_incomplete_runs():
+    short = analyze_run(_run(minutes=25))
+    assert short is not None and short["decoupling_pct"] is None
+
+    intervals = _run()
+    intervals["velocity_smooth"] = np.where((intervals["time"] // 300) % 2, 4.5, 2.2)
+    assert not analyze_run(intervals)["steady"]  # type: ignore[index]
+
+    assert analyze_run({"heartrate": np.ones(10)}) is None
+
+
+def _add_run(db: Database, activity_id: str, day: str, sport: str = "run", **kwargs: float) -> None:
+    db.upsert_activity(activity_id, f"{day}T07:00:00", sport, 10_000.0, 3600.0)
+    store_streams(db, activity_id, _run(**kwargs))  # type: ignore[arg-type]
+
+
+def test_results_are_cached_per_activity(temp_db: Database, monkeypatch: pytest.MonkeyPatch):
+    _add_run(temp_db, "a", "2026-01-05", drift=0.05)
+    calls = []
+    real = decoupling.load_streams
+    monkeypatch.setattr(decoupling, "load_streams", lambda db, i: calls.append(i) or real(db, i))
+
+    first = hr_drift_trend(temp_db, "2026-01-01", "2026-01-31")
+    hr_drift_trend(temp_db, "2026-01-01", "2026-01-31")
+    assert calls == ["a"]
+    assert first["points"][0]["decoupling_pct"] > 0
+
+    store_streams(temp_db, "a", _run())  # new streams drop the stored result
+    again = hr_drift_trend(temp_db, "2026-01-01", "2026-01-31")
+    assert calls == ["a", "a"]
+    assert again["points"][0]["decoupling_pct"] == pytest.approx(0.0)
+
+
+def test_trend_uses_easy_runs_in_range(temp_db: Database):
+    data = copy.copy(SNAPSHOT_DATA)
+    data["max_hr"] = 190
+    temp_db.insert_snapshot(data)
+    sports = ["run", "trailrun", "run", "virtualrun", "treadmill", "run"]
+    for i, drift in enumerate([0.12, 0.10, 0.08, 0.04, 0.02, 0.01]):
+        _add_run(temp_db, f"r{i}", f"2026-01-{5 + i * 2:02d}", sports[i], drift=drift)
+    _add_run(temp_db, "ride", "2026-01-12", "ride")
+    _add_run(temp_db, "hard", "2026-01-16", hr=170.0)  # above 80% of max HR
+    _add_run(temp_db, "old", "2025-06-01")
+    temp_db.upsert_activity("nostreams", "2026-01-08T07:00:00", "run", 5000.0, 1500.0)
+
+    result = hr_drift_trend(temp_db, "2026-01-01", "2026-01-31")
+    assert [p["activity_id"] for p in result["points"]] == [f"r{i}" for i in range(5, -1, -1)]
+    assert result["trend"] == "improving"
+    assert result["assessment"] == "aerobically_fit"
+
+    with patch("training_status.api.get_db", return_value=temp_db):
+        client = TestClient(app)
+        body = client.get(
+            "/api/analytics/hr-drift", params={"start": "2026-01-10", "end": "2026-01-31"}
+        ).json()
+        assert [p["activity_id"] for p in body["points"]] == ["r5", "r4", "r3"]
+        assert (body["start"], body["end"]) == ("2026-01-10", "2026-01-31")
+        assert client.get("/api/analytics/hr-drift", params={"end": "Jan"}).status_code == 422
+
+
+def test_calculate_hr_drift_trend():
+    def points(*values: float) -> list[dict]:
+        return [{"date": f"2026-01-{i + 1:02d}", "decoupling_pct": v} for i, v in enumerate(values)]
+
+    assert calculate_hr_drift(points(2.0, 3.0))["assessment"] == "insufficient_data"
+    assert calculate_hr_drift(points(8.0, 8.5, 6.0, 6.5))["trend"] == "declining"
+    stable = calculate_hr_drift(points(4.0, 4.5, 4.2, 4.4))
+    assert (stable["trend"], stable["assessment"]) == ("stable", "aerobically_fit")
+    assert stable["avg_decoupling_pct"] == pytest.approx(4.28, abs=0.01)
@@ -0,0 +1,73 @@
+"""Tests for concurrent source fetching with deadlines and partial results."""
+
+import threading
+import time
+
+import pytest
+
+from benchmarks.bench_fetch import LatencyStub, stub_fetchers
+from training_status.config import Settings
+from training_status.database import Database
+from training_status.services import http
+from training_status.services.fetch import fetch_sources, source_deadline
+
+
+@pytest.fixture(autouse=True)
+def _own_clients(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(http, "_clients", {})
+
+
+def test_failing_and_late_sources_are_left_out():
+    release = threading.Event()
+
+    def late() -> dict:
+        release.wait(5)
+        return {"late": True}
+
+    def broken() -> dict:
+        raise RuntimeError("token expired")
+
+    start = time.monotonic()
+    results = fetch_sources(
+        {"intervals": lambda: {"ctl": 45}, "smashrun": broken, "strava": late},
+        {"intervals": 1.0, "smashrun": 1.0, "strava": 0.2},
+    )
+    release.set()
+    assert time.monotonic() - start < 1.0  # did not wait for the late source
+    assert results["intervals"].ok and results["intervals"].data == {"ctl": 45}
+    assert (results["smashrun"].data, results["smashrun"].error) == ({}, "token expired")
+    assert results["strava"].error == "no response within 0.2s"
+    assert results["strava"].secs >= 0.2
+
+
+def test_sources_and_endpoints_are_fetched_concurrently(temp_db: Database):
+    latency = 0.15
+    with LatencyStub(latency) as stub:
+        fetchers = stub_fetchers(stub, temp_db)
+        start = time.monotonic()
+        results = fetch_sources(fetchers, dict.fromkeys(fetchers, 10.0))
+        elapsed = time.monotonic() - start
+
+    assert all(r.ok for r in results.values()), results
+    assert results["intervals"].data["ctl"] == 45.0
+    assert results["intervals"].data["rest_days"] == 0
+    assert results["smashrun"].data["week_0_km"] == 10
+    assert results["strava"].data["strava_weekly_km"] == 10.0
+    requests = sum(s["requests"] for s in http.http_stats().values())
+    assert requests == 8
+    # Longest chain: Strava's token, then athlete -> stats alongside this week's runs
+    assert elapsed < 5 * latency < requests * latency
+
+
+def test_deadlines_default_to_two_request_timeouts():
+    settings = Settings(
+        intervals_id="i1",
+        intervals_api_key="key",
+        smashrun_token="t",
+        api_timeout=10,
+        strava_timeout=4,
+    )
+    assert source_deadline(settings, "intervals") == 20
+    assert source_deadline(settings, "strava") == 8
+    settings.fetch_deadline = 45
+    assert source_deadline(settings, "strava") == 45
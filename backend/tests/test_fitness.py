@@ -0,0 +1,113 @@
+"""Tests for the Banister fitness-fatigue engine."""
+
+import copy
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from training_status.database import Database
+from training_status.services.analytics import calculate_detraining, calculate_taper
+from training_status.services.fitness import FitnessState, simulate, update_fitness_days
+from training_status.services.pipeline import run_post_insert_stages
+
+from .conftest import SNAPSHOT_DATA
+
+
+def _step_reference(ctl: float, atl: float, loads: list[float]) -> tuple[list, list]:
+    state = FitnessState(ctl, atl)
+    ctls, atls = [], []
+    for load in loads:
+        state = state.step(load)
+        ctls.append(state.ctl)
+        atls.append(state.atl)
+    return ctls, atls
+
+
+def test_simulate_matches_daily_steps_over_long_horizon():
+    """The vectorized projection equals stepping one day at a time (incl. chunking)."""
+    rng = np.random.default_rng(3)
+    loads = rng.gamma(2.0, 30.0, 5000)
+    loads[rng.random(5000) < 0.3] = 0.0
+
+    ctl, atl, tsb = simulate(50.0, 60.0, loads)
+    ref_ctl, ref_atl = _step_reference(50.0, 60.0, loads.tolist())
+
+    np.testing.assert_allclose(ctl, ref_ctl, rtol=1e-9)
+    np.testing.assert_allclose(atl, ref_atl, rtol=1e-9)
+    np.testing.assert_allclose(tsb, ctl - atl)
+
+
+def test_simulate_broadcasts_over_scenarios():
+    plans = np.array([[0.0] * 14, [50.0] * 14, [100.0] * 14])
+    ctl, atl, _ = simulate(50.0, 50.0, plans)
+
+    assert ctl.shape == (3, 14)
+    assert ctl[0, -1] < 50.0 < ctl[2, -1]
+    assert ctl[1] == pytest.approx([50.0] * 14)
+    assert atl[1] == pytest.approx([50.0] * 14)
+
+
+def test_custom_time_constants():
+    ctl, atl, _ = simulate(0.0, 0.0, [100.0], ctl_tau=10, atl_tau=2)
+    assert ctl[0] == pytest.approx(10.0)
+    assert atl[0] == pytest.approx(50.0)
+
+
+def test_detraining_is_zero_load_simulation():
+    points = calculate_detraining(60.0, 70.0, weeks=2)
+    assert points[0]["ctl"] == 60.0
+    assert points[2]["ctl"] == pytest.approx(60.0 * (1 - 1 / 42) ** 14, abs=0.05)
+    assert points[2]["atl"] == pytest.approx(70.0 * (1 - 1 / 7) ** 14, abs=0.05)
+
+
+def test_taper_raises_race_day_form():
+    race = (date.today() + timedelta(days=30)).isoformat()
+    result = calculate_taper(race, current_ctl=60.0, current_atl=75.0)
+
+    assert result["taper_weeks"] == 3
+    assert [w["days_to_race"] for w in result["weeks"]] == [21, 14, 7]
+    assert result["race_day_tsb"] > 0
+    assert result["weeks"][-1]["projected_ctl"] == result["race_day_ctl"]
+    assert result["race_day_ctl"] < 60.0
+
+
+def test_fitness_days_seed_then_step_per_day(temp_db: Database):
+    assert update_fitness_days(temp_db, {}, 40.0, 45.0, today="2026-03-01") == 1
+    loads = {"2026-03-02": 80.0, "2026-03-04": 30.0}
+    assert update_fitness_days(temp_db, loads, None, None, today="2026-03-04") == 3
+
+    rows = temp_db.get_fitness_days()
+    assert [r["day"] for r in rows] == ["2026-03-04", "2026-03-03", "2026-03-02", "2026-03-01"]
+    ref_ctl, ref_atl = _step_reference(40.0, 45.0, [80.0, 0.0, 30.0])
+    assert rows[0]["ctl"] == pytest.approx(ref_ctl[-1], abs=1e-3)
+    assert rows[0]["atl"] == pytest.approx(ref_atl[-1], abs=1e-3)
+
+    # Same day again with more load: today is recomputed from yesterday, not stepped twice
+    update_fitness_days(temp_db, {**loads, "2026-03-04": 90.0}, None, None, today="2026-03-04")
+    ref_ctl, _ = _step_reference(40.0, 45.0, [80.0, 0.0, 90.0])
+    latest = temp_db.get_latest_fitness_day()
+    assert latest["load"] == 90.0
+    assert latest["ctl"] == pytest.approx(ref_ctl[-1], abs=1e-3)
+
+
+def test_fitness_days_reseed_after_long_gap(temp_db: Database):
+    update_fitness_days(temp_db, {}, 40.0, 45.0, today="2026-03-01")
+    update_fitness_days(temp_db, {}, 55.0, 50.0, today="2026-04-01")
+    latest = temp_db.get_latest_fitness_day()
+    assert (latest["ctl"], latest["atl"]) == (55.0, 50.0)
+    assert len(temp_db.get_fitness_days()) == 2
+
+
+def test_pipeline_updates_fitness_from_snapshot_loads(temp_db: Database):
+    data = copy.copy(SNAPSHOT_DATA)
+    data["recorded_at"] = "2026-03-01T10:00:00"
+    data["intervals_json"] = json.dumps({"daily_loads": {"2026-03-01": 70.0}})
+    snapshot_id = temp_db.insert_snapshot(data)
+
+    assert run_post_insert_stages(temp_db, snapshot_id) == []
+    row = temp_db.get_latest_fitness_day()
+    assert row["day"] == "2026-03-01"
+    assert row["load"] == 70.0
+    assert row["ctl"] == SNAPSHOT_DATA["ctl"]
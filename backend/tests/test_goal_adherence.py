@@ -0,0 +1,108 @@
+"""Tests for SQL goal adherence across weekly, monthly and yearly goals."""
+
+import copy
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import Database
+from training_status.services.analytics import calculate_goal_adherence
+
+from .conftest import SNAPSHOT_DATA
+
+MONDAY = date(2026, 1, 5)
+
+
+def _run_daily(db: Database, daily_km: list[float], skip_sundays: bool = False) -> None:
+    """One morning snapshot per day from MONDAY, with Smashrun-style week totals."""
+    week_km = last_week_km = 0.0
+    for i, km in enumerate(daily_km):
+        day = MONDAY + timedelta(days=i)
+        if day.weekday() == 0:
+            week_km, last_week_km = 0.0, week_km
+        week_km += km
+        if skip_sundays and day.weekday() == 6:
+            continue
+        data = copy.copy(SNAPSHOT_DATA)
+        data.update(
+            recorded_at=f"{day.isoformat()}T08:00:00",
+            week_0_km=week_km,
+            week_1_km=last_week_km if i >= 7 else None,
+        )
+        db.insert_snapshot(data)
+
+
+def _periods(db: Database, period: str, target: float, **kwargs: str) -> list[tuple]:
+    return [tuple(r) for r in db.get_goal_periods(period, target, **kwargs)]
+
+
+def test_weekly_totals_use_week_1_km_for_missed_days(temp_db: Database):
+    _run_daily(temp_db, [5.0] * 21, skip_sundays=True)
+
+    rows = _periods(temp_db, "week", 33.0, today="2026-01-25")
+    assert [(r[0], r[1]) for r in rows] == [
+        ("2026-01-05", 35.0),
+        ("2026-01-12", 35.0),
+        ("2026-01-19", 30.0),  # this week's Sunday is not synced yet
+    ]
+    assert [r[3] for r in rows] == [0, 0, 1]
+
+
+def test_month_and_year_buckets(temp_db: Database):
+    _run_daily(temp_db, [4.0] * 40)  # Jan 5 .. Feb 13
+
+    months = _periods(temp_db, "month", 100.0, today="2026-02-13")
+    assert [(r[0], r[1], r[2]) for r in months] == [
+        ("2026-01-01", 108.0, 1),
+        ("2026-02-01", 52.0, 0),
+    ]
+    years = _periods(temp_db, "year", 1000.0, today="2026-02-13")
+    assert [(r[0], r[1]) for r in years] == [("2026-01-01", 160.0)]
+
+
+def test_gaps_and_islands_streaks(temp_db: Database):
+    # weeks: hit, hit, miss, hit, hit, hit, miss (in progress)
+    weekly = [35, 35, 10, 35, 35, 35, 10]
+    _run_daily(temp_db, [km / 7 for km in weekly for _ in range(7)])
+
+    rows = _periods(temp_db, "week", 30.0, today="2026-02-22")
+    assert [r[4] for r in rows] == [1, 2, 0, 1, 2, 3, 0]
+
+    report = calculate_goal_adherence(30.0, rows, "week")
+    assert report["streak"] == 3  # the unfinished week does not break it
+    assert report["longest_streak"] == 3
+    assert report["overall_pct"] == round(5 / 6 * 100)
+    assert report["periods"][0]["in_progress"]
+    assert report["message"] == "Hit goal 5/6 weeks (83%)"
+
+
+def test_period_start_bounds_history(temp_db: Database):
+    _run_daily(temp_db, [5.0] * 28)
+
+    rows = _periods(temp_db, "week", 30.0, start="2026-01-14", today="2026-03-01")
+    assert [r[0] for r in rows] == ["2026-01-12", "2026-01-19", "2026-01-26"]
+    # a start before the first snapshot yields empty periods rather than skipping them
+    early = _periods(temp_db, "week", 30.0, start="2025-12-22", today="2026-03-01")
+    assert [(r[0], r[1]) for r in early[:2]] == [("2025-12-22", 0), ("2025-12-29", 0)]
+
+    with pytest.raises(ValueError, match="Unknown goal period"):
+        temp_db.get_goal_periods("fortnight", 30.0)
+
+
+def test_adherence_endpoint_covers_every_goal_type(temp_db: Database):
+    _run_daily(temp_db, [5.0] * 28)
+
+    with patch("training_status.api.get_db", return_value=temp_db):
+        client = TestClient(app)
+        for goal_type, target in (("weekly_km", 30.0), ("monthly_km", 100.0), ("yearly_km", 1e3)):
+            client.post("/api/goals", json={"goal_type": goal_type, "target_value": target})
+
+        reports = {r["goal_type"]: r for r in client.get("/api/analytics/adherence").json()}
+
+    assert {r["period"] for r in reports.values()} == {"week", "month", "year"}
+    assert [p["actual_km"] for p in reports["weekly_km"]["periods"]] == [35.0] * 4
+    assert reports["weekly_km"]["streak"] == 4
+    assert [p["actual_km"] for p in reports["monthly_km"]["periods"]] == [5.0, 135.0]
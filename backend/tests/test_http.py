@@ -0,0 +1,251 @@
+"""Tests for the shared HTTP layer against a local stub server."""
+
+import json
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import requests
+
+from training_status.config import Settings
+from training_status.services import http
+from training_status.services.http import (
+    HttpClient,
+    RateLimitGovernor,
+    RetryPolicy,
+    cache_ttls,
+    http_client,
+    retry_after,
+)
+from training_status.services.http_cache import HttpCache, cache_key
+from training_status.services.intervals import IntervalsClient
+
+
+class _Stub(ThreadingHTTPServer):
+    """Serves scripted responses per path: a list of (status, headers, body)."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.scripts: dict[str, list[tuple[int, dict[str, str], bytes]]] = {}
+        self.hits: list[tuple[str, int]] = []  # (path, client port)
+        self.auth: list[str | None] = []
+        self.etags: list[str | None] = []  # If-None-Match sent
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server: _Stub
+
+    def do_GET(self) -> None:  # noqa: N802
+        path = self.path.split("?")[0]
+        self.server.hits.append((path, self.client_address[1]))
+        self.server.auth.append(self.headers.get("Authorization"))
+        self.server.etags.append(self.headers.get("If-None-Match"))
+        script = self.server.scripts.get(path) or [(404, {}, b"")]
+        status, headers, body = script.pop(0) if len(script) > 1 else script[0]
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def stub() -> Iterator[_Stub]:
+    server = _Stub()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(sleeps: list[float], **policy: float) -> HttpClient:
+    return HttpClient("test", timeout=5, policy=RetryPolicy(**policy), sleep=sleeps.append)
+
+
+def test_connections_are_kept_alive(stub: _Stub):
+    stub.scripts["/ok"] = [(200, {}, b'{"a": 1}')]
+    client = _client([])
+    for _ in range(3):
+        assert client.get(f"{stub.url}/ok").json() == {"a": 1}
+    assert len({port for _, port in stub.hits}) == 1  # one TCP connection
+    stats = client.stats.as_dict()
+    assert (stats["requests"], stats["retries"], stats["bytes_received"]) == (3, 0, 24)
+    assert stats["max_latency_secs"] > 0
+
+
+def test_retryable_statuses_back_off_exponentially(stub: _Stub):
+    stub.scripts["/flaky"] = [(503, {}, b""), (502, {}, b""), (503, {}, b""), (200, {}, b"ok")]
+    sleeps: list[float] = []
+    response = _client(sleeps, backoff=1.0).get(f"{stub.url}/flaky")
+    assert response.status_code == 200
+    assert len(sleeps) == 3
+    for attempt, delay in enumerate(sleeps):
+        assert 2**attempt / 2 <= delay <= 2**attempt  # half fixed, half jitter
+
+
+def test_gives_up_after_the_retry_budget(stub: _Stub):
+    stub.scripts["/down"] = [(500, {}, b"")]
+    sleeps: list[float] = []
+    client = _client(sleeps, retries=2)
+    assert client.get(f"{stub.url}/down").status_code == 500
+    assert len(sleeps) == 2 and client.stats.requests == 3
+
+    stub.scripts["/missing"] = [(404, {}, b"")]
+    assert client.get(f"{stub.url}/missing").status_code == 404  # not retried
+    assert len(sleeps) == 2
+
+
+def test_retry_after_is_honored(stub: _Stub):
+    stub.scripts["/limited"] = [(429, {"Retry-After": "7"}, b""), (200, {}, b"ok")]
+    sleeps: list[float] = []
+    assert _client(sleeps).get(f"{stub.url}/limited").status_code == 200
+    assert sleeps == [7.0]
+
+    stub.scripts["/later"] = [(429, {"Retry-After": "3600"}, b"")]
+    assert _client(sleeps).get(f"{stub.url}/later").status_code == 429  # too long to wait
+    assert sleeps == [7.0]
+
+    dated = requests.Response()
+    dated.headers["Retry-After"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert retry_after(dated) == 0.0  # in the past
+
+
+def test_connection_errors_are_retried_then_raised():
+    with ThreadingHTTPServer(("127.0.0.1", 0), _Handler) as closed:
+        port = closed.server_address[1]
+    sleeps: list[float] = []
+    client = _client(sleeps, retries=2)
+    with pytest.raises(requests.ConnectionError):
+        client.get(f"http://127.0.0.1:{port}/")
+    assert len(sleeps) == 2 and client.stats.errors == 3
+
+
+def test_source_clients_share_one_session(stub: _Stub, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(http, "_clients", {})
+    settings = Settings(
+        intervals_id="i1",
+        intervals_api_key="key",
+        smashrun_token="t",
+        api_timeout=12,
+        intervals_timeout=4,
+    )
+    first, second = IntervalsClient(settings), IntervalsClient(settings)
+    assert first.http is second.http
+    assert first.http.timeout == 4
+    assert http_client("smashrun", settings).timeout == 12
+
+    stub.scripts["/athlete/i1/activities"] = [(200, {}, json.dumps([{"id": "a1"}]).encode())]
+    first.base_url = f"{stub.url}/athlete/i1"
+    assert first.get_activities("2026-01-01", "2026-01-31") == [{"id": "a1"}]
+    assert stub.auth[-1] and stub.auth[-1].startswith("Basic ")
+    assert http.http_stats()["intervals"]["requests"] == 1
+
+
+class _Clock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, secs: float) -> None:
+        self.now += secs
+
+
+def test_governor_waits_for_the_window_to_roll_over():
+    clock = _Clock(900 * 1000 + 850)  # 50 s before a quarter hour
+    governor = RateLimitGovernor((2, 5), clock=clock, sleep=clock.sleep)
+    assert governor.acquire() == governor.acquire() == 0
+    assert governor.acquire() == pytest.approx(50, abs=0.1)  # 15-minute bucket was empty
+    assert governor.tokens == [1, 2]
+    governor.acquire()
+    governor.acquire()
+    waited = governor.acquire()  # daily bucket empty: wait for midnight UTC
+    assert clock.now % 86400 < 1 and waited > 900
+
+
+def test_governor_follows_the_rate_limit_headers(stub: _Stub):
+    clock = _Clock(900 * 1000)
+    governor = RateLimitGovernor((100, 1000), clock=clock, sleep=clock.sleep)
+    headers = {
+        "X-RateLimit-Limit": "200,2000",
+        "X-RateLimit-Usage": "150,400",
+        "X-ReadRateLimit-Limit": "100,1000",
+        "X-ReadRateLimit-Usage": "99,400",
+    }
+    stub.scripts["/limited"] = [(200, headers, b"{}")]
+    client = HttpClient("test", timeout=5, sleep=[].append, governor=governor)
+    client.get(f"{stub.url}/limited")
+    assert governor.tokens == [1, 600]  # the stricter read limit, counting other clients' use
+    client.get(f"{stub.url}/limited")
+    assert clock.now == 900 * 1000  # the last request in this window did not wait
+    client.get(f"{stub.url}/limited")
+    assert clock.now >= 900 * 1001  # the next one waited for the quarter hour
+    assert len(stub.hits) == 3  # and never drew a 429
+
+
+def _cached_client(tmp_path: Path, max_bytes: int = 1 << 20, **ttls: int) -> HttpClient:
+    cache = HttpCache(tmp_path / "http_cache.db", max_bytes)
+    return HttpClient("test", timeout=5, cache=cache, ttls={f"*/{p}": t for p, t in ttls.items()})
+
+
+def test_unchanged_responses_are_revalidated_and_served_from_cache(stub: _Stub, tmp_path: Path):
+    body = json.dumps({"totalDistance": 5000.0}).encode()
+    stub.scripts["/my/stats"] = [(200, {"ETag": '"v1"'}, body), (304, {"ETag": '"v1"'}, b"")]
+    client = _cached_client(tmp_path)
+    assert client.get(f"{stub.url}/my/stats", params={"a": 1}).json() == {"totalDistance": 5000.0}
+    again = client.get(f"{stub.url}/my/stats", params={"a": 1})
+    assert (again.status_code, again.json()) == (200, {"totalDistance": 5000.0})
+    assert stub.etags == [None, '"v1"']
+    stats = client.stats.as_dict()
+    assert (stats["cache_misses"], stats["cache_revalidated"]) == (1, 1)
+    assert stats["bytes_saved"] == len(body)
+
+    client.get(f"{stub.url}/my/stats", params={"a": 2})  # other params: another entry
+    assert stub.etags[-1] is None
+
+
+def test_fresh_responses_are_served_without_a_request(stub: _Stub, tmp_path: Path):
+    stub.scripts["/athlete"] = [(200, {}, b'{"id": 7}')]
+    stub.scripts["/private"] = [(200, {"Cache-Control": "no-store", "ETag": '"p"'}, b"{}")]
+    client = _cached_client(tmp_path, athlete=60, private=60)
+    for _ in range(3):
+        assert client.get(f"{stub.url}/athlete").json() == {"id": 7}
+        client.get(f"{stub.url}/private")
+    assert [path for path, _ in stub.hits].count("/athlete") == 1
+    assert [path for path, _ in stub.hits].count("/private") == 3  # never stored
+    assert client.stats.as_dict()["cache_hits"] == 2
+
+    settings = Settings(
+        intervals_id="i1",
+        intervals_api_key="key",
+        smashrun_token="t",
+        http_cache_ttls={"smashrun:*/my/stats": 60, "smashrun:*/my/badges": 30, "strava:*": 1},
+    )
+    assert cache_ttls(settings, "smashrun") == {"*/my/stats": 60, "*/my/badges": 30}
+
+
+def test_cache_evicts_the_least_recently_used(stub: _Stub, tmp_path: Path):
+    for path in ("/a", "/b", "/c"):
+        stub.scripts[path] = [(200, {"ETag": f'"{path}"'}, b"x" * 100)]
+    client = _cached_client(tmp_path, max_bytes=250)
+    assert client.cache is not None
+    client.get(f"{stub.url}/a")
+    client.get(f"{stub.url}/b")
+    assert client.cache.get(cache_key("test", f"{stub.url}/a")) is not None  # a used last
+    client.get(f"{stub.url}/c")
+    assert client.cache.get(cache_key("test", f"{stub.url}/b")) is None
+    assert client.cache.get(cache_key("test", f"{stub.url}/a")) is not None
+    assert client.cache.size() == 200
@@ -0,0 +1,92 @@
+"""Tests for the FIT/GPX/TCX parsers and the multi-process directory importer."""
+
+import gzip
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from benchmarks.bench_import import fit_bytes, gpx_bytes, synthetic_samples, tcx_bytes
+from training_status.database import Database
+from training_status.services.activity_files import file_format, parse_activity
+from training_status.services.importer import import_directory
+from training_status.services.streams import load_streams
+
+START = datetime(2026, 10, 18, 7, 0, tzinfo=timezone.utc)
+SAMPLES = synthetic_samples(600)
+
+
+@pytest.mark.parametrize(
+    ("name", "content", "start_local"),
+    [
+        ("run.fit", fit_bytes(START, SAMPLES), "2026-10-18T09:00:00"),  # the file's own UTC+2
+        ("run.gpx", gpx_bytes(START, SAMPLES), None),
+        ("run.tcx.gz", gzip.compress(tcx_bytes(START, SAMPLES)), None),
+    ],
+)
+def test_formats_parse_to_the_same_activity(name: str, content: bytes, start_local: str | None):
+    activity = parse_activity(name, content)
+
+    local = START.astimezone().replace(tzinfo=None).isoformat(timespec="seconds")
+    assert activity.start_date_local == (start_local or local)
+    assert activity.sport == "run"
+    assert activity.distance_m == pytest.approx(SAMPLES[-1].distance, rel=0.005)
+    assert activity.moving_time_secs == pytest.approx(599)
+    assert activity.average_hr == pytest.approx(149.5, abs=0.5)
+    streams = activity.streams
+    assert set(streams) == {
+        "time",
+        "heartrate",
+        "velocity_smooth",
+        "cadence",
+        "altitude",
+        "lat",
+        "lng",
+    }
+    assert streams["time"][-1] == 599
+    assert streams["heartrate"][:3].tolist() == [140, 141, 142]
+    assert streams["lat"][-1] == pytest.approx(SAMPLES[-1].lat, abs=1e-6)
+    assert streams["altitude"][10] == pytest.approx(SAMPLES[10].altitude, abs=0.2)
+    assert np.nanmedian(streams["velocity_smooth"]) == pytest.approx(3.0, abs=0.3)
+
+
+def test_unreadable_files_raise_value_error():
+    assert file_format(Path("a/Run.FIT.gz")) == "fit"
+    assert file_format(Path("notes.txt")) is None
+    with pytest.raises(ValueError, match="Not a FIT file"):
+        parse_activity("x.fit", b"garbage")
+    with pytest.raises(ValueError, match="Truncated"):
+        parse_activity("x.fit", fit_bytes(START, SAMPLES)[:-200])
+    with pytest.raises(ValueError, match="Bad XML"):
+        parse_activity("x.gpx", b"<gpx><trk>")
+
+
+def test_import_directory_parses_in_workers_and_skips_known_content(
+    temp_db: Database, tmp_path: Path
+):
+    root = tmp_path / "exports"
+    (root / "2026" / "10").mkdir(parents=True)
+    (root / "2026" / "10" / "a.fit").write_bytes(fit_bytes(START, SAMPLES))
+    (root / "2026" / "10" / "b.gpx").write_bytes(gpx_bytes(START, SAMPLES[:300], "hiking"))
+    (root / "2026" / "copy-of-a.fit").write_bytes(fit_bytes(START, SAMPLES))
+    (root / "c.tcx.gz").write_bytes(gzip.compress(tcx_bytes(START, SAMPLES[:120])))
+    (root / "broken.tcx").write_bytes(b"<TrainingCenterDatabase>")
+    (root / "readme.txt").write_text("not an activity")
+
+    stats = import_directory(temp_db, root, workers=2)
+    assert (stats.files, stats.imported, stats.skipped, stats.failed) == (5, 3, 1, 1)
+    assert stats.errors[0][0].endswith("broken.tcx")
+    assert stats.files_per_sec > 0
+
+    activities = temp_db.get_activities()
+    assert sorted(a["sport"] for a in activities) == ["hike", "run", "run"]
+    assert all(a["id"].startswith("file-") for a in activities)
+    # Streams for the runs only, readable like the synced ones
+    assert len(stats.run_ids) == 2
+    assert temp_db.get_streamed_activity_ids() == set(stats.run_ids)
+    assert len(load_streams(temp_db, stats.run_ids[0])["heartrate"]) in (600, 120)
+
+    again = import_directory(temp_db, root, workers=1)
+    assert (again.files, again.imported, again.skipped, again.failed) == (5, 0, 4, 1)
+    assert len(temp_db.get_imported_file_hashes()) == 3
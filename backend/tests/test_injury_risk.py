@@ -0,0 +1,93 @@
+"""Tests for the daily injury-risk series."""
+
+import copy
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import Database
+from training_status.services.analytics import calculate_injury_risk
+from training_status.services.injury_risk import COLUMNS, calculate_injury_risk_series
+
+from .conftest import SNAPSHOT_DATA
+
+START = date(2026, 1, 1)
+
+
+def _history(db: Database, days: int, gap_after: int | None = None) -> list[tuple]:
+    """Insert a varied daily history; returns rows in ``calculate_injury_risk`` order."""
+    rng = np.random.default_rng(7)
+    rows = []
+    day = START
+    for i in range(days):
+        data = copy.copy(SNAPSHOT_DATA)
+        ctl = float(rng.uniform(30, 50))
+        atl = float(ctl * rng.uniform(0.8, 1.7))
+        data.update(
+            recorded_at=f"{day.isoformat()}T08:00:00",
+            ctl=ctl,
+            atl=atl,
+            ac_ratio=atl / ctl,
+            ramp_rate=float(rng.uniform(0, 10)),
+            rest_days=int(rng.integers(0, 3)),
+            hrv=float(rng.normal(55, 8)),
+            sleep_score=float(rng.uniform(40, 90)),
+            fatigue=int(rng.integers(1, 6)),
+        )
+        db.insert_snapshot(data)
+        rows.append(tuple(data[c] for c in COLUMNS))
+        day += timedelta(days=1 if i != gap_after else 10)
+    return rows
+
+
+def test_series_matches_single_day_assessment(temp_db: Database):
+    rows = _history(temp_db, 30)
+    points = calculate_injury_risk_series(temp_db)
+
+    assert len(points) == 30 - 6
+    for k, point in enumerate(points):
+        upto = rows[: k + 7][::-1]
+        # calculate_injury_risk takes ac_ratio in place of ctl/atl
+        single = calculate_injury_risk([(r[0], r[1], r[2], r[1] / r[0], *r[3:]) for r in upto][:14])
+        assert point["risk_score"] == single["risk_score"], point["day"]
+        assert point["risk_level"] == single["risk_level"]
+        assert point["factors"] == [f["factor"] for f in single["factors"]]
+
+
+def test_gap_days_are_skipped(temp_db: Database):
+    _history(temp_db, 20, gap_after=9)
+    days = [p["day"] for p in calculate_injury_risk_series(temp_db)]
+    assert "2026-01-12" not in days
+    assert days[-1] == (START + timedelta(days=9 + 10 + 9)).isoformat()
+
+
+def test_fitness_days_supply_acwr(temp_db: Database):
+    _history(temp_db, 10)
+    temp_db.upsert_fitness_day("2026-01-10", 120.0, 40.0, 70.0)
+
+    last = calculate_injury_risk_series(temp_db)[-1]
+    assert (last["acute_load"], last["chronic_load"], last["acwr"]) == (70.0, 40.0, 1.75)
+    assert "Very high fatigue load" in last["factors"]
+
+
+def test_series_endpoint_ranges(temp_db: Database):
+    _history(temp_db, 40)
+    with patch("training_status.api.get_db", return_value=temp_db):
+        client = TestClient(app)
+        recent = client.get("/api/analytics/injury-risk/series", params={"days": 10}).json()
+        assert [p["day"] for p in recent["points"]][0] == "2026-01-31"
+        assert recent["summary"]["days"] == 10
+
+        window = client.get(
+            "/api/analytics/injury-risk/series",
+            params={"start": "2026-01-10", "end": "2026-01-14"},
+        ).json()
+        assert [p["day"] for p in window["points"]] == [f"2026-01-{d}" for d in range(10, 15)]
+        peak = max(window["points"], key=lambda p: p["risk_score"])
+        assert window["summary"]["peak_score"] == peak["risk_score"]
+
+        bad = client.get("/api/analytics/injury-risk/series", params={"start": "Jan 1"})
+        assert bad.status_code == 422
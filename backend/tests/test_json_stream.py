@@ -0,0 +1,31 @@
+"""Tests for incremental JSON array parsing."""
+
+import json
+
+import pytest
+
+from training_status.services.json_stream import iter_array
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_elements_and_their_text_survive_any_chunking():
+    body = (
+        '[ {"activityId": 12, "notes": "Löpning 🏃, \\"fast\\"", "laps": [1, 2.5e3]},\n'
+        '  12345678, -0.25, "x", null, true, [], {} ]'
+    ).encode()
+    expected = json.loads(body)
+    for size in (1, 2, 3, 7, 64, len(body)):
+        items = list(iter_array(_chunks(body, size)))
+        assert [element for element, _ in items] == expected, size
+        assert [json.loads(text) for _, text in items] == expected
+    assert list(iter_array([b"[", b" ]"])) == []
+    assert next(iter(iter_array([body])))[1].startswith('{"activityId": 12')
+
+
+@pytest.mark.parametrize("body", [b'{"a": 1}', b"[1, 2", b'[{"a": 1}', b"[1 2]", b""])
+def test_malformed_arrays_raise(body: bytes):
+    with pytest.raises(ValueError):
+        list(iter_array(_chunks(body, 2)))
@@ -0,0 +1,150 @@
+"""Tests for materialized analytics and the post-insert pipeline."""
+
+import copy
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import Database
+from training_status.services.critical_speed import CS_WINDOW
+from training_status.services.materialized import (
+    ANALYTICS,
+    get_analytic,
+    refresh_analytics,
+)
+from training_status.services.pipeline import run_post_insert_stages
+
+from .conftest import SNAPSHOT_DATA
+
+
+def _insert_history(db: Database, days: int = 20) -> int:
+    """Insert one varied snapshot per day. Returns the last snapshot ID."""
+    row_id = 0
+    for i in range(days):
+        data = copy.copy(SNAPSHOT_DATA)
+        data["recorded_at"] = f"2026-01-{1 + i:02d}T10:00:00"
+        data["ctl"] = 40.0 + i * 0.5
+        data["atl"] = 35.0 + (i % 5) * 3
+        data["tsb"] = data["ctl"] - data["atl"]
+        data["hrv"] = 50.0 + (i % 7) * 2
+        data["sleep_score"] = 55.0 + (i % 4) * 10
+        data["week_0_km"] = 10.0 + (i % 7) * 6
+        data["rest_days"] = i % 3
+        row_id = db.insert_snapshot(data)
+    return row_id
+
+
+def _live(db: Database, name: str) -> object:
+    """Live computation, normalised through JSON like the stored payload."""
+    return json.loads(json.dumps(ANALYTICS[name].build(db)))
+
+
+@pytest.mark.parametrize("name", sorted(ANALYTICS))
+def test_materialized_matches_live_computation(temp_db: Database, name: str):
+    """Every stored analytic equals a fresh live computation over the same data."""
+    temp_db.create_goal(goal_type="weekly_km", target_value=30.0)
+    snapshot_id = _insert_history(temp_db)
+    assert run_post_insert_stages(temp_db, snapshot_id) == []
+
+    row = temp_db.get_analytics_result(name)
+    assert row["snapshot_id"] == snapshot_id
+    assert row["version"] == ANALYTICS[name].version
+    assert json.loads(row["payload"]) == _live(temp_db, name)
+    assert get_analytic(temp_db, name) == _live(temp_db, name)
+
+
+def test_stale_result_is_recomputed_after_new_snapshot(temp_db: Database):
+    """A stored result older than the newest snapshot is not served."""
+    _insert_history(temp_db, days=3)
+    refresh_analytics(temp_db, ["detraining"])
+    before = get_analytic(temp_db, "detraining")
+
+    data = copy.copy(SNAPSHOT_DATA)
+    data["recorded_at"] = "2026-02-01T10:00:00"
+    data["ctl"], data["atl"] = 70.0, 20.0
+    temp_db.insert_snapshot(data)
+
+    after = get_analytic(temp_db, "detraining")
+    assert after != before
+    assert after["current_ctl"] == pytest.approx(70.0)
+
+
+def test_result_is_recomputed_after_input_table_write(temp_db: Database):
+    """Writes to a derived input table outside the snapshot path make results stale."""
+    _insert_history(temp_db, days=3)
+    refresh_analytics(temp_db, ["race_predictor", "detraining"])
+    assert get_analytic(temp_db, "race_predictor")["critical_speed_low_ms"] is None
+    detraining = temp_db.get_analytics_result("detraining")["computed_at"]
+
+    temp_db.replace_critical_speed_history(
+        [("2026-01-03", CS_WINDOW, 4.1, 210.0, 3.9, 4.3, 150.0, 270.0, 6)]
+    )
+
+    after = get_analytic(temp_db, "race_predictor")
+    assert after["critical_speed_ms"] == pytest.approx(4.1)
+    assert after["critical_speed_low_ms"] == pytest.approx(3.9)
+    # Analytics that do not read the table stay fresh
+    get_analytic(temp_db, "detraining")
+    assert temp_db.get_analytics_result("detraining")["computed_at"] == detraining
+
+
+def test_outdated_version_is_recomputed(temp_db: Database):
+    """Payloads stored by an older builder version are rebuilt on read."""
+    snapshot_id = _insert_history(temp_db, days=3)
+    temp_db.save_analytics_result("overload", 0, snapshot_id, json.dumps({"stale": True}))
+
+    assert get_analytic(temp_db, "overload") == _live(temp_db, "overload")
+    assert temp_db.get_analytics_result("overload")["version"] == ANALYTICS["overload"].version
+
+
+def test_goal_change_recomputes_adherence(temp_db: Database):
+    """Creating or deleting a goal refreshes the stored adherence report."""
+    _insert_history(temp_db, days=10)
+    refresh_analytics(temp_db)
+    assert get_analytic(temp_db, "goal_adherence") == []
+
+    with patch("training_status.api.get_db", return_value=temp_db):
+        client = TestClient(app)
+        client.post("/api/goals", json={"goal_type": "weekly_km", "target_value": 25.0})
+        stored = json.loads(temp_db.get_analytics_result("goal_adherence")["payload"])
+        assert len(stored) == 1
+        assert stored[0]["target_km"] == pytest.approx(25.0)
+
+        goal_id = client.get("/api/goals").json()["items"][0]["id"]
+        client.delete(f"/api/goals/{goal_id}")
+        assert json.loads(temp_db.get_analytics_result("goal_adherence")["payload"]) == []
+        assert client.get("/api/analytics/adherence").json() == []
+
+
+def test_dated_result_is_recomputed_on_a_new_day(temp_db: Database):
+    """Goal adherence (current period, streak) is not served from a previous day."""
+    temp_db.create_goal(goal_type="weekly_km", target_value=30.0)
+    _insert_history(temp_db, days=10)
+    refresh_analytics(temp_db, ["goal_adherence"])
+    with temp_db.connection() as conn:
+        conn.execute("UPDATE analytics_results SET payload = '[]' WHERE name = 'goal_adherence'")
+    assert get_analytic(temp_db, "goal_adherence") == []  # same day: stored payload served
+
+    with temp_db.connection() as conn:
+        conn.execute(
+            "UPDATE analytics_results SET computed_at = '2000-01-01T23:59:00'"
+            " WHERE name = 'goal_adherence'"
+        )
+    assert get_analytic(temp_db, "goal_adherence") == _live(temp_db, "goal_adherence")
+    assert temp_db.get_analytics_result("goal_adherence")["computed_at"] > "2000-01-02"
+
+
+def test_failing_stage_does_not_block_pipeline(temp_db: Database):
+    """A raising stage is reported but later stages still run."""
+    calls = []
+
+    def boom(db: Database, snapshot_id: int) -> None:
+        raise RuntimeError("boom")
+
+    stages = [("boom", boom), ("after", lambda db, sid: calls.append(sid))]
+    with patch("training_status.services.pipeline.POST_INSERT_STAGES", stages):
+        assert run_post_insert_stages(temp_db, 7) == ["boom"]
+    assert calls == [7]
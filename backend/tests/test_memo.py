@@ -0,0 +1,141 @@
+"""Tests for the memoization layer."""
+
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import Database
+from training_status.services import memo
+from training_status.services.analytics import (
+    calculate_detraining,
+    calculate_race_predictions,
+    calculate_taper,
+)
+from training_status.services.memo import cache_stats, invalidate, memoize
+
+from .conftest import SNAPSHOT_DATA
+
+
+def _counted(**options: object):
+    calls = []
+
+    @memoize(**options)  # type: ignore[arg-type]
+    def square(x: float, extra: list[int] | None = None) -> dict:
+        calls.append(x)
+        return {"value": x * x, "extra": extra}
+
+    return square, calls
+
+
+def test_hits_misses_and_float_normalization():
+    square, calls = _counted(precision=2)
+    assert square(3.0)["value"] == 9.0
+    square(3.001)  # rounds to the same key
+    square(3.0, extra=[1, 2])
+    square(3.0, extra=[1, 2])
+
+    assert calls == [3.0, 3.0]
+    info = square.cache_info()
+    assert (info.hits, info.misses, info.size) == (2, 2, 2)
+
+
+def test_lru_eviction():
+    square, calls = _counted(maxsize=2)
+    square(1.0)
+    square(2.0)
+    square(1.0)  # 1.0 is now most recent
+    square(3.0)  # evicts 2.0
+    square(1.0)
+    square(2.0)
+    assert calls == [1.0, 2.0, 3.0, 2.0]
+
+
+def test_ttl_expiry(monkeypatch: pytest.MonkeyPatch):
+    now = [100.0]
+    monkeypatch.setattr(memo.time, "monotonic", lambda: now[0])
+    square, calls = _counted(ttl=60)
+    square(2.0)
+    now[0] += 59
+    square(2.0)
+    now[0] += 2
+    square(2.0)
+    assert calls == [2.0, 2.0]
+
+
+def test_scope_is_part_of_the_key():
+    scope = ["monday"]
+    square, calls = _counted(scope=lambda: scope[0])
+    square(2.0)
+    scope[0] = "tuesday"
+    square(2.0)
+    assert len(calls) == 2
+
+
+def test_returned_values_are_copies():
+    square, _ = _counted()
+    square(2.0)["value"] = -1
+    assert square(2.0)["value"] == 4.0
+
+
+def test_invalidate_drops_everything():
+    square, calls = _counted()
+    square(2.0)
+    invalidate()
+    square(2.0)
+    assert len(calls) == 2
+
+
+def test_source_data_write_invalidates(temp_db: Database):
+    square, calls = _counted()
+    square(2.0)
+    temp_db.get_latest_snapshot()  # reads do not invalidate
+    temp_db.save_analytics_result("bench", 1, None, "{}")  # nor do derived tables
+    square(2.0)
+    temp_db.insert_snapshot(SNAPSHOT_DATA)
+    square(2.0)
+    assert len(calls) == 2
+
+
+def test_get_handlers_keep_caches_warm(temp_db: Database):
+    temp_db.insert_snapshot(SNAPSHOT_DATA)
+    race_date = (date.today() + timedelta(days=30)).isoformat()
+    with patch("training_status.api.get_db", return_value=temp_db):
+        client = TestClient(app)
+        client.get("/api/analytics/taper", params={"race_date": race_date})
+        before = calculate_taper.cache_info()  # type: ignore[attr-defined]
+        # Each of these writes derived rows (materialized results, metric stats)
+        for path in ("race-predictor", "readiness", "consistency", "detraining"):
+            assert client.get(f"/api/analytics/{path}").status_code == 200
+        client.get("/api/analytics/taper", params={"race_date": race_date})
+    after = calculate_taper.cache_info()  # type: ignore[attr-defined]
+    assert after.hits == before.hits + 1
+    assert after.size == before.size
+
+
+def test_result_computed_across_a_write_is_not_cached(temp_db: Database):
+    calls = []
+
+    @memoize()
+    def slow(x: float) -> float:
+        calls.append(x)
+        temp_db.insert_snapshot(SNAPSHOT_DATA)  # a write lands mid-computation
+        return x
+
+    slow(1.0)
+    assert slow.cache_info().size == 0  # type: ignore[attr-defined]
+
+
+def test_analytics_functions_are_memoized():
+    invalidate()
+    before = cache_stats()[f"{calculate_detraining.__module__}.calculate_detraining"]
+    first = calculate_detraining(45.0, 50.0)
+    assert calculate_detraining(45.00001, 50.0) == first
+    after = calculate_detraining.cache_info()  # type: ignore[attr-defined]
+    assert after.hits == before.hits + 1
+
+    predictions = calculate_race_predictions(3.6, 200.0, 45.0, "5:00")
+    predictions.clear()
+    assert calculate_race_predictions(3.6, 200.0, 45.0, "5:00")
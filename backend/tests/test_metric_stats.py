@@ -0,0 +1,117 @@
+"""Tests for the running metric_stats store."""
+
+import copy
+import statistics
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from training_status.cli import main
+from training_status.database import Database
+from training_status.services.metric_stats import (
+    WINDOWS,
+    RunningStats,
+    get_baselines,
+    rebuild_metric_stats,
+    sync_metric_stats,
+)
+
+from .conftest import SNAPSHOT_DATA
+
+
+def _insert(db: Database, day: date, hour: int, **values: float | None) -> int:
+    data = copy.copy(SNAPSHOT_DATA)
+    data["recorded_at"] = f"{day.isoformat()}T{hour:02d}:00:00"
+    data.update(values)
+    return db.insert_snapshot(data)
+
+
+def _stats(db: Database) -> dict[tuple[str, int], dict]:
+    keys = ("n", "mean", "m2", "ewma", "ewm_var", "prev_ewma", "prev_ewm_var", "last_value")
+    return {(r["metric"], r["window_days"]): {k: r[k] for k in keys} for r in db.get_metric_stats()}
+
+
+def test_welford_add_remove_matches_direct():
+    s = RunningStats("hrv", 7)
+    for x in [50.0, 52.0, 47.0, 55.0, 51.0]:
+        s.add(x)
+    s.remove(50.0)
+    assert s.n == 4
+    assert s.mean == pytest.approx(statistics.mean([52.0, 47.0, 55.0, 51.0]))
+    assert s.std == pytest.approx(statistics.stdev([52.0, 47.0, 55.0, 51.0]))
+
+
+def test_incremental_sync_matches_rebuild(temp_db: Database):
+    rng = np.random.default_rng(5)
+    day = date(2025, 1, 1)
+    for i in range(90):
+        day += timedelta(days=int(rng.choice([1, 1, 1, 2, 4])))
+        hrv = None if rng.random() < 0.15 else float(rng.normal(55, 6))
+        _insert(temp_db, day, 8, hrv=hrv, week_0_km=float(rng.uniform(10, 60)))
+        if rng.random() < 0.2:  # second snapshot the same day replaces the first
+            _insert(temp_db, day, 20, hrv=float(rng.normal(55, 6)), week_0_km=None)
+        if i == 60:
+            day += timedelta(days=400)  # gap longer than every window
+        sync_metric_stats(temp_db)
+
+    incremental = _stats(temp_db)
+    rebuild_metric_stats(temp_db)
+    rebuilt = _stats(temp_db)
+
+    assert incremental.keys() == rebuilt.keys()
+    for key, expected in rebuilt.items():
+        for field, value in expected.items():
+            if value is None:
+                assert incremental[key][field] is None, (key, field)
+            else:
+                assert incremental[key][field] == pytest.approx(value, rel=1e-9, abs=1e-9), (
+                    key,
+                    field,
+                )
+
+
+def test_window_stats_match_daily_values(temp_db: Database):
+    start = date(2026, 1, 1)
+    values = [50.0 + (i % 9) for i in range(40)]
+    for i, v in enumerate(values):
+        _insert(temp_db, start + timedelta(days=i), 8, hrv=v)
+
+    stats = get_baselines(temp_db, ["hrv"], window_days=28)["hrv"]
+    assert stats.n == 28
+    assert stats.mean == pytest.approx(statistics.mean(values[-28:]))
+    assert stats.std == pytest.approx(statistics.stdev(values[-28:]))
+
+    base = get_baselines(temp_db, ["hrv"], window_days=7, exclude_latest=True)["hrv"]
+    assert base.n == 6
+    assert base.mean == pytest.approx(statistics.mean(values[-7:-1]))
+
+
+def test_out_of_order_insert_triggers_rebuild(temp_db: Database):
+    for i in range(10):
+        _insert(temp_db, date(2026, 3, 1) + timedelta(days=i), 8, hrv=60.0)
+    sync_metric_stats(temp_db)
+    _insert(temp_db, date(2026, 2, 25), 8, hrv=30.0)  # back-filled day
+
+    sync_metric_stats(temp_db)
+    stats = get_baselines(temp_db, ["hrv"], window_days=28)["hrv"]
+    assert stats.n == 11
+    assert stats.mean == pytest.approx((60.0 * 10 + 30.0) / 11)
+
+
+def test_every_metric_and_window_is_stored(temp_db: Database):
+    _insert(temp_db, date(2026, 1, 1), 8)
+    sync_metric_stats(temp_db)
+    rows = temp_db.get_metric_stats(["hrv"])
+    assert sorted(r["window_days"] for r in rows) == sorted(WINDOWS)
+
+
+def test_rebuild_stats_command(temp_db: Database, monkeypatch, capsys):
+    for i in range(3):
+        _insert(temp_db, date(2026, 1, 1) + timedelta(days=i), 8, hrv=50.0 + i)
+    monkeypatch.setattr("training_status.cli.get_db", lambda: temp_db)
+
+    main(["rebuild-stats"])
+
+    assert "3 days" in capsys.readouterr().out
+    assert get_baselines(temp_db, ["hrv"], 7)["hrv"].mean == pytest.approx(51.0)
@@ -0,0 +1,124 @@
+"""Tests for the mean-maximal pace curve and critical speed from stored best efforts."""
+
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import Database
+from training_status.services import pace_curve
+from training_status.services.pace_curve import (
+    best_efforts,
+    fit_critical_speed,
+    local_critical_speed,
+    mean_max_curve,
+    period_start,
+    update_best_efforts,
+)
+from training_status.services.streams import store_streams
+
+TODAY = date(2026, 3, 1)
+
+
+def _run(*segments: tuple[int, float]) -> dict[str, np.ndarray]:
+    """Streams of (seconds, speed m/s) segments back to back."""
+    speed = np.concatenate([np.full(secs, v) for secs, v in segments])
+    return {"time": np.arange(len(speed), dtype=float), "velocity_smooth": speed}
+
+
+def _add_run(db: Database, activity_id: str, day: str, *segments: tuple[int, float]) -> None:
+    db.upsert_activity(activity_id, f"{day}T07:00:00", "run")
+    store_streams(db, activity_id, _run(*segments))  # type: ignore[arg-type]
+
+
+def test_efforts_of_a_steady_run():
+    efforts = best_efforts(_run((3600, 3.0)))
+    assert efforts is not None
+    assert efforts["duration"][60] == pytest.approx(180.0)
+    assert efforts["distance"][1000] == 334  # first whole second past 1000 m
+    assert 5400 not in efforts["duration"]  # longer than the run
+    assert max(efforts["distance"]) == 10000
+    assert best_efforts({"heartrate": np.ones(10)}) is None
+
+
+def test_sliding_window_finds_the_fast_segment():
+    efforts = best_efforts(_run((1200, 3.0), (300, 5.0), (1200, 3.0)))
+    assert efforts is not None
+    assert efforts["duration"][300] == pytest.approx(1500.0)
+    assert efforts["distance"][1000] == 200
+    assert efforts["duration"][600] == pytest.approx(1500.0 + 300 * 3.0)
+
+
+def test_pauses_add_no_distance():
+    run = _run((3600, 3.0))
+    run["time"] = run["time"].copy()
+    run["time"][1800:] += 900  # paused for 15 minutes
+    efforts = best_efforts(run)
+    assert efforts is not None
+    assert efforts["duration"][3600] == pytest.approx(3600 * 3.0 - 900 * 3.0, abs=3)
+    assert efforts["distance"][10000] > 3600
+
+
+def test_fit_recovers_critical_speed():
+    cs, d_prime = 4.0, 200.0
+    points = [((d - d_prime) / cs, d) for d in (1000.0, 2000.0, 3000.0, 5000.0)]
+    assert fit_critical_speed(points) == {"critical_speed": 4.0, "d_prime": 200.0}
+    assert fit_critical_speed(points[:1])["critical_speed"] is None
+
+
+def test_periods():
+    assert period_start("42d", TODAY) == "2026-01-19"
+    assert period_start("season", TODAY) == "2026-01-01"
+    assert period_start("all", TODAY) is None
+    with pytest.raises(ValueError, match="Unknown curve period"):
+        period_start("fortnight", TODAY)
+
+
+def test_efforts_are_stored_incrementally(temp_db: Database, monkeypatch: pytest.MonkeyPatch):
+    _add_run(temp_db, "a", "2026-02-20", (1500, 4.0))
+    calls = []
+    real = pace_curve.load_streams
+    monkeypatch.setattr(pace_curve, "load_streams", lambda db, i: calls.append(i) or real(db, i))
+
+    assert update_best_efforts(temp_db) == 1
+    _add_run(temp_db, "b", "2026-02-22", (400, 5.0))
+    assert update_best_efforts(temp_db) == 1
+    assert update_best_efforts(temp_db) == 0
+    assert calls == ["a", "b"]
+
+    rows = {(r["kind"], r["target"]): r["value"] for r in temp_db.get_activity_best_efforts("b")}
+    assert rows[("distance", 1000.0)] == 200
+
+    store_streams(temp_db, "b", _run((400, 4.5)))  # new streams drop the stored efforts
+    assert temp_db.get_activity_best_efforts("b") == []
+    assert update_best_efforts(temp_db) == 1
+
+
+def test_curve_and_critical_speed_by_period(temp_db: Database):
+    _add_run(temp_db, "fast", "2026-02-25", (401, 5.0))  # 2 km at 5 m/s
+    _add_run(temp_db, "long", "2026-02-10", (1251, 4.0))  # 5 km at 4 m/s
+    _add_run(temp_db, "old", "2025-10-01", (300, 6.0))
+
+    recent = mean_max_curve(temp_db, "42d", today=TODAY)
+    best_km = {p["distance_m"]: (p["secs"], p["activity_id"]) for p in recent["distances"]}
+    assert best_km[1000] == (200, "fast")
+    assert best_km[5000] == (1250, "long")
+    fit = fit_critical_speed([(200, 1000), (400, 2000), (750, 3000), (1000, 4000), (1250, 5000)])
+    assert {k: recent[k] for k in fit} == fit
+    assert local_critical_speed(temp_db, TODAY) == fit
+
+    every = mean_max_curve(temp_db, "all", today=TODAY)
+    assert every["distances"][0]["activity_id"] == "old"  # 400 m
+    assert {p["activity_id"] for p in mean_max_curve(temp_db, "season", TODAY)["distances"]} == {
+        "fast",
+        "long",
+    }
+
+    with patch("training_status.api.get_db", return_value=temp_db):
+        client = TestClient(app)
+        body = client.get("/api/analytics/pace-curve", params={"period": "all"}).json()
+        assert body["durations"][0] == every["durations"][0]
+        assert client.get("/api/analytics/pace-curve", params={"period": "1y"}).status_code == 422
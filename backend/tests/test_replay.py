@@ -0,0 +1,120 @@
+"""Tests for the record/replay stand-in server behind the end-to-end benchmarks."""
+
+import json
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+import requests
+from pydantic import ValidationError
+
+from benchmarks.bench_report import replay_settings, run_report
+from benchmarks.replay import Recorder, ReplayServer, report_environment
+from training_status.config import Settings
+from training_status.database import Database
+from training_status.services import http
+from training_status.services.smashrun import SmashrunClient
+
+
+@pytest.fixture(autouse=True)
+def _own_clients(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(http, "_clients", {})
+
+
+def test_report_runs_end_to_end_against_the_recordings(tmp_path: Path):
+    with ReplayServer() as server:
+        settings = replay_settings(server, tmp_path)
+        db = Database(settings.db_path)
+        db.init_schema()
+        _, out, stats = run_report(settings, db)
+        assert "Intervals.icu: ok" in out and "Smashrun: ok" in out and "Strava: ok" in out
+        assert server.requests == sum(s["requests"] for s in stats.values()) == 9
+        snapshot = db.get_snapshot_columns(
+            db.get_latest_snapshot_id(),  # type: ignore[arg-type]
+            ["total_distance_km", "week_0_km"],
+        )
+        assert snapshot is not None
+        assert snapshot[0] == 4821.3
+        assert snapshot[1] > 0  # recorded dates were moved up to this week
+
+        first = server.requests
+        _, out, stats = run_report(settings, db)
+        assert server.requests - first == 4  # stats and athlete are still fresh in the cache
+        assert sum(s["cache_hits"] for s in stats.values()) == 4
+
+
+def _write(recordings: Path, recorded_on: date) -> None:
+    recordings.mkdir()
+    runs = [{"activityId": 2, "startDateTimeLocal": f"{recorded_on}T07:00:00", "distance": 5.0}]
+    exchanges = [
+        {
+            "method": "GET",
+            "path": "/smashrun/v1/my/stats",
+            "query": {},
+            "status": 200,
+            "headers": {"ETag": '"s1"'},
+            "body": {"totalDistance": 10.0, "access_token": "secret"},
+        },
+        {
+            "method": "GET",
+            "path": "/smashrun/v1/my/activities",
+            "query": {"count": "100", "page": "0"},
+            "status": 200,
+            "headers": {},
+            "body": runs,
+        },
+    ]
+    recording = {"recorded_on": recorded_on.isoformat(), "exchanges": exchanges}
+    (recordings / "smashrun.json").write_text(json.dumps(recording))
+
+
+def test_replay_matches_pages_shifts_dates_and_scales(tmp_path: Path):
+    _write(tmp_path / "in", date.today() - timedelta(days=10))
+    with ReplayServer(tmp_path / "in", scale=3) as server:
+        url = f"{server.url}/smashrun/v1/my/activities"
+        page = requests.get(url, params={"page": 0, "count": 100, "fromDate": 1}, timeout=5).json()
+        assert [a["activityId"] for a in page] == [2, 10**9 + 2, 2 * 10**9 + 2]
+        assert page[0]["startDateTimeLocal"] == f"{date.today()}T07:00:00"
+        assert requests.get(url, params={"page": 1}, timeout=5).json() == []  # not recorded
+        assert requests.get(f"{server.url}/smashrun/v1/nope", timeout=5).status_code == 404
+
+    with ReplayServer(tmp_path / "in", error_rate=1.0) as server:
+        assert requests.get(f"{server.url}/smashrun/v1/my/stats", timeout=5).status_code == 503
+
+
+def test_recorder_captures_sanitized_replayable_exchanges(tmp_path: Path):
+    _write(tmp_path / "in", date.today())
+    with ReplayServer(tmp_path / "in") as server:
+        settings = replay_settings(server, tmp_path)
+        recorder = Recorder(settings)
+        with report_environment(settings, Database(settings.db_path)):
+            recorder.attach()
+            client = SmashrunClient(settings)
+            client._get("my/stats")
+            client._get("my/activities", {"count": 100, "page": 0})
+        recorder.save(tmp_path / "out")
+
+    saved = json.loads((tmp_path / "out" / "smashrun.json").read_text())
+    stats, activities = saved["exchanges"]
+    assert stats["path"] == "/smashrun/v1/my/stats" and stats["headers"]["ETag"] == '"s1"'
+    assert stats["body"] == {"totalDistance": 10.0, "access_token": "redacted"}
+    assert activities["query"] == {"count": "100", "page": "0"}
+    assert activities["body"][0]["activityId"] == 2
+
+
+def test_stand_in_mode_refuses_the_real_data_dir(tmp_path: Path):
+    credentials = {"intervals_id": "i0", "intervals_api_key": "key", "smashrun_token": "t"}
+    stand_in = {**credentials, "api_stand_in_url": "http://127.0.0.1:8765"}
+    with pytest.raises(ValidationError, match="DB_PATH"):
+        Settings(**stand_in)
+    with pytest.raises(ValidationError, match="HTTP_CACHE_PATH"):
+        Settings(**stand_in, db_path=tmp_path / "replay.db", http_cache_max_mb=64)
+
+    Settings(**stand_in, db_path=tmp_path / "replay.db", http_cache_max_mb=0)
+    Settings(
+        **stand_in,
+        db_path=tmp_path / "replay.db",
+        http_cache_path=tmp_path / "c.db",
+        http_cache_max_mb=64,
+    )
+    Settings(**credentials)  # the default paths are fine for the real APIs
@@ -0,0 +1,161 @@
+"""Tests for the what-if scenario simulator."""
+
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from training_status.api import app
+from training_status.database import Database
+from training_status.services import scenarios
+from training_status.services.analytics import calculate_taper
+from training_status.services.fitness import FitnessState
+from training_status.services.scenarios import build_load_matrix, expand_grid, simulate_scenarios
+
+from .conftest import SNAPSHOT_DATA
+
+
+def _race(days: int) -> str:
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+def test_expand_grid_is_cartesian_product():
+    params = expand_grid({"weekly_volume_pct": [90, 110], "taper_weeks": [1, 2, 3]})
+    n = 2 * 2 * 2 * 3 * 3  # defaults fill the other axes
+    assert all(len(v) == n for v in params.values())
+    combos = set(zip(*(params[k].tolist() for k in sorted(params)), strict=True))
+    assert len(combos) == n
+
+
+def test_expand_grid_rejects_bad_values():
+    with pytest.raises(ValueError):
+        expand_grid({"taper_shape": ["sudden"]})
+    with pytest.raises(ValueError):
+        expand_grid({"weekly_volume_pct": list(range(2000)), "taper_weeks": [0, 1, 2, 3, 4]})
+    with pytest.raises(ValueError, match="weekly_volume_pct"):
+        expand_grid({"weekly_volume_pct": [100.0, 1000.0]})
+    with pytest.raises(ValueError, match="weekly_progression_pct"):
+        expand_grid({"weekly_progression_pct": [100.0]})
+
+
+def test_race_date_beyond_horizon_is_rejected():
+    result = simulate_scenarios(_race(scenarios.MAX_HORIZON_DAYS + 1), 50.0, 50.0)
+    assert result["error"].startswith("Race date must be at most")
+    assert result["scenarios"] == []
+
+
+def test_grid_times_horizon_is_capped():
+    grid = {"weekly_volume_pct": list(range(100)), "weekly_progression_pct": [0, 1, 2, 3]}
+    with patch.object(scenarios, "MAX_CELLS", 100 * 4 * 2 * 3 * 3 * 59):
+        assert "error" not in simulate_scenarios(_race(60), 50.0, 50.0, grid=grid, top=1)
+        result = simulate_scenarios(_race(61), 50.0, 50.0, grid=grid, top=1)
+    assert "scenario-days" in result["error"]
+    assert result["scenarios"] == []
+
+
+def test_non_finite_scenarios_are_not_ranked():
+    def evaluate(params, *args):
+        ctl = np.full(len(params["taper_weeks"]), 50.0)
+        ctl[:3] = [np.nan, np.inf, 100.0]
+        return ctl, ctl - 10.0
+
+    with patch.object(scenarios, "evaluate", evaluate):
+        result = simulate_scenarios(_race(30), 50.0, 50.0, top=200, include_trajectories=False)
+    ranked = result["scenarios"]
+    assert len(ranked) == result["evaluated"] - 2
+    assert ranked[0]["race_day_ctl"] == pytest.approx(100.0)
+    assert all(np.isfinite(s["score"]) for s in ranked)
+
+
+def test_load_matrix_rest_days_and_taper():
+    params = expand_grid(
+        {
+            "weekly_volume_pct": [100],
+            "weekly_progression_pct": [0],
+            "rest_days_per_week": [2],
+            "taper_weeks": [2],
+            "taper_shape": ["step"],
+        }
+    )
+    loads = build_load_matrix(params, horizon=28, baseline=50.0)[0]
+
+    # Full weeks keep the baseline weekly volume, spread over the training days
+    assert loads[:7].sum() == pytest.approx(350.0)
+    assert (loads[:7] == 0).sum() == 2
+    # Step taper: 80% then 70% of normal volume in the final two weeks
+    assert loads[14:21].sum() == pytest.approx(350.0 * 0.8)
+    assert loads[21:].sum() == pytest.approx(350.0 * 0.7)
+
+
+def test_race_day_values_match_daily_steps():
+    result = simulate_scenarios(_race(30), 55.0, 65.0, top=3)
+    best = result["scenarios"][0]
+
+    state = FitnessState(55.0, 65.0)
+    for point in best["trajectory"]:
+        state = state.step(point["load"])
+    assert best["race_day_ctl"] == pytest.approx(state.ctl, abs=0.1)
+    assert best["race_day_tsb"] == pytest.approx(state.tsb, abs=0.1)
+    assert len(best["trajectory"]) == 29
+
+
+def test_scenarios_ranked_by_score():
+    result = simulate_scenarios(_race(40), 50.0, 50.0, target_tsb=5.0, top=100)
+    scores = [s["score"] for s in result["scenarios"]]
+    assert scores == sorted(scores, reverse=True)
+    assert result["evaluated"] == 3 * 2 * 2 * 3 * 3
+    best = result["scenarios"][0]
+    assert best["score"] == pytest.approx(
+        best["race_day_ctl"] - 2.0 * abs(best["race_day_tsb"] - 5.0), abs=0.2
+    )
+
+
+def test_tapers_longer_than_available_time_are_dropped():
+    result = simulate_scenarios(_race(10), 50.0, 50.0, grid={"taper_weeks": [1, 2]})
+    assert {s["params"]["taper_weeks"] for s in result["scenarios"]} == {1}
+
+
+def test_race_day_matches_calculate_taper():
+    # The taper plan as a scenario: full volume, no rest days, then the same taper
+    plan = {
+        "weekly_volume_pct": [100],
+        "weekly_progression_pct": [0],
+        "rest_days_per_week": [0],
+        "taper_weeks": [3],
+        "taper_shape": ["linear"],
+    }
+    scenario = simulate_scenarios(_race(30), 60.0, 75.0, grid=plan)["scenarios"][0]
+    taper = calculate_taper(_race(30), 60.0, "linear", 75.0)
+
+    assert taper["taper_weeks"] == 3
+    assert scenario["race_day_ctl"] == taper["race_day_ctl"]
+    assert scenario["race_day_tsb"] == taper["race_day_tsb"]
+    assert scenario["trajectory"][-1]["ctl"] == taper["weeks"][-1]["projected_ctl"]
+
+
+def test_process_pool_matches_single_pass():
+    params = expand_grid({"weekly_volume_pct": [80, 100, 120]})
+    single = scenarios.evaluate(params, 60, 50.0, 50.0, 60.0)
+    with patch.object(scenarios, "POOL_THRESHOLD", 0):
+        pooled = scenarios.evaluate(params, 60, 50.0, 50.0, 60.0, workers=2)
+    np.testing.assert_allclose(pooled, single)
+
+
+def test_scenarios_endpoint(temp_db: Database):
+    temp_db.insert_snapshot(SNAPSHOT_DATA)
+    with patch("training_status.api.get_db", return_value=temp_db):
+        client = TestClient(app)
+        resp = client.post(
+            "/api/analytics/scenarios",
+            json={"race_date": _race(35), "grid": {"taper_weeks": [2, 3]}, "top": 5},
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["current"]["ctl"] == SNAPSHOT_DATA["ctl"]
+        assert len(body["scenarios"]) == 5
+        assert body["scenarios"][0]["rank"] == 1
+
+        bad = client.post("/api/analytics/scenarios", json={"race_date": "not-a-date"})
+        assert bad.json()["error"].startswith("Invalid date")
@@ -0,0 +1,226 @@
+"""Tests for the data-source adapter registry and its wave executor."""
+
+import re
+import threading
+import time
+
+import pytest
+
+from training_status.config import Settings
+from training_status.database import Database
+from training_status.database.schema import INSERT_SNAPSHOT
+from training_status.services import sources as sources_module
+from training_status.services.sources import (
+    SOURCES,
+    SourceAdapter,
+    SourceContext,
+    register_source,
+    run_sources,
+    snapshot_columns,
+    snapshot_ready,
+    snapshot_row,
+)
+
+from .conftest import SNAPSHOT_DATA
+
+SETTINGS = Settings(
+    intervals_id="i1", intervals_api_key="key", smashrun_token="t", http_cache_max_mb=0
+)
+
+
+def _registry(*adapters: SourceAdapter) -> dict[str, SourceAdapter]:
+    sources: dict[str, SourceAdapter] = {}
+    for adapter in adapters:
+        register_source(adapter, sources)
+    return sources
+
+
+def test_dependents_run_after_their_dependencies_and_failures_stay_isolated(temp_db: Database):
+    started: dict[str, float] = {}
+    both_running = threading.Barrier(2, timeout=2)
+
+    def fetch(name: str, data: dict, wait: bool = False):
+        def run(ctx: SourceContext) -> dict:
+            started[name] = time.monotonic()
+            if wait:
+                both_running.wait()  # only passes if the two sources run concurrently
+            return {**data, "inputs": sorted(ctx.inputs)}
+
+        return run
+
+    def broken(ctx: SourceContext) -> dict:
+        raise RuntimeError("token expired")
+
+    sources = _registry(
+        SourceAdapter("load", "Load", fetch("load", {"ctl": 45}, wait=True), {"ctl": "REAL"}),
+        SourceAdapter("totals", "Totals", fetch("totals", {"km": 12}, wait=True), {"km": "REAL"}),
+        SourceAdapter("broken", "Broken", broken, {"x": "REAL"}),
+        SourceAdapter("derived", "Derived", fetch("derived", {}), depends_on=("load", "off")),
+        SourceAdapter("orphan", "Orphan", fetch("orphan", {}), depends_on=("broken",)),
+        SourceAdapter("off", "Off", fetch("off", {}), enabled=lambda settings: False),
+    )
+    seen = []
+    results = run_sources(
+        SETTINGS, temp_db, sources, on_result=lambda adapter, _: seen.append(adapter.name)
+    )
+
+    assert results["load"].ok and results["totals"].ok
+    assert results["broken"].error == "token expired"
+    # A disabled dependency is ignored; a failed one skips its dependents
+    assert results["derived"].ok and results["derived"].data["inputs"] == ["load"]
+    assert started["derived"] >= started["load"]
+    assert results["orphan"].error == "skipped: broken failed" and "orphan" not in started
+    assert "off" not in results and "off" not in started
+    assert seen == ["load", "totals", "broken", "derived", "orphan"]
+
+
+def test_late_fetch_writes_are_rolled_back(temp_db: Database):
+    release, done = threading.Event(), threading.Event()
+    late_error: list[Exception] = []
+
+    def prompt(ctx: SourceContext) -> dict:
+        assert ctx.db is not temp_db  # every fetch has its own handle
+        ctx.db.create_goal("weekly_km", 30.0)
+        return {}
+
+    def late(ctx: SourceContext) -> dict:
+        release.wait(2)
+        try:
+            ctx.db.create_goal("monthly_km", 120.0)
+        except RuntimeError as e:
+            late_error.append(e)
+        done.set()
+        return {}
+
+    sources = _registry(
+        SourceAdapter("prompt", "Prompt", prompt),
+        SourceAdapter("late", "Late", late, deadline=lambda settings: 0.05),
+    )
+    results = run_sources(SETTINGS, temp_db, sources)
+    release.set()
+    assert done.wait(2)
+
+    assert results["prompt"].ok and results["late"].error == "no response within 0.05s"
+    assert [g["goal_type"] for g in temp_db.get_active_goals()] == ["weekly_km"]
+    assert "rolled back" in str(late_error[0])
+
+
+def test_snapshot_row_merges_every_registered_column(temp_db: Database):
+    def fetch(ctx: SourceContext) -> dict:
+        return {}
+
+    sources = _registry(
+        SourceAdapter(
+            "load",
+            "Load",
+            fetch,
+            {"ctl": "REAL", "atl": "REAL"},
+            raw_column="intervals_json",
+            required=True,
+        ),
+        SourceAdapter(
+            "scaled",
+            "Scaled",
+            fetch,
+            {"week_0_km": "REAL"},
+            normalize=lambda data: {"week_0_km": data["m"] / 1000},
+        ),
+        SourceAdapter("broken", "Broken", fetch, {"vo2max": "REAL"}),
+    )
+    results = run_sources(SETTINGS, temp_db, sources)
+    results["load"].data = {"ctl": 45.0, "extra": 1, "_raw": {"wellness": {}}}
+    results["scaled"].data = {"m": 12500}
+    results["broken"].error = "timeout"
+
+    row = snapshot_row(results, sources)
+    assert {k: v for k, v in row.items() if k != "recorded_at"} == {
+        "ctl": 45.0,
+        "atl": None,
+        "intervals_json": '{"wellness": {}}',
+        "week_0_km": 12.5,
+        "vo2max": None,
+    }
+    assert snapshot_ready(results, sources)
+    results["load"].error = "timeout"
+    assert not snapshot_ready(results, sources)
+
+    # A normalize failure only loses that source's columns
+    results["scaled"].data = {}
+    row = snapshot_row(results, sources)
+    assert row["week_0_km"] is None
+    assert results["scaled"].error == "normalize failed: 'm'"
+
+
+def test_register_source_rejects_taken_names_and_columns():
+    def fetch(ctx: SourceContext) -> dict:
+        return {}
+
+    sources = _registry(SourceAdapter("load", "Load", fetch, {"ctl": "REAL"}))
+    with pytest.raises(ValueError, match="already registered"):
+        register_source(SourceAdapter("load", "Load", fetch), sources)
+    with pytest.raises(ValueError, match="belongs to 'load'"):
+        register_source(SourceAdapter("other", "Other", fetch, {"ctl": "REAL"}), sources)
+
+
+def test_builtin_sources_fill_the_snapshot_table(temp_db: Database):
+    params = set(re.findall(r":(\w+)", INSERT_SNAPSHOT))
+    assert set(snapshot_columns(SOURCES)) | {"recorded_at"} == params
+    assert temp_db.add_snapshot_columns(snapshot_columns(SOURCES)) == []
+
+
+def test_contributed_columns_are_added_and_inserted(temp_db: Database):
+    assert temp_db.add_snapshot_columns({"garmin_body_battery": "INTEGER", "ctl": "REAL"}) == [
+        "garmin_body_battery"
+    ]
+    assert temp_db.add_snapshot_columns({"garmin_body_battery": "INTEGER"}) == []
+    with pytest.raises(ValueError, match="Invalid column"):
+        temp_db.add_snapshot_columns({"x; DROP TABLE snapshots": "REAL"})
+
+    snapshot_id = temp_db.insert_snapshot({**SNAPSHOT_DATA, "garmin_body_battery": 71})
+    with temp_db.connection() as conn:
+        row = conn.execute(
+            "SELECT ctl, garmin_body_battery FROM snapshots WHERE id = ?", (snapshot_id,)
+        ).fetchone()
+    assert row == (45.0, 71)
+
+
+def test_critical_speed_history_is_refit_only_when_efforts_change(
+    temp_db: Database, monkeypatch: pytest.MonkeyPatch
+):
+    refits: list[Database] = []
+    efforts_updated = iter([0, 3])
+    monkeypatch.setattr(sources_module, "update_critical_speed_history", refits.append)
+    monkeypatch.setattr(sources_module, "sync_activity_streams", lambda db, client, activities: 1)
+    monkeypatch.setattr(sources_module, "update_activity_decoupling", lambda db, ids: {})
+    monkeypatch.setattr(sources_module, "update_best_efforts", lambda db: next(efforts_updated))
+    monkeypatch.setattr(
+        sources_module, "local_critical_speed", lambda db: {"critical_speed": 4.0, "d_prime": 200.0}
+    )
+    ctx = SourceContext(SETTINGS, temp_db, {"intervals": {"_raw": {"activities": [{}]}}})
+
+    assert SOURCES["critical_speed"].fetch(ctx)["critical_speed"] == 4.0
+    SOURCES["streams"].fetch(ctx)  # no best effort changed
+    assert refits == []
+    SOURCES["streams"].fetch(ctx)
+    assert refits == [temp_db]
+
+
+def test_critical_speed_runs_when_streams_fail(temp_db: Database, monkeypatch: pytest.MonkeyPatch):
+    def broken_streams(db: Database, client: object, activities: list) -> int:
+        raise RuntimeError("streams down")
+
+    monkeypatch.setattr(sources_module, "sync_activity_streams", broken_streams)
+    monkeypatch.setattr(
+        sources_module, "local_critical_speed", lambda db: {"critical_speed": 4.0, "d_prime": 200.0}
+    )
+    sources = _registry(
+        SourceAdapter("intervals", "Intervals", lambda ctx: {"_raw": {"activities": [{}]}}),
+        SOURCES["streams"],
+        SOURCES["critical_speed"],
+    )
+    settings = SETTINGS.model_copy(update={"sync_streams": True})
+
+    results = run_sources(settings, temp_db, sources)
+    assert results["streams"].error == "streams down"
+    assert results["critical_speed"].ok
+    assert snapshot_row(results, sources)["critical_speed"] == 4.0
@@ -0,0 +1,143 @@
+"""Tests for activity stream storage and sync."""
+
+import numpy as np
+import pytest
+import requests
+
+from training_status.database import Database
+from training_status.services.streams import (
+    StreamCache,
+    decode_stream,
+    encode_stream,
+    load_streams,
+    parse_intervals_streams,
+    store_streams,
+    stream_cache,
+    sync_activity_streams,
+)
+
+
+def _run(seconds: int = 3600, seed: int = 0) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    t = np.arange(seconds, dtype=float)
+    return {
+        "time": t,
+        "heartrate": np.round(140 + 10 * t / seconds + rng.normal(0, 1, seconds)),
+        "velocity_smooth": np.round(3.2 + rng.normal(0, 0.05, seconds), 3),
+        "altitude": np.round(20 + np.cumsum(rng.normal(0, 0.1, seconds)), 1),
+        "lat": np.round(59.3 + np.cumsum(rng.normal(0, 1e-5, seconds)), 7),
+        "lng": np.round(18.0 + np.cumsum(rng.normal(0, 1e-5, seconds)), 7),
+    }
+
+
+def _decode(encoded) -> np.ndarray:  # type: ignore[no-untyped-def]
+    return decode_stream(
+        encoded.dtype, encoded.scale, encoded.base, encoded.length, encoded.data, encoded.nulls
+    )
+
+
+def _encode_and_check(name: str, values: np.ndarray):  # type: ignore[no-untyped-def]
+    encoded = encode_stream(name, values)
+    assert encoded.length == len(values)
+    assert len(encoded.data) < values.nbytes / 4, name  # deltas compress well
+    return encoded
+
+
+def test_round_trip_is_exact_at_stream_precision():
+    for name, values in _run().items():
+        encoded = _encode_and_check(name, values)
+        np.testing.assert_allclose(_decode(encoded), values, atol=0.5 / encoded.scale)
+
+
+def test_deltas_use_the_narrowest_dtype():
+    assert encode_stream("heartrate", [140, 141, 139, 150]).dtype == "|i1"
+    assert encode_stream("velocity_smooth", [3.0, 3.3, 2.9]).dtype == "<i2"
+    assert encode_stream("lat", [59.3, 59.30001]).dtype == "|i1"  # the first sample is the base
+    assert encode_stream("lat", [59.3, 59.301]).dtype == "<i2"
+    assert encode_stream("lat", [59.3, 59.4]).dtype == "<i4"
+
+
+def test_missing_samples_come_back_as_nan():
+    values = [None, 150.0, None, None, 152.0, None]
+    decoded = _decode(encode_stream("heartrate", values))
+    assert np.isnan(decoded[[0, 2, 3, 5]]).all()
+    assert decoded[1] == 150.0 and decoded[4] == 152.0
+    assert _decode(encode_stream("heartrate", [])).shape == (0,)
+
+
+def test_decoded_streams_are_read_only():
+    decoded = _decode(encode_stream("heartrate", [140, 141]))
+    with pytest.raises(ValueError):
+        decoded[0] = 0
+
+
+def test_store_load_and_cache(temp_db: Database):
+    stream_cache.clear()
+    run = _run(600)
+    stored = store_streams(temp_db, "i1", {**run, "watts": [1, 2]})
+    assert 0 < stored < sum(v.nbytes for v in run.values()) / 4
+
+    first = load_streams(temp_db, "i1")
+    assert set(first) == set(run)
+    assert load_streams(temp_db, "i1") is first  # served from the LRU
+    assert (stream_cache.hits, stream_cache.misses) == (1, 1)
+
+    store_streams(temp_db, "i1", {"heartrate": [100, 101]})  # replaces and evicts
+    assert list(load_streams(temp_db, "i1")) == ["heartrate"]
+    assert load_streams(temp_db, "missing") == {}
+
+
+def test_lru_evicts_least_recently_used():
+    cache = StreamCache(maxsize=2)
+    cache.put(("db", "a"), {})
+    cache.put(("db", "b"), {})
+    cache.get(("db", "a"))
+    cache.put(("db", "c"), {})
+    assert cache.get(("db", "b")) is None
+    assert cache.get(("db", "a")) == {}
+
+
+def test_parse_intervals_streams_splits_latlng():
+    payload = [
+        {"type": "heartrate", "data": [140, 141]},
+        {"type": "latlng", "data": [59.3, 59.31], "data2": [18.0, 18.01]},
+        {"type": "watts", "data": [200, 210]},
+        {"type": "cadence", "data": None},
+    ]
+    assert parse_intervals_streams(payload) == {
+        "heartrate": [140, 141],
+        "lat": [59.3, 59.31],
+        "lng": [18.0, 18.01],
+    }
+
+
+class _FakeClient:
+    def __init__(self, fail: set[str] | None = None) -> None:
+        self.fail = fail or set()
+        self.requested: list[str] = []
+
+    def get_activity_streams(self, activity_id: str, types: list[str]) -> list[dict]:
+        self.requested.append(activity_id)
+        if activity_id in self.fail:
+            raise requests.HTTPError("404")
+        return [{"type": "heartrate", "data": [140, 142, 141]}]
+
+
+def test_sync_fetches_new_runs_only(temp_db: Database):
+    activities = [
+        {"id": "i1", "type": "Run", "start_date_local": "2026-01-05T07:00:00", "distance": 8000},
+        {"id": "i2", "type": "Ride", "start_date_local": "2026-01-06T07:00:00"},
+        {"id": "i3", "type": "Run", "start_date_local": "2026-01-07T07:00:00"},
+    ]
+    client = _FakeClient(fail={"i3"})
+    assert sync_activity_streams(temp_db, client, activities) == 1
+    assert client.requested == ["i1", "i3"]
+
+    again = _FakeClient()
+    assert sync_activity_streams(temp_db, again, activities) == 1
+    assert again.requested == ["i3"]  # the failed download is retried
+
+    rows = temp_db.get_activities(start="2026-01-06", end="2026-01-07")
+    assert [(r["id"], r["sport"]) for r in rows] == [("i2", "ride"), ("i3", "run")]
+    assert [r["id"] for r in temp_db.get_activities(sport="run")] == ["i1", "i3"]
+    assert temp_db.get_streamed_activity_ids() == {"i1", "i3"}
@@ -0,0 +1,292 @@
+"""Tests for incremental source syncs and their persisted cursors."""
+
+import json
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+import requests
+
+from training_status.config import Settings
+from training_status.database import Database
+from training_status.services import smashrun, strava
+from training_status.services.intervals import WELLNESS_REFETCH_DAYS, IntervalsClient
+from training_status.services.smashrun import SINCE_MARGIN, SmashrunClient
+from training_status.services.strava import SYNC_OVERLAP, StravaClient
+
+SETTINGS = Settings(
+    intervals_id="i1",
+    intervals_api_key="key",
+    smashrun_token="t",
+    strava_client_id="1",
+    strava_client_secret="secret",
+    strava_refresh_token="env-refresh",
+    http_cache_max_mb=0,
+)
+
+
+def _days_ago(n: int) -> str:
+    return (date.today() - timedelta(days=n)).isoformat()
+
+
+class _Intervals(IntervalsClient):
+    """Serves canned wellness days and records each request's params."""
+
+    def __init__(self) -> None:
+        super().__init__(SETTINGS)
+        self.wellness: list[dict] = []
+        self.calls: list[tuple[str, dict | None]] = []
+
+    def _get(self, endpoint: str, params: dict | None = None) -> dict:
+        self.calls.append((endpoint, params))
+        return self.wellness if endpoint == "wellness" else []  # type: ignore[return-value]
+
+
+def test_wellness_sync_requests_only_new_days(temp_db: Database):
+    client = _Intervals()
+    client.wellness = [
+        {"id": _days_ago(9), "ctl": 40.0, "vo2max": 52.0},
+        {"id": _days_ago(8), "ctl": 41.0},
+        {"id": _days_ago(7), "ctl": 42.0, "atl": 30.0},
+    ]
+    assert client.sync_wellness(temp_db) == 3
+    assert client.calls == [("wellness", None)]  # first sync: the default range
+    assert temp_db.get_sync_cursor("intervals", "wellness") == _days_ago(7)
+
+    client.wellness = [{"id": _days_ago(7), "ctl": 43.0}, {"id": _days_ago(0), "ctl": 44.0}]
+    assert client.sync_wellness(temp_db) == 2
+    oldest = _days_ago(7 + WELLNESS_REFETCH_DAYS)
+    assert client.calls[-1] == ("wellness", {"oldest": oldest, "newest": _days_ago(0)})
+    assert temp_db.get_sync_cursor("intervals", "wellness") == _days_ago(0)
+
+    client.wellness = []
+    assert client.sync_wellness(temp_db) == 0
+    assert temp_db.get_sync_cursor("intervals", "wellness") == _days_ago(0)
+
+
+def test_wellness_comes_from_the_stored_days(temp_db: Database):
+    client = _Intervals()
+    client.wellness = [
+        {"id": _days_ago(30), "vo2max": 51.5},
+        {"id": _days_ago(1), "ctl": 50.0, "atl": 60.0, "rampRate": 1.5, "restingHR": 47},
+    ]
+    result = client.get_wellness(temp_db)
+    assert (result["ctl"], result["tsb"], result["resting_hr"]) == (50.0, -10.0, 47)
+    assert result["vo2max"] == 51.5  # fallback to the latest stored value
+    assert result["_raw"]["wellness"]["id"] == _days_ago(1)
+
+    client.wellness = []
+    assert client.get_wellness(temp_db)["ctl"] == 50.0  # nothing new: still answered locally
+
+    empty = Database(temp_db.db_path.with_name("empty.db"))
+    empty.init_schema()
+    with pytest.raises(RuntimeError, match="No wellness data"):
+        client.get_wellness(empty)
+
+
+def test_vo2max_fallback_uses_the_partial_index(temp_db: Database):
+    with temp_db.connection() as conn:
+        plan = conn.execute(
+            """EXPLAIN QUERY PLAN SELECT vo2max FROM wellness_days
+               WHERE vo2max IS NOT NULL ORDER BY day DESC LIMIT 1"""
+        ).fetchall()
+    assert "idx_wellness_vo2max" in str(plan)
+
+
+class _Smashrun(SmashrunClient):
+    """Pages through canned activities (newest first) and records each request."""
+
+    def __init__(self) -> None:
+        super().__init__(SETTINGS)
+        self.activities: list[dict] = []
+        self.calls: list[tuple[str, dict | None]] = []
+
+    def _get(self, endpoint: str, params: dict | None = None) -> dict:
+        self.calls.append((endpoint, params))
+        if endpoint == "my/stats":
+            return {"totalDistance": 1234.5, "runCount": 321}
+        assert params is not None
+        start = params["page"] * params["count"]
+        return self.activities[start : start + params["count"]]  # type: ignore[return-value]
+
+    def _stream(self, endpoint: str, params: dict | None = None) -> Iterator[tuple[dict, str]]:
+        for activity in self._get(endpoint, params):
+            yield activity, json.dumps(activity)  # type: ignore[misc]
+
+
+def _run(activity_id: int, days_ago: int, km: float, **extra: object) -> dict:
+    start = f"{_days_ago(days_ago)}T07:00:00"
+    return {
+        "activityId": activity_id,
+        "activityType": "running",
+        "startDateTimeLocal": start,
+        "distance": km,
+        **extra,
+    }
+
+
+def test_smashrun_sync_fetches_only_newer_activities(
+    temp_db: Database, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(smashrun, "PAGE_SIZE", 2)
+    client = _Smashrun()
+    client.activities = [_run(3, 2, 5.0), _run(2, 9, 8.0), _run(1, 40, 10.0)]
+    assert [a.id for a in client.sync_activities(temp_db)] == [3, 2, 1]
+    assert [c[1]["page"] for c in client.calls] == [0, 1]  # type: ignore[index]
+    assert "fromDate" not in client.calls[0][1]  # type: ignore[operator]
+    assert temp_db.get_sync_cursor("smashrun", "activities") == "3"
+
+    client.calls.clear()
+    client.activities = [_run(5, 0, 4.0), _run(4, 1, 6.0), _run(3, 2, 5.0), _run(2, 9, 8.0)]
+    assert [a.id for a in client.sync_activities(temp_db)] == [5, 4]
+    assert len(client.calls) == 2  # the second page reached an already-seen id
+    since = datetime.fromisoformat(f"{_days_ago(2)}T07:00:00") - SINCE_MARGIN
+    assert client.calls[0][1]["fromDate"] == int(  # type: ignore[index]
+        since.replace(tzinfo=timezone.utc).timestamp()
+    )
+    assert temp_db.get_sync_cursor("smashrun", "activities") == "5"
+
+
+def test_interrupted_smashrun_backfill_resumes(temp_db: Database, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(smashrun, "PAGE_SIZE", 2)
+    client = _Smashrun()
+    client.activities = [_run(i, i, 5.0) for i in range(5, 0, -1)]
+    real = client._get
+
+    def cut_off(endpoint: str, params: dict | None = None) -> dict:
+        if params and params["page"] == 1:
+            raise TimeoutError("deadline")
+        return real(endpoint, params)
+
+    monkeypatch.setattr(client, "_get", cut_off)
+    with pytest.raises(TimeoutError):
+        client.sync_activities(temp_db)
+    assert temp_db.get_sync_cursor("smashrun", "activities_backfill") == "1"
+    assert temp_db.get_smashrun_km(_days_ago(5), _days_ago(0)) == 10.0  # page 0 kept
+
+    monkeypatch.setattr(client, "_get", real)
+    client.calls.clear()
+    assert [a.id for a in client.sync_activities(temp_db)] == [3, 2, 1]
+    assert [c[1] for c in client.calls] == [{"count": 2, "page": 1}, {"count": 2, "page": 2}]
+    assert temp_db.get_sync_cursor("smashrun", "activities_backfill") == ""
+    assert temp_db.get_sync_cursor("smashrun", "activities") == "5"
+
+    client.calls.clear()
+    assert client.sync_activities(temp_db) == []
+    assert "fromDate" in client.calls[0][1]  # type: ignore[operator]
+
+
+def test_smashrun_totals_come_from_the_cache(temp_db: Database):
+    client = _Smashrun()
+    today = date.today()
+    last_month = (today.replace(day=1) - timedelta(days=1)).replace(day=1)  # >= 28 days back
+    client.activities = [
+        _run(4, 0, 5.0, temperature=12.0),
+        {**_run(3, 0, 9.0), "activityType": "cycling"},
+        _run(2, 7 + today.weekday(), 8.0),  # Monday-Sunday of last week
+        _run(1, (today - last_month).days, 10.0),
+    ]
+    stats = client.get_stats(temp_db)
+    assert stats["total_distance_km"] == 1234.5
+    assert stats["week_0_km"] == 5.0  # running only
+    assert stats["week_1_km"] == 8.0
+    last_week_in_last_month = (today - timedelta(days=7 + today.weekday())).month != today.month
+    assert stats["last_month_km"] == 10.0 + (8.0 if last_week_in_last_month else 0.0)
+    assert stats["weather_temp"] == 12.0
+    assert len(stats["_raw"]["activities"]) == 4
+
+    client.activities = []  # nothing new: totals still answered locally
+    again = client.get_stats(temp_db)
+    assert again["week_0_km"] == 5.0 and again["_raw"]["activities"] == []
+
+
+class _Strava(StravaClient):
+    """Issues numbered tokens and pages through canned activities (oldest first)."""
+
+    def __init__(self, db: Database) -> None:
+        super().__init__(SETTINGS, db)
+        self.refreshed: list[str] = []
+        self.rejected: set[str] = set()
+        self.activities: list[dict] = []
+        self.calls: list[tuple[str, dict | None]] = []
+
+    def _refresh(self, refresh_token: str) -> dict:
+        if refresh_token in self.rejected:
+            raise requests.HTTPError("400 Bad Request")
+        self.refreshed.append(refresh_token)
+        n = len(self.refreshed)
+        expires = datetime.now(tz=timezone.utc).timestamp() + 3600
+        return {
+            "access_token": f"access-{n}",
+            "refresh_token": f"refresh-{n}",
+            "expires_at": expires,
+        }
+
+    def _get(self, endpoint: str, params: dict | None = None) -> object:
+        self.calls.append((endpoint, params))
+        if endpoint == "athlete":
+            return {"id": 7}
+        if endpoint.endswith("/stats"):
+            return {"all_run_totals": {"distance": 5e6, "count": 600}}
+        assert params is not None
+        start = (params["page"] - 1) * params["per_page"]
+        return self.activities[start : start + params["per_page"]]
+
+    def _stream(self, endpoint: str, params: dict | None = None) -> Iterator[tuple[dict, str]]:
+        for activity in self._get(endpoint, params):
+            yield activity, json.dumps(activity)
+
+
+def test_strava_tokens_survive_the_process(temp_db: Database):
+    first = _Strava(temp_db)
+    assert first._get_access_token() == "access-1"
+    assert first.refreshed == ["env-refresh"]
+
+    second = _Strava(temp_db)  # a new process: reuses the cached access token
+    assert second._get_access_token() == "access-1" and second.refreshed == []
+
+    temp_db.save_oauth_token("strava", "access-1", "refresh-1", 0.0)  # expired
+    third = _Strava(temp_db)
+    third._get_access_token()
+    assert third.refreshed == ["refresh-1"]  # the rotated refresh token, not .env's
+
+    temp_db.save_oauth_token("strava", "stale", "revoked", 0.0)
+    fourth = _Strava(temp_db)
+    fourth.rejected.add("revoked")
+    fourth._get_access_token()
+    assert fourth.refreshed == ["env-refresh"]  # re-authorised into .env since
+
+
+def _strava_run(activity_id: int, days_ago: int, km: float, kind: str = "Run") -> dict:
+    day = _days_ago(days_ago)
+    return {
+        "id": activity_id,
+        "start_date": f"{day}T06:00:00Z",
+        "start_date_local": f"{day}T08:00:00Z",
+        "type": kind,
+        "distance": km * 1000,
+        "moving_time": km * 300,
+    }
+
+
+def test_strava_sync_pages_from_the_after_cursor(
+    temp_db: Database, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(strava, "PAGE_SIZE", 2)
+    client = _Strava(temp_db)
+    client.activities = [_strava_run(1, 30, 10.0), _strava_run(2, 20, 8.0), _strava_run(3, 9, 5.0)]
+    assert client.sync_activities() == 3
+    assert [(c[1]["after"], c[1]["page"]) for c in client.calls] == [(0, 1), (0, 2)]  # type: ignore[index]
+    latest = datetime.fromisoformat(f"{_days_ago(9)}T06:00:00+00:00").timestamp()
+    assert temp_db.get_sync_cursor("strava", "activities") == str(int(latest))
+
+    client.calls.clear()
+    client.activities = [_strava_run(4, 0, 6.0), _strava_run(5, 0, 3.0, "Ride")]
+    assert client.sync_activities() == 2
+    after = int(latest) - int(SYNC_OVERLAP.total_seconds())
+    assert client.calls[0][1] == {"after": after, "page": 1, "per_page": 2}
+    assert len(client.calls) == 2  # a full page is followed by one more request
+
+    stats = client.get_stats()
+    assert stats["strava_weekly_km"] == 6.0  # runs only
+    assert stats["strava_total_km"] == 5000.0
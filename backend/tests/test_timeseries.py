@@ -0,0 +1,108 @@
+"""Tests for the vectorized time-series primitives."""
+
+import copy
+import math
+import statistics
+
+import numpy as np
+import pytest
+
+from training_status.database import Database
+from training_status.services.timeseries import (
+    ewma,
+    load_columns,
+    load_daily,
+    rolling_mean,
+    rolling_std,
+    rolling_zscore,
+    shift,
+    to_array,
+)
+
+from .conftest import SNAPSHOT_DATA
+
+NAN = float("nan")
+
+
+def _ewma_reference(values: list[float], alpha: float) -> list[float]:
+    out, y = [], None
+    for v in values:
+        if not math.isnan(v):
+            y = v if y is None else y + alpha * (v - y)
+        out.append(NAN if y is None else y)
+    return out
+
+
+def test_to_array_maps_none_to_nan():
+    arr = to_array([1, None, 3.5])
+    assert arr[0] == 1.0 and math.isnan(arr[1]) and arr[2] == 3.5
+
+
+def test_rolling_mean_and_std_skip_nan():
+    x = np.array([1.0, 2.0, NAN, 4.0, 5.0, 6.0])
+    mean = rolling_mean(x, 3)
+    std = rolling_std(x, 3)
+
+    assert mean.tolist() == pytest.approx([1.0, 1.5, 1.5, 3.0, 4.5, 5.0])
+    assert math.isnan(std[0])
+    assert std[5] == pytest.approx(statistics.stdev([4.0, 5.0, 6.0]))
+    assert std[3] == pytest.approx(statistics.stdev([2.0, 4.0]))
+
+
+def test_rolling_mean_min_periods():
+    x = np.array([1.0, NAN, NAN, 4.0])
+    assert np.isnan(rolling_mean(x, 2, min_periods=2)).all()
+
+
+def test_rolling_zscore_excludes_current_value():
+    x = np.array([10.0, 12.0, 11.0, 13.0, 30.0])
+    z = rolling_zscore(x, window=4, min_periods=3)
+    baseline = [10.0, 12.0, 11.0, 13.0]
+    expected = (30.0 - statistics.mean(baseline)) / statistics.stdev(baseline)
+    assert z[4] == pytest.approx(expected)
+    assert np.isnan(z[:3]).all()
+
+
+@pytest.mark.parametrize("alpha", [1.0, 0.5, 2 / 8, 1 / 42, 1e-3])
+def test_ewma_matches_recursive_reference(alpha: float):
+    rng = np.random.default_rng(7)
+    x = rng.normal(50, 10, 3000)
+    x[rng.random(3000) < 0.2] = NAN
+    x[:2] = NAN
+    expected = _ewma_reference(x.tolist(), alpha)
+    np.testing.assert_allclose(ewma(x, alpha=alpha), expected, rtol=1e-9, equal_nan=True)
+
+
+def test_shift_pads_with_nan():
+    x = np.array([1.0, 2.0, 3.0])
+    assert np.isnan(shift(x, 1)[0]) and shift(x, 1)[1:].tolist() == [1.0, 2.0]
+    assert shift(x, -1)[:2].tolist() == [2.0, 3.0]
+
+
+def test_load_columns_full_history_oldest_first(temp_db: Database):
+    for i in range(40):
+        data = copy.copy(SNAPSHOT_DATA)
+        data["recorded_at"] = f"2026-01-{1 + i % 28:02d}T{10 + i // 28:02d}:00:00"
+        data["hrv"] = None if i % 5 == 0 else float(i)
+        temp_db.insert_snapshot(data)
+
+    cols = load_columns(temp_db, ["hrv", "ctl"])
+    assert len(cols["hrv"]) == 40
+    assert np.isnan(cols["hrv"]).sum() == 8
+    assert cols["ctl"].tolist() == [45.0] * 40
+
+
+def test_load_daily_keeps_last_snapshot_per_day_and_fills_gaps(temp_db: Database):
+    for ts, hrv in [
+        ("2026-01-01T08:00:00", 50.0),
+        ("2026-01-01T20:00:00", 52.0),
+        ("2026-01-04T08:00:00", 55.0),
+    ]:
+        data = copy.copy(SNAPSHOT_DATA)
+        data["recorded_at"], data["hrv"] = ts, hrv
+        temp_db.insert_snapshot(data)
+
+    days, matrix = load_daily(temp_db, ["hrv"])
+    assert [str(d) for d in days] == ["2026-01-01", "2026-01-02", "2026-01-03", "2026-01-04"]
+    assert matrix[0, 0] == 52.0 and matrix[3, 0] == 55.0
+    assert np.isnan(matrix[1:3, 0]).all()
@@ -1,10 +1,11 @@
 import type {
   Snapshot, SnapshotsResponse, FetchResult, Goal, ConsistencyScore, Recommendation,
-  InjuryRisk, CorrelationsResponse, RacePredictorResponse,
+  InjuryRisk, InjuryRiskSeries, CorrelationsResponse, RacePredictorResponse,
   ProjectionsResponse, DetrainingResponse, WeeklySummary, AdherenceReport,
   PersonalRecord, Note, StravaStatus, ReadinessScoreData, WorkoutSuggestionData,
   OverloadResponse, TrainingZonesData, HrDriftData, SleepInsightsData, TaperData,
-  GearItem, HealthEvent, AnnotationItem
+  PaceCurveData, PaceCurvePeriod, CriticalSpeedHistory,
+  GearItem, HealthEvent, AnnotationItem, AlertList
 } from './types'
 import { getCached, setCached, deleteCached, clearCache } from './idb'
 
@@ -94,6 +95,10 @@ export async function fetchInjuryRisk(): Promise<InjuryRisk> {
   return cachedGet('/api/analytics/injury-risk')
 }
 
+export async function fetchInjuryRiskSeries(days = 90): Promise<InjuryRiskSeries> {
+  return cachedGet(`/api/analytics/injury-risk/series?days=${days}`)
+}
+
 export async function fetchCorrelations(): Promise<CorrelationsResponse> {
   return cachedGet('/api/analytics/correlations')
 }
@@ -122,6 +127,11 @@ export async function fetchNotes(limit = 50): Promise<{ items: Note[] }> {
   return cachedGet(`/api/notes?limit=${limit}`)
 }
 
+export async function fetchAlerts(limit = 20, beforeId?: number): Promise<AlertList> {
+  const cursor = beforeId ? `&before_id=${beforeId}` : ''
+  return cachedGet(`/api/alerts?limit=${limit}${cursor}`)
+}
+
 export async function createNote(note_date: string, content: string): Promise<{ success: boolean }> {
   const res = await fetch('/api/notes', {
     method: 'POST',
@@ -166,6 +176,14 @@ export async function fetchHrDrift(): Promise<HrDriftData> {
   return cachedGet('/api/analytics/hr-drift')
 }
 
+export async function fetchPaceCurve(period: PaceCurvePeriod = '42d'): Promise<PaceCurveData> {
+  return cachedGet(`/api/analytics/pace-curve?period=${period}`)
+}
+
+export async function fetchCriticalSpeedHistory(window = 42, days = 365): Promise<CriticalSpeedHistory> {
+  return cachedGet(`/api/analytics/critical-speed?window=${window}&days=${days}`)
+}
+
 export async function fetchSleepInsights(): Promise<SleepInsightsData> {
   return cachedGet('/api/analytics/sleep-insights')
 }
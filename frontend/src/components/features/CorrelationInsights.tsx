@@ -7,6 +7,7 @@ const typeIcons: Record<string, string> = {
   weather: '🌤️',
   sleep_recovery: '😴',
   rest_recovery: '🛌',
+  correlation: '🔗',
   default: '💡'
 }
 
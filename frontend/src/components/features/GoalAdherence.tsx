@@ -2,6 +2,15 @@ import { useState, useEffect } from 'react'
 import { fetchAdherence } from '../../api'
 import type { AdherenceReport } from '../../types'
 
+const GOAL_LABELS: Record<AdherenceReport['goal_type'], string> = {
+  weekly_km: 'Weekly goal',
+  monthly_km: 'Monthly goal',
+  yearly_km: 'Yearly goal',
+}
+
+// Most recent periods shown in the grid
+const MAX_DOTS = 26
+
 export default function GoalAdherence() {
   const [reports, setReports] = useState<AdherenceReport[]>([])
   const [loading, setLoading] = useState(true)
@@ -18,19 +27,19 @@ export default function GoalAdherence() {
   if (reports.length === 0) {
     return (
       <p className="text-gray-600 text-sm">
-        Set a weekly km goal to track adherence over time.
+        Set a km goal to track adherence over time.
       </p>
     )
   }
 
   return (
     <div className="space-y-4">
-      {reports.map((report, idx) => (
-        <div key={idx} className="bg-gray-900 rounded-xl border border-gray-800 p-4">
+      {reports.map((report) => (
+        <div key={report.goal_id} className="bg-gray-900 rounded-xl border border-gray-800 p-4">
           <div className="flex items-center justify-between mb-3">
             <div>
               <h4 className="text-sm font-medium text-gray-200">
-                Weekly goal: {report.target_km} km
+                {GOAL_LABELS[report.goal_type]}: {report.target_km} km
               </h4>
               <p className="text-xs text-gray-500 mt-0.5">{report.message}</p>
             </div>
@@ -49,30 +58,37 @@ export default function GoalAdherence() {
                 </p>
               )}
               {report.streak > 0 && (
-                <p className="text-xs text-gray-500">🔥 {report.streak} week streak</p>
+                <p className="text-xs text-gray-500">
+                  🔥 {report.streak} {report.period} streak
+                </p>
+              )}
+              {report.longest_streak > report.streak && (
+                <p className="text-xs text-gray-600">Best: {report.longest_streak}</p>
               )}
             </div>
           </div>
 
-          {/* Week grid */}
+          {/* Period grid */}
           <div className="flex gap-1.5 flex-wrap">
-            {[...report.weeks].reverse().map((week, i) => (
+            {report.periods.slice(0, MAX_DOTS).reverse().map((p) => (
               <div
-                key={i}
-                title={`${week.week_start}: ${week.actual_km}/${week.planned_km} km`}
+                key={p.period_start}
+                title={`${p.period_start}: ${p.actual_km}/${p.planned_km} km${p.in_progress ? ' (in progress)' : ''}`}
                 className={`w-7 h-7 rounded flex items-center justify-center text-xs font-medium cursor-default
                   ${
-                    week.achieved
+                    p.achieved
                       ? 'bg-green-600 text-green-100'
-                      : 'bg-red-900 text-red-300'
+                      : p.in_progress
+                        ? 'bg-gray-800 text-gray-400'
+                        : 'bg-red-900 text-red-300'
                   }`}
               >
-                {week.achieved ? '✓' : '✗'}
+                {p.achieved ? '✓' : p.in_progress ? '…' : '✗'}
               </div>
             ))}
           </div>
           <p className="text-xs text-gray-600 mt-2">
-            Each dot = one week · Hover for details · Most recent on right
+            Each dot = one {report.period} · Hover for details · Most recent on right
           </p>
         </div>
       ))}
@@ -1,7 +1,9 @@
 import { useState, useEffect } from 'react'
 import { fetchHrDrift } from '../../api'
 import type { HrDriftData } from '../../types'
-import { ResponsiveContainer, LineChart, Line, XAxis, YAxis, Tooltip, CartesianGrid } from 'recharts'
+import {
+  ResponsiveContainer, LineChart, Line, XAxis, YAxis, Tooltip, CartesianGrid, ReferenceLine,
+} from 'recharts'
 
 export default function HrDriftAnalysis() {
   const [data, setData] = useState<HrDriftData | null>(null)
@@ -19,21 +21,28 @@ export default function HrDriftAnalysis() {
   return (
     <div className="bg-gray-900 rounded-xl p-4">
       <div className="flex items-center justify-between mb-3">
-        <h3 className="text-sm font-semibold text-gray-400 uppercase tracking-wider">HR Drift Analysis</h3>
+        <h3 className="text-sm font-semibold text-gray-400 uppercase tracking-wider">Aerobic Decoupling</h3>
         <span className={`text-xs font-medium ${trendColor}`}>{data.trend}</span>
       </div>
-      <p className="text-sm text-gray-400 mb-3">{data.message}</p>
+      <p className="text-sm text-gray-400 mb-1">{data.message}</p>
+      {data.avg_decoupling_pct !== null && (
+        <p className="text-xs text-gray-500 mb-3">
+          Avg Pa:HR {data.avg_decoupling_pct}% over {data.points.length} easy runs
+          {data.assessment === 'aerobically_fit' ? ' · under 5%: solid aerobic base' : ''}
+        </p>
+      )}
       {data.points.length > 2 && (
         <ResponsiveContainer width="100%" height={200}>
           <LineChart data={[...data.points].reverse()}>
             <CartesianGrid strokeDasharray="3 3" stroke="#374151" />
             <XAxis dataKey="date" tick={{ fontSize: 10, fill: '#9ca3af' }} />
-            <YAxis tick={{ fontSize: 10, fill: '#9ca3af' }} domain={['auto', 'auto']} />
+            <YAxis tick={{ fontSize: 10, fill: '#9ca3af' }} domain={['auto', 'auto']} unit="%" />
             <Tooltip contentStyle={{ background: '#1f2937', border: 'none', borderRadius: 8, fontSize: 12 }} />
+            <ReferenceLine y={5} stroke="#4b5563" strokeDasharray="4 4" />
             <Line
-              type="monotone" dataKey="z2_ratio" name="Z2 Ratio %"
+              type="monotone" dataKey="decoupling_pct" name="Decoupling %"
               stroke={data.trend === 'improving' ? '#22c55e' : data.trend === 'declining' ? '#ef4444' : '#6b7280'}
-              strokeWidth={2} dot={false}
+              strokeWidth={2} dot={{ r: 2 }}
             />
           </LineChart>
         </ResponsiveContainer>
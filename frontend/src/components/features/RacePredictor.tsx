@@ -1,15 +1,9 @@
 import { useEffect, useState } from 'react'
 import { fetchRacePredictions } from '../../api'
-import type { RacePrediction } from '../../types'
+import type { RacePredictorResponse } from '../../types'
 
 export default function RacePredictor() {
-  const [data, setData] = useState<{
-    predictions: RacePrediction[]
-    critical_speed_ms: number
-    d_prime_meters: number
-    fitness_level: string
-    message: string
-  } | null>(null)
+  const [data, setData] = useState<RacePredictorResponse | null>(null)
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
@@ -45,7 +39,9 @@ export default function RacePredictor() {
         <div>
           <p className="text-sm font-medium text-gray-300">Fitness Level: {data.fitness_level}</p>
           <p className="text-xs text-gray-500">
-            CS: {data.critical_speed_ms.toFixed(2)} m/s 
+            CS: {data.critical_speed_ms.toFixed(2)} m/s
+            {data.critical_speed_low_ms != null && data.critical_speed_high_ms != null &&
+              ` (95% CI ${data.critical_speed_low_ms.toFixed(2)}-${data.critical_speed_high_ms.toFixed(2)}) `}
             {data.d_prime_meters > 0 && `| D': ${data.d_prime_meters.toFixed(0)}m`}
           </p>
         </div>
@@ -71,6 +67,9 @@ export default function RacePredictor() {
             <div className="text-right">
               <p className="text-sm font-bold text-green-400">{pred.predicted_time}</p>
               <p className="text-xs text-gray-500">{pred.predicted_pace}</p>
+              {pred.time_fast && pred.time_slow && (
+                <p className="text-xs text-gray-600">{pred.time_fast}-{pred.time_slow}</p>
+              )}
             </div>
           </div>
         ))}
@@ -1,4 +1,6 @@
-import type { Snapshot } from '../../types'
+import { useEffect, useState } from 'react'
+import { fetchAlerts } from '../../api'
+import type { AnomalyAlert, Snapshot } from '../../types'
 
 interface Props {
   snapshot: Snapshot
@@ -11,9 +13,33 @@ interface Alert {
   type: 'warning' | 'danger' | 'info'
 }
 
+const METRIC_ICONS: Record<string, string> = {
+  hrv: '💓',
+  resting_hr: '❤️',
+}
+
 export default function SmartAlerts({ snapshot }: Props) {
+  const [anomalies, setAnomalies] = useState<AnomalyAlert[]>([])
+
+  useEffect(() => {
+    fetchAlerts(5)
+      .then(data => setAnomalies(data.items))
+      .catch(console.error)
+  }, [snapshot.id])
+
   const alerts: Alert[] = []
 
+  // Anomalies detected on the server for the snapshot's day
+  const day = snapshot.recorded_at.slice(0, 10)
+  for (const a of anomalies.filter(a => a.day === day)) {
+    alerts.push({
+      id: `anomaly-${a.id}`,
+      icon: METRIC_ICONS[a.metric] ?? '📉',
+      message: a.message,
+      type: a.severity
+    })
+  }
+
   // Check various conditions
   if (snapshot.rest_days !== null && snapshot.rest_days > 5) {
     alerts.push({
@@ -147,6 +147,33 @@ export interface InjuryRisk {
   recommendations: (string | null)[]
 }
 
+export interface InjuryRiskPoint {
+  day: string
+  risk_score: number
+  risk_level: 'low' | 'moderate' | 'elevated' | 'high'
+  acute_load: number | null
+  chronic_load: number | null
+  acwr: number | null
+  ramp_rate: number | null
+  avg_rest_days: number | null
+  hrv_change_pct: number | null
+  factors: string[]
+}
+
+export interface InjuryRiskSeries {
+  start: string | null
+  end: string | null
+  points: InjuryRiskPoint[]
+  summary: {
+    days: number
+    mean_score: number | null
+    peak_score: number | null
+    peak_day: string | null
+    elevated_days: number
+    high_days: number
+  }
+}
+
 export interface CorrelationInsight {
   type: string
   title: string
@@ -154,10 +181,22 @@ export interface CorrelationInsight {
   recommendation: string
 }
 
+export interface CorrelationPair {
+  x: string
+  y: string
+  lag_days: number
+  pearson_r: number
+  spearman_rho: number
+  n: number
+  p_value: number
+  q_value: number
+}
+
 export interface CorrelationsResponse {
   insights: CorrelationInsight[]
   data_points: number
   message: string
+  pairs?: CorrelationPair[]
 }
 
 export interface RacePrediction {
@@ -166,11 +205,15 @@ export interface RacePrediction {
   predicted_time: string
   predicted_pace: string
   typical_range: string
+  time_fast?: string | null
+  time_slow?: string | null
 }
 
 export interface RacePredictorResponse {
   predictions: RacePrediction[]
   critical_speed_ms: number
+  critical_speed_low_ms?: number | null
+  critical_speed_high_ms?: number | null
   d_prime_meters: number
   fitness_level: string
   message: string
@@ -207,18 +250,23 @@ export interface WeeklySummary {
   message: string
 }
 
-export interface WeekAdherence {
-  week_start: string
+export interface PeriodAdherence {
+  period_start: string
   planned_km: number
   actual_km: number
   achieved: boolean
+  in_progress: boolean
 }
 
 export interface AdherenceReport {
+  goal_id: number
+  goal_type: 'weekly_km' | 'monthly_km' | 'yearly_km'
+  period: 'week' | 'month' | 'year'
   target_km: number
   overall_pct: number | null
   streak: number
-  weeks: WeekAdherence[]
+  longest_streak: number
+  periods: PeriodAdherence[]
   message: string
 }
 
@@ -240,6 +288,26 @@ export interface Note {
   content: string
 }
 
+export interface AnomalyAlert {
+  id: number
+  created_at: string
+  day: string
+  metric: string
+  detector: 'ewma' | 'cusum'
+  severity: 'warning' | 'danger'
+  value: number
+  baseline_mean: number
+  baseline_std: number
+  statistic: number
+  message: string
+  snapshot_id: number | null
+}
+
+export interface AlertList {
+  items: AnomalyAlert[]
+  next_before_id: number | null
+}
+
 export interface StravaStatus {
   configured: boolean
   message: string
@@ -306,15 +374,68 @@ export interface TrainingZonesData {
 
 export interface HrDriftPoint {
   date: string
-  z2_ratio: number
-  easy_pct: number
+  activity_id: string
+  decoupling_pct: number
+  efficiency: number
+  avg_hr: number
+  duration_min: number
 }
 
 export interface HrDriftData {
+  start: string
+  end: string
   points: HrDriftPoint[]
-  assessment: string
+  assessment: 'aerobically_fit' | 'needs_base' | 'insufficient_data'
   message: string
   trend: string
+  avg_decoupling_pct: number | null
+}
+
+export interface DurationEffort {
+  secs: number
+  distance_m: number
+  speed_ms: number
+  pace: string
+  activity_id: string
+  date: string
+}
+
+export interface DistanceEffort {
+  distance_m: number
+  secs: number
+  speed_ms: number
+  pace: string
+  activity_id: string
+  date: string
+}
+
+export type PaceCurvePeriod = '42d' | '90d' | 'season' | 'all'
+
+export interface PaceCurveData {
+  period: PaceCurvePeriod
+  start: string | null
+  end: string
+  durations: DurationEffort[]
+  distances: DistanceEffort[]
+  critical_speed: number | null
+  d_prime: number | null
+}
+
+export interface CriticalSpeedPoint {
+  day: string
+  critical_speed: number
+  d_prime: number
+  cs_low: number | null
+  cs_high: number | null
+  d_prime_low: number | null
+  d_prime_high: number | null
+  efforts: number
+}
+
+export interface CriticalSpeedHistory {
+  window_days: number
+  points: CriticalSpeedPoint[]
+  latest: CriticalSpeedPoint | null
 }
 
 export interface SleepInsight {